@@ -7,10 +7,8 @@ from datetime import datetime
 from homeassistant.config_entries import ConfigEntry, ConfigEntryState
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import device_registry as dr, entity_registry as er
-from homeassistant.helpers.device_registry import (
-    DeviceEntryDisabler,
-)
 from .const import (
+    CONF_PROFILE_NEXT_STARTUP,
     DOMAIN,
     DOMAIN_ORIG,
     PLATFORMS,
@@ -33,9 +31,6 @@ from .util import get_config_entry_runtime_data, is_device_in_domain_device_maps
 from .multi_manager.shared.services.services import (
     ServiceManager,
 )
-from .entity import (
-    XTEntity,
-)
 from .multi_manager.shared.tuya_patches.tuya_patches import (
     XTTuyaPatcher,
 )
@@ -95,29 +90,31 @@ async def async_setup_entry(hass: HomeAssistant, entry: XTConfigEntry) -> bool:
     XTConcurrencyManager.hass = hass
     XTTuyaPatcher.patch_tuya_code()
     start_time = datetime.now()
-    last_time = start_time
     multi_manager = MultiManager(hass, entry)
+    tracer = multi_manager.startup_tracer
+    profile_startup = bool(entry.options.get(CONF_PROFILE_NEXT_STARTUP, False))
+    if profile_startup:
+        # Only profile a single startup
+        hass.config_entries.async_update_entry(
+            entry,
+            options={
+                key: value
+                for key, value in entry.options.items()
+                if key != CONF_PROFILE_NEXT_STARTUP
+            },
+        )
+    tracer.start(profile=profile_startup)
     service_manager = ServiceManager(multi_manager=multi_manager)
-    last_time = datetime.now()
-    await multi_manager.setup_entry()
-    multi_manager.device_watcher.report_message(
-        XTDeviceWatcherSpecialDevice.NOT_LINKED_TO_A_DEVICE,
-        f"Xtended Tuya {entry.title} {datetime.now() - last_time} for setup_entry",
-        XTDeviceWatcherCategory.XT_PERFORMANCE,
-        None,
-        False,
-    )
+    with tracer.span("setup_entry"):
+        await multi_manager.setup_entry()
 
-    # Get all devices from Tuya
-    last_time = datetime.now()
-    await multi_manager.mm_update_device_cache()
-    multi_manager.device_watcher.report_message(
-        XTDeviceWatcherSpecialDevice.NOT_LINKED_TO_A_DEVICE,
-        f"Xtended Tuya {entry.title} {datetime.now() - last_time} for update_device_cache",
-        XTDeviceWatcherCategory.XT_PERFORMANCE,
-        None,
-        False,
-    )
+    # Get all devices from the last snapshot, or from Tuya
+    warm_start = multi_manager.warm_start
+    with tracer.span("warm_start"):
+        is_warm_start = await warm_start.async_restore()
+    if not is_warm_start:
+        with tracer.span("update_device_cache"):
+            await multi_manager.mm_update_device_cache()
 
     # Connection is successful, store the manager & listener
     entry.runtime_data = HomeAssistantXTData(
@@ -127,134 +124,52 @@ async def async_setup_entry(hass: HomeAssistant, entry: XTConfigEntry) -> bool:
     )
 
     # Cleanup device registry
-    last_time = datetime.now()
     XTEventLoopProtector.execute_out_of_event_loop(
         cleanup_device_registry, hass, multi_manager, entry
     )
-    multi_manager.device_watcher.report_message(
-        XTDeviceWatcherSpecialDevice.NOT_LINKED_TO_A_DEVICE,
-        f"Xtended Tuya {entry.title} {datetime.now() - last_time} for cleanup_device_registry",
-        XTDeviceWatcherCategory.XT_PERFORMANCE,
-        None,
-        False,
-    )
 
     # Register known device IDs
-    last_time = datetime.now()
-    device_registry = dr.async_get(hass)
+    registry_sync = multi_manager.registry_sync
     aggregated_device_map = multi_manager.device_map
-    for device in aggregated_device_map.values():
-        XTEntity.mark_overriden_entities_as_disabled(hass, device)
-        XTEntity.register_current_entities_as_handled_dpcode(hass, device)
-        multi_manager.virtual_state_handler.apply_init_virtual_states(device)
-    multi_manager.device_watcher.report_message(
-        XTDeviceWatcherSpecialDevice.NOT_LINKED_TO_A_DEVICE,
-        f"Xtended Tuya {entry.title} {datetime.now() - last_time} for device id registration",
-        XTDeviceWatcherCategory.XT_PERFORMANCE,
-        None,
-        False,
-    )
+    with tracer.span("device_id_registration"):
+        registry_sync.async_build_index()
+        entry.async_on_unload(registry_sync.async_stop)
+        registry_sync.async_sync_entities(aggregated_device_map.values())
+        for device in aggregated_device_map.values():
+            multi_manager.virtual_state_handler.apply_init_virtual_states(device)
+        if not is_warm_start:
+            warm_start.update_cloud_signatures()
 
-    last_time = datetime.now()
-    for device in aggregated_device_map.values():
-        domain_identifiers: list = multi_manager.get_domain_identifiers_of_device(
-            device.id
-        )
-        identifiers: set[tuple[str, str]] = set()
-        if device_registry.async_get_device({(DOMAIN_ORIG, device.id)}) is not None:
-            identifiers.add((DOMAIN_ORIG, device.id))
-
-        for domain_identifier in domain_identifiers:
-            identifiers.add((domain_identifier, device.id))
-        device_entry = device_registry.async_get_or_create(
-            config_entry_id=entry.entry_id,
-            identifiers=identifiers,
-            manufacturer="Tuya",
-            name=device.name,
-            model=f"{device.product_name} (unsupported)",
-        )
-        # Enable the device if it was disabled by the integration
-        if (
-            device_entry.disabled_by is not None
-            and device_entry.disabled_by != DeviceEntryDisabler.USER
-        ):
-            device_registry.async_update_device(
-                device_entry.id,
-                disabled_by=None,
-            )
-    multi_manager.device_watcher.report_message(
-        XTDeviceWatcherSpecialDevice.NOT_LINKED_TO_A_DEVICE,
-        f"Xtended Tuya {entry.title} {datetime.now() - last_time} for create device",
-        XTDeviceWatcherCategory.XT_PERFORMANCE,
-        None,
-        False,
-    )
+    with tracer.span("create_devices"):
+        registry_sync.async_sync_devices(entry.entry_id, aggregated_device_map.values())
 
-    last_time = datetime.now()
-    await multi_manager.setup_entity_parsers()
-    multi_manager.device_watcher.report_message(
-        XTDeviceWatcherSpecialDevice.NOT_LINKED_TO_A_DEVICE,
-        f"Xtended Tuya {entry.title} {datetime.now() - last_time} for setup_entity_parsers",
-        XTDeviceWatcherCategory.XT_PERFORMANCE,
-        None,
-        False,
-    )
+    with tracer.span("setup_entity_parsers"):
+        await multi_manager.setup_entity_parsers()
 
-    last_time = datetime.now()
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    multi_manager.device_watcher.report_message(
-        XTDeviceWatcherSpecialDevice.NOT_LINKED_TO_A_DEVICE,
-        f"Xtended Tuya {entry.title} {datetime.now() - last_time} for async_forward_entry_setups",
-        XTDeviceWatcherCategory.XT_PERFORMANCE,
-        None,
-        False,
-    )
+    with tracer.span("forward_entry_setups"):
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     # If the device does not register any entities, the device does not need to subscribe
-    # So the subscription is here
-    last_time = datetime.now()
-    await XTEventLoopProtector.execute_out_of_event_loop_and_return(
-        multi_manager.refresh_mq
-    )
-    multi_manager.device_watcher.report_message(
-        XTDeviceWatcherSpecialDevice.NOT_LINKED_TO_A_DEVICE,
-        f"Xtended Tuya {entry.title} {datetime.now() - last_time} for refresh_mq",
-        XTDeviceWatcherCategory.XT_PERFORMANCE,
-        None,
-        False,
-    )
+    # So the subscription is here (after the reconciliation on a warm start)
+    if not is_warm_start:
+        with tracer.span("refresh_mq"):
+            await XTEventLoopProtector.execute_out_of_event_loop_and_return(
+                multi_manager.refresh_mq
+            )
 
-    last_time = datetime.now()
-    service_manager.register_services()
-    multi_manager.device_watcher.report_message(
-        XTDeviceWatcherSpecialDevice.NOT_LINKED_TO_A_DEVICE,
-        f"Xtended Tuya {entry.title} {datetime.now() - last_time} for register_services",
-        XTDeviceWatcherCategory.XT_PERFORMANCE,
-        None,
-        False,
-    )
+    with tracer.span("register_services"):
+        service_manager.register_services()
 
-    last_time = datetime.now()
     XTEventLoopProtector.execute_out_of_event_loop(
         cleanup_duplicated_devices, hass, entry
     )
-    multi_manager.device_watcher.report_message(
-        XTDeviceWatcherSpecialDevice.NOT_LINKED_TO_A_DEVICE,
-        f"Xtended Tuya {entry.title} {datetime.now() - last_time} for cleanup_duplicated_devices",
-        XTDeviceWatcherCategory.XT_PERFORMANCE,
-        None,
-        False,
-    )
 
-    last_time = datetime.now()
-    await multi_manager.on_loading_finalized(hass, entry)
-    multi_manager.device_watcher.report_message(
-        XTDeviceWatcherSpecialDevice.NOT_LINKED_TO_A_DEVICE,
-        f"Xtended Tuya {entry.title} {datetime.now() - last_time} for on_loading_finalized",
-        XTDeviceWatcherCategory.XT_PERFORMANCE,
-        None,
-        False,
-    )
+    with tracer.span("on_loading_finalized"):
+        await multi_manager.on_loading_finalized(hass, entry)
+    await tracer.async_finish()
+    if not is_warm_start:
+        await warm_start.async_save()
+    warm_start.async_setup(entry)
     multi_manager.device_watcher.report_message(
         XTDeviceWatcherSpecialDevice.NOT_LINKED_TO_A_DEVICE,
         f"Xtended Tuya {entry.title} loaded in {datetime.now() - start_time}",
@@ -264,6 +179,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: XTConfigEntry) -> bool:
     )
     return True
 
+
 async def cleanup_duplicated_devices(
     hass: HomeAssistant, current_entry: ConfigEntry
 ) -> None:
@@ -366,6 +282,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: XTConfigEntry) -> bool:
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         tuya = entry.runtime_data
         if tuya.manager is not None:
+            await tuya.manager.warm_start.async_save()
             if tuya.manager.mq is not None:
                 tuya.manager.mq.stop()
             tuya.manager.remove_device_listeners()
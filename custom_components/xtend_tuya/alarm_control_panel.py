@@ -26,6 +26,7 @@ from .const import TUYA_DISCOVERY_NEW
 from .entity import (
     XTEntity,
     XTEntityDescriptorManager,
+    XTEntityDiscovery,
 )
 
 
@@ -80,54 +81,44 @@ async def async_setup_entry(
     @callback
     def async_discover_device(device_map, restrict_dpcode: str | None = None) -> None:
         """Discover and add a discovered Tuya siren."""
-        entities: list[XTAlarmEntity] = []
-        device_ids = [*device_map]
-        if hass_data.manager is None:
+        if (device_manager := hass_data.manager) is None:
             return
-        for device_id in device_ids:
-            if device := hass_data.manager.device_map.get(device_id, None):
-                if category_descriptions := cast(
-                    XTAlarmEntityDescription,
-                    XTEntityDescriptorManager.get_category_descriptors(
-                        supported_descriptors, device.category
-                    ),
-                ):
-                    externally_managed_dpcodes = (
-                        XTEntityDescriptorManager.get_category_keys(
-                            externally_managed_descriptors.get(device.category)
-                        )
+
+        def discover_entities(device: XTDevice) -> list[XTAlarmEntity]:
+            entities: list[XTAlarmEntity] = []
+            if category_descriptions := cast(
+                XTAlarmEntityDescription,
+                XTEntityDescriptorManager.get_category_descriptors(
+                    supported_descriptors, device.category
+                ),
+            ):
+                externally_managed_dpcodes = XTEntityDescriptorManager.get_category_keys(
+                    externally_managed_descriptors.get(device.category)
+                )
+                entities.extend(
+                    XTAlarmEntity.get_entity_instance(
+                        device=device,
+                        device_manager=device_manager,
+                        description=description,
+                        definition=definition,
                     )
-                    if XTEntity.supports_description(
-                        device,
-                        this_platform,
-                        category_descriptions,
-                        True,
-                        externally_managed_dpcodes,
-                    ) and (definition := get_default_definition(device)):
-                        entities.append(
-                            XTAlarmEntity.get_entity_instance(
-                                device=device,
-                                device_manager=hass_data.manager,
-                                description=category_descriptions,
-                                definition=definition,
-                            )
-                        )
-                    if XTEntity.supports_description(
+                    for description in XTEntityDiscovery.get_supported_descriptions(
                         device,
                         this_platform,
-                        category_descriptions,
-                        False,
+                        (category_descriptions,),
                         externally_managed_dpcodes,
-                    ) and (definition := get_default_definition(device)):
-                        entities.append(
-                            XTAlarmEntity.get_entity_instance(
-                                device=device,
-                                device_manager=hass_data.manager,
-                                description=category_descriptions,
-                                definition=definition,
-                            )
-                        )
-        async_add_entities(entities)
+                    )
+                    if (definition := get_default_definition(device))
+                )
+            return entities
+
+        XTEntityDiscovery.add_entities(
+            device_manager,
+            this_platform,
+            device_map,
+            discover_entities,
+            async_add_entities,
+        )
 
     hass_data.manager.register_device_descriptors(this_platform, supported_descriptors)
     async_discover_device([*hass_data.manager.device_map])
@@ -42,6 +42,7 @@ from .ha_tuya_integration.tuya_integration_imports import (
 from .entity import (
     XTEntity,
     XTEntityDescriptorManager,
+    XTEntityDiscovery,
 )
 
 COMPOUND_KEY: list[str | tuple[str, ...]] = ["key", "dpcode"]
@@ -400,81 +401,60 @@ async def async_setup_entry(
     @callback
     def async_discover_device(device_map, restrict_dpcode: str | None = None) -> None:
         """Discover and add a discovered Tuya binary sensor."""
-        entities: list[XTBinarySensorEntity] = []
-        device_ids = [*device_map]
-        if hass_data.manager is None:
+        if (device_manager := hass_data.manager) is None:
             return
-        for device_id in device_ids:
-            if device := hass_data.manager.device_map.get(device_id, None):
-                if category_descriptions := XTEntityDescriptorManager.get_category_descriptors(
-                    supported_descriptors, device.category
-                ):
-                    externally_managed_dpcodes = (
-                        XTEntityDescriptorManager.get_category_keys(
-                            externally_managed_descriptors.get(device.category)
-                        )
+
+        def discover_entities(device: XTDevice) -> list[XTBinarySensorEntity]:
+            entities: list[XTBinarySensorEntity] = []
+            if category_descriptions := XTEntityDescriptorManager.get_category_descriptors(
+                supported_descriptors, device.category
+            ):
+                externally_managed_dpcodes = (
+                    XTEntityDescriptorManager.get_category_keys(
+                        externally_managed_descriptors.get(device.category)
                     )
-                    if restrict_dpcode is not None:
-                        category_descriptions = cast(
-                            tuple[XTBinarySensorEntityDescription, ...],
-                            restrict_descriptor_category(
-                                category_descriptions, [restrict_dpcode]
-                            ),
-                        )
-                    entities.extend(
-                        XTBinarySensorEntity.get_entity_instance(
-                            description=description,
-                            device=device,
-                            device_manager=hass_data.manager,
-                            definition=definition,
-                        )
-                        for description in category_descriptions
-                        if (
-                            XTEntity.supports_description(
-                                device=device,
-                                platform=this_platform,
-                                description=description,
-                                first_pass=True,
-                                externally_managed_dpcodes=externally_managed_dpcodes,
-                                key_fields=COMPOUND_KEY,
-                            )
-                            and (
-                                definition := xt_get_default_definition(
-                                    device=device,
-                                    description=XTBinarySensorEntityDescription(
-                                        **description.__dict__
-                                    ),
-                                )
-                            )
-                        )
+                )
+                if restrict_dpcode is not None:
+                    category_descriptions = cast(
+                        tuple[XTBinarySensorEntityDescription, ...],
+                        restrict_descriptor_category(
+                            category_descriptions, [restrict_dpcode]
+                        ),
                     )
-                    entities.extend(
-                        XTBinarySensorEntity.get_entity_instance(
-                            description, device, hass_data.manager, definition
-                        )
-                        for description in category_descriptions
-                        if (
-                            XTEntity.supports_description(
-                                device=device,
-                                platform=this_platform,
-                                description=description,
-                                first_pass=False,
-                                externally_managed_dpcodes=externally_managed_dpcodes,
-                                key_fields=COMPOUND_KEY,
-                            )
-                            and (
-                                definition := xt_get_default_definition(
-                                    device=device,
-                                    description=XTBinarySensorEntityDescription(
-                                        **description.__dict__
-                                    ),
-                                )
-                            )
+                entities.extend(
+                    XTBinarySensorEntity.get_entity_instance(
+                        description=description,
+                        device=device,
+                        device_manager=device_manager,
+                        definition=definition,
+                    )
+                    for description in XTEntityDiscovery.get_supported_descriptions(
+                        device=device,
+                        platform=this_platform,
+                        category_descriptions=category_descriptions,
+                        externally_managed_dpcodes=externally_managed_dpcodes,
+                        key_fields=COMPOUND_KEY,
+                    )
+                    if (
+                        definition := xt_get_default_definition(
+                            device=device,
+                            description=XTBinarySensorEntityDescription(
+                                **description.__dict__
+                            ),
                         )
                     )
-        async_add_entities(entities)
+                )
+            return entities
+
+        XTEntityDiscovery.add_entities(
+            device_manager,
+            this_platform,
+            device_map,
+            discover_entities,
+            async_add_entities,
+        )
         if restrict_dpcode is None:
-            hass_data.manager.add_post_setup_callback(
+            device_manager.add_post_setup_callback(
                 XTMultiManagerPostSetupCallbackPriority.PRIORITY_LAST,
                 async_add_generic_entities,
                 device_map,
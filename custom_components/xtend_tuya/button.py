@@ -49,6 +49,7 @@ from .ha_tuya_integration.tuya_integration_imports import (
 from .entity import (
     XTEntity,
     XTEntityDescriptorManager,
+    XTEntityDiscovery,
 )
 
 from .multi_manager.shared.data_entry.ir_device_data_entry import (
@@ -478,131 +479,109 @@ async def async_setup_entry(
     @callback
     def async_discover_device(device_map, restrict_dpcode: str | None = None) -> None:
         """Discover and add a discovered Tuya buttons."""
-        if hass_data.manager is None:
+        if (device_manager := hass_data.manager) is None:
             return
-        entities: list[XTButtonEntity] = []
-        device_ids = [*device_map]
-        for device_id in device_ids:
-            if device := hass_data.manager.device_map.get(device_id):
-                if device.category in IR_HUB_CATEGORY_LIST:
-                    hass_data.manager.set_general_property(
-                        XTMultiManagerProperties.IR_DEVICE_ID, device.id
+
+        def discover_entities(device: XTDevice) -> list[XTButtonEntity]:
+            entities: list[XTButtonEntity] = []
+            if device.category in IR_HUB_CATEGORY_LIST:
+                device_manager.set_general_property(
+                    XTMultiManagerProperties.IR_DEVICE_ID, device.id
+                )
+            if category_descriptions := XTEntityDescriptorManager.get_category_descriptors(
+                supported_descriptors, device.category
+            ):
+                externally_managed_dpcodes = (
+                    XTEntityDescriptorManager.get_category_keys(
+                        externally_managed_descriptors.get(device.category)
                     )
-                if category_descriptions := XTEntityDescriptorManager.get_category_descriptors(
-                    supported_descriptors, device.category
-                ):
-                    externally_managed_dpcodes = (
-                        XTEntityDescriptorManager.get_category_keys(
-                            externally_managed_descriptors.get(device.category)
-                        )
+                )
+                if restrict_dpcode is not None:
+                    category_descriptions = cast(
+                        tuple[XTButtonEntityDescription, ...],
+                        restrict_descriptor_category(
+                            category_descriptions, [restrict_dpcode]
+                        ),
                     )
-                    if restrict_dpcode is not None:
-                        category_descriptions = cast(
-                            tuple[XTButtonEntityDescription, ...],
-                            restrict_descriptor_category(
-                                category_descriptions, [restrict_dpcode]
-                            ),
-                        )
-                    entities.extend(
-                        XTButtonEntity.get_entity_instance(
-                            device=device,
-                            device_manager=hass_data.manager,
-                            description=description,
-                            definition=definition,
-                        )
-                        for description in category_descriptions
-                        if (
-                            XTEntity.supports_description(
-                                device,
-                                this_platform,
-                                description,
-                                True,
-                                externally_managed_dpcodes,
-                            )
-                            and (
-                                definition := xt_get_default_definition(
-                                    device=device,
-                                    description=description,
-                                )
-                            )
-                        )
+                entities.extend(
+                    XTButtonEntity.get_entity_instance(
+                        device=device,
+                        device_manager=device_manager,
+                        description=description,
+                        definition=definition,
                     )
-                    entities.extend(
-                        XTButtonEntity.get_entity_instance(
+                    for description in XTEntityDiscovery.get_supported_descriptions(
+                        device,
+                        this_platform,
+                        category_descriptions,
+                        externally_managed_dpcodes,
+                    )
+                    if (
+                        definition := xt_get_default_definition(
                             device=device,
-                            device_manager=hass_data.manager,
                             description=description,
-                            definition=definition,
-                        )
-                        for description in category_descriptions
-                        if (
-                            XTEntity.supports_description(
-                                device,
-                                this_platform,
-                                description,
-                                False,
-                                externally_managed_dpcodes,
-                            )
-                            and (
-                                definition := xt_get_default_definition(
-                                    device=device,
-                                    description=description,
-                                )
-                            )
                         )
                     )
-                    for description in category_descriptions:
-                        if (
-                            hasattr(description, "vf_reset_state")
-                            and description.vf_reset_state
-                        ):
-                            for reset_state in description.vf_reset_state:
-                                if reset_state in device.status:
-                                    if dpcode_wrapper := XTVirtualButtonDPCodeWrapper.find_dpcode(
-                                        device,
-                                        description.key,
-                                        prefer_function=True,
-                                    ):
-                                        entities.append(
-                                            XTButtonEntity.get_entity_instance(
-                                                device=device,
-                                                device_manager=hass_data.manager,
-                                                description=description,
-                                                definition=ButtonDefinition(
-                                                    button_wrapper=dpcode_wrapper
-                                                ),
-                                            )
+                )
+                for description in category_descriptions:
+                    if (
+                        hasattr(description, "vf_reset_state")
+                        and description.vf_reset_state
+                    ):
+                        for reset_state in description.vf_reset_state:
+                            if reset_state in device.status:
+                                if dpcode_wrapper := XTVirtualButtonDPCodeWrapper.find_dpcode(
+                                    device,
+                                    description.key,
+                                    prefer_function=True,
+                                ):
+                                    entities.append(
+                                        XTButtonEntity.get_entity_instance(
+                                            device=device,
+                                            device_manager=device_manager,
+                                            description=description,
+                                            definition=ButtonDefinition(
+                                                button_wrapper=dpcode_wrapper
+                                            ),
                                         )
-                                    break
-                    for description in category_descriptions:
-                        if (
-                            hasattr(description, "vf_history_import_dpcodes")
-                            and description.vf_history_import_dpcodes
-                        ):
-                            for (
-                                history_import_dpcode
-                            ) in description.vf_history_import_dpcodes:
-                                if history_import_dpcode in device.status:
-                                    if dpcode_wrapper := XTVirtualButtonDPCodeWrapper.find_dpcode(
-                                        device,
-                                        description.key,
-                                        prefer_function=True,
-                                    ):
-                                        entities.append(
-                                            XTButtonEntity.get_entity_instance(
-                                                device=device,
-                                                device_manager=hass_data.manager,
-                                                description=description,
-                                                definition=ButtonDefinition(
-                                                    button_wrapper=dpcode_wrapper
-                                                ),
-                                            )
+                                    )
+                                break
+                for description in category_descriptions:
+                    if (
+                        hasattr(description, "vf_history_import_dpcodes")
+                        and description.vf_history_import_dpcodes
+                    ):
+                        for (
+                            history_import_dpcode
+                        ) in description.vf_history_import_dpcodes:
+                            if history_import_dpcode in device.status:
+                                if dpcode_wrapper := XTVirtualButtonDPCodeWrapper.find_dpcode(
+                                    device,
+                                    description.key,
+                                    prefer_function=True,
+                                ):
+                                    entities.append(
+                                        XTButtonEntity.get_entity_instance(
+                                            device=device,
+                                            device_manager=device_manager,
+                                            description=description,
+                                            definition=ButtonDefinition(
+                                                button_wrapper=dpcode_wrapper
+                                            ),
                                         )
-                                    break
+                                    )
+                                break
+            return entities
 
-        async_add_entities(entities)
+        XTEntityDiscovery.add_entities(
+            device_manager,
+            this_platform,
+            device_map,
+            discover_entities,
+            async_add_entities,
+        )
         if restrict_dpcode is None:
-            hass_data.manager.add_post_setup_callback(
+            device_manager.add_post_setup_callback(
                 XTMultiManagerPostSetupCallbackPriority.PRIORITY_LAST,
                 async_add_IR_entities,
                 device_map,
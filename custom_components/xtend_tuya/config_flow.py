@@ -40,6 +40,7 @@ from .const import (
     CONF_AUTH_TYPE,
     CONF_COUNTRY_CODE,
     CONF_NO_OPENAPI,
+    CONF_PROFILE_NEXT_STARTUP,
     CONF_PASSWORD_OT,
     CONF_USERNAME,
     CONF_USERNAME_OT,
@@ -79,6 +80,7 @@ class XTStepId(StrEnum):
     LOCK_DEVICE_SETTINGS = "lock_device_settings"
     SELECT_COVER_DEVICE = "select_cover_device"
     COVER_DEVICE_SETTINGS = "cover_device_settings"
+    DEBUG_SETTINGS = "debug_settings"
 
 
 OPTION_STEP_DEFINITION: dict[XTStepId, tuple[str, list[Any], dict[str, Any], bool]] = {
@@ -87,7 +89,11 @@ OPTION_STEP_DEFINITION: dict[XTStepId, tuple[str, list[Any], dict[str, Any], boo
         [],
         {
             "step_id": XTStepId.INIT,
-            "menu_options": [XTStepId.CONFIGURE_API, XTStepId.DEVICE_SETTINGS],
+            "menu_options": [
+                XTStepId.CONFIGURE_API,
+                XTStepId.DEVICE_SETTINGS,
+                XTStepId.DEBUG_SETTINGS,
+            ],
         },
         False,
     ),
@@ -777,6 +783,35 @@ class TuyaOptionFlow(OptionsFlow):
             },
         )
 
+    async def async_step_debug_settings(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Handle debug settings."""
+        if user_input is not None:
+            return self.async_create_entry(
+                title="",
+                data={
+                    **self.options,
+                    CONF_PROFILE_NEXT_STARTUP: bool(
+                        user_input.get(CONF_PROFILE_NEXT_STARTUP, False)
+                    ),
+                },
+            )
+
+        return self.async_show_form(
+            step_id=XTStepId.DEBUG_SETTINGS,
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_PROFILE_NEXT_STARTUP,
+                        default=bool(
+                            self.options.get(CONF_PROFILE_NEXT_STARTUP, False)
+                        ),
+                    ): bool,
+                }
+            ),
+        )
+
     async def async_step_configure(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
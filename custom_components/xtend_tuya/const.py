@@ -44,6 +44,8 @@ CONF_USERNAME_OT = "username"
 CONF_PASSWORD_OT = "password"
 CONF_COUNTRY_CODE = "country_code"
 CONF_APP_TYPE = "tuya_app_type"
+# Debug options
+CONF_PROFILE_NEXT_STARTUP = "profile_next_startup"
 
 TUYA_CLIENT_ID = "HA_3y9q4ak7g4ephrvke"
 TUYA_SCHEMA = "haauthorize"
@@ -70,6 +72,31 @@ CROSS_CATEGORY_DEVICE_DESCRIPTOR: str = "cross_category_device_descriptor"
 
 XT_RETRY_FAILED_CALLS_NUMBER: int = 5
 
+# Cached product thing models are re-fetched from the cloud after this delay (seconds)
+XT_PRODUCT_SCHEMA_MAX_AGE: int = 7 * 24 * 3600
+
+# Refresh of the IoT device specifications and properties: devices refreshed
+# at the same time and devices started per second
+XT_DEVICE_CACHE_REFRESH_CONCURRENCY: int = 10
+XT_DEVICE_CACHE_REFRESH_RATE_LIMIT: float | None = 40.0
+
+# Import of the consumption history: queries running at the same time, queries
+# started per second and statistic rows handed to the recorder at once
+XT_CONSUMPTION_STATISTICS_CONCURRENCY: int = 4
+XT_CONSUMPTION_STATISTICS_RATE_LIMIT: float | None = 10.0
+XT_CONSUMPTION_STATISTICS_IMPORT_BATCH_SIZE: int = 1000
+
+# Commands sent to a device within this delay (seconds) go out together, the
+# last value of a slider-style DPCode wins. 0 sends the commands right away
+XT_COMMAND_COALESCING_WINDOW: float = 0.15
+
+# Topics per SUBSCRIBE packet of the sharing MQ, each device has two topics
+XT_SHARING_MQTT_SUBSCRIBE_BATCH_SIZE: int = 40
+
+# Longest delay (seconds) a command is held while the devices restored from the
+# snapshot are refreshed from the cloud, it fails afterwards
+XT_WARM_START_COMMAND_TIMEOUT: float = 30.0
+
 
 class TuyaCloudOpenAPIEndpoint(StrEnum):
     """Tuya Cloud Open API Endpoint."""
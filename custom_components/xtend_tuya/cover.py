@@ -47,6 +47,7 @@ from .ha_tuya_integration.tuya_integration_imports import (
 from .entity import (
     XTEntity,
     XTEntityDescriptorManager,
+    XTEntityDiscovery,
 )
 
 
@@ -226,87 +227,62 @@ async def async_setup_entry(
     @callback
     def async_discover_device(device_map, restrict_dpcode: str | None = None) -> None:
         """Discover and add a discovered tuya cover."""
-        if hass_data.manager is None:
+        if (device_manager := hass_data.manager) is None:
             return
-        entities: list[XTCoverEntity] = []
-        device_ids = [*device_map]
-        for device_id in device_ids:
-            if device := hass_data.manager.device_map.get(device_id):
-                if category_descriptions := XTEntityDescriptorManager.get_category_descriptors(
-                    supported_descriptors, device.category
-                ):
-                    externally_managed_dpcodes = (
-                        XTEntityDescriptorManager.get_category_keys(
-                            externally_managed_descriptors.get(device.category)
-                        )
+
+        def discover_entities(device: XTDevice) -> list[XTCoverEntity]:
+            entities: list[XTCoverEntity] = []
+            if category_descriptions := XTEntityDescriptorManager.get_category_descriptors(
+                supported_descriptors, device.category
+            ):
+                externally_managed_dpcodes = (
+                    XTEntityDescriptorManager.get_category_keys(
+                        externally_managed_descriptors.get(device.category)
                     )
-                    if restrict_dpcode is not None:
-                        category_descriptions = cast(
-                            tuple[XTCoverEntityDescription, ...],
-                            restrict_descriptor_category(
-                                category_descriptions, [restrict_dpcode]
-                            ),
-                        )
-                    entities.extend(
-                        XTCoverEntity.get_entity_instance(
-                            description=description,
-                            device=device,
-                            device_manager=hass_data.manager,
-                            hass=hass,
-                            definition=definition,
-                        )
-                        for description in category_descriptions
-                        if XTEntity.supports_description(
-                            device=device,
-                            platform=this_platform,
-                            description=description,
-                            first_pass=True,
-                            externally_managed_dpcodes=externally_managed_dpcodes,
-                        )
-                        and (
-                            definition := get_default_definition(
-                                device=device,
-                                current_position_dpcode=description.current_position,
-                                current_state_dpcode=description.current_state,
-                                current_state_wrapper=description.current_state_wrapper,
-                                instruction_dpcode=description.key,
-                                instruction_wrapper=description.instruction_wrapper,
-                                position_wrapper=description.position_wrapper,
-                                set_position_dpcode=description.set_position,
-                            )
-                        )
+                )
+                if restrict_dpcode is not None:
+                    category_descriptions = cast(
+                        tuple[XTCoverEntityDescription, ...],
+                        restrict_descriptor_category(
+                            category_descriptions, [restrict_dpcode]
+                        ),
+                    )
+                entities.extend(
+                    XTCoverEntity.get_entity_instance(
+                        description=description,
+                        device=device,
+                        device_manager=device_manager,
+                        hass=hass,
+                        definition=definition,
                     )
-                    entities.extend(
-                        XTCoverEntity.get_entity_instance(
+                    for description in XTEntityDiscovery.get_supported_descriptions(
+                        device,
+                        this_platform,
+                        category_descriptions,
+                        externally_managed_dpcodes,
+                    )
+                    if (
+                        definition := get_default_definition(
                             device=device,
-                            device_manager=hass_data.manager,
-                            description=description,
-                            hass=hass,
-                            definition=definition,
-                        )
-                        for description in category_descriptions
-                        if XTEntity.supports_description(
-                            device,
-                            this_platform,
-                            description,
-                            False,
-                            externally_managed_dpcodes,
-                        )
-                        and (
-                            definition := get_default_definition(
-                                device,
-                                current_position_dpcode=description.current_position,
-                                current_state_dpcode=description.current_state,
-                                current_state_wrapper=description.current_state_wrapper,
-                                instruction_dpcode=description.key,
-                                instruction_wrapper=description.instruction_wrapper,
-                                position_wrapper=description.position_wrapper,
-                                set_position_dpcode=description.set_position,
-                            )
+                            current_position_dpcode=description.current_position,
+                            current_state_dpcode=description.current_state,
+                            current_state_wrapper=description.current_state_wrapper,
+                            instruction_dpcode=description.key,
+                            instruction_wrapper=description.instruction_wrapper,
+                            position_wrapper=description.position_wrapper,
+                            set_position_dpcode=description.set_position,
                         )
                     )
+                )
+            return entities
 
-        async_add_entities(entities)
+        XTEntityDiscovery.add_entities(
+            device_manager,
+            this_platform,
+            device_map,
+            discover_entities,
+            async_add_entities,
+        )
 
     hass_data.manager.register_device_descriptors(this_platform, supported_descriptors)
     async_discover_device([*hass_data.manager.device_map])
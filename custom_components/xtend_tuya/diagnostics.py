@@ -67,7 +67,14 @@ def _async_get_diagnostics(
                 devices=[
                     _async_device_as_dict(hass, device)
                     for device in hass_data.manager.device_map.values()
-                ]
+                ],
+                cloud_fixes=hass_data.manager.cloud_fix_statistics.get_statistics(),
+                mqtt=hass_data.manager.get_mqtt_statistics(),
+                api=hass_data.manager.get_api_statistics(),
+                commands=hass_data.manager.command_router.get_statistics()
+                | hass_data.manager.command_queue.get_statistics(),
+                rejected_values=hass_data.manager.rejected_values.get_statistics(),
+                startup_timelines=hass_data.manager.storage_manager.get_startup_timelines(),
             )
 
     return data
@@ -96,6 +103,9 @@ def _async_device_as_dict(hass: HomeAssistant, device: XTDevice) -> dict[str, An
     mm_data = {}
     if multi_manager := device.get_multi_manager(hass=hass):
         mm_data["mode"] = multi_manager.get_active_types()
+        mm_data["rejected_values"] = (
+            multi_manager.rejected_values.get_device_statistics(device.id)
+        )
     data = {
         "id": device.id,
         "name": device.name,
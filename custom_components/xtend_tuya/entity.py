@@ -1,20 +1,13 @@
 from __future__ import annotations
+from collections.abc import Callable, Iterable, Iterator
 from typing import cast, Any
 from enum import StrEnum
-from homeassistant.helpers.entity import EntityDescription
-from homeassistant.helpers import entity_registry as er, device_registry as dr
-from homeassistant.helpers.entity_registry import (
-    RegistryEntryDisabler,
-)
-from homeassistant.helpers.entity_platform import async_get_platforms
+from homeassistant.helpers.entity import Entity, EntityDescription
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
 from .const import (
     LOGGER,
     CROSS_CATEGORY_DEVICE_DESCRIPTOR,
-    DOMAIN,
-    DOMAIN_ORIG,
-    FULLY_OVERRIDEN_PLATFORMS,
     DPCODE_PREFERED_DEVICE_CLASS,
 )
 import custom_components.xtend_tuya.multi_manager.shared.shared_classes as sc
@@ -495,64 +488,6 @@ class XTEntity(TuyaEntity):
             return getattr(wrapper, "_DPTYPE")
         return None
 
-    @staticmethod
-    def mark_overriden_entities_as_disabled(hass: HomeAssistant, device: sc.XTDevice):
-        device_registry = dr.async_get(hass)
-        entity_registry = er.async_get(hass)
-        hass_device = device_registry.async_get_device(
-            identifiers={(DOMAIN, device.id), (DOMAIN_ORIG, device.id)}
-        )
-        entity_platforms = async_get_platforms(hass, DOMAIN_ORIG)
-        if hass_device:
-            hass_entities = er.async_entries_for_device(
-                entity_registry,
-                device_id=hass_device.id,
-                include_disabled_entities=False,
-            )
-            for entity_registration in hass_entities:
-                for entity_platform in entity_platforms:
-                    if entity_registration.entity_id in entity_platform.entities:
-                        entity_instance_platform = Platform(entity_platform.domain)
-                        if entity_instance_platform in FULLY_OVERRIDEN_PLATFORMS:
-                            entity_registry.async_update_entity(
-                                entity_id=entity_registration.entity_id,
-                                disabled_by=RegistryEntryDisabler.USER,
-                            )
-
-    @staticmethod
-    def register_current_entities_as_handled_dpcode(
-        hass: HomeAssistant, device: sc.XTDevice
-    ):
-        device_registry = dr.async_get(hass)
-        entity_registry = er.async_get(hass)
-        hass_device = device_registry.async_get_device(
-            identifiers={(DOMAIN, device.id), (DOMAIN_ORIG, device.id)}
-        )
-        entity_platforms = async_get_platforms(hass, DOMAIN_ORIG)
-        if hass_device:
-            hass_entities = er.async_entries_for_device(
-                entity_registry,
-                device_id=hass_device.id,
-                include_disabled_entities=False,
-            )
-            for entity_registration in hass_entities:
-                for entity_platform in entity_platforms:
-                    if entity_registration.entity_id in entity_platform.entities:
-                        entity_instance = entity_platform.entities[
-                            entity_registration.entity_id
-                        ]
-                        entity_instance_platform = Platform(entity_platform.domain)
-                        entity_description: EntityDescription | None = None
-                        if hasattr(entity_instance, "entity_description"):
-                            entity_description = entity_instance.entity_description
-                        if entity_description is not None:
-                            dpcode = XTEntity._get_description_dpcode(
-                                entity_description
-                            )
-                            XTEntity.register_handled_dpcode(
-                                device, entity_instance_platform, dpcode
-                            )
-
     @staticmethod
     def register_handled_dpcode(device: sc.XTDevice, platform: Platform, dpcode: str):
         handled_dpcodes: dict[str, list[str]] = cast(
@@ -655,7 +590,7 @@ class XTEntity(TuyaEntity):
             # if device.force_compatibility is True:
             #    return False, dpcode
 
-            all_aliases = device.get_all_status_code_aliases()
+            all_aliases = device.get_dpcode_index().alias_to_code
             if current_status := all_aliases.get(dpcode):
                 if (
                     XTEntity.is_dpcode_handled(device, platform, current_status)
@@ -877,3 +812,64 @@ class XTEntity(TuyaEntity):
             f"Multiple possible device class {proposed_device_class} for unit {dpcode_information.unit} on device {device.name} ({dpcode_information.dpcode}), unable to determine the most probable one, returning None. Please report to developer.",
         )
         return None
+
+
+class XTEntityDiscovery:
+    """Discovery shared by the platforms.
+
+    Descriptions are only checked when the device reports their DPCode (or an
+    alias of it), in the two passes supports_description expects, and the
+    entities are added as the devices are processed rather than all at once.
+    """
+
+    DEVICES_PER_CHUNK: int = 20
+
+    @staticmethod
+    def get_supported_descriptions(
+        device: sc.XTDevice,
+        platform: Platform,
+        category_descriptions: Iterable[EntityDescription],
+        externally_managed_dpcodes: list[str] = [],
+        key_fields: list[str | tuple[str, ...]] | None = None,
+        multi_manager: mm.MultiManager | None = None,
+    ) -> Iterator[Any]:
+        discovery_dpcodes = device.get_discovery_dpcodes()
+        candidates = [
+            description
+            for description in category_descriptions
+            if XTEntity._get_description_dpcode(description) in discovery_dpcodes
+        ]
+        for first_pass in (True, False):
+            for description in candidates:
+                if XTEntity.supports_description(
+                    device,
+                    platform,
+                    description,
+                    first_pass,
+                    externally_managed_dpcodes,
+                    key_fields,
+                    multi_manager,
+                ):
+                    yield description
+
+    @staticmethod
+    def add_entities(
+        multi_manager: mm.MultiManager,
+        platform: Platform,
+        device_ids: Iterable[str],
+        discover_entities: Callable[[sc.XTDevice], Iterable[Entity]],
+        async_add_entities: AddEntitiesCallback,
+    ) -> None:
+        entities: list[Entity] = []
+        devices_in_chunk = 0
+        for device_id in [*device_ids]:
+            if device := multi_manager.device_map.get(device_id):
+                with multi_manager.startup_tracer.span(f"entity_discovery:{platform}"):
+                    entities.extend(discover_entities(device))
+                devices_in_chunk += 1
+                if devices_in_chunk >= XTEntityDiscovery.DEVICES_PER_CHUNK:
+                    # Entities are added eagerly, the first ones show up while the rest is discovered
+                    async_add_entities(entities)
+                    entities = []
+                    devices_in_chunk = 0
+        async_add_entities(entities)
@@ -56,6 +56,7 @@ from .ha_tuya_integration.tuya_integration_imports import (
 from .entity import (
     XTEntity,
     XTEntityDescriptorManager,
+    XTEntityDiscovery,
 )
 
 
@@ -470,75 +471,54 @@ async def async_setup_entry(
     @callback
     def async_discover_device(device_map, restrict_dpcode: str | None = None) -> None:
         """Discover and add a discovered tuya sensor."""
-        if hass_data.manager is None:
+        if (device_manager := hass_data.manager) is None:
             return
-        entities: list[XTEventEntity] = []
-        device_ids = [*device_map]
-        for device_id in device_ids:
-            if device := hass_data.manager.device_map.get(device_id):
-                if category_descriptions := XTEntityDescriptorManager.get_category_descriptors(
-                    supported_descriptors, device.category
-                ):
-                    externally_managed_dpcodes = (
-                        XTEntityDescriptorManager.get_category_keys(
-                            externally_managed_descriptors.get(device.category)
-                        )
+
+        def discover_entities(device: XTDevice) -> list[XTEventEntity]:
+            entities: list[XTEventEntity] = []
+            if category_descriptions := XTEntityDescriptorManager.get_category_descriptors(
+                supported_descriptors, device.category
+            ):
+                externally_managed_dpcodes = (
+                    XTEntityDescriptorManager.get_category_keys(
+                        externally_managed_descriptors.get(device.category)
                     )
-                    if restrict_dpcode is not None:
-                        category_descriptions = cast(
-                            tuple[XTEventEntityDescription, ...],
-                            restrict_descriptor_category(
-                                category_descriptions, [restrict_dpcode]
-                            ),
-                        )
-                    entities.extend(
-                        XTEventEntity.get_entity_instance(
-                            device=device,
-                            device_manager=hass_data.manager,
-                            description=description,
-                            definition=definition,
-                        )
-                        for description in category_descriptions
-                        if (
-                            XTEntity.supports_description(
-                                device,
-                                this_platform,
-                                description,
-                                True,
-                                externally_managed_dpcodes,
-                            )
-                            and (
-                                definition := xt_get_default_definition(
-                                    device, description.key, description.wrapper_class
-                                )
-                            )
-                        )
+                )
+                if restrict_dpcode is not None:
+                    category_descriptions = cast(
+                        tuple[XTEventEntityDescription, ...],
+                        restrict_descriptor_category(
+                            category_descriptions, [restrict_dpcode]
+                        ),
                     )
-                    entities.extend(
-                        XTEventEntity.get_entity_instance(
-                            device=device,
-                            device_manager=hass_data.manager,
-                            description=description,
-                            definition=definition,
-                        )
-                        for description in category_descriptions
-                        if (
-                            XTEntity.supports_description(
-                                device,
-                                this_platform,
-                                description,
-                                False,
-                                externally_managed_dpcodes,
-                            )
-                            and (
-                                definition := xt_get_default_definition(
-                                    device, description.key, description.wrapper_class
-                                )
-                            )
+                entities.extend(
+                    XTEventEntity.get_entity_instance(
+                        device=device,
+                        device_manager=device_manager,
+                        description=description,
+                        definition=definition,
+                    )
+                    for description in XTEntityDiscovery.get_supported_descriptions(
+                        device,
+                        this_platform,
+                        category_descriptions,
+                        externally_managed_dpcodes,
+                    )
+                    if (
+                        definition := xt_get_default_definition(
+                            device, description.key, description.wrapper_class
                         )
                     )
+                )
+            return entities
 
-        async_add_entities(entities)
+        XTEntityDiscovery.add_entities(
+            device_manager,
+            this_platform,
+            device_map,
+            discover_entities,
+            async_add_entities,
+        )
 
     hass_data.manager.register_device_descriptors(this_platform, supported_descriptors)
     async_discover_device([*hass_data.manager.device_map])
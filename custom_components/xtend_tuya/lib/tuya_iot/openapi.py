@@ -2,12 +2,19 @@
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import hmac
 import json
+import logging
+import math
+import re
+import threading
 import time
-from typing import Any, cast
+from collections import deque
+from typing import Any, NoReturn, cast
 
+import aiohttp
 import requests
 
 from .openlogging import logger
@@ -24,6 +31,13 @@ TO_C_SMART_HOME_REFRESH_TOKEN_API = "/v1.0/token/"
 TO_C_CUSTOM_TOKEN_API = "/v1.0/iot-03/users/login"
 TO_C_SMART_HOME_TOKEN_API = "/v1.0/iot-01/associated-users/actions/authorized-login"
 
+# Path segments holding an id (device, user, home...), replaced to group the statistics by endpoint
+ENDPOINT_ID_SEGMENT = re.compile(r"^(?=.*\d)[\w\-.,]{12,}$")
+ENDPOINT_LATENCY_SAMPLES = 256
+
+# Maximum number of concurrent requests sent by the async transport to the API host
+DEFAULT_MAX_CONNECTIONS_PER_HOST = 20
+
 
 class TuyaTokenInfo:
     """Tuya token info.
@@ -102,6 +116,42 @@ class TuyaTokenInfo:
         self.marked_invalid = True
 
 
+class TuyaOpenAPIEndpointStatistics:
+    """Requests, latency, response size and error codes of an API endpoint."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.response_bytes = 0
+        self.error_codes: dict[str, int] = {}
+        # Latencies of the most recent requests, for the percentiles
+        self.latencies: deque[float] = deque(maxlen=ENDPOINT_LATENCY_SAMPLES)
+
+    def add(self, latency: float, response_bytes: int, error_code: str | None) -> None:
+        self.count += 1
+        self.response_bytes += response_bytes
+        self.latencies.append(latency)
+        if error_code is not None:
+            self.error_codes[error_code] = self.error_codes.get(error_code, 0) + 1
+
+    def as_dict(self) -> dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "count": self.count,
+            "p50_ms": self._percentile_ms(latencies, 0.5),
+            "p95_ms": self._percentile_ms(latencies, 0.95),
+            "response_bytes": self.response_bytes,
+            "error_codes": dict(self.error_codes),
+        }
+
+    @staticmethod
+    def _percentile_ms(latencies: list[float], percentile: float) -> float | None:
+        if not latencies:
+            return None
+        # Nearest-rank percentile
+        index = max(0, math.ceil(percentile * len(latencies)) - 1)
+        return round(latencies[index] * 1000, 3)
+
+
 class TuyaOpenAPI:
     """Open Api.
 
@@ -122,6 +172,8 @@ class TuyaOpenAPI:
     ) -> None:
         """Init TuyaOpenAPI."""
         self.session = requests.session()
+        self.async_session: aiohttp.ClientSession | None = None
+        self._async_semaphore: asyncio.Semaphore | None = None
 
         self.endpoint = endpoint
         self.access_id = access_id
@@ -153,6 +205,21 @@ class TuyaOpenAPI:
         self.__country_code = ""
         self.__schema = ""
 
+        self.endpoint_statistics: dict[str, TuyaOpenAPIEndpointStatistics] = {}
+        self._statistics_lock = threading.Lock()
+
+    def set_async_session(
+        self,
+        async_session: aiohttp.ClientSession,
+        max_connections_per_host: int = DEFAULT_MAX_CONNECTIONS_PER_HOST,
+    ) -> None:
+        """Use an aiohttp session for the async_* requests.
+
+        Without one, the async_* requests run the blocking requests in the executor.
+        """
+        self.async_session = async_session
+        self._async_semaphore = asyncio.Semaphore(max_connections_per_host)
+
     def report_message(self, method: str, message: str, stack_info: bool = False):
         method_call = getattr(logger, method, None)
         if method_call is not None and callable(method_call):
@@ -160,6 +227,38 @@ class TuyaOpenAPI:
         else:
             logger.warning(f"Could not find method {method} in LOGGER, {message=} {stack_info=}")
 
+    def is_reporting(self, method: str) -> bool:
+        """Whether report_message emits messages of this method, so that they are only built when needed."""
+        level = logging.getLevelName(method.upper())
+        return not isinstance(level, int) or logger.isEnabledFor(level)
+
+    def get_statistics(self) -> dict[str, Any]:
+        with self._statistics_lock:
+            return {
+                endpoint: statistics.as_dict()
+                for endpoint, statistics in self.endpoint_statistics.items()
+            }
+
+    def _record_request(
+        self,
+        method: str,
+        path: str,
+        latency: float,
+        response_bytes: int,
+        error_code: str | None,
+    ) -> None:
+        normalized_path = "/".join(
+            "{id}" if ENDPOINT_ID_SEGMENT.match(segment) else segment
+            for segment in path.split("/")
+        )
+        endpoint = f"{method} {normalized_path}"
+        with self._statistics_lock:
+            statistics = self.endpoint_statistics.get(endpoint)
+            if statistics is None:
+                statistics = TuyaOpenAPIEndpointStatistics()
+                self.endpoint_statistics[endpoint] = statistics
+            statistics.add(latency, response_bytes, error_code)
+
     # https://developer.tuya.com/docs/iot/open-api/api-reference/singnature?id=Ka43a5mtx1gsc
     def _calculate_sign(
         self,
@@ -374,16 +473,13 @@ class TuyaOpenAPI:
         )
         return self.is_token_valid()
 
-    def __request(
+    def __prepare_headers(
         self,
         method: str,
         path: str,
-        params: dict[str, Any] | None = None,
-        body: dict[str, Any] | None = None,
-        first_pass: bool = True,
-    ) -> dict[str, Any]:
-        start_time = time.time()
-        self.__refresh_access_token_if_need(path, first_pass)
+        params: dict[str, Any] | None,
+        body: dict[str, Any] | None,
+    ) -> dict[str, str]:
         access_token = (
             self.token_info.access_token if self.token_info.is_valid() else ""
         )
@@ -405,54 +501,71 @@ class TuyaOpenAPI:
             headers["dev_lang"] = "python"
             headers["dev_version"] = VERSION
             headers["dev_channel"] = self.dev_channel
+        return headers
 
-        response = self.session.request(
+    def __on_invalid_response(
+        self,
+        method: str,
+        path: str,
+        request_start: float,
+        response: Any,
+        response_bytes: int,
+        exception: Exception,
+    ) -> NoReturn:
+        self._record_request(
             method,
-            self.endpoint + path,
-            params=params,
-            json=body,
-            headers=headers,
+            path,
+            time.perf_counter() - request_start,
+            response_bytes,
+            "invalid_json",
         )
+        logger.error(f"Could not convert payload back to json: {response=} <=> {exception}")
+        raise Exception(exception)
 
-        try:
-            result: dict[str, Any] = response.json()
-        except Exception as e:
-            logger.error(f"Could not convert payload back to json: {response=} <=> {e}")
-            raise Exception(e)
-
+    def __on_response(
+        self,
+        method: str,
+        path: str,
+        params: dict[str, Any] | None,
+        body: dict[str, Any] | None,
+        first_pass: bool,
+        access_token: str,
+        start_time: float,
+        request_start: float,
+        response_bytes: int,
+        result: dict[str, Any],
+    ) -> bool:
+        """Record and trace a response, returns whether the request has to be replayed."""
+        self._record_request(
+            method,
+            path,
+            time.perf_counter() - request_start,
+            response_bytes,
+            None if result.get("success", True) else str(result.get("code")),
+        )
         time_taken = time.time() - start_time
-
-        # if response.ok is False or result.get("success", True) is False:
-        #     self.report_message(
-        #         "debug",
-        #         f"[IOT API][{time_taken}]Request: {method} {path} PARAMS: {json.dumps(params, ensure_ascii=False, indent=2) if params is not None else ''} BODY: {json.dumps(body, ensure_ascii=False, indent=2) if body is not None else ''}, first_pass={first_pass}, access_token={access_token}"
-        #     )
-        #     self.report_message(
-        #         "debug",
-        #         f"[IOT API][{time_taken}]Response: {json.dumps(result, ensure_ascii=False, indent=2)}",
-        #         stack_info=True,
-        #     )
-        #     pass
-        if first_pass is False:
-            self.report_message(
-                "debug",
-                f"[IOT API][{time_taken}]SECOND PASS Request: {method} {path} PARAMS: {json.dumps(params, ensure_ascii=False, indent=2) if params is not None else ''} BODY: {json.dumps(body, ensure_ascii=False, indent=2) if body is not None else ''}, first_pass={first_pass}, access_token={access_token}",
-            )
-            self.report_message(
-                "debug",
-                f"[IOT API][{time_taken}]SECOND PASS Response: {json.dumps(result, ensure_ascii=False, indent=2)}",
-                stack_info=True,
-            )
-        else:
-            self.report_message(
-                "debug",
-                f"[IOT API][{time_taken}]Request: {method} {path} PARAMS: {json.dumps(params, ensure_ascii=False, indent=2) if params is not None else ''} BODY: {json.dumps(body, ensure_ascii=False, indent=2) if body is not None else ''}",
-            )
-            self.report_message(
-                "debug",
-                f"[IOT API][{time_taken}]Response: {json.dumps(result, ensure_ascii=False, indent=2)}",
-            )
-            pass
+        # Pretty-printing large responses is expensive, only do it when the messages are emitted
+        if self.is_reporting("debug"):
+            if first_pass is False:
+                self.report_message(
+                    "debug",
+                    f"[IOT API][{time_taken}]SECOND PASS Request: {method} {path} PARAMS: {json.dumps(params, ensure_ascii=False, indent=2) if params is not None else ''} BODY: {json.dumps(body, ensure_ascii=False, indent=2) if body is not None else ''}, first_pass={first_pass}, access_token={access_token}",
+                )
+                self.report_message(
+                    "debug",
+                    f"[IOT API][{time_taken}]SECOND PASS Response: {json.dumps(result, ensure_ascii=False, indent=2)}",
+                    stack_info=True,
+                )
+            else:
+                self.report_message(
+                    "debug",
+                    f"[IOT API][{time_taken}]Request: {method} {path} PARAMS: {json.dumps(params, ensure_ascii=False, indent=2) if params is not None else ''} BODY: {json.dumps(body, ensure_ascii=False, indent=2) if body is not None else ''}",
+                )
+                self.report_message(
+                    "debug",
+                    f"[IOT API][{time_taken}]Response: {json.dumps(result, ensure_ascii=False, indent=2)}",
+                )
+                pass
 
         if result.get("code", -1) in [
             TUYA_ERROR_CODE_TOKEN_INVALID,
@@ -467,7 +580,117 @@ class TuyaOpenAPI:
                 and path.startswith(self.__refresh_path) is False
             ):
                 self.report_message("debug", f"__request replaying request after token refresh {self.token_info=}")
-                return self.__request(method, path, params, body, False)
+                return True
+        return False
+
+    def __request(
+        self,
+        method: str,
+        path: str,
+        params: dict[str, Any] | None = None,
+        body: dict[str, Any] | None = None,
+        first_pass: bool = True,
+    ) -> dict[str, Any]:
+        start_time = time.time()
+        self.__refresh_access_token_if_need(path, first_pass)
+        headers = self.__prepare_headers(method, path, params, body)
+
+        request_start = time.perf_counter()
+        response = self.session.request(
+            method,
+            self.endpoint + path,
+            params=params,
+            json=body,
+            headers=headers,
+        )
+
+        try:
+            result: dict[str, Any] = response.json()
+        except Exception as e:
+            self.__on_invalid_response(
+                method, path, request_start, response, len(response.content), e
+            )
+
+        if self.__on_response(
+            method,
+            path,
+            params,
+            body,
+            first_pass,
+            headers["access_token"],
+            start_time,
+            request_start,
+            len(response.content),
+            result,
+        ):
+            return self.__request(method, path, params, body, False)
+
+        return result
+
+    async def __async_request(
+        self,
+        method: str,
+        path: str,
+        params: dict[str, Any] | None = None,
+        body: dict[str, Any] | None = None,
+        first_pass: bool = True,
+    ) -> dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        if self.async_session is None or self._async_semaphore is None:
+            return await loop.run_in_executor(
+                None, self.__request, method, path, params, body, first_pass
+            )
+
+        start_time = time.time()
+        if self.token_info.is_valid() is False:
+            # Reconnecting waits for the other reconnections and is rare, keep it in the executor
+            await loop.run_in_executor(
+                None, self.__refresh_access_token_if_need, path, first_pass
+            )
+        headers = self.__prepare_headers(method, path, params, body)
+        data = None
+        if body is not None:
+            # The body is signed as serialized by json.dumps, the session's serializer may differ
+            data = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        query = None
+        if params is not None:
+            # Same query string as requests, which also formats the values with str()
+            query = {
+                key: str(value) for key, value in params.items() if value is not None
+            }
+
+        request_start = time.perf_counter()
+        async with self._async_semaphore:
+            async with self.async_session.request(
+                method,
+                self.endpoint + path,
+                params=query,
+                data=data,
+                headers=headers,
+            ) as response:
+                content = await response.read()
+
+        try:
+            result: dict[str, Any] = json.loads(content)
+        except Exception as e:
+            self.__on_invalid_response(
+                method, path, request_start, response, len(content), e
+            )
+
+        if self.__on_response(
+            method,
+            path,
+            params,
+            body,
+            first_pass,
+            headers["access_token"],
+            start_time,
+            request_start,
+            len(content),
+            result,
+        ):
+            return await self.__async_request(method, path, params, body, False)
 
         return result
 
@@ -526,3 +749,27 @@ class TuyaOpenAPI:
             response: response body
         """
         return self.__request("DELETE", path, params, None)
+
+    async def async_get(
+        self, path: str, params: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        """Http Get, without blocking the event loop."""
+        return await self.__async_request("GET", path, params, None)
+
+    async def async_post(
+        self, path: str, body: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        """Http Post, without blocking the event loop."""
+        return await self.__async_request("POST", path, None, body)
+
+    async def async_put(
+        self, path: str, body: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        """Http Put, without blocking the event loop."""
+        return await self.__async_request("PUT", path, None, body)
+
+    async def async_delete(
+        self, path: str, params: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        """Http Delete, without blocking the event loop."""
+        return await self.__async_request("DELETE", path, params, None)
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import base64
 import json
+import queue
 import threading
 import time
 import uuid
@@ -36,6 +37,10 @@ CONNECT_FAILED_NOT_AUTHORISED = 5
 TO_C_CUSTOM_MQTT_CONFIG_API = "/v1.0/iot-03/open-hub/access-config"
 TO_C_SMART_HOME_MQTT_CONFIG_API = "/v1.0/open-hub/access/config"
 
+DISPATCH_QUEUE_SIZE = 1000
+DISPATCH_LANES = 1
+DISPATCH_STOP_POLL_SECONDS = 0.5
+
 
 class TuyaMQConfig:
     """Tuya mqtt config."""
@@ -72,6 +77,187 @@ class TuyaMQConfig:
         return True
 
 
+class TuyaMQTimingStatistics:
+    """Count, total and max duration of a processing step."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, duration: float) -> None:
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "avg_ms": round(self.total * 1000 / self.count, 3) if self.count else 0,
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class TuyaMQDispatcher:
+    """Decode and dispatch stage of the MQTT messages.
+
+    The paho network thread only hands the raw payloads over to a bounded
+    queue, so that decoding messages and running the listeners never delays
+    its keepalives. When the queue is full the message is dropped and counted.
+    A worker thread decodes the messages in arrival order and dispatches them
+    itself, or with lanes > 1 to one lane per device id so that the messages
+    of a device keep their order while devices are dispatched concurrently.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        decode: Callable[[bytes, Any], dict[str, Any] | None],
+        dispatch: Callable[[dict[str, Any]], None],
+        queue_size: int = DISPATCH_QUEUE_SIZE,
+        lanes: int = DISPATCH_LANES,
+    ) -> None:
+        self.name = name
+        self._decode = decode
+        self._dispatch = dispatch
+        self._queue: queue.Queue[tuple[bytes, Any]] = queue.Queue(maxsize=queue_size)
+        self._lane_queues: list[queue.Queue[dict[str, Any]]] = [
+            queue.Queue(maxsize=queue_size) for _ in range(lanes if lanes > 1 else 0)
+        ]
+        self._stop_event = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._stats_lock = threading.Lock()
+        self.received = 0
+        self.dropped = 0
+        self.decode_failures = 0
+        self.dispatch_failures = 0
+        self.max_queue_depth = 0
+        self.decode_time = TuyaMQTimingStatistics()
+        self.dispatch_time = TuyaMQTimingStatistics()
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._threads.append(
+            threading.Thread(
+                target=self._decode_loop, name=f"{self.name} MQTT decode", daemon=True
+            )
+        )
+        for lane_queue in self._lane_queues:
+            self._threads.append(
+                threading.Thread(
+                    target=self._lane_loop,
+                    args=(lane_queue,),
+                    name=f"{self.name} MQTT dispatch",
+                    daemon=True,
+                )
+            )
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        # Pending messages are discarded, the workers exit at their next poll
+        self._stop_event.set()
+
+    def submit(self, payload: bytes, user_data: Any) -> bool:
+        """Hand a raw message over to the workers, called from the paho network thread."""
+        try:
+            self._queue.put_nowait((payload, user_data))
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped += 1
+                dropped = self.dropped
+            if dropped == 1 or dropped % 100 == 0:
+                logger.warning(
+                    f"[{self.name} MQTT] message queue is full, {dropped} message(s) dropped so far"
+                )
+            return False
+        with self._stats_lock:
+            self.received += 1
+            depth = self._queue.qsize()
+            if depth > self.max_queue_depth:
+                self.max_queue_depth = depth
+        return True
+
+    def get_statistics(self) -> dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self.max_queue_depth,
+                "queue_size": self._queue.maxsize,
+                "lane_depths": [lane_queue.qsize() for lane_queue in self._lane_queues],
+                "received": self.received,
+                "dropped": self.dropped,
+                "decode_failures": self.decode_failures,
+                "dispatch_failures": self.dispatch_failures,
+                "decode_time": self.decode_time.as_dict(),
+                "dispatch_time": self.dispatch_time.as_dict(),
+            }
+
+    def _get(self, source_queue: queue.Queue) -> Any:
+        while not self._stop_event.is_set():
+            try:
+                return source_queue.get(timeout=DISPATCH_STOP_POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return None
+
+    def _decode_loop(self) -> None:
+        while (item := self._get(self._queue)) is not None:
+            payload, user_data = item
+            start = time.perf_counter()
+            try:
+                msg_dict = self._decode(payload, user_data)
+            except Exception as e:
+                msg_dict = None
+                logger.warning(f"[{self.name} MQTT] Failed to decode message: {e}")
+            decode_duration = time.perf_counter() - start
+            with self._stats_lock:
+                self.decode_time.add(decode_duration)
+                if msg_dict is None:
+                    self.decode_failures += 1
+            if msg_dict is None:
+                continue
+            if self._lane_queues:
+                lane_queue = self._lane_queues[
+                    hash(self._get_device_id(msg_dict)) % len(self._lane_queues)
+                ]
+                # Blocking: a busy lane slows decoding down until the input queue drops
+                lane_queue.put(msg_dict)
+            else:
+                self._run_dispatch(msg_dict)
+
+    def _lane_loop(self, lane_queue: queue.Queue) -> None:
+        while (msg_dict := self._get(lane_queue)) is not None:
+            self._run_dispatch(msg_dict)
+
+    def _run_dispatch(self, msg_dict: dict[str, Any]) -> None:
+        start = time.perf_counter()
+        try:
+            self._dispatch(msg_dict)
+        except Exception as e:
+            with self._stats_lock:
+                self.dispatch_failures += 1
+            logger.exception(e)
+        dispatch_duration = time.perf_counter() - start
+        with self._stats_lock:
+            self.dispatch_time.add(dispatch_duration)
+
+    @staticmethod
+    def _get_device_id(msg_dict: dict[str, Any]) -> str | None:
+        data = msg_dict.get("data")
+        if not isinstance(data, dict):
+            return None
+        if dev_id := data.get("devId"):
+            return dev_id
+        biz_data = data.get("bizData")
+        if isinstance(biz_data, dict):
+            return biz_data.get("devId")
+        return None
+
+
 class TuyaOpenMQ(threading.Thread):
     """Tuya open iot hub.
 
@@ -99,6 +285,9 @@ class TuyaOpenMQ(threading.Thread):
         self.class_id: str = class_id
         self.topics: str = topics
         self._client_lock = threading.Lock()
+        self.dispatcher = TuyaMQDispatcher(
+            class_id, self._decode_message, self._dispatch_message
+        )
 
     def _get_mqtt_config(self, first_pass=True) -> TuyaMQConfig:
         path = (
@@ -160,7 +349,11 @@ class TuyaOpenMQ(threading.Thread):
             return json.loads(plaintext)
 
     def _on_message(self, mqttc: mqtt.Client, user_data: Any, msg: mqtt.MQTTMessage):
-        msg_dict = json.loads(msg.payload.decode("utf8"))
+        # Runs on the paho network thread, keep it short
+        self.dispatcher.submit(msg.payload, user_data)
+
+    def _decode_message(self, payload: bytes, user_data: Any) -> dict[str, Any] | None:
+        msg_dict = json.loads(payload.decode("utf8"))
         t = msg_dict.get("t", "")
         mq_config = user_data["mqConfig"]
         decrypted_data = self._decode_mq_message(
@@ -168,11 +361,13 @@ class TuyaOpenMQ(threading.Thread):
         )
         if decrypted_data is None:
             logger.warning(f"[{self.class_id} MQTT] Failed to decode message: {msg_dict}")
-            return
+            return None
 
         msg_dict["data"] = decrypted_data
         #logger.debug(f"[{self.class_id} MQTT] on_message: {msg_dict}")
+        return msg_dict
 
+    def _dispatch_message(self, msg_dict: dict[str, Any]) -> None:
         for listener in self.message_listeners:
             listener(msg_dict)
 
@@ -326,6 +521,7 @@ class TuyaOpenMQ(threading.Thread):
         Start mqtt thread
         """
         #logger.warning(f"[{self.class_id} MQTT] start")
+        self.dispatcher.start()
         super().start()
 
     def stop(self):
@@ -341,6 +537,7 @@ class TuyaOpenMQ(threading.Thread):
                 self.client.disconnect()
             self.client = None
             self._stop_event.set()
+            self.dispatcher.stop()
 
     def add_message_listener(self, listener: Callable[[dict], None]):
         """Add mqtt message listener."""
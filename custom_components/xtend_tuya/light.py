@@ -47,6 +47,7 @@ from .ha_tuya_integration.tuya_integration_imports import (
 from .entity import (
     XTEntity,
     XTEntityDescriptorManager,
+    XTEntityDiscovery,
 )
 
 
@@ -290,93 +291,64 @@ async def async_setup_entry(
     @callback
     def async_discover_device(device_map, restrict_dpcode: str | None = None) -> None:
         """Discover and add a discovered tuya light."""
-        if hass_data.manager is None:
+        if (device_manager := hass_data.manager) is None:
             return
-        entities: list[XTLightEntity] = []
-        device_ids = [*device_map]
-        for device_id in device_ids:
-            if device := hass_data.manager.device_map.get(device_id):
-                if category_descriptions := XTEntityDescriptorManager.get_category_descriptors(
-                    supported_descriptors, device.category
-                ):
-                    externally_managed_dpcodes = (
-                        XTEntityDescriptorManager.get_category_keys(
-                            externally_managed_descriptors.get(device.category)
-                        )
+
+        def discover_entities(device: XTDevice) -> list[XTLightEntity]:
+            entities: list[XTLightEntity] = []
+            if category_descriptions := XTEntityDescriptorManager.get_category_descriptors(
+                supported_descriptors, device.category
+            ):
+                externally_managed_dpcodes = (
+                    XTEntityDescriptorManager.get_category_keys(
+                        externally_managed_descriptors.get(device.category)
                     )
-                    if restrict_dpcode is not None:
-                        category_descriptions = cast(
-                            tuple[XTLightEntityDescription, ...],
-                            restrict_descriptor_category(
-                                category_descriptions, [restrict_dpcode]
-                            ),
-                        )
-                    entities.extend(
-                        XTLightEntity.get_entity_instance(
-                            device=device,
-                            device_manager=hass_data.manager,
-                            description=description,
-                            definition=definition,
-                        )
-                        for description in category_descriptions
-                        if (
-                            XTEntity.supports_description(
-                                device,
-                                this_platform,
-                                description,
-                                True,
-                                externally_managed_dpcodes,
-                            )
-                            and (
-                                definition := xt_get_default_definition(
-                                    device=device,
-                                    switch_dpcode=description.key,
-                                    brightness_dpcode=description.brightness,
-                                    brightness_max_dpcode=description.brightness_max,
-                                    brightness_min_dpcode=description.brightness_min,
-                                    color_data_dpcode=description.color_data,
-                                    color_mode_dpcode=description.color_mode,
-                                    color_temp_dpcode=description.color_temp,
-                                    fallback_color_data_mode=description.fallback_color_data_mode,
-                                )
-                            )
-                        )
+                )
+                if restrict_dpcode is not None:
+                    category_descriptions = cast(
+                        tuple[XTLightEntityDescription, ...],
+                        restrict_descriptor_category(
+                            category_descriptions, [restrict_dpcode]
+                        ),
+                    )
+                entities.extend(
+                    XTLightEntity.get_entity_instance(
+                        device=device,
+                        device_manager=device_manager,
+                        description=description,
+                        definition=definition,
+                    )
+                    for description in XTEntityDiscovery.get_supported_descriptions(
+                        device,
+                        this_platform,
+                        category_descriptions,
+                        externally_managed_dpcodes,
                     )
-                    entities.extend(
-                        XTLightEntity.get_entity_instance(
+                    if (
+                        definition := xt_get_default_definition(
                             device=device,
-                            device_manager=hass_data.manager,
-                            description=description,
-                            definition=definition,
-                        )
-                        for description in category_descriptions
-                        if (
-                            XTEntity.supports_description(
-                                device,
-                                this_platform,
-                                description,
-                                False,
-                                externally_managed_dpcodes,
-                            )
-                            and (
-                                definition := xt_get_default_definition(
-                                    device=device,
-                                    switch_dpcode=description.key,
-                                    brightness_dpcode=description.brightness,
-                                    brightness_max_dpcode=description.brightness_max,
-                                    brightness_min_dpcode=description.brightness_min,
-                                    color_data_dpcode=description.color_data,
-                                    color_mode_dpcode=description.color_mode,
-                                    color_temp_dpcode=description.color_temp,
-                                    fallback_color_data_mode=description.fallback_color_data_mode,
-                                )
-                            )
+                            switch_dpcode=description.key,
+                            brightness_dpcode=description.brightness,
+                            brightness_max_dpcode=description.brightness_max,
+                            brightness_min_dpcode=description.brightness_min,
+                            color_data_dpcode=description.color_data,
+                            color_mode_dpcode=description.color_mode,
+                            color_temp_dpcode=description.color_temp,
+                            fallback_color_data_mode=description.fallback_color_data_mode,
                         )
                     )
+                )
+            return entities
 
-        async_add_entities(entities)
+        XTEntityDiscovery.add_entities(
+            device_manager,
+            this_platform,
+            device_map,
+            discover_entities,
+            async_add_entities,
+        )
         if restrict_dpcode is None:
-            hass_data.manager.add_post_setup_callback(
+            device_manager.add_post_setup_callback(
                 XTMultiManagerPostSetupCallbackPriority.PRIORITY_LAST,
                 async_add_generic_entities,
                 device_map,
@@ -1,8 +1,6 @@
 from __future__ import annotations
 import requests
 import json
-from datetime import datetime, timedelta
-import copy
 from typing import Optional, Literal, Any
 from enum import StrEnum
 from webrtc_models import (
@@ -10,6 +8,7 @@ from webrtc_models import (
 )
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.issue_registry import (
     IssueSeverity,
 )
@@ -30,6 +29,7 @@ from ...shared.interface.device_manager import (
 from ...shared.shared_classes import (
     XTConfigEntry,
     XTDeviceMap,
+    XTDeviceReportItem,
 )
 from ...shared.threading import (
     XTEventLoopProtector,
@@ -68,10 +68,14 @@ from ....const import (
     XTIRRemoteInformation,
     XTIRRemoteKeysInformation,
     XTDeviceWatcherCategory,
-    XTDeviceWatcherSpecialDevice,
 )
 
 
+class XTIOTCommandApi(StrEnum):
+    OPEN_API_REGULAR = "open_api_regular"
+    PROPERTY_UPDATE = "property_update"
+
+
 def get_plugin_instance() -> XTTuyaIOTDeviceManagerInterface | None:
     return XTTuyaIOTDeviceManagerInterface()
 
@@ -94,19 +98,11 @@ class XTTuyaIOTDeviceManagerInterface(XTDeviceManagerInterface):
         config_entry: XTConfigEntry,
         multi_manager: MultiManager,
     ) -> None:
-        last_time = datetime.now()
         self.multi_manager: MultiManager = multi_manager
         self.hass = hass
         self.iot_account = await self._init_from_entry(hass, config_entry)
         if self.iot_account:
             self.multi_manager.register_account(self)
-        self.multi_manager.device_watcher.report_message(
-            XTDeviceWatcherSpecialDevice.NOT_LINKED_TO_A_DEVICE,
-            f"Xtended Tuya {config_entry.title} {datetime.now() - last_time} for setup_from_entry {self.get_type_name()}",
-            XTDeviceWatcherCategory.XT_PERFORMANCE,
-            None,
-            False,
-        )
 
     async def _init_from_entry(
         self, hass: HomeAssistant, config_entry: XTConfigEntry
@@ -158,6 +154,9 @@ class XTTuyaIOTDeviceManagerInterface(XTDeviceManagerInterface):
             auth_type=auth_type,
             non_user_specific_api=False,
         )
+        async_session = async_get_clientsession(self.multi_manager.hass)
+        non_user_api.set_async_session(async_session)
+        api.set_async_session(async_session)
         api.set_dev_channel("hass")
         try:
             connect_non_user_api = (
@@ -264,10 +263,10 @@ class XTTuyaIOTDeviceManagerInterface(XTDeviceManagerInterface):
     def unload(self):
         pass
 
-    def on_message(self, msg: dict):
+    def on_message(self, msg: dict, report: list[XTDeviceReportItem] | None = None):
         if self.iot_account is None:
             return None
-        self.iot_account.device_manager.on_message(msg)  # type: ignore
+        self.iot_account.device_manager.on_message(msg, report)  # type: ignore
 
     def query_scenes(self) -> list:
         # return self.iot_account.home_manager.query_scenes()
@@ -315,6 +314,22 @@ class XTTuyaIOTDeviceManagerInterface(XTDeviceManagerInterface):
         self.iot_account.device_manager.mq.stop()
         self.iot_account.device_manager.ipc_manager.mq.stop()
 
+    def get_mqtt_statistics(self) -> dict[str, Any] | None:
+        if self.iot_account is None:
+            return None
+        return {
+            "device": self.iot_account.device_manager.mq.dispatcher.get_statistics(),
+            "ipc": self.iot_account.device_manager.ipc_manager.mq.dispatcher.get_statistics(),
+        }
+
+    def get_api_statistics(self) -> dict[str, Any] | None:
+        if self.iot_account is None:
+            return None
+        return {
+            "user": self.iot_account.device_manager.api.get_statistics(),
+            "non_user": self.iot_account.device_manager.non_user_api.get_statistics(),
+        }
+
     def on_post_setup(self):
         if self.iot_account is None:
             return None
@@ -495,190 +510,113 @@ class XTTuyaIOTDeviceManagerInterface(XTDeviceManagerInterface):
     def get_platform_descriptors_to_merge(self, platform: Platform) -> Any:
         pass
 
-    def send_command(
+    def get_command_apis(
         self, device_id: str, command: dict[str, Any], reverse_filters: bool = False
-    ) -> bool:
-        class XTApiList(StrEnum):
-            OPEN_API_REGULAR = "open_api_regular"
-            PROPERTY_UPDATE = "property_update"
-
-        api_priority_list: list[XTApiList] = []
+    ) -> list[str]:
         device = self.multi_manager.device_map.get(device_id)
-        dpId: int | None = None
         if device is None or self.iot_account is None:
-            return False
+            return []
         command_code = command.get("code")
         command_value = command.get("value")
 
         if command_code is None or command_value is None:
-            return False
+            return []
 
         if dpId := self.multi_manager._read_dpId_from_code(command_code, device):
             use_open_api: bool = device.local_strategy[dpId].get("use_open_api", False)
             if use_open_api is False:
                 if reverse_filters is False:
-                    return False
+                    return []
             else:
                 if reverse_filters is True:
-                    return False
+                    return []
             property_update: bool = device.local_strategy[dpId].get(
                 "property_update", False
             )
             if property_update:
-                api_priority_list.append(XTApiList.PROPERTY_UPDATE)
-                api_priority_list.append(XTApiList.OPEN_API_REGULAR)
-            else:
-                api_priority_list.append(XTApiList.OPEN_API_REGULAR)
-                api_priority_list.append(XTApiList.PROPERTY_UPDATE)
-        else:
-            return False
+                return [
+                    XTIOTCommandApi.PROPERTY_UPDATE,
+                    XTIOTCommandApi.OPEN_API_REGULAR,
+                ]
+            return [XTIOTCommandApi.OPEN_API_REGULAR, XTIOTCommandApi.PROPERTY_UPDATE]
+        return []
 
+    def send_commands_through_api(
+        self, device_id: str, commands: list[dict[str, Any]], api: str
+    ) -> bool:
+        device = self.multi_manager.device_map.get(device_id)
+        if device is None or self.iot_account is None:
+            return False
         command_list: list = []
-        for api_type in api_priority_list:
-            try:
-                match api_type:
-                    case XTApiList.OPEN_API_REGULAR:
-                        command_list = []
-                        command_dict = {"code": command_code, "value": command_value}
-                        command_list.append(command_dict)
-                        self.multi_manager.device_watcher.report_message(
-                            device_id,
-                            f"Sending Open API regular command : {command_list}",
-                            XTDeviceWatcherCategory.IOT_API,
-                            device,
-                            False,
-                        )
-                        self.iot_account.device_manager.send_commands(
-                            device_id, command_list
-                        )
-                    case XTApiList.PROPERTY_UPDATE:
-                        command_list = []
-                        property_dict = {str(command_code): command_value}
-                        command_list.append(property_dict)
-                        self.multi_manager.device_watcher.report_message(
-                            device_id,
-                            f"Sending property command : {command_list}",
-                            XTDeviceWatcherCategory.IOT_API,
-                            device,
-                            False,
-                        )
-                        self.iot_account.device_manager.send_property_update(
-                            device_id, command_list
-                        )
+        try:
+            match api:
+                case XTIOTCommandApi.OPEN_API_REGULAR:
+                    command_list = [
+                        {"code": command["code"], "value": command["value"]}
+                        for command in commands
+                    ]
+                    self.multi_manager.device_watcher.report_message(
+                        device_id,
+                        f"Sending Open API regular command : {command_list}",
+                        XTDeviceWatcherCategory.IOT_API,
+                        device,
+                        False,
+                    )
+                    self.iot_account.device_manager.send_commands(
+                        device_id, command_list
+                    )
+                case XTIOTCommandApi.PROPERTY_UPDATE:
+                    # All the properties in a single update
+                    command_list = [
+                        {str(command["code"]): command["value"] for command in commands}
+                    ]
+                    self.multi_manager.device_watcher.report_message(
+                        device_id,
+                        f"Sending property command : {command_list}",
+                        XTDeviceWatcherCategory.IOT_API,
+                        device,
+                        False,
+                    )
+                    self.iot_account.device_manager.send_property_update(
+                        device_id, command_list
+                    )
+                case _:
+                    return False
 
-                # If the command fails, the caller returns an exception, so we assume it worked if we reach here
+            # If the command fails, the caller returns an exception, so we assume it worked if we reach here
+            return True
+        except Exception as e:
+            self.multi_manager.device_watcher.report_message(
+                device_id,
+                f"[IOT]Send {api} command failed, device id: {device_id}, command: {command_list}, exception: {e}",
+                XTDeviceWatcherCategory.IOT_API,
+            )
+        return False
+
+    def send_command(
+        self, device_id: str, command: dict[str, Any], reverse_filters: bool = False
+    ) -> bool:
+        for api in self.get_command_apis(device_id, command, reverse_filters):
+            if self.send_commands_through_api(device_id, [command], api):
                 return True
-            except Exception as e:
-                self.multi_manager.device_watcher.report_message(
-                    device_id,
-                    f"[IOT]Send {api_type} command failed, device id: {device_id}, command: {command_list}, exception: {e}",
-                    XTDeviceWatcherCategory.IOT_API,
-                )
         return False
 
-    def get_device_consumption_statistics_by_day(
-        self, device_id: str, start_day: str, end_day: str
+    async def async_get_device_consumption_history(
+        self,
+        device_id: str,
+        start_day: str,
+        end_day: str,
+        start_day_and_hour: str,
+        end_day_and_hour: str,
     ) -> dict[str, dict[float, float]] | None:
         if self.iot_account is None:
             return None
-
-        supported_codes = self.iot_account.device_manager.api.get(
-            f"/v1.0/devices/{device_id}/all-statistic-type"
-        )
-        return_dict: dict[str, dict[float, float]] = {}
-        for supported_code in supported_codes.get("result", []):
-            stat_type = supported_code.get("stat_type")
-            code = supported_code.get("code")
-            # if stat_type != "sum":
-            #    continue
-            params = {
-                "code": code,
-                "start_day": start_day,
-                "end_day": end_day,
-                "stat_type": stat_type,
-            }
-            stat_result = self.iot_account.device_manager.api.get(
-                f"/v1.0/devices/{device_id}/statistics/days", params
-            )
-            temp_dict: dict[str, str] = {}
-            if result := stat_result.get("result", None):
-                temp_dict = result.get("days", {})
-                for day in copy.deepcopy(temp_dict):
-                    if temp_dict[day] == "0.00":
-                        del temp_dict[day]
-                    else:
-                        break
-                for day in temp_dict:
-                    if code not in return_dict:
-                        return_dict[code] = {}
-                    return_dict[code][
-                        datetime.strptime(f"{day}12", "%Y%m%d%H").timestamp()
-                    ] = round(float(temp_dict[day]), 5)
-        return return_dict
-
-    def get_device_consumption_statistics_by_hour(
-        self, device_id: str, start_day_and_hour: str, end_day_and_hour: str
-    ) -> dict[str, dict[float, float]] | None:
-        if self.iot_account is None:
+        device_manager = self.iot_account.device_manager
+        if (device := device_manager.device_map.get(device_id)) is None:
             return None
-
-        supported_codes = self.iot_account.device_manager.api.get(
-            f"/v1.0/devices/{device_id}/all-statistic-type"
+        return await device_manager.statistics_fetcher.async_get_consumption_history(
+            device, start_day, end_day, start_day_and_hour, end_day_and_hour
         )
-        return_dict: dict[str, dict[float, float]] = {}
-        query_ranges: list[tuple[str, str]] = []
-        start_day_and_hour_dt = datetime.strptime(start_day_and_hour, "%Y%m%d%H")
-        end_day_and_hour_dt = datetime.strptime(end_day_and_hour, "%Y%m%d%H")
-        while start_day_and_hour_dt < end_day_and_hour_dt:
-            end_of_start_day = start_day_and_hour_dt.replace(hour=23)
-            if end_of_start_day < end_day_and_hour_dt:
-                query_ranges.append(
-                    (
-                        start_day_and_hour_dt.strftime("%Y%m%d%H"),
-                        end_of_start_day.strftime("%Y%m%d%H"),
-                    )
-                )
-                start_day_and_hour_dt = end_of_start_day.replace(hour=0) + timedelta(
-                    days=1
-                )
-            else:
-                query_ranges.append(
-                    (
-                        start_day_and_hour_dt.strftime("%Y%m%d%H"),
-                        end_day_and_hour_dt.strftime("%Y%m%d%H"),
-                    )
-                )
-                break
-        for supported_code in supported_codes.get("result", []):
-            stat_type = supported_code.get("stat_type")
-            code = supported_code.get("code")
-            # if stat_type != "sum":
-            #    continue
-            for start, end in query_ranges:
-                params = {
-                    "code": code,
-                    "start_hour": start,
-                    "end_hour": end,
-                    "stat_type": stat_type,
-                }
-                stat_result = self.iot_account.device_manager.api.get(
-                    f"/v1.0/devices/{device_id}/statistics/hours", params
-                )
-                temp_dict: dict[str, str] = {}
-                if result := stat_result.get("result", None):
-                    temp_dict = result.get("hours", {})
-                    for day_and_hour in copy.deepcopy(temp_dict):
-                        if temp_dict[day_and_hour] == "0.00":
-                            del temp_dict[day_and_hour]
-                        else:
-                            break
-                    for day_and_hour in temp_dict:
-                        if code not in return_dict:
-                            return_dict[code] = {}
-                        return_dict[code][
-                            datetime.strptime(day_and_hour, "%Y%m%d%H").timestamp()
-                        ] = round(float(temp_dict[day_and_hour]), 5)
-        return return_dict
 
     def convert_to_xt_device(
         self, device: Any, device_source_priority: XTDeviceSourcePriority | None = None
@@ -726,6 +664,15 @@ class XTTuyaIOTDeviceManagerInterface(XTDeviceManagerInterface):
             )
         )
 
+    async def async_get_webrtc_sdp_answer(
+        self, device_id: str, session_id: str, sdp_offer: str, channel: str
+    ) -> str | None:
+        if self.iot_account is None:
+            return None
+        return await self.iot_account.device_manager.ipc_manager.webrtc_manager.async_get_sdp_answer(
+            device_id, session_id, sdp_offer, channel
+        )
+
     def get_webrtc_ice_servers(
         self, device_id: str, session_id: str | None, format: str, hass: HomeAssistant
     ) -> str | None:
@@ -1,6 +1,9 @@
 from __future__ import annotations
 from typing import Any, cast
 from datetime import datetime, timedelta
+import asyncio
+import heapq
+import threading
 import time
 import json
 from webrtc_models import (
@@ -58,6 +61,41 @@ class XTIOTWebRTCSession:
         self.modes = {}
         self.offer_codec_manager = None
         self.answer_codec_manager = None
+        # Set when the device sent its last answer candidate
+        self.all_candidates_received = threading.Event()
+        self._async_waiters: list[
+            tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]
+        ] = []
+        self._waiters_lock = threading.Lock()
+
+    def set_all_candidates_received(self) -> None:
+        with self._waiters_lock:
+            self.has_all_candidates = True
+            self.all_candidates_received.set()
+            async_waiters, self._async_waiters = self._async_waiters, []
+        for loop, future in async_waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve_future, future)
+            except RuntimeError:
+                # The loop of the waiter is closed
+                pass
+
+    async def async_wait_for_all_candidates(self, timeout: float) -> bool:
+        loop = asyncio.get_running_loop()
+        with self._waiters_lock:
+            if self.all_candidates_received.is_set():
+                return True
+            future: asyncio.Future[None] = loop.create_future()
+            self._async_waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except TimeoutError:
+            return False
+        finally:
+            with self._waiters_lock:
+                if (loop, future) in self._async_waiters:
+                    self._async_waiters.remove((loop, future))
 
     def __repr__(self) -> str:
         answer = ""
@@ -79,34 +117,68 @@ class XTIOTWebRTCSession:
         )
 
 
+def _resolve_future(future: asyncio.Future[None]) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class XTIOTWebRTCSessionStore:
+    """WebRTC sessions by session ID.
+
+    The sessions are used from the event loop, the executor and the MQTT
+    thread. The expired sessions are dropped from a heap ordered by expiry
+    instead of scanning every session on each access.
+    """
+
+    def __init__(self) -> None:
+        self._sessions: dict[str, XTIOTWebRTCSession] = {}
+        self._expiry_heap: list[tuple[datetime, str]] = []
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> XTIOTWebRTCSession | None:
+        with self._lock:
+            self._drop_expired_sessions()
+            return self._sessions.get(session_id)
+
+    def get_or_create(self, session_id: str) -> XTIOTWebRTCSession:
+        with self._lock:
+            self._drop_expired_sessions()
+            if (session := self._sessions.get(session_id)) is None:
+                session = XTIOTWebRTCSession()
+                self._sessions[session_id] = session
+                heapq.heappush(self._expiry_heap, (session.valid_until, session_id))
+            return session
+
+    def _drop_expired_sessions(self) -> None:
+        current_time = datetime.now()
+        while self._expiry_heap and self._expiry_heap[0][0] < current_time:
+            valid_until, session_id = heapq.heappop(self._expiry_heap)
+            session = self._sessions.get(session_id)
+            # The session may have been created again since
+            if session is not None and session.valid_until == valid_until:
+                del self._sessions[session_id]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+
 class XTIOTWebRTCManager:
     def __init__(self, ipc_manager: ipc_man.XTIOTIPCManager) -> None:
-        self.sdp_exchange: dict[str, XTIOTWebRTCSession] = {}
+        self.sessions = XTIOTWebRTCSessionStore()
         self.ipc_manager = ipc_manager
 
     def get_webrtc_session(self, session_id: str | None) -> XTIOTWebRTCSession | None:
         if session_id is None:
             return None
-        self._clean_cache()
-        if result := self.sdp_exchange.get(session_id):
-            return result
-        return None
-
-    def _clean_cache(self) -> None:
-        current_time = datetime.now()
-        to_clean = []
-        for session_id in self.sdp_exchange:
-            if self.sdp_exchange[session_id].valid_until < current_time:
-                to_clean.append(session_id)
-        for session_id in to_clean:
-            self.sdp_exchange.pop(session_id)
+        return self.sessions.get(session_id)
 
     def set_sdp_answer(self, session_id: str | None, answer: dict) -> None:
         if session_id is None:
             return
-        self._create_session_if_necessary(session_id)
-        self.sdp_exchange[session_id].answer = answer
-        if callback := self.sdp_exchange[session_id].message_callback:
+        session = self._create_session_if_necessary(session_id)
+        session.answer = answer
+        if callback := session.message_callback:
             sdp_answer = answer.get("sdp", "")
             sdp_answer = self.fix_answer(sdp_answer, session_id)
             callback(WebRTCAnswer(answer=sdp_answer))
@@ -114,12 +186,12 @@ class XTIOTWebRTCManager:
     def add_sdp_answer_candidate(self, session_id: str | None, candidate: dict) -> None:
         if session_id is None:
             return
-        self._create_session_if_necessary(session_id)
-        self.sdp_exchange[session_id].answer_candidates.append(candidate)
+        session = self._create_session_if_necessary(session_id)
+        session.answer_candidates.append(candidate)
         candidate_str = cast(str, candidate.get("candidate", ""))
         if candidate_str == "":
-            self.sdp_exchange[session_id].has_all_candidates = True
-        if callback := self.sdp_exchange[session_id].message_callback:
+            session.set_all_candidates_received()
+        if callback := session.message_callback:
             ice_candidate = candidate_str.removeprefix("a=").removesuffix(ENDLINE)
             callback(
                 WebRTCCandidate(candidate=RTCIceCandidate(candidate=ice_candidate))
@@ -132,29 +204,25 @@ class XTIOTWebRTCManager:
         self.send_to_ipc_mqtt(session_id, device, json.dumps(resolution_payload))
 
     def set_config(self, session_id: str, config: dict[str, Any]):
-        self._create_session_if_necessary(session_id)
+        session = self._create_session_if_necessary(session_id)
 
         # Format ICE Servers so that they can be used by GO2RTC
         p2p_config: dict = config.get("p2p_config", {})
         if ices := p2p_config.get("ices"):
             p2p_config["ices"] = json.dumps(ices).replace(": ", ":").replace(", ", ",")
-        self.sdp_exchange[session_id].webrtc_config = config
+        session.webrtc_config = config
 
     def set_sdp_offer(self, session_id: str, offer: str) -> None:
-        self._create_session_if_necessary(session_id)
-        self.sdp_exchange[session_id].offer = offer
-        self.sdp_exchange[session_id].offer_codec_manager = XTIOTWebRTCCodecManager(
-            offer
-        )
+        session = self._create_session_if_necessary(session_id)
+        session.offer = offer
+        session.offer_codec_manager = XTIOTWebRTCCodecManager(offer)
 
     def set_original_sdp_offer(self, session_id: str, offer: str) -> None:
-        self._create_session_if_necessary(session_id)
-        self.sdp_exchange[session_id].original_offer = offer
+        session = self._create_session_if_necessary(session_id)
+        session.original_offer = offer
 
-    def _create_session_if_necessary(self, session_id: str) -> None:
-        self._clean_cache()
-        if session_id not in self.sdp_exchange:
-            self.sdp_exchange[session_id] = XTIOTWebRTCSession()
+    def _create_session_if_necessary(self, session_id: str) -> XTIOTWebRTCSession:
+        return self.sessions.get_or_create(session_id)
 
     async def async_get_config(
         self, device_id: str, session_id: str | None, hass: HomeAssistant | None = None
@@ -323,8 +391,45 @@ class XTIOTWebRTCManager:
         channel: str,
         wait_for_answers: int = 5,
     ) -> str | None:
-        sleep_step = 0.01
-        sleep_count: int = int(wait_for_answers / sleep_step)
+        if (
+            sent_offer := self._send_sdp_offer(
+                device_id, session_id, sdp_offer, channel
+            )
+        ) is None:
+            return None
+        if session := self.get_webrtc_session(session_id):
+            # Woken up by the MQTT thread on the last answer candidate
+            session.all_candidates_received.wait(wait_for_answers)
+        return self._finish_sdp_answer(device_id, session_id, *sent_offer)
+
+    async def async_get_sdp_answer(
+        self,
+        device_id: str,
+        session_id: str,
+        sdp_offer: str,
+        channel: str,
+        wait_for_answers: int = 5,
+    ) -> str | None:
+        """Same as get_sdp_answer without holding an executor thread during the wait."""
+        sent_offer = await XTEventLoopProtector.execute_out_of_event_loop_and_return(
+            self._send_sdp_offer, device_id, session_id, sdp_offer, channel
+        )
+        if sent_offer is None:
+            return None
+        if session := self.get_webrtc_session(session_id):
+            await session.async_wait_for_all_candidates(wait_for_answers)
+        return await XTEventLoopProtector.execute_out_of_event_loop_and_return(
+            self._finish_sdp_answer, device_id, session_id, *sent_offer
+        )
+
+    def _send_sdp_offer(
+        self,
+        device_id: str,
+        session_id: str,
+        sdp_offer: str,
+        channel: str,
+    ) -> tuple[str, str, list[str]] | None:
+        """Sends the offer and its candidates, returns the topic, moto ID and offer candidates."""
         self.set_original_sdp_offer(session_id, sdp_offer)
         if webrtc_config := self.get_config(device_id, session_id):
             auth_token = webrtc_config.get("auth")
@@ -350,6 +455,7 @@ class XTIOTWebRTCManager:
                 and self.ipc_manager.mq.mq_config.sink_topic is not None
                 and moto_id is not None
             ):
+                # Only the first sink topic is used
                 for topic in self.ipc_manager.mq.mq_config.sink_topic.values():
                     topic = topic.replace("{device_id}", device_id)
                     topic = topic.replace("moto_id", moto_id)
@@ -400,44 +506,48 @@ class XTIOTWebRTCManager:
                             self.ipc_manager.publish_to_ipc_mqtt(
                                 topic, json.dumps(payload)
                             )
-                    for _ in range(sleep_count):
-                        if session := self.get_webrtc_session(session_id):
-                            if session.has_all_candidates:
-                                break
-                        time.sleep(sleep_step)  # Wait for MQTT responses
-                    if offer_candidates:
-                        payload = {
-                            "protocol": 302,
-                            "pv": "2.2",
-                            "t": int(time.time()),
-                            "data": {
-                                "header": {
-                                    "type": "candidate",
-                                    "from": f"{self.ipc_manager.get_from()}",
-                                    "to": f"{device_id}",
-                                    "sub_dev_id": "",
-                                    "sessionid": f"{session_id}",
-                                    "moto_id": f"{moto_id}",
-                                    "tid": "",
-                                },
-                                "msg": {"mode": "webrtc", "candidate": ""},
-                            },
-                        }
-                        self.ipc_manager.publish_to_ipc_mqtt(topic, json.dumps(payload))
-                    if session := self.get_webrtc_session(session_id):
-                        # Format SDP answer and send it back
-                        sdp_answer: str = session.answer.get("sdp", "")
-                        candidates: str = ""
-                        if session.answer_candidates:
-                            for candidate in session.answer_candidates:
-                                candidates += candidate.get("candidate", "")
-                            sdp_answer += candidates + "a=end-of-candidates" + ENDLINE
-                        session.final_answer = f"{sdp_answer}"
-                        return sdp_answer
-
-            if not auth_token or not moto_id:
-                return None
+                    return topic, moto_id, offer_candidates
+
+        return None
 
+    def _finish_sdp_answer(
+        self,
+        device_id: str,
+        session_id: str,
+        topic: str,
+        moto_id: str,
+        offer_candidates: list[str],
+    ) -> str | None:
+        """Ends the offer candidates and formats the SDP answer received so far."""
+        if offer_candidates:
+            payload = {
+                "protocol": 302,
+                "pv": "2.2",
+                "t": int(time.time()),
+                "data": {
+                    "header": {
+                        "type": "candidate",
+                        "from": f"{self.ipc_manager.get_from()}",
+                        "to": f"{device_id}",
+                        "sub_dev_id": "",
+                        "sessionid": f"{session_id}",
+                        "moto_id": f"{moto_id}",
+                        "tid": "",
+                    },
+                    "msg": {"mode": "webrtc", "candidate": ""},
+                },
+            }
+            self.ipc_manager.publish_to_ipc_mqtt(topic, json.dumps(payload))
+        if session := self.get_webrtc_session(session_id):
+            # Format SDP answer and send it back
+            sdp_answer: str = session.answer.get("sdp", "")
+            candidates: str = ""
+            if session.answer_candidates:
+                for candidate in session.answer_candidates:
+                    candidates += candidate.get("candidate", "")
+                sdp_answer += candidates + "a=end-of-candidates" + ENDLINE
+            session.final_answer = f"{sdp_answer}"
+            return sdp_answer
         return None
 
     def delete_webrtc_session(self, device_id: str, session_id: str) -> str | None:
@@ -1,9 +1,6 @@
 from __future__ import annotations
 from typing import Any
 import json
-from paho.mqtt import (
-    client as mqtt,
-)
 from ..xt_tuya_iot_mq import (
     XTIOTOpenMQ,
 )
@@ -24,8 +21,5 @@ class XTIOTOpenMQIPC(XTIOTOpenMQ):
             api, manager, class_id="IPC", topics="ipc"
         )
 
-    def _on_message(self, mqttc: mqtt.Client, user_data: Any, msg: mqtt.MQTTMessage):
-        msg_dict = json.loads(msg.payload.decode("utf8"))
-
-        for listener in self.message_listeners:
-            listener(msg_dict)
+    def _decode_message(self, payload: bytes, user_data: Any) -> dict[str, Any] | None:
+        return json.loads(payload.decode("utf8"))
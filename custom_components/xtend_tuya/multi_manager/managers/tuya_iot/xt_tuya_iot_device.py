@@ -1,4 +1,5 @@
 from __future__ import annotations
+from typing import Any
 
 from ....lib.tuya_iot.device import (
     SmartHomeDeviceManage,
@@ -7,8 +8,12 @@ from ....lib.tuya_iot.device import (
 
 
 class XTSmartHomeDeviceManage(SmartHomeDeviceManage):
-    pass
+    async def async_get_device_specification(self, device_id: str) -> dict[str, Any]:
+        return await self.api.async_get(f"/v1.0/devices/{device_id}/specifications")
 
 
 class XTIndustrySolutionDeviceManage(IndustrySolutionDeviceManage):
-    pass
+    async def async_get_device_specification(self, device_id: str) -> dict[str, Any]:
+        return await self.api.async_get(
+            f"/v1.0/iot-03/devices/{device_id}/specification"
+        )
@@ -4,13 +4,19 @@ https://github.com/tuya/tuya-iot-python-sdk
 """
 
 from __future__ import annotations
+import asyncio
+import copy
+import hashlib
 import json
 import datetime
+import threading
 import time
 from ....lib.tuya_iot import (
     TuyaDeviceManager,
 )
 from ....lib.tuya_iot.device import (
+    TuyaDeviceFunction,
+    TuyaDeviceStatusRange,
     BIZCODE_ONLINE,
     BIZCODE_OFFLINE,
     BIZCODE_NAME_UPDATE,
@@ -36,20 +42,27 @@ from ....const import (
     XTDeviceWatcherCategory,
     BIZCODE_EVENT_NOTIFY,
     XT_DEVICE_EVENT_NOTIFY_DPCODE,
+    XT_PRODUCT_SCHEMA_MAX_AGE,
+    XT_DEVICE_CACHE_REFRESH_CONCURRENCY,
+    XT_DEVICE_CACHE_REFRESH_RATE_LIMIT,
 )
 from ...shared.shared_classes import (
     XTDevice,
     XTDeviceFunction,
     XTDeviceStatusRange,
     XTDeviceMap,
+    XTDeviceReportItem,
 )
 from ...shared.threading import (
-    XTConcurrencyManager,
+    XTAsyncWorkQueue,
     XTEventLoopProtector,
 )
 from ...shared.merging_manager import (
     XTMergingManager,
 )
+from ...shared.storage.storage_manager import (
+    XTProductSchema,
+)
 from ...multi_manager import (
     MultiManager,  # noqa: F811
 )
@@ -70,6 +83,9 @@ from .xt_tuya_iot_mq import (
 from .xt_tuya_iot_home_manager import (
     TuyaHomeManager,
 )
+from .xt_tuya_iot_statistics import (
+    XTIOTStatisticsFetcher,
+)
 
 
 class XTIOTDeviceManager(TuyaDeviceManager):
@@ -97,6 +113,9 @@ class XTIOTDeviceManager(TuyaDeviceManager):
         self.api = api
         self.mq = mq
         self.home_manager: TuyaHomeManager | None = None
+        self._product_schema_locks: dict[str, threading.Lock] = {}
+        self._async_product_schema_locks: dict[str, asyncio.Lock] = {}
+        self.statistics_fetcher = XTIOTStatisticsFetcher(self)
 
     def register_home_manager(self, home_manager: TuyaHomeManager):
         self.home_manager = home_manager
@@ -150,8 +169,8 @@ class XTIOTDeviceManager(TuyaDeviceManager):
     async def async_update_device_list_in_smart_home_mod(self):
         if self.api.token_info.is_valid() is False:  # CHANGED
             return None  # CHANGED
-        response = await XTEventLoopProtector.execute_out_of_event_loop_and_return(
-            self.api.get, f"/v1.0/users/{self.api.token_info.uid}/devices"
+        response = await self.api.async_get(
+            f"/v1.0/users/{self.api.token_info.uid}/devices"
         )
         if response["success"]:
             for item in response["result"]:
@@ -212,10 +231,14 @@ class XTIOTDeviceManager(TuyaDeviceManager):
         Args:
           devIds(list[str]): devices' id, max 20 once call
         """
-        self._update_device_list_info_cache(devIds)
-        self._update_device_list_status_cache(devIds)
+        await XTEventLoopProtector.execute_out_of_event_loop_and_return(
+            self._update_device_list_info_cache, devIds
+        )
+        await XTEventLoopProtector.execute_out_of_event_loop_and_return(
+            self._update_device_list_status_cache, devIds
+        )
 
-        self.update_device_function_cache(devIds)
+        await self.async_update_device_function_cache(devIds)
 
     def get_devices_from_sharing(self) -> dict[str, XTDevice]:
         return_dict: dict[str, XTDevice] = {}
@@ -245,37 +268,76 @@ class XTIOTDeviceManager(TuyaDeviceManager):
         self.update_device_list_in_smart_home_mod()
 
     async def async_update_device_function_cache(self, devIds: list = []):
-        concurrency_manager = XTConcurrencyManager(max_concurrency=9)
-
-        device_map = (
-            filter(lambda d: d.id in devIds, self.device_map.values())
-            if devIds
-            else self.device_map.values()
+        dev_ids = set(devIds)
+        work_queue = XTAsyncWorkQueue(
+            "IoT device function cache",
+            max_concurrency=XT_DEVICE_CACHE_REFRESH_CONCURRENCY,
+            rate_limit=XT_DEVICE_CACHE_REFRESH_RATE_LIMIT,
+        )
+        await work_queue.run(
+            [
+                device
+                for device in self.device_map.values()
+                if not dev_ids or device.id in dev_ids
+            ],
+            self._async_update_single_device_function_cache,
         )
 
-        async def update_single_device(device: XTDevice):
-            await XTEventLoopProtector.execute_out_of_event_loop_and_return(
-                self.update_device_function_cache, [device.id]
-            )
-
-        for device in device_map:
-            concurrency_manager.add_coroutine(update_single_device(device))
-        await concurrency_manager.gather()
+    async def _async_update_single_device_function_cache(self, device: XTDevice):
+        # The specification and the properties of a device are independent
+        specification, (shadow_response, product_schema) = await asyncio.gather(
+            self.device_manage.async_get_device_specification(device.id),  # type: ignore
+            self._async_get_open_api_device_data(device),
+        )
+        await XTEventLoopProtector.execute_out_of_event_loop_and_return(
+            self._apply_device_function_cache,
+            device,
+            specification,
+            shadow_response,
+            product_schema,
+        )
 
     def update_device_function_cache(self, devIds: list = []):
-        for device_id in self.device_map:
-            device = self.device_map[device_id]
-            if device_id in devIds or not devIds:
-                super().update_device_function_cache(devIds=[device_id])
-                device_open_api = self.get_open_api_device(device)
-                XTMergingManager.merge_devices(
-                    device, device_open_api, self.multi_manager
-                )
-                self.multi_manager.virtual_state_handler.apply_init_virtual_states(
-                    device
+        dev_ids = set(devIds)
+        for device in list(self.device_map.values()):
+            if not dev_ids or device.id in dev_ids:
+                shadow_response, product_schema = self._get_open_api_device_data(device)
+                self._apply_device_function_cache(
+                    device,
+                    self.get_device_specification(device.id),
+                    shadow_response,
+                    product_schema,
                 )
 
-    def on_message(self, msg: dict):
+    def _apply_device_function_cache(
+        self,
+        device: XTDevice,
+        specification: dict[str, Any],
+        shadow_response: dict[str, Any],
+        product_schema: XTProductSchema | None,
+    ):
+        if specification.get("success"):
+            result = specification.get("result", {})
+            device.function = {
+                function["code"]: TuyaDeviceFunction(**function)
+                for function in result["functions"]
+            }
+            device.status_range = {
+                status["code"]: TuyaDeviceStatusRange(**status)
+                for status in result["status"]
+            }
+        device_open_api = self._build_open_api_device(
+            device, shadow_response, product_schema
+        )
+        XTMergingManager.merge_devices(device, device_open_api, self.multi_manager)
+        self.multi_manager.virtual_state_handler.apply_init_virtual_states(device)
+
+    def on_message(self, msg: dict, report: list[XTDeviceReportItem] | None = None):
+        data = msg.get("data", {})
+        if report is not None and msg.get("protocol", 0) == PROTOCOL_DEVICE_REPORT:
+            if status := data.get("status", None):
+                self._on_device_report(data["devId"], status, report)
+            return
         super().on_message(msg)
 
     def _on_device_other(self, device_id: str, biz_code: str, data: dict[str, Any]):
@@ -344,7 +406,12 @@ class XTIOTDeviceManager(TuyaDeviceManager):
             for listener in self.device_listeners:
                 listener.add_device(device)
 
-    def _on_device_report(self, device_id: str, status: list[dict[str, Any]]):
+    def _on_device_report(
+        self,
+        device_id: str,
+        status: list[dict[str, Any]],
+        report: list[XTDeviceReportItem] | None = None,
+    ):
         self.multi_manager.device_watcher.report_message(
             device_id,
             f"[{MESSAGE_SOURCE_TUYA_IOT}]On device report: {status=}",
@@ -355,21 +422,22 @@ class XTIOTDeviceManager(TuyaDeviceManager):
             return
         updated_status_properties = []
         dp_timestamps = {}
-        status_new = self.multi_manager.convert_device_report_status_list(
-            device_id,
-            status,
-            MESSAGE_SOURCE_TUYA_IOT,
-        )
-        status_new = self.multi_manager.multi_source_handler.filter_status_list(
-            device_id, MESSAGE_SOURCE_TUYA_IOT, status_new
+        if report is None:
+            report = self.multi_manager.resolve_device_report(
+                device_id,
+                status,
+                MESSAGE_SOURCE_TUYA_IOT,
+            )
+        report = self.multi_manager.multi_source_handler.filter_status_list(
+            device_id, MESSAGE_SOURCE_TUYA_IOT, report
         )
-        status_new = self.multi_manager.virtual_state_handler.apply_virtual_states_to_status_list(
-            device, status_new, MESSAGE_SOURCE_TUYA_IOT
+        report = self.multi_manager.virtual_state_handler.apply_virtual_states_to_status_list(
+            device, report, MESSAGE_SOURCE_TUYA_IOT
         )
-        for item in status_new:
-            if "code" in item and "value" in item:
-                code = item["code"]
-                value = item["value"]
+        for item in report:
+            if item.code is not None:
+                code = item.code
+                value = item.value
                 self.multi_manager.device_watcher.report_message(
                     device.id,
                     f"Status update before conversion: {code} => {value}",
@@ -387,9 +455,11 @@ class XTIOTDeviceManager(TuyaDeviceManager):
                     False,
                     code,
                 )
+                if not self.multi_manager.is_reported_value_valid(device, code, value):
+                    continue
                 device.status[code] = value
                 updated_status_properties.append(code)
-                if t := item.get("t"):
+                if t := item.t:
                     dp_timestamps[code] = t
 
         self._update_device(
@@ -415,7 +485,35 @@ class XTIOTDeviceManager(TuyaDeviceManager):
             self.device_map[device_id] = XTDevice(**item)
             self.device_map[device_id].source = "IOT _update_device_list_info_cache"
 
-    def get_open_api_device(self, device: XTDevice) -> XTDevice | None:
+    def get_open_api_device(self, device: XTDevice) -> XTDevice:
+        return self._build_open_api_device(
+            device, *self._get_open_api_device_data(device)
+        )
+
+    def _get_open_api_device_data(
+        self, device: XTDevice
+    ) -> tuple[dict[str, Any], XTProductSchema | None]:
+        response = self.api.get(f"/v2.0/cloud/thing/{device.id}/shadow/properties")
+        if not response.get("success"):
+            LOGGER.warning(f"Response1: {response}: {device.id=}")
+        return response, self._get_product_schema(device, response)
+
+    async def _async_get_open_api_device_data(
+        self, device: XTDevice
+    ) -> tuple[dict[str, Any], XTProductSchema | None]:
+        response = await self.api.async_get(
+            f"/v2.0/cloud/thing/{device.id}/shadow/properties"
+        )
+        if not response.get("success"):
+            LOGGER.warning(f"Response1: {response}: {device.id=}")
+        return response, await self._async_get_product_schema(device, response)
+
+    def _build_open_api_device(
+        self,
+        device: XTDevice,
+        response: dict[str, Any],
+        product_schema: XTProductSchema | None,
+    ) -> XTDevice:
         device_properties = XTDevice.from_compatible_device(
             device, "IOT get_open_api_device"
         )
@@ -424,57 +522,12 @@ class XTIOTDeviceManager(TuyaDeviceManager):
         device_properties.status = {}
         device_properties.local_strategy = {}
         device_properties.device_source_priority = XTDeviceSourcePriority.TUYA_IOT
-        response = self.api.get(f"/v2.0/cloud/thing/{device.id}/shadow/properties")
-        response2 = self.api.get(f"/v2.0/cloud/thing/{device.id}/model")
-        if not response.get("success") or not response2.get("success"):
-            LOGGER.warning(f"Response1: {response}: {device.id=}")
-            LOGGER.warning(f"Response2: {response2}: {device.id=}")
-
-        if response2.get("success", False):
-            result = response2.get("result", {})
-            data_model = json.loads(result.get("model", "{}"))
-            device_properties.data_model = data_model
-            for service in data_model.get("services", {}):
-                for property in service.get("properties", {}):
-                    if (
-                        "abilityId" in property
-                        and "code" in property
-                        and "accessMode" in property
-                        and "typeSpec" in property
-                    ):
-                        dp_id = int(property["abilityId"])
-                        code = property["code"]
-                        typeSpec = property["typeSpec"]
-                        real_type = TuyaDPType.try_parse(typeSpec["type"])
-                        access_mode = property["accessMode"]
-                        typeSpec.pop("type")
-                        typeSpec_json = json.dumps(typeSpec)
-                        if dp_id not in device_properties.local_strategy:
-                            if (
-                                code in device_properties.function
-                                or code in device_properties.status_range
-                            ):
-                                property_update = False
-                            else:
-                                property_update = True
-                            device_properties.local_strategy[dp_id] = {
-                                "value_convert": "default",
-                                "status_code": code,
-                                "config_item": {
-                                    "statusFormat": f'{{"{code}":"$"}}',
-                                    "valueDesc": typeSpec_json,
-                                    "valueType": real_type,
-                                    "pid": device.product_id,
-                                },
-                                "property_update": property_update,
-                                "use_open_api": True,
-                                "access_mode": access_mode,
-                                "status_code_alias": [],
-                            }
-                            if code in device_properties.status_range:
-                                device_properties.status_range[code].dp_id = dp_id
-                            if code in device_properties.function:
-                                device_properties.function[code].dp_id = dp_id
+
+        if product_schema is not None:
+            device_properties.data_model = product_schema.data_model
+            device_properties.local_strategy = copy.deepcopy(
+                self._get_product_local_strategy(product_schema, device.product_id)
+            )
 
         if response.get("success", False):
             result = response.get("result", {})
@@ -551,23 +604,186 @@ class XTIOTDeviceManager(TuyaDeviceManager):
         # self.multi_manager.device_watcher.report_message(device_properties.id, f"get_open_api_device: {device}", device_properties)
         return device_properties
 
+    def _get_product_schema(
+        self, device: XTDevice, shadow_response: dict[str, Any]
+    ) -> XTProductSchema | None:
+        # Devices of the same product share the same thing model, only fetch it
+        # once per product and keep it in the storage so that restarts don't
+        # have to fetch it again.
+        product_id = device.product_id
+        if not product_id:
+            return self._fetch_product_schema(device, shadow_response)
+        storage_manager = self.multi_manager.storage_manager
+        with self._product_schema_locks.setdefault(product_id, threading.Lock()):
+            product_schema = storage_manager.get_product_schema(product_id)
+            if product_schema is not None and self._is_product_schema_valid(
+                product_schema, shadow_response
+            ):
+                return product_schema
+            return self._update_product_schema(
+                product_id,
+                product_schema,
+                self._fetch_product_schema(device, shadow_response),
+            )
+
+    async def _async_get_product_schema(
+        self, device: XTDevice, shadow_response: dict[str, Any]
+    ) -> XTProductSchema | None:
+        # Same as _get_product_schema, the devices of a product wait for the
+        # first one to fetch the model
+        product_id = device.product_id
+        if not product_id:
+            return await self._async_fetch_product_schema(device, shadow_response)
+        storage_manager = self.multi_manager.storage_manager
+        async with self._async_product_schema_locks.setdefault(
+            product_id, asyncio.Lock()
+        ):
+            product_schema = storage_manager.get_product_schema(product_id)
+            if product_schema is not None and self._is_product_schema_valid(
+                product_schema, shadow_response
+            ):
+                return product_schema
+            return self._update_product_schema(
+                product_id,
+                product_schema,
+                await self._async_fetch_product_schema(device, shadow_response),
+            )
+
+    def _update_product_schema(
+        self,
+        product_id: str,
+        product_schema: XTProductSchema | None,
+        new_product_schema: XTProductSchema | None,
+    ) -> XTProductSchema | None:
+        if new_product_schema is None:
+            # Keep using the previous model if the cloud didn't answer
+            return product_schema
+        if (
+            product_schema is not None
+            and product_schema.model_hash == new_product_schema.model_hash
+        ):
+            # Same model, keep the already built template and the DPIds
+            # reported by the other devices of this product
+            new_product_schema.local_strategy = product_schema.local_strategy
+            new_product_schema.known_dp_ids = sorted(
+                set(new_product_schema.known_dp_ids).union(product_schema.known_dp_ids)
+            )
+        self.multi_manager.storage_manager.set_product_schema(
+            product_id, new_product_schema
+        )
+        return new_product_schema
+
+    def _is_product_schema_valid(
+        self, product_schema: XTProductSchema, shadow_response: dict[str, Any]
+    ) -> bool:
+        if product_schema.is_expired(XT_PRODUCT_SCHEMA_MAX_AGE):
+            return False
+        if shadow_response.get("success", False):
+            # A DPId that was never seen for this product means that the model changed
+            known_dp_ids = set(product_schema.known_dp_ids)
+            for dp_property in shadow_response.get("result", {}).get("properties", []):
+                if (
+                    "dp_id" in dp_property
+                    and int(dp_property["dp_id"]) not in known_dp_ids
+                ):
+                    return False
+        return True
+
+    def _fetch_product_schema(
+        self, device: XTDevice, shadow_response: dict[str, Any]
+    ) -> XTProductSchema | None:
+        response = self.api.get(f"/v2.0/cloud/thing/{device.id}/model")
+        return self._parse_product_schema(device, shadow_response, response)
+
+    async def _async_fetch_product_schema(
+        self, device: XTDevice, shadow_response: dict[str, Any]
+    ) -> XTProductSchema | None:
+        response = await self.api.async_get(f"/v2.0/cloud/thing/{device.id}/model")
+        return self._parse_product_schema(device, shadow_response, response)
+
+    def _parse_product_schema(
+        self,
+        device: XTDevice,
+        shadow_response: dict[str, Any],
+        response: dict[str, Any],
+    ) -> XTProductSchema | None:
+        if not response.get("success", False):
+            LOGGER.warning(f"Response2: {response}: {device.id=}")
+            return None
+        model: str = response.get("result", {}).get("model", "{}")
+        product_schema = XTProductSchema(
+            model_hash=hashlib.sha256(model.encode()).hexdigest(),
+            data_model=json.loads(model),
+            fetched_at=time.time(),
+        )
+        known_dp_ids: set[int] = set(
+            self._get_product_local_strategy(product_schema, device.product_id).keys()
+        )
+        if shadow_response.get("success", False):
+            for dp_property in shadow_response.get("result", {}).get("properties", []):
+                if "dp_id" in dp_property:
+                    known_dp_ids.add(int(dp_property["dp_id"]))
+        product_schema.known_dp_ids = sorted(known_dp_ids)
+        return product_schema
+
+    def _get_product_local_strategy(
+        self, product_schema: XTProductSchema, product_id: str
+    ) -> dict[int, dict[str, Any]]:
+        # The returned dict is shared by every device of the product, callers
+        # must copy it before handing it to a device
+        if product_schema.local_strategy is not None:
+            return product_schema.local_strategy
+        local_strategy: dict[int, dict[str, Any]] = {}
+        for service in product_schema.data_model.get("services", {}):
+            for property in service.get("properties", {}):
+                if (
+                    "abilityId" in property
+                    and "code" in property
+                    and "accessMode" in property
+                    and "typeSpec" in property
+                ):
+                    dp_id = int(property["abilityId"])
+                    code = property["code"]
+                    typeSpec = {
+                        key: value
+                        for key, value in property["typeSpec"].items()
+                        if key != "type"
+                    }
+                    real_type = TuyaDPType.try_parse(property["typeSpec"].get("type"))
+                    access_mode = property["accessMode"]
+                    if dp_id not in local_strategy:
+                        local_strategy[dp_id] = {
+                            "value_convert": "default",
+                            "status_code": code,
+                            "config_item": {
+                                "statusFormat": f'{{"{code}":"$"}}',
+                                "valueDesc": json.dumps(typeSpec),
+                                "valueType": real_type,
+                                "pid": product_id,
+                            },
+                            "property_update": True,
+                            "use_open_api": True,
+                            "access_mode": access_mode,
+                            "status_code_alias": [],
+                        }
+        product_schema.local_strategy = local_strategy
+        return local_strategy
+
     def send_property_update(self, device_id: str, properties: list[dict[str, Any]]):
+        # The properties of a dict are issued together
         for property in properties:
-            for prop_key in property:
-                property_str = json.dumps({prop_key: property[prop_key]})
-                self.multi_manager.device_watcher.report_message(
-                    device_id,
-                    f"Sending property update, payload: {json.dumps({'properties': property_str})}",
-                    XTDeviceWatcherCategory.IOT_API,
-                )
-                result = self.api.post(
-                    f"/v2.0/cloud/thing/{device_id}/shadow/properties/issue",
-                    {"properties": property_str},
-                )
-                if result.get("success") is False:
-                    raise Exception(
-                        f"send_property_update error:({properties}): {result}"
-                    )
+            property_str = json.dumps(property)
+            self.multi_manager.device_watcher.report_message(
+                device_id,
+                f"Sending property update, payload: {json.dumps({'properties': property_str})}",
+                XTDeviceWatcherCategory.IOT_API,
+            )
+            result = self.api.post(
+                f"/v2.0/cloud/thing/{device_id}/shadow/properties/issue",
+                {"properties": property_str},
+            )
+            if result.get("success") is False:
+                raise Exception(f"send_property_update error:({properties}): {result}")
 
     def send_lock_unlock_command(
         self,
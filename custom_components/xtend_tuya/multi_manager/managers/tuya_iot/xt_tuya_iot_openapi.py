@@ -56,3 +56,12 @@ class XTIOTOpenAPI(TuyaOpenAPI):
             )
         else:
             return super().report_message(method, message, stack_info)
+
+    def is_reporting(self, method: str) -> bool:
+        if self.multi_manager:
+            return self.multi_manager.device_watcher.will_report(
+                dev_id=XTDeviceWatcherSpecialDevice.NOT_LINKED_TO_A_DEVICE,
+                category=XTDeviceWatcherCategory.IOT_API,
+                method=method,
+            )
+        return super().is_reporting(method)
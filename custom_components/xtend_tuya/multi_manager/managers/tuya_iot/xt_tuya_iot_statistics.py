@@ -0,0 +1,306 @@
+from __future__ import annotations
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import partial
+from typing import TYPE_CHECKING, Any
+from ....const import (
+    LOGGER,
+    XT_CONSUMPTION_STATISTICS_CONCURRENCY,
+    XT_CONSUMPTION_STATISTICS_RATE_LIMIT,
+)
+from ...shared.shared_classes import (
+    XTDevice,
+)
+from ...shared.threading import (
+    XTAsyncWorkQueue,
+)
+
+if TYPE_CHECKING:
+    from .xt_tuya_iot_manager import (
+        XTIOTDeviceManager,
+    )
+
+
+@dataclass
+class XTStatisticsQuery:
+    code: str
+    stat_type: str
+    granularity: str
+    start: str
+    end: str
+    success: bool = False
+
+
+class XTIOTStatisticsFetcher:
+    """Fetches the consumption history of the devices from the OpenAPI.
+
+    The statistic types are fetched once per product. The day and hour buckets
+    received are kept in their own store, an import only queries the cloud
+    from the last bucket it already has. The queries run concurrently, rate
+    limited.
+    """
+
+    HISTORY_VERSION: int = 1
+    DAYS: str = "days"
+    HOURS: str = "hours"
+
+    # Granularity => (start parameter, end parameter)
+    QUERY_PARAMETERS: dict[str, tuple[str, str]] = {
+        DAYS: ("start_day", "end_day"),
+        HOURS: ("start_hour", "end_hour"),
+    }
+
+    def __init__(self, device_manager: XTIOTDeviceManager) -> None:
+        self.device_manager = device_manager
+        # Product ID => statistic types of the product
+        self.statistic_types: dict[str, list[dict[str, Any]]] = {}
+        # Device ID => code => buckets per granularity and the last bucket
+        # fetched per granularity, loaded on first use
+        self._history: dict[str, dict[str, dict[str, Any]]] | None = None
+        self._history_lock = asyncio.Lock()
+
+    async def async_get_statistic_types(self, device: XTDevice) -> list[dict[str, Any]]:
+        if (
+            device.product_id
+            and (statistic_types := self.statistic_types.get(device.product_id))
+            is not None
+        ):
+            return statistic_types
+        response = await self.device_manager.api.async_get(
+            f"/v1.0/devices/{device.id}/all-statistic-type"
+        )
+        statistic_types = response.get("result", [])
+        if response.get("success", False) and device.product_id:
+            self.statistic_types[device.product_id] = statistic_types
+        return statistic_types
+
+    async def async_get_consumption_history(
+        self,
+        device: XTDevice,
+        start_day: str,
+        end_day: str,
+        start_day_and_hour: str,
+        end_day_and_hour: str,
+    ) -> dict[str, dict[float, float]]:
+        """Day buckets (at noon) followed by hour buckets, per code."""
+        statistic_types = await self.async_get_statistic_types(device)
+        device_history = (await self._async_load_history()).setdefault(device.id, {})
+        queries: list[XTStatisticsQuery] = []
+        codes: list[str] = []
+        for statistic_type in statistic_types:
+            code = statistic_type.get("code")
+            stat_type = statistic_type.get("stat_type")
+            if code is None:
+                continue
+            codes.append(code)
+            code_history = device_history.setdefault(
+                code,
+                {XTIOTStatisticsFetcher.DAYS: {}, XTIOTStatisticsFetcher.HOURS: {}},
+            )
+            start, end = self._get_missing_range(
+                code_history, XTIOTStatisticsFetcher.DAYS, start_day, end_day
+            )
+            queries.append(
+                XTStatisticsQuery(
+                    code, stat_type, XTIOTStatisticsFetcher.DAYS, start, end
+                )
+            )
+            start, end = self._get_missing_range(
+                code_history,
+                XTIOTStatisticsFetcher.HOURS,
+                start_day_and_hour,
+                end_day_and_hour,
+            )
+            for start, end in self.split_hour_range_by_day(start, end):
+                queries.append(
+                    XTStatisticsQuery(
+                        code, stat_type, XTIOTStatisticsFetcher.HOURS, start, end
+                    )
+                )
+
+        work_queue = XTAsyncWorkQueue(
+            f"Consumption history of {device.id}",
+            max_concurrency=XT_CONSUMPTION_STATISTICS_CONCURRENCY,
+            rate_limit=XT_CONSUMPTION_STATISTICS_RATE_LIMIT,
+        )
+        await work_queue.run(
+            queries, partial(self._async_run_query, device.id, device_history)
+        )
+        self._update_fetched_ranges(device_history, queries)
+        for code_history in device_history.values():
+            self._prune_buckets(code_history, XTIOTStatisticsFetcher.DAYS, start_day)
+            self._prune_buckets(
+                code_history, XTIOTStatisticsFetcher.HOURS, start_day_and_hour
+            )
+        await self._async_save_history()
+        return self.build_consumption_history(
+            device_history,
+            codes,
+            start_day,
+            end_day,
+            start_day_and_hour,
+            end_day_and_hour,
+        )
+
+    @staticmethod
+    def _get_missing_range(
+        code_history: dict[str, Any], granularity: str, start: str, end: str
+    ) -> tuple[str, str]:
+        # The last bucket fetched may not have been complete, it is fetched again
+        fetched_until: str | None = code_history.get(f"{granularity}_until")
+        if fetched_until is not None and start <= fetched_until <= end:
+            return fetched_until, end
+        return start, end
+
+    @staticmethod
+    def split_hour_range_by_day(
+        start_day_and_hour: str, end_day_and_hour: str
+    ) -> list[tuple[str, str]]:
+        query_ranges: list[tuple[str, str]] = []
+        start_day_and_hour_dt = datetime.strptime(start_day_and_hour, "%Y%m%d%H")
+        end_day_and_hour_dt = datetime.strptime(end_day_and_hour, "%Y%m%d%H")
+        while start_day_and_hour_dt < end_day_and_hour_dt:
+            end_of_start_day = start_day_and_hour_dt.replace(hour=23)
+            if end_of_start_day < end_day_and_hour_dt:
+                query_ranges.append(
+                    (
+                        start_day_and_hour_dt.strftime("%Y%m%d%H"),
+                        end_of_start_day.strftime("%Y%m%d%H"),
+                    )
+                )
+                start_day_and_hour_dt = end_of_start_day.replace(hour=0) + timedelta(
+                    days=1
+                )
+            else:
+                query_ranges.append(
+                    (
+                        start_day_and_hour_dt.strftime("%Y%m%d%H"),
+                        end_day_and_hour_dt.strftime("%Y%m%d%H"),
+                    )
+                )
+                break
+        return query_ranges
+
+    async def _async_run_query(
+        self,
+        device_id: str,
+        device_history: dict[str, dict[str, Any]],
+        query: XTStatisticsQuery,
+    ) -> None:
+        start_parameter, end_parameter = XTIOTStatisticsFetcher.QUERY_PARAMETERS[
+            query.granularity
+        ]
+        params = {
+            "code": query.code,
+            start_parameter: query.start,
+            end_parameter: query.end,
+            "stat_type": query.stat_type,
+        }
+        response = await self.device_manager.api.async_get(
+            f"/v1.0/devices/{device_id}/statistics/{query.granularity}", params
+        )
+        if (result := response.get("result", None)) is None:
+            return None
+        device_history[query.code][query.granularity].update(
+            result.get(query.granularity, {})
+        )
+        query.success = True
+
+    @staticmethod
+    def _update_fetched_ranges(
+        device_history: dict[str, dict[str, Any]], queries: list[XTStatisticsQuery]
+    ) -> None:
+        # The queries are in chronological order, a failed query stops the
+        # fetched range so that it is queried again next time
+        failed: set[tuple[str, str]] = set()
+        for query in queries:
+            if (query.code, query.granularity) in failed:
+                continue
+            if query.success:
+                device_history[query.code][f"{query.granularity}_until"] = query.end
+            else:
+                failed.add((query.code, query.granularity))
+
+    @staticmethod
+    def _prune_buckets(
+        code_history: dict[str, Any], granularity: str, start: str
+    ) -> None:
+        code_history[granularity] = {
+            bucket: value
+            for bucket, value in code_history[granularity].items()
+            if bucket >= start
+        }
+
+    @staticmethod
+    def _strip_leading_zeros(buckets: list[str], values: dict[str, str]) -> list[str]:
+        # The leading empty buckets are from before the device was installed
+        for index, bucket in enumerate(buckets):
+            if values[bucket] != "0.00":
+                return buckets[index:]
+        return []
+
+    @staticmethod
+    def build_consumption_history(
+        device_history: dict[str, dict[str, Any]],
+        codes: list[str],
+        start_day: str,
+        end_day: str,
+        start_day_and_hour: str,
+        end_day_and_hour: str,
+    ) -> dict[str, dict[float, float]]:
+        return_dict: dict[str, dict[float, float]] = {}
+        for code in codes:
+            if (code_history := device_history.get(code)) is None:
+                continue
+            code_buckets: dict[float, float] = {}
+            days: dict[str, str] = code_history[XTIOTStatisticsFetcher.DAYS]
+            for day in XTIOTStatisticsFetcher._strip_leading_zeros(
+                sorted(day for day in days if start_day <= day <= end_day), days
+            ):
+                code_buckets[datetime.strptime(f"{day}12", "%Y%m%d%H").timestamp()] = (
+                    round(float(days[day]), 5)
+                )
+            # The hours were queried (and stripped) one day at a time
+            hours: dict[str, str] = code_history[XTIOTStatisticsFetcher.HOURS]
+            hours_by_day: dict[str, list[str]] = {}
+            for day_and_hour in sorted(hours):
+                if start_day_and_hour <= day_and_hour <= end_day_and_hour:
+                    hours_by_day.setdefault(day_and_hour[:8], []).append(day_and_hour)
+            for day_hours in hours_by_day.values():
+                for day_and_hour in XTIOTStatisticsFetcher._strip_leading_zeros(
+                    day_hours, hours
+                ):
+                    code_buckets[
+                        datetime.strptime(day_and_hour, "%Y%m%d%H").timestamp()
+                    ] = round(float(hours[day_and_hour]), 5)
+            if code_buckets:
+                return_dict[code] = code_buckets
+        return return_dict
+
+    async def _async_load_history(self) -> dict[str, dict[str, dict[str, Any]]]:
+        async with self._history_lock:
+            if self._history is None:
+                stored_history = (
+                    await self.device_manager.multi_manager.storage_manager.load_consumption_history()
+                )
+                if (
+                    stored_history is not None
+                    and stored_history.get("version")
+                    == XTIOTStatisticsFetcher.HISTORY_VERSION
+                ):
+                    self._history = stored_history.get("devices", {})
+                else:
+                    self._history = {}
+            return self._history
+
+    async def _async_save_history(self) -> None:
+        if self._history is None:
+            return None
+        if not await self.device_manager.multi_manager.storage_manager.save_consumption_history(
+            {
+                "version": XTIOTStatisticsFetcher.HISTORY_VERSION,
+                "devices": self._history,
+            }
+        ):
+            LOGGER.warning("Could not save the consumption history cache")
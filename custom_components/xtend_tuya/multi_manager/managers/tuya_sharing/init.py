@@ -1,7 +1,6 @@
 from __future__ import annotations
 from typing import Optional, Literal, Any
 import json
-from datetime import datetime
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
@@ -24,6 +23,7 @@ from ...shared.shared_classes import (
     XTConfigEntry,
     XTDeviceMap,
     XTDevice,
+    XTDeviceReportItem,
 )
 from .xt_tuya_sharing_data import (
     TuyaSharingData,
@@ -38,6 +38,9 @@ from .xt_tuya_sharing_api import (
     XTSharingAPI,
     XTSharingTokenInfo,
 )
+from .xt_tuya_sharing_mq import (
+    XTSharingMQ,
+)
 from .ha_tuya_integration.config_entry_handler import (
     XTHATuyaIntegrationConfigEntryManager,
 )
@@ -75,10 +78,12 @@ from ....const import (
     LOGGER,
     XTLockingMechanism,
     XTDeviceWatcherCategory,
-    XTDeviceWatcherSpecialDevice,
 )
 
 
+SHARING_COMMAND_API: str = "sharing"
+
+
 def get_plugin_instance() -> XTTuyaSharingDeviceManagerInterface | None:
     return XTTuyaSharingDeviceManagerInterface()
 
@@ -103,7 +108,6 @@ class XTTuyaSharingDeviceManagerInterface(XTDeviceManagerInterface):
         config_entry: XTConfigEntry,
         multi_manager: MultiManager,
     ) -> None:
-        last_time = datetime.now()
         self.multi_manager: MultiManager = multi_manager
         self.hass = hass
         self.sharing_account: TuyaSharingData | None = await self._init_from_entry(
@@ -111,13 +115,6 @@ class XTTuyaSharingDeviceManagerInterface(XTDeviceManagerInterface):
         )
         if self.sharing_account:
             self.multi_manager.register_account(self)
-        self.multi_manager.device_watcher.report_message(
-            XTDeviceWatcherSpecialDevice.NOT_LINKED_TO_A_DEVICE,
-            f"Xtended Tuya {config_entry.title} {datetime.now() - last_time} for setup_from_entry {self.get_type_name()}",
-            XTDeviceWatcherCategory.XT_PERFORMANCE,
-            None,
-            False,
-        )
 
     async def _init_from_entry(
         self, hass: HomeAssistant, config_entry: XTConfigEntry
@@ -247,6 +244,13 @@ class XTTuyaSharingDeviceManagerInterface(XTDeviceManagerInterface):
             return None
         self.sharing_account.device_manager.refresh_mq()
 
+    def get_mqtt_statistics(self) -> dict[str, Any] | None:
+        if self.sharing_account is None or not isinstance(
+            self.sharing_account.device_manager.mq, XTSharingMQ
+        ):
+            return None
+        return self.sharing_account.device_manager.mq.get_statistics()
+
     def remove_device_listeners(self) -> None:
         if self.sharing_account is None:
             return None
@@ -270,10 +274,10 @@ class XTTuyaSharingDeviceManagerInterface(XTDeviceManagerInterface):
                 self.sharing_account.device_manager.terminal_id
             )
 
-    def on_message(self, msg: dict):
+    def on_message(self, msg: dict, report: list[XTDeviceReportItem] | None = None):
         if self.sharing_account is None:
             return None
-        self.sharing_account.device_manager.on_message(msg)
+        self.sharing_account.device_manager.on_message(msg, report)
 
     def query_scenes(self) -> list:
         if self.sharing_account is None:
@@ -370,45 +374,58 @@ class XTTuyaSharingDeviceManagerInterface(XTDeviceManagerInterface):
         ):
             return get_tuya_platform_descriptors(platform)
 
-    def send_command(
+    def get_command_apis(
         self, device_id: str, command: dict[str, Any], reverse_filters: bool = False
-    ) -> bool:
+    ) -> list[str]:
         if self.sharing_account is None:
-            return False
-        regular_commands: list[dict[str, Any]] = []
+            return []
         device = self.multi_manager.device_map.get(device_id)
         if device is None:
-            return False
+            return []
         command_code = command.get("code")
         if command_code is None:
-            return False
+            return []
 
         # Filter commands that require the use of OpenAPI
         if dpId := self.multi_manager._read_dpId_from_code(command_code, device):
             use_open_api: bool = device.local_strategy[dpId].get("use_open_api", False)
             if use_open_api:
                 if reverse_filters is False:
-                    return False
+                    return []
             else:
                 if reverse_filters is True:
-                    return False
-        regular_commands.append(command)
+                    return []
+        return [SHARING_COMMAND_API]
 
+    def send_commands_through_api(
+        self, device_id: str, commands: list[dict[str, Any]], api: str
+    ) -> bool:
+        if self.sharing_account is None or api != SHARING_COMMAND_API:
+            return False
+        device = self.multi_manager.device_map.get(device_id)
+        if device is None:
+            return False
         try:
-            if regular_commands:
-                self.sharing_account.device_manager.send_commands(
-                    device_id, regular_commands
-                )
+            if commands:
+                self.sharing_account.device_manager.send_commands(device_id, commands)
             return True
         except Exception as e:
             self.multi_manager.device_watcher.report_message(
                 device_id,
-                f"[Sharing]Send command failed, device id: {device_id}, commands: {regular_commands}, exception: {e}",
+                f"[Sharing]Send command failed, device id: {device_id}, commands: {commands}, exception: {e}",
                 XTDeviceWatcherCategory.SHARING_API,
                 device=device,
             )
         return False
 
+    def send_command(
+        self, device_id: str, command: dict[str, Any], reverse_filters: bool = False
+    ) -> bool:
+        for api in self.get_command_apis(device_id, command, reverse_filters):
+            if self.send_commands_through_api(device_id, [command], api):
+                return True
+        return False
+
     def convert_to_xt_device(
         self, device: Any, device_source_priority: XTDeviceSourcePriority | None = None
     ) -> XTDevice:
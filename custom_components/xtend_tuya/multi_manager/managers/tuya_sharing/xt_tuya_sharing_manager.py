@@ -40,6 +40,7 @@ from ...multi_manager import (
 from ...shared.shared_classes import (
     XTDevice,
     XTDeviceMap,
+    XTDeviceReportItem,
 )
 import custom_components.xtend_tuya.multi_manager.managers.tuya_sharing.xt_tuya_sharing_device_repository as dr
 import custom_components.xtend_tuya.multi_manager.managers.tuya_sharing.xt_tuya_sharing_mq as mq
@@ -91,10 +92,6 @@ class XTSharingDeviceManager(Manager):  # noqa: F811
                 self.mq.stop()
             self.__other_device_manager.refresh_mq()
             return
-        if self.mq is not None:
-            self.mq.stop()
-            self.mq = None
-
         home_ids = [home.id for home in self.user_homes]
         device = [
             device
@@ -102,6 +99,18 @@ class XTSharingDeviceManager(Manager):  # noqa: F811
             # if hasattr(device, "id") and getattr(device, "set_up", False)
         ]
 
+        if (
+            isinstance(self.mq, mq.XTSharingMQ)
+            and self.mq.is_running()
+            and self.mq.owner_ids == home_ids
+        ):
+            # Only the devices added or removed since are (un)subscribed
+            self.mq.update_devices(device)
+            return
+        if self.mq is not None:
+            self.mq.stop()
+            self.mq = None
+
         if self.customer_api is not None:
             self.mq = mq.XTSharingMQ(
                 self.customer_api,
@@ -174,13 +183,17 @@ class XTSharingDeviceManager(Manager):  # noqa: F811
                 return None
             index += 1
 
-    def on_message(self, msg: dict[str, Any]):
+    def on_message(
+        self,
+        msg: dict[str, Any],
+        report: list[XTDeviceReportItem] | None = None,
+    ):
         try:
             protocol = msg.get("protocol", 0)
             data: dict[str, Any] = msg.get("data", {})
 
             if protocol == PROTOCOL_DEVICE_REPORT:
-                self._on_device_report(data["devId"], data["status"])
+                self._on_device_report(data["devId"], data["status"], report)
             if protocol == PROTOCOL_OTHER and data.get("bizCode") is not None:
                 bizcode: str = cast(str, data.get("bizCode"))
                 dev_id: str | None = data.get("bizData", {}).get("devId")
@@ -254,7 +267,12 @@ class XTSharingDeviceManager(Manager):  # noqa: F811
         if biz_code in [BIZCODE_ONLINE, BIZCODE_OFFLINE]:
             self.multi_manager.update_device_online_status(device_id)
 
-    def _on_device_report(self, device_id: str, status: list):
+    def _on_device_report(
+        self,
+        device_id: str,
+        status: list,
+        report: list[XTDeviceReportItem] | None = None,
+    ):
         self.multi_manager.device_watcher.report_message(
             device_id,
             f"[{MESSAGE_SOURCE_TUYA_SHARING}]On device report: {status=}",
@@ -263,21 +281,22 @@ class XTSharingDeviceManager(Manager):  # noqa: F811
         device = self.device_map.get(device_id, None)
         if not device:
             return
-        status_new = self.multi_manager.convert_device_report_status_list(
-            device_id,
-            status,
-            MESSAGE_SOURCE_TUYA_SHARING,
-        )
-        status_new = self.multi_manager.multi_source_handler.filter_status_list(
-            device_id, MESSAGE_SOURCE_TUYA_SHARING, status_new
+        if report is None:
+            report = self.multi_manager.resolve_device_report(
+                device_id,
+                status,
+                MESSAGE_SOURCE_TUYA_SHARING,
+            )
+        report = self.multi_manager.multi_source_handler.filter_status_list(
+            device_id, MESSAGE_SOURCE_TUYA_SHARING, report
         )
-        status_new = self.multi_manager.virtual_state_handler.apply_virtual_states_to_status_list(
-            device, status_new, MESSAGE_SOURCE_TUYA_SHARING
+        report = self.multi_manager.virtual_state_handler.apply_virtual_states_to_status_list(
+            device, report, MESSAGE_SOURCE_TUYA_SHARING
         )
 
-        self._on_device_report_tuya_sharing(device_id, status_new)
+        self._on_device_report_tuya_sharing(device_id, report)
     
-    def _on_device_report_tuya_sharing(self, device_id: str, status: list[dict[str, Any]]):
+    def _on_device_report_tuya_sharing(self, device_id: str, status: list[XTDeviceReportItem]):
         device = self.device_map.get(device_id, None)
         if not device:
             return
@@ -288,9 +307,9 @@ class XTSharingDeviceManager(Manager):  # noqa: F811
         if device.support_local:
             for item in status:
                 # [{'dpId': 1, 't': 1752456620499, 'value': 120}]
-                if "dpId" in item and "value" in item:
-                    if item["dpId"] not in device.local_strategy:
-                        LOGGER.debug(f"mq _on_device_report unknown dpId: {item['dpId']}")
+                if item.dp_id is not None:
+                    if item.dp_id not in device.local_strategy:
+                        LOGGER.debug(f"mq _on_device_report unknown dpId: {item.dp_id}")
                         continue
                     #CHANGED
                     # dp_id_item = device.local_strategy[item["dpId"]]
@@ -302,35 +321,29 @@ class XTSharingDeviceManager(Manager):  # noqa: F811
                     # code, value = strategy.convert(strategy_name, dp_item, config_item)
                     #END CHANGED
                     #ADDED
-                    dp_id_item = device.local_strategy.get(item["dpId"], {})
-                    code = dp_id_item.get("status_code")
-                    value = item.get("value")
+                    # The code of a resolved item is the status_code of its dpId
+                    code = item.code
+                    value = item.value
                     if code is None:
                         LOGGER.warning(f"Could not read DPCode for {item} of {device.name}, skipping")
                         continue
                     value = device.apply_dpcode_strategy(code, value, self.multi_manager)
                     #END ADDED
 
-                    status_range = device.status_range.get(code, None)
-                    if status_range and status_range.type == "Enum":
-                        try:
-                            range_values = json.loads(status_range.values)
-                            if value not in range_values.get("range", []):
-                                LOGGER.debug(f"mq _on_device_report value not in range value={value}")
-                                continue
-                        except (json.JSONDecodeError, TypeError) as err:
-                            LOGGER.warning(f"mq _on_device_report failed to parse status_range values for {code}: {err}")
+                    if not self.multi_manager.is_reported_value_valid(device, code, value):
+                        LOGGER.debug(f"mq _on_device_report value not in range value={value}")
+                        continue
                     
                     #LOGGER.debug(f"mq _on_device_report after strategy convert code={code},value={value}")
                     device.status[code] = value
                     updated_status_properties.append(code)
-                    if t := item.get("t"):
+                    if t := item.t:
                         dp_timestamps[code] = t
         else:
             for item in status:
-                if "code" in item and "value" in item:
-                    code = item["code"]
-                    value = item["value"]
+                if item.code is not None:
+                    code = item.code
+                    value = item.value
                     device.status[code] = value
                     updated_status_properties.append(code)
 
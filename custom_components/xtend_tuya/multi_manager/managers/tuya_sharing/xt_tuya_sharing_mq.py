@@ -1,5 +1,6 @@
 from __future__ import annotations
 import json
+import threading
 import uuid
 from typing import Any
 from tuya_sharing.mq import (
@@ -12,6 +13,7 @@ from paho.mqtt import client as mqtt
 import custom_components.xtend_tuya.multi_manager.managers.tuya_sharing.xt_tuya_sharing_manager as sm
 from ....const import (
     LOGGER,
+    XT_SHARING_MQTT_SUBSCRIBE_BATCH_SIZE,
     XTDeviceWatcherCategory,
     XTDeviceWatcherSpecialDevice,
 )
@@ -66,24 +68,56 @@ class XTSharingMQ(SharingMQ):
         )
         self.manager = manager
         self.shutting_down = False
+        self._topic_lock = threading.Lock()
+        # Device topics acknowledged by the broker on the current connection
+        self._subscribed_topics: set[str] = set()
+        # Message ID => device topics of a SUBSCRIBE not acknowledged yet
+        self._pending_subscriptions: dict[int, list[str]] = {}
+        self.subscribe_packets = 0
+        self.unsubscribe_packets = 0
+        self.rejected_topics = 0
+
+    def is_running(self) -> bool:
+        return self.is_alive() and not self.shutting_down and self.client is not None
+
+    def get_device_topics(self, device_id: str) -> list[str]:
+        return [
+            self.subscribe_topic(device_id, True),
+            self.subscribe_topic(device_id, False),
+        ]
 
     def subscribe_device(self, dev_id: str, device: CustomerDevice):
         if device is None:
             return
-        self.device.append(device)
-        self.subscribe_to_mqtt_topics(device)
+        if all(known_device.id != dev_id for known_device in self.device):
+            self.device.append(device)
+        self.subscribe_to_mqtt_topics(self.get_device_topics(dev_id))
 
     def un_subscribe_device(self, dev_id: str, support_local: bool):
-        topic1 = self.subscribe_topic(dev_id, True)
-        topic2 = self.subscribe_topic(dev_id, False)
-        if self.client is not None:
-            self.client.unsubscribe([topic1, topic2])
-        else:
-            self.manager.multi_manager.device_watcher.report_message(
-                dev_id,
-                f"Could not unsubscribe to topics: {topic1=} {topic2=}",
-                XTDeviceWatcherCategory.MQTT,
-            )
+        self.device = [device for device in self.device if device.id != dev_id]
+        self.unsubscribe_from_mqtt_topics(self.get_device_topics(dev_id))
+
+    def update_devices(self, devices: list[sm.XTDevice]) -> None:
+        """Only subscribes to the topics of the new devices and unsubscribes from the removed ones."""
+        self.device = list(devices)
+        if self.mq_config is None:
+            # The topics are subscribed on connection
+            return None
+        wanted_topics: list[str] = []
+        for device in devices:
+            wanted_topics.extend(self.get_device_topics(device.id))
+        with self._topic_lock:
+            known_topics = self._get_known_topics()
+        self.unsubscribe_from_mqtt_topics(
+            sorted(known_topics.difference(wanted_topics))
+        )
+        self.subscribe_to_mqtt_topics(wanted_topics)
+
+    def _get_known_topics(self) -> set[str]:
+        known_topics = set(self._subscribed_topics)
+        for topics in self._pending_subscriptions.values():
+            known_topics.update(topics)
+        return known_topics
 
     def _start(self, mq_config: SharingMQConfig) -> mqtt.Client:
         # mqttc = mqtt.Client(callback_api_version=mqtt_CallbackAPIVersion.VERSION2, client_id=mq_config.client_id)
@@ -122,8 +156,21 @@ class XTSharingMQ(SharingMQ):
             listener(msg_dict)
     
     def _on_subscribe(self, mqttc: mqtt.Client, user_data: Any, mid, granted_qos):
-        #LOGGER.debug(f"[SHARING] on_subscribe: {user_data=} {mid=} {granted_qos=}")
-        pass
+        with self._topic_lock:
+            topics = self._pending_subscriptions.pop(mid, [])
+            rejected_topics: list[str] = []
+            for topic, qos in zip(topics, granted_qos):
+                if qos >= 0x80:
+                    rejected_topics.append(topic)
+                else:
+                    self._subscribed_topics.add(topic)
+            self.rejected_topics += len(rejected_topics)
+        if rejected_topics:
+            self.manager.multi_manager.device_watcher.report_message(
+                XTDeviceWatcherSpecialDevice.NOT_LINKED_TO_A_DEVICE,
+                f"[SHARING] Subscription refused for topics: {rejected_topics=} {mid=}",
+                XTDeviceWatcherCategory.MQTT,
+            )
 
     def _get_mqtt_config(self) -> SharingMQConfig:
         link_id = f"tuya-device-sharing-sdk-python.{uuid.uuid1()}"
@@ -134,35 +181,79 @@ class XTSharingMQ(SharingMQ):
 
         return XTMQConfig(response)
 
-    def subscribe_to_mqtt_topics(self, device: CustomerDevice) -> None:
-        topic1 = self.subscribe_topic(device.id, True)
-        topic2 = self.subscribe_topic(device.id, False)
-        if self.client is not None:
-            error, mid = self.client.subscribe((topic1, 0))
-            if error:
-                self.manager.multi_manager.device_watcher.report_message(
-                    device.id,
-                    f"[SHARING] Subscribed to topics: {topic1=} {error=} {mid=}",
-                    XTDeviceWatcherCategory.MQTT,
-                )
-            error, mid = self.client.subscribe((topic2, 0))
-            if error:
-                self.manager.multi_manager.device_watcher.report_message(
-                    device.id,
-                    f"[SHARING] Subscribed to topics: {topic2=} {error=} {mid=}",
-                    XTDeviceWatcherCategory.MQTT,
-                )
-        else:
+    def subscribe_to_mqtt_topics(
+        self, topics: list[str], client: mqtt.Client | None = None
+    ) -> None:
+        client = client or self.client
+        if client is None:
             self.manager.multi_manager.device_watcher.report_message(
-                device.id,
-                f"[SHARING] Could not subscribe to topics: {topic1=} {topic2=}",
+                XTDeviceWatcherSpecialDevice.NOT_LINKED_TO_A_DEVICE,
+                f"[SHARING] Could not subscribe to topics: {topics=}",
                 XTDeviceWatcherCategory.MQTT,
             )
+            return None
+        with self._topic_lock:
+            known_topics = self._get_known_topics()
+            topics = [
+                topic for topic in dict.fromkeys(topics) if topic not in known_topics
+            ]
+            for i in range(0, len(topics), XT_SHARING_MQTT_SUBSCRIBE_BATCH_SIZE):
+                batch = topics[i : i + XT_SHARING_MQTT_SUBSCRIBE_BATCH_SIZE]
+                error, mid = client.subscribe([(topic, 0) for topic in batch])
+                if error:
+                    self.manager.multi_manager.device_watcher.report_message(
+                        XTDeviceWatcherSpecialDevice.NOT_LINKED_TO_A_DEVICE,
+                        f"[SHARING] Subscribed to topics: {batch=} {error=} {mid=}",
+                        XTDeviceWatcherCategory.MQTT,
+                    )
+                    continue
+                # Acknowledged in _on_subscribe
+                self._pending_subscriptions[mid] = batch
+                self.subscribe_packets += 1
+
+    def unsubscribe_from_mqtt_topics(self, topics: list[str]) -> None:
+        if not topics:
+            return None
+        if self.client is None:
+            self.manager.multi_manager.device_watcher.report_message(
+                XTDeviceWatcherSpecialDevice.NOT_LINKED_TO_A_DEVICE,
+                f"Could not unsubscribe to topics: {topics=}",
+                XTDeviceWatcherCategory.MQTT,
+            )
+            return None
+        with self._topic_lock:
+            self._subscribed_topics.difference_update(topics)
+            for mid, pending_topics in list(self._pending_subscriptions.items()):
+                self._pending_subscriptions[mid] = [
+                    topic for topic in pending_topics if topic not in topics
+                ]
+            for i in range(0, len(topics), XT_SHARING_MQTT_SUBSCRIBE_BATCH_SIZE):
+                self.client.unsubscribe(
+                    topics[i : i + XT_SHARING_MQTT_SUBSCRIBE_BATCH_SIZE]
+                )
+                self.unsubscribe_packets += 1
+
+    def get_statistics(self) -> dict[str, Any]:
+        with self._topic_lock:
+            return {
+                "devices": len(self.device),
+                "subscribed_topics": len(self._subscribed_topics),
+                "pending_topics": sum(
+                    len(topics) for topics in self._pending_subscriptions.values()
+                ),
+                "rejected_topics": self.rejected_topics,
+                "subscribe_packets": self.subscribe_packets,
+                "unsubscribe_packets": self.unsubscribe_packets,
+            }
 
     def _on_connect(self, mqttc: mqtt.Client, user_data: Any, flags, rc):
         if rc == 0:
             if self.mq_config is None:
                 return
+            # A new session starts without any subscription
+            with self._topic_lock:
+                self._subscribed_topics.clear()
+                self._pending_subscriptions.clear()
             for owner_id in self.owner_ids:
                 owner_topic = self.mq_config.owner_topic.format(ownerId=owner_id)
                 error, mid = mqttc.subscribe(owner_topic)
@@ -172,25 +263,9 @@ class XTSharingMQ(SharingMQ):
                             f"[SHARING] Subscribed to owner topic: {owner_topic=} {error=} {mid=}",
                             XTDeviceWatcherCategory.MQTT,
                         )
+            topics: list[str] = []
             for dev in self.device:
-                self.subscribe_to_mqtt_topics(dev)
-            # batch_size = 10
-            # for i in range(0, len(self.device), batch_size):
-            #     batch_devices = self.device[i : i + batch_size]
-            #     topics_to_subscribe = []
-            #     for dev in batch_devices:
-            #         dev_id = dev.id
-            #         topic_str = self.subscribe_topic(dev_id, False)
-            #         topics_to_subscribe.append((topic_str, 0))  # 指定主题和qos=0
-            #         topic_str = self.subscribe_topic(dev_id, True)
-            #         topics_to_subscribe.append((topic_str, 0))  # 指定主题和qos=0
-
-            #     if topics_to_subscribe:
-            #         mqttc.subscribe(topics_to_subscribe)
-            #         self.manager.multi_manager.device_watcher.report_message(
-            #             XTDeviceWatcherSpecialDevice.NOT_LINKED_TO_A_DEVICE,
-            #             f"[SHARING] Subscribed to topics: {topics_to_subscribe=}",
-            #             XTDeviceWatcherCategory.MQTT,
-            #         )
+                topics.extend(self.get_device_topics(dev.id))
+            self.subscribe_to_mqtt_topics(topics, mqttc)
         else:
             super()._on_connect(mqttc, user_data, flags, rc)
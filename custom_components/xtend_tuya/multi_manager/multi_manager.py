@@ -1,5 +1,4 @@
 from __future__ import annotations
-import copy
 import importlib
 import os
 import inspect
@@ -30,6 +29,7 @@ from ..const import (
     XT_DEVICE_EVENT_NOTIFY_DPCODE,
     XTEntityAccessMode,
     XTAcceptableStoragePropertyValue,
+    XT_COMMAND_COALESCING_WINDOW,
 )
 from .shared.shared_classes import (
     DeviceWatcher,
@@ -38,6 +38,7 @@ from .shared.shared_classes import (
     XTDevice,
     XTTrackedDictionnary,
     XTDeviceStatusRange,
+    XTDeviceReportItem,
 )
 from ..ha_tuya_integration.tuya_integration_imports import (
     TuyaDPType,
@@ -50,11 +51,15 @@ from .shared.threading import (
 from .shared.debug.debug_helper import (
     DebugHelper,
 )
+from .shared.debug.startup_tracer import (
+    XTStartupTracer,
+)
 from .shared.merging_manager import (
     XTMergingManager,
 )
 from .shared.cloud_fix import (
     CloudFixes,
+    XTCloudFixStatistics,
 )
 from .shared.multi_source_handler import (
     MultiSourceHandler,
@@ -71,6 +76,21 @@ from .shared.multi_virtual_state_handler import (
 from .shared.multi_virtual_function_handler import (
     XTVirtualFunctionHandler,
 )
+from .shared.registry_sync import (
+    XTRegistrySync,
+)
+from .shared.warm_start import (
+    XTWarmStart,
+)
+from .shared.command_router import (
+    XTCommandRouter,
+)
+from .shared.command_queue import (
+    XTCommandQueue,
+)
+from .shared.value_validator import (
+    XTRejectedValues,
+)
 from ..util import (
     append_lists,
 )
@@ -98,7 +118,16 @@ class MultiManager(TuyaManager):
         self.hass = hass
         self.multi_source_handler = MultiSourceHandler(self)
         self.device_watcher = DeviceWatcher(self)
+        self.registry_sync = XTRegistrySync(hass, self)
         self.storage_manager = XTStorageManager(hass, config_entry, self)
+        self.startup_tracer = XTStartupTracer(self)
+        self.warm_start = XTWarmStart(hass, self)
+        self.command_router = XTCommandRouter(self)
+        self.command_queue = XTCommandQueue(
+            self.command_router, window=XT_COMMAND_COALESCING_WINDOW
+        )
+        self.rejected_values = XTRejectedValues()
+        self.cloud_fix_statistics = XTCloudFixStatistics()
         self.accounts: dict[str, XTDeviceManagerInterface] = {}
         self.master_device_map: XTDeviceMap = XTDeviceMap({})
         self.is_ready_for_messages = False
@@ -155,25 +184,31 @@ class MultiManager(TuyaManager):
             ):
                 load_path = f".managers.{directory}.init"
                 try:
-                    plugin = (
-                        await XTEventLoopProtector.execute_out_of_event_loop_and_return(
+                    with self.startup_tracer.span(f"import_plugin:{directory}"):
+                        plugin = await XTEventLoopProtector.execute_out_of_event_loop_and_return(
                             importlib.import_module,
                             name=load_path,
                             package=__package__,
                         )
-                    )
                     # LOGGER.debug(f"Plugin {load_path} loaded")
                     instance: XTDeviceManagerInterface = plugin.get_plugin_instance()
                     concurrency_manager.add_coroutine(
-                        instance.setup_from_entry(self.hass, self.config_entry, self)
+                        self._setup_account_from_entry(directory, instance)
                     )
                 except ModuleNotFoundError as e:
                     LOGGER.error(f"Loading module failed: {e}")
         await concurrency_manager.gather()
         for account in self.accounts.values():
-            await XTEventLoopProtector.execute_out_of_event_loop_and_return(
-                account.on_post_setup
-            )
+            with self.startup_tracer.span(f"post_setup:{account.get_type_name()}"):
+                await XTEventLoopProtector.execute_out_of_event_loop_and_return(
+                    account.on_post_setup
+                )
+
+    async def _setup_account_from_entry(
+        self, directory: str, instance: XTDeviceManagerInterface
+    ) -> None:
+        with self.startup_tracer.span(f"setup_from_entry:{directory}"):
+            await instance.setup_from_entry(self.hass, self.config_entry, self)
 
     async def setup_entity_parsers(self) -> None:
         await XTCustomEntityParser.setup_entity_parsers(self.hass, self)
@@ -196,6 +231,20 @@ class MultiManager(TuyaManager):
                 return_list.append(new_descriptors)
         return return_list
 
+    def get_mqtt_statistics(self) -> dict[str, Any]:
+        statistics: dict[str, Any] = {}
+        for account_name, account in self.accounts.items():
+            if account_statistics := account.get_mqtt_statistics():
+                statistics[account_name] = account_statistics
+        return statistics
+
+    def get_api_statistics(self) -> dict[str, Any]:
+        statistics: dict[str, Any] = {}
+        for account_name, account in self.accounts.items():
+            if account_statistics := account.get_api_statistics():
+                statistics[account_name] = account_statistics
+        return statistics
+
     def get_platform_descriptors_to_exclude(self, platform: Platform) -> list:
         return_list: list = []
         for account in self.accounts.values():
@@ -204,6 +253,10 @@ class MultiManager(TuyaManager):
         return return_list
 
     async def mm_update_device_cache(self) -> None:
+        await self.update_account_device_caches()
+        self.build_master_device_map()
+
+    async def update_account_device_caches(self) -> None:
         self.is_ready_for_messages = False
         XTDeviceMap.clear_master_device_map()
         concurrency_manager = XTConcurrencyManager()
@@ -211,7 +264,10 @@ class MultiManager(TuyaManager):
         async def update_manager_device_cache(
             manager: XTDeviceManagerInterface,
         ) -> None:
-            await manager.update_device_cache()
+            with self.startup_tracer.span(
+                f"update_device_cache:{manager.get_type_name()}"
+            ):
+                await manager.update_device_cache()
 
         for manager in self.accounts.values():
             concurrency_manager.add_coroutine(
@@ -220,28 +276,35 @@ class MultiManager(TuyaManager):
 
         await concurrency_manager.gather()
 
+        # Persist the product thing models fetched during the refresh
+        await self.storage_manager.save_store_if_dirty()
+
+    def build_master_device_map(self) -> None:
         # Register all devices in the master device map
-        self.update_master_device_map()
+        with self.startup_tracer.span("update_master_device_map"):
+            self.update_master_device_map()
 
         # Now let's aggregate all of these devices into a single
         # "All functionnality" device
-        self._merge_devices_from_multiple_sources()
+        with self.startup_tracer.span("merge_devices"):
+            self._merge_devices_from_multiple_sources()
         for device in self.device_map.values():
-            # Applied twice because some parts at the end of apply_fix would change values of previous calls
-            CloudFixes.apply_fixes(device, self)
-            CloudFixes.apply_fixes(device, self)
-            CloudFixes.apply_post_init_fixes(device, self)
+            with self.startup_tracer.span("cloud_fixes"):
+                CloudFixes.apply_fixes(device, self)
+                CloudFixes.apply_post_init_fixes(device, self)
             self._add_dpcodes_supported_by_all_devices(device)
 
             # Don't allow changes to DPCodes after the global initialization
             device.force_compatibility = True
 
             # Apply conversion strategy after initial import
-            for dpcode in device.status:
-                device.status[dpcode] = device.apply_dpcode_strategy(
-                    dpcode, device.status[dpcode], self
-                )
-        self._enable_multi_map_device_alignment()
+            with self.startup_tracer.span("apply_dpcode_strategy"):
+                for dpcode in device.status:
+                    device.status[dpcode] = device.apply_dpcode_strategy(
+                        dpcode, device.status[dpcode], self
+                    )
+        with self.startup_tracer.span("align_device_maps"):
+            self._enable_multi_map_device_alignment()
         self._process_pending_messages()
         for device in self.device_map.values():
             if self.device_watcher.is_watched(
@@ -301,6 +364,13 @@ class MultiManager(TuyaManager):
                     if device_id not in self.master_device_map:
                         self.master_device_map[device_id] = device_map[device_id]
 
+    def replace_device_in_device_maps(
+        self, device: XTDevice, new_device: XTDevice
+    ) -> None:
+        for device_map in [self.device_map, *self.__get_available_device_maps()]:
+            if device_map.get(device.id) is device:
+                device_map[device.id] = new_device
+
     def __get_available_device_maps(self) -> list[XTDeviceMap]:
         return_list: list[XTDeviceMap] = []
         for manager in self.accounts.values():
@@ -311,12 +381,15 @@ class MultiManager(TuyaManager):
     def _merge_devices_from_multiple_sources(self):
         # Merge the device function, status_range and status between managers
         for device in self.device_map.values():
-            to_be_merged: list[XTDevice] = []
-            devices = self.__get_devices_from_device_id(device.id)
-            for current_device in devices:
-                for prev_device in to_be_merged:
-                    XTMergingManager.merge_devices(prev_device, current_device, self)
-                to_be_merged.append(current_device)
+            with self.startup_tracer.span("merge_device"):
+                to_be_merged: list[XTDevice] = []
+                devices = self.__get_devices_from_device_id(device.id)
+                for current_device in devices:
+                    for prev_device in to_be_merged:
+                        XTMergingManager.merge_devices(
+                            prev_device, current_device, self
+                        )
+                    to_be_merged.append(current_device)
 
     def _enable_multi_map_device_alignment(self):
         for device_map in self.__get_available_device_maps():
@@ -355,24 +428,10 @@ class MultiManager(TuyaManager):
             and device.status_range[code].dp_id != 0
         ):
             return device.status_range[code].dp_id
-        for dpId in device.local_strategy:
-            if device.local_strategy[dpId]["status_code"] == code:
-                return dpId
-            if (
-                "status_code_alias" in device.local_strategy[dpId]
-                and code in device.local_strategy[dpId]["status_code_alias"]
-            ):
-                return dpId
-            elif "status_code_alias" not in device.local_strategy[dpId]:
-                LOGGER.warning(
-                    f"Device {device.name} ({device.id}) has no status_code_alias dict for dpId {dpId}, please contact the developer about this"
-                )
-        return None
+        return device.get_dpcode_index().code_to_dp_id.get(code)
 
     def _read_code_from_dpId(self, dpId: int, device: XTDevice) -> str | None:
-        if dp_id_item := device.local_strategy.get(dpId, None):
-            return dp_id_item["status_code"]
-        return None
+        return device.get_dpcode_index().dp_id_to_code.get(dpId)
 
     def __get_devices_from_device_id(self, device_id: str) -> list[XTDevice]:
         return_list = []
@@ -414,6 +473,9 @@ class MultiManager(TuyaManager):
 
             if dpId is None and code is None:
                 for temp_dpId in state:
+                    # Other keys of the state (e.g. "t") are not dpIds
+                    if not str(temp_dpId).isdigit():
+                        continue
                     temp_code = self._read_code_from_dpId(int(temp_dpId), device)
                     if temp_code is not None:
                         dpId = int(temp_dpId)
@@ -432,23 +494,44 @@ class MultiManager(TuyaManager):
             return None, None, None, False
         return code, dpId, value, True
 
-    def convert_device_report_status_list(
+    def resolve_device_report(
         self, device_id: str, status_in: list, source: str
-    ) -> list[dict[str, Any]]:
-        status = copy.deepcopy(status_in)
-        for item in status:
-            if "t" in item and source in [MESSAGE_SOURCE_TUYA_SHARING]:
-                item["t"] = int(item["t"] / 1000)  # Convert from ms to s
+    ) -> list[XTDeviceReportItem]:
+        report: list[XTDeviceReportItem] = []
+        for item in status_in:
             code, dpId, value, result_ok = self._read_code_dpid_value_from_state(
                 device_id, item
             )
-            if result_ok:
-                item["code"] = code
-                item["dpId"] = dpId
-                item["value"] = value
-            else:
-                pass
-        return status
+            if not result_ok:
+                # Unresolved items are passed on as reported
+                if "value" not in item:
+                    continue
+                code = item.get("code")
+                dpId = item.get("dpId")
+                value = item["value"]
+            t = item.get("t")
+            if t is not None and source == MESSAGE_SOURCE_TUYA_SHARING:
+                t = int(t / 1000)  # Convert from ms to s
+            report.append(XTDeviceReportItem(code, dpId, value, t, source))
+        return report
+
+    def is_reported_value_valid(self, device: XTDevice, code: str, value: Any) -> bool:
+        """Whether a reported value can be stored, the values outside of the status range are counted."""
+        if (status_range := device.status_range.get(code)) is None:
+            return True
+        validator = status_range.validator
+        if validator.is_valid(value):
+            return True
+        self.rejected_values.record(device.id, code, validator.drop_invalid)
+        self.device_watcher.report_message(
+            device.id,
+            f"Reported value outside of the status range: {code} => {value}, dropped: {validator.drop_invalid}",
+            XTDeviceWatcherCategory.STATUS_CHANGES,
+            device,
+            False,
+            code,
+        )
+        return not validator.drop_invalid
 
     def on_message(self, msg: dict, source: str | None = None):
         if source is None:
@@ -467,14 +550,16 @@ class MultiManager(TuyaManager):
         #     f"on_message ({source}) => {msg} <=> {new_message}",
         #     XTDeviceWatcherCategory.MQTT,
         # )
+        report: list[XTDeviceReportItem] | None = None
         if status_list := self._get_status_list_from_message(msg):
             # self.device_watcher.report_message(
             #     dev_id,
             #     f"On Message reporting ({source}): {msg}",
             #     XTDeviceWatcherCategory.MQTT,
             # )
+            report = self.resolve_device_report(dev_id, status_list, source)
             self.multi_source_handler.register_status_list_from_source(
-                dev_id, source, status_list
+                dev_id, source, report
             )
             self.device_watcher.report_message(
                 dev_id,
@@ -483,7 +568,8 @@ class MultiManager(TuyaManager):
             )
 
         if source in self.accounts:
-            self.accounts[source].on_message(new_message)
+            # The account dispatches the report resolved above instead of resolving it again
+            self.accounts[source].on_message(new_message, report)
 
     def add_device_by_id(self, device_id: str):
         for account in self.accounts.values():
@@ -529,32 +615,23 @@ class MultiManager(TuyaManager):
         return return_list
 
     def send_commands(self, device_id: str, commands: list[dict[str, Any]]) -> bool:  # type: ignore
+        self.warm_start.wait_for_devices()
         virtual_function_commands: list[dict[str, Any]] = []
         regular_commands: list[dict[str, Any]] = []
         if device := self.device_map.get(device_id, None):
-            virtual_function_list = (
-                self.virtual_function_handler.get_category_virtual_functions(
-                    device.category
-                )
-            )
             for command in commands:
                 command_code = command["code"]
                 command_value = command["value"]
-                vf_found = False
-                for virtual_function in virtual_function_list:
-                    if (
-                        command_code == virtual_function.key
-                        or command_code in virtual_function.vf_reset_state
-                    ):
-                        command_dict = {
-                            "code": command_code,
-                            "value": command_value,
-                            "virtual_function": virtual_function,
-                        }
-                        virtual_function_commands.append(command_dict)
-                        vf_found = True
-                        break
-                if not vf_found:
+                if virtual_function := self.virtual_function_handler.get_code_virtual_function(
+                    device.category, command_code
+                ):
+                    command_dict = {
+                        "code": command_code,
+                        "value": command_value,
+                        "virtual_function": virtual_function,
+                    }
+                    virtual_function_commands.append(command_dict)
+                else:
                     regular_commands.append(command)
         else:
             return False
@@ -565,49 +642,9 @@ class MultiManager(TuyaManager):
             )
             return True
 
-        last_command_result: bool = False
         if regular_commands:
-            for regular_command in regular_commands:
-                for account in self.accounts.values():
-                    if last_command_result := account.send_command(
-                        device_id, regular_command, reverse_filters=False
-                    ):
-                        break
-
-                # If the command failed, try using the other APIs
-                if last_command_result is False:
-                    for account in self.accounts.values():
-                        if last_command_result := account.send_command(
-                            device_id, regular_command, reverse_filters=True
-                        ):
-                            break
-
-                # If it still didn't work, try sending the command aliases if they exist
-                if last_command_result is False:
-                    alias_command: list[dict[str, Any]] = []
-                    if code := regular_command.get("code", None):
-                        for alias in device.get_status_code_aliases(code):
-                            alias_command.append(
-                                {
-                                    "code": alias,
-                                    "value": regular_command["value"],
-                                }
-                            )
-                    for command in alias_command:
-                        last_command_result = False
-                        for account in self.accounts.values():
-                            if last_command_result := account.send_command(
-                                device_id, command, reverse_filters=False
-                            ):
-                                break
-                        for account in self.accounts.values():
-                            if last_command_result := account.send_command(
-                                device_id, command, reverse_filters=True
-                            ):
-                                break
-                        if last_command_result is True:
-                            break
-        return last_command_result
+            return self.command_queue.send_commands(device, regular_commands)
+        return False
 
     def get_device_stream_allocate(
         self, device_id: str, stream_type: Literal["flv", "hls", "rtmp", "rtsp"]
@@ -624,6 +661,7 @@ class MultiManager(TuyaManager):
         lock: bool,
         force_unlock_mechanism: XTLockingMechanism = XTLockingMechanism.AUTO,
     ) -> bool:
+        self.warm_start.wait_for_devices()
         for account in self.accounts.values():
             if account.send_lock_unlock_command(device, lock, force_unlock_mechanism):
                 return True
@@ -638,24 +676,19 @@ class MultiManager(TuyaManager):
             if account.trigger_scene(home_id, scene_id):
                 return
 
-    def get_device_consumption_statistics_by_day(
-        self, device_id: str, start_day: str, end_day: str
-    ) -> dict[str, dict[float, float]] | None:
-        for account in self.accounts.values():
-            if stats := account.get_device_consumption_statistics_by_day(
-                device_id, start_day, end_day
-            ):
-                return stats
-        return None
-
-    def get_device_consumption_statistics_by_hour(
-        self, device_id: str, start_day_and_hour: str, end_day_and_hour: str
+    async def async_get_device_consumption_history(
+        self,
+        device_id: str,
+        start_day: str,
+        end_day: str,
+        start_day_and_hour: str,
+        end_day_and_hour: str,
     ) -> dict[str, dict[float, float]] | None:
         for account in self.accounts.values():
-            if stats := account.get_device_consumption_statistics_by_hour(
-                device_id, start_day_and_hour, end_day_and_hour
+            if history := await account.async_get_device_consumption_history(
+                device_id, start_day, end_day, start_day_and_hour, end_day_and_hour
             ):
-                return stats
+                return history
         return None
 
     def update_device_online_status(self, device_id: str):
@@ -1,12 +1,22 @@
 from __future__ import annotations
 import json
 import copy
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, replace
+from operator import attrgetter
 from typing import Any
 from .shared_classes import (
     XTDevice,
+    XTDeviceDPCodeIndex,
     XTDeviceFunction,
+    XTDeviceStatusFunctionShared,
     XTDeviceStatusRange,
 )
+from .value_descriptor import (
+    XTValueDescriptor,
+)
 from ...ha_tuya_integration.tuya_integration_imports import (
     TuyaDPType,
 )
@@ -18,10 +28,242 @@ from ...const import (
 )
 import custom_components.xtend_tuya.multi_manager.multi_manager as mm
 
+# Each domain is a part of the device the cloud fixes read or write, the first domain
+# of a collection also tracks the entries added to or removed from the collection
+COLLECTION_DOMAINS: dict[str, tuple[str, ...]] = {
+    "status": ("status",),
+    "status_range": (
+        "status_range.keys",
+        "status_range.type",
+        "status_range.values",
+        "status_range.dp_id",
+    ),
+    "function": (
+        "function.keys",
+        "function.type",
+        "function.values",
+        "function.dp_id",
+    ),
+    "local_strategy": (
+        "local_strategy.keys",
+        "local_strategy.code",
+        "local_strategy.type",
+        "local_strategy.values",
+        "local_strategy.format",
+        "local_strategy.enum_map",
+        "local_strategy.access",
+        "local_strategy.attrs",
+    ),
+    "data_model": ("data_model",),
+}
+ALL_DOMAINS: tuple[str, ...] = tuple(
+    domain for domains in COLLECTION_DOMAINS.values() for domain in domains
+)
+_MISSING = object()
+_get_code = attrgetter("code")
+_get_type = attrgetter("type")
+_get_value_descr = attrgetter("value_descr")
+_get_dp_id = attrgetter("dp_id")
+
+# Keys of a domain and the value of each key for that domain
+XTCloudFixSnapshot = tuple[tuple[Any, ...], tuple[Any, ...]]
+
+
+def _domains(*prefixes: str) -> frozenset[str]:
+    return frozenset(
+        domain
+        for domain in ALL_DOMAINS
+        if any(
+            domain == prefix or domain.startswith(f"{prefix}.") for prefix in prefixes
+        )
+    )
+
+
+def _snapshot_item_values(items: tuple[Any, ...]) -> tuple[Any, ...]:
+    try:
+        return tuple(map(_get_value_descr, items))
+    except AttributeError:
+        # Status ranges and functions not converted to XT classes yet
+        return tuple(
+            (
+                item.value_descr
+                if isinstance(item, XTDeviceStatusFunctionShared)
+                else item.values
+            )
+            for item in items
+        )
+
+
+def _snapshot_item_dp_ids(items: tuple[Any, ...]) -> tuple[Any, ...]:
+    try:
+        return tuple(map(_get_dp_id, items))
+    except AttributeError:
+        return tuple(getattr(item, "dp_id", 0) for item in items)
+
+
+def _snapshot_item_types(items: tuple[Any, ...]) -> tuple[Any, ...]:
+    types = tuple(map(_get_type, items))
+    # Some fixes behave differently for plain strings and TuyaDPType
+    return tuple(zip(map(type, types), types))
+
+
+def _config_items(dp_items: tuple[dict[str, Any], ...]) -> list[dict[str, Any]]:
+    return [dp_item.get("config_item") or {} for dp_item in dp_items]
+
+
+def _snapshot_local_strategy_types(
+    dp_items: tuple[dict[str, Any], ...],
+) -> tuple[Any, ...]:
+    snapshot = []
+    for config_item in _config_items(dp_items):
+        value_type = config_item.get("valueType")
+        # Types are only aligned with the other sources when a valueDesc is present
+        snapshot.append((type(value_type), value_type, "valueDesc" in config_item))
+    return tuple(snapshot)
+
+
+_ITEM_SNAPSHOTS: dict[str, Callable[[tuple[Any, ...]], tuple[Any, ...]]] = {
+    "keys": lambda items: tuple(zip(map(type, items), map(_get_code, items))),
+    "type": _snapshot_item_types,
+    "values": _snapshot_item_values,
+    "dp_id": _snapshot_item_dp_ids,
+}
+_LOCAL_STRATEGY_SNAPSHOTS: dict[
+    str, Callable[[tuple[dict[str, Any], ...]], tuple[Any, ...]]
+] = {
+    "keys": lambda dp_items: (),
+    "code": lambda dp_items: tuple(
+        (
+            dp_item.get("status_code"),
+            dp_item.get("status_code_alias") is None,
+            tuple(dp_item.get("status_code_alias") or ()),
+        )
+        for dp_item in dp_items
+    ),
+    "type": _snapshot_local_strategy_types,
+    "values": lambda dp_items: tuple(
+        config_item.get("valueDesc") for config_item in _config_items(dp_items)
+    ),
+    "format": lambda dp_items: tuple(
+        config_item.get("statusFormat") for config_item in _config_items(dp_items)
+    ),
+    "enum_map": lambda dp_items: tuple(
+        tuple(config_item.get("enumMappingMap") or ())
+        for config_item in _config_items(dp_items)
+    ),
+    "access": lambda dp_items: tuple(
+        dp_item.get("access_mode") for dp_item in dp_items
+    ),
+    "attrs": lambda dp_items: tuple(
+        (dp_item.get("property_update"), dp_item.get("use_open_api"))
+        for dp_item in dp_items
+    ),
+}
+
+
+@dataclass
+class XTCloudFixPassStatistics:
+    runs: int = 0
+    skips: int = 0
+    changes: int = 0
+    codes_touched: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class XTCloudFixEngineStatistics:
+    calls: int = 0
+    iterations: int = 0
+    max_iterations: int = 0
+    not_converged: int = 0
+    tracking_seconds: float = 0.0
+
+
+class XTCloudFixStatistics:
+    """Counts the work done by CloudFixes for the devices of one MultiManager."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.engine = XTCloudFixEngineStatistics()
+        # Pass name => statistics of the pass
+        self.passes: dict[str, XTCloudFixPassStatistics] = {}
+
+    def record(
+        self,
+        engine: XTCloudFixEngineStatistics,
+        passes: dict[str, XTCloudFixPassStatistics],
+    ) -> None:
+        """Adds the statistics of one apply_fixes call."""
+        with self._lock:
+            self.engine.calls += engine.calls
+            self.engine.iterations += engine.iterations
+            self.engine.max_iterations = max(
+                self.engine.max_iterations, engine.max_iterations
+            )
+            self.engine.not_converged += engine.not_converged
+            self.engine.tracking_seconds += engine.tracking_seconds
+            for name, pass_statistics in passes.items():
+                total = self.passes.setdefault(name, XTCloudFixPassStatistics())
+                total.runs += pass_statistics.runs
+                total.skips += pass_statistics.skips
+                total.changes += pass_statistics.changes
+                total.codes_touched += pass_statistics.codes_touched
+                total.seconds += pass_statistics.seconds
+
+    def get_statistics(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "engine": asdict(self.engine),
+                "passes": {
+                    fix_pass.name: asdict(
+                        self.passes.get(fix_pass.name, XTCloudFixPassStatistics())
+                    )
+                    for fix_pass in CloudFixes.PASSES
+                },
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.engine = XTCloudFixEngineStatistics()
+            self.passes = {}
+
+
+@dataclass
+class XTCloudFixPass:
+    name: str
+    fix: Callable[[XTDevice], None]
+    # Domains the decisions of the pass depend on, it only runs again if one of them changed
+    reads: frozenset[str]
+    # Domains the pass may modify
+    writes: frozenset[str]
+
+
+@dataclass
+class XTCloudFixState:
+    snapshots: dict[str, XTCloudFixSnapshot]
+    # Passes whose inputs changed after their last run when the engine stopped
+    pending_passes: frozenset[str]
+
 
 class CloudFixes:
+    MAX_ITERATIONS: int = 5
+    PASSES: list[XTCloudFixPass] = []
+
     @staticmethod
-    def apply_fixes(device: XTDevice, multi_manager: mm.MultiManager | None = None):
+    def apply_fixes(
+        device: XTDevice,
+        multi_manager: mm.MultiManager | None = None,
+        max_iterations: int | None = None,
+        statistics: XTCloudFixStatistics | None = None,
+    ):
+        """Run the fix passes until none of them has anything left to change.
+
+        A pass is only run again when a domain it reads changed since its last run.
+        The state reached is kept on the device so that a later call only runs the
+        passes affected by what changed in between, or left pending by a call
+        limited by max_iterations. The work done is added to statistics, the ones
+        of the multi_manager by default.
+        """
         if multi_manager is not None:
             # multi_manager.device_watcher.report_message(
             #     device.id,
@@ -29,22 +271,84 @@ class CloudFixes:
             #     device=device,
             # )
             pass
-        CloudFixes._unify_data_types(device)
-        CloudFixes._unify_added_attributes(device)
-        CloudFixes._map_dpid_to_codes(device)
-        CloudFixes._fix_incorrect_valuedescr(device)
-        CloudFixes._fix_incorrect_percentage_scale(device)
-        CloudFixes._align_valuedescr(device)
-        CloudFixes._fix_missing_local_strategy_enum_mapping_map(device)
-        CloudFixes._fix_missing_range_values_using_data_model(device)
-        CloudFixes._fix_missing_range_values_using_local_strategy(device)
-        CloudFixes._fix_missing_aliases_using_status_format(device)
-        CloudFixes._remove_status_that_are_local_strategy_aliases(device)
-        CloudFixes._fix_unaligned_function_or_status_range(device)
-        CloudFixes._strip_valuedescr_of_non_label_fields_for_bitmaps(device)
-        CloudFixes._fix_isolated_status_range_and_function(device)
-        CloudFixes._align_uom(device)
-        CloudFixes._fix_incorrect_access_mode(device)
+        if max_iterations is None:
+            max_iterations = CloudFixes.MAX_ITERATIONS
+        if statistics is None and multi_manager is not None:
+            statistics = multi_manager.cloud_fix_statistics
+        # Counted locally, then added to statistics in one go
+        engine_statistics = XTCloudFixEngineStatistics(calls=1)
+        pass_statistics: dict[str, XTCloudFixPassStatistics] = {}
+        tracking_start = time.perf_counter()
+        snapshots = {
+            domain: CloudFixes._take_snapshot(device, domain) for domain in ALL_DOMAINS
+        }
+        step = 1
+        domain_changed_at: dict[str, int] = {}
+        last_run: dict[str, int] = {}
+        previous_state: XTCloudFixState | None = getattr(
+            device, "cloud_fix_state", None
+        )
+        for domain in ALL_DOMAINS:
+            if previous_state is None or CloudFixes._diff_snapshots(
+                previous_state.snapshots.get(domain), snapshots[domain]
+            ):
+                domain_changed_at[domain] = step
+        if previous_state is not None:
+            for pass_name in previous_state.pending_passes:
+                last_run[pass_name] = -1
+        tracking_seconds = time.perf_counter() - tracking_start
+
+        iterations = 0
+        while True:
+            dirty_passes = [
+                fix_pass
+                for fix_pass in CloudFixes.PASSES
+                if CloudFixes._is_pass_dirty(fix_pass, last_run, domain_changed_at)
+            ]
+            if not dirty_passes or iterations >= max_iterations:
+                break
+            iterations += 1
+            for fix_pass in CloudFixes.PASSES:
+                run_statistics = pass_statistics.setdefault(
+                    fix_pass.name, XTCloudFixPassStatistics()
+                )
+                if not CloudFixes._is_pass_dirty(fix_pass, last_run, domain_changed_at):
+                    run_statistics.skips += 1
+                    continue
+                step += 1
+                pass_start = time.perf_counter()
+                fix_pass.fix(device)
+                pass_end = time.perf_counter()
+                changed_keys = CloudFixes._track_pass_changes(
+                    device, fix_pass, snapshots, domain_changed_at, step
+                )
+                run_statistics.runs += 1
+                run_statistics.seconds += pass_end - pass_start
+                if changed_keys:
+                    run_statistics.changes += 1
+                    run_statistics.codes_touched += len(changed_keys)
+                last_run[fix_pass.name] = step
+                tracking_seconds += time.perf_counter() - pass_end
+
+        engine_statistics.iterations = iterations
+        engine_statistics.max_iterations = iterations
+        engine_statistics.tracking_seconds = tracking_seconds
+        if dirty_passes and max_iterations == CloudFixes.MAX_ITERATIONS:
+            engine_statistics.not_converged += 1
+            LOGGER.debug(
+                f"CloudFixes did not converge after {iterations} iterations for device {device.name}"
+            )
+        if (
+            "local_strategy.keys" in domain_changed_at
+            or "local_strategy.code" in domain_changed_at
+        ):
+            # Status codes or aliases may have moved between dpIds
+            XTDeviceDPCodeIndex.invalidate_all()
+        device.cloud_fix_state = XTCloudFixState(
+            snapshots, frozenset(fix_pass.name for fix_pass in dirty_passes)
+        )
+        if statistics is not None:
+            statistics.record(engine_statistics, pass_statistics)
         if multi_manager is not None:
             # multi_manager.device_watcher.report_message(
             #     device.id,
@@ -53,6 +357,95 @@ class CloudFixes:
             # )
             pass
 
+    @staticmethod
+    def _is_pass_dirty(
+        fix_pass: XTCloudFixPass,
+        last_run: dict[str, int],
+        domain_changed_at: dict[str, int],
+    ) -> bool:
+        last_run_step = last_run.get(fix_pass.name, 0)
+        for domain in fix_pass.reads:
+            if domain_changed_at.get(domain, 0) > last_run_step:
+                return True
+        return False
+
+    @staticmethod
+    def _track_pass_changes(
+        device: XTDevice,
+        fix_pass: XTCloudFixPass,
+        snapshots: dict[str, XTCloudFixSnapshot],
+        domain_changed_at: dict[str, int],
+        step: int,
+    ) -> set[Any]:
+        changed_keys: set[Any] = set()
+        to_check = list(fix_pass.writes)
+        checked: set[str] = set()
+        while to_check:
+            domain = to_check.pop()
+            if domain in checked:
+                continue
+            checked.add(domain)
+            snapshot = CloudFixes._take_snapshot(device, domain)
+            if domain_changed_keys := CloudFixes._diff_snapshots(
+                snapshots[domain], snapshot
+            ):
+                changed_keys.update(domain_changed_keys)
+                domain_changed_at[domain] = step
+                if snapshots[domain][0] != snapshot[0]:
+                    # Entries were added or removed, the other domains of the collection are outdated
+                    collection_domains = COLLECTION_DOMAINS[domain.split(".")[0]]
+                    domain_changed_at[collection_domains[0]] = step
+                    to_check.extend(collection_domains)
+            snapshots[domain] = snapshot
+        return changed_keys
+
+    @staticmethod
+    def _take_snapshot(device: XTDevice, domain: str) -> XTCloudFixSnapshot:
+        # Snapshots only hold immutable values so that they can be kept across calls
+        collection, _, attribute = domain.partition(".")
+        match collection:
+            case "status_range" | "function":
+                items: dict[str, Any] = getattr(device, collection)
+                return tuple(items), _ITEM_SNAPSHOTS[attribute](tuple(items.values()))
+            case "local_strategy":
+                return tuple(device.local_strategy), _LOCAL_STRATEGY_SNAPSHOTS[
+                    attribute
+                ](tuple(device.local_strategy.values()))
+            case "status":
+                return tuple(device.status), tuple(device.status.values())
+            case _:
+                return ("data_model",), (device.data_model,)
+
+    @staticmethod
+    def _diff_snapshots(
+        before: XTCloudFixSnapshot | None, after: XTCloudFixSnapshot
+    ) -> set[Any]:
+        """Keys of the entries that differ between two snapshots of a domain."""
+        if before == after:
+            return set()
+        if before is None:
+            return set(after[0])
+        before_keys, before_values = before
+        after_keys, after_values = after
+        if not after_values:
+            # Domain only tracking the keys
+            return set(before_keys).symmetric_difference(after_keys)
+        if before_keys == after_keys:
+            return {
+                key
+                for key, before_value, after_value in zip(
+                    after_keys, before_values, after_values
+                )
+                if before_value != after_value
+            }
+        before_dict = dict(zip(before_keys, before_values))
+        after_dict = dict(zip(after_keys, after_values))
+        return {
+            key
+            for key in before_dict.keys() | after_dict.keys()
+            if before_dict.get(key, _MISSING) != after_dict.get(key, _MISSING)
+        } or set(after_keys)
+
     @staticmethod
     def apply_post_init_fixes(
         device: XTDevice, multi_manager: mm.MultiManager | None = None
@@ -88,8 +481,9 @@ class CloudFixes:
                             #LOGGER.exception(e)
                             pass
                 if new_dptype is not None:
-                    dpcode_info.dptype = new_dptype
-                    device.set_dpcode_information(dpcode_info)
+                    device.set_dpcode_information(
+                        replace(dpcode_info, dptype=new_dptype)
+                    )
 
     @staticmethod
     def fix_incorrect_percent_scale_forced(
@@ -111,8 +505,10 @@ class CloudFixes:
             recomputed_function_code = status_code
 
             if config_item := device.local_strategy[dpId].get("config_item"):
-                if value_descr := config_item.get("valueDesc"):
-                    value = json.loads(value_descr)
+                if config_item.get("valueDesc"):
+                    value = XTValueDescriptor.get_config_item_descriptor(
+                        config_item
+                    ).to_dict()
                     if "min" in value and "max" in value and "scale" in value:
                         try:
                             max = int(value["max"])
@@ -121,11 +517,14 @@ class CloudFixes:
                                 max = int(max / 10)
                                 scale = scale + 1
                             value["scale"] = scale
-                            config_item["valueDesc"] = json.dumps(value)
+                            XTValueDescriptor.update_config_item_descriptor(
+                                config_item, value
+                            )
                         except Exception:
                             continue
         if recomputed_function_code in device.status_range:
-            value = json.loads(device.status_range[recomputed_function_code].values)
+            status_range = device.status_range[recomputed_function_code]
+            value = status_range.value_descr.to_dict()
             if "min" in value and "max" in value and "scale" in value:
                 try:
                     max = int(value["max"])
@@ -134,13 +533,12 @@ class CloudFixes:
                         max = int(max / 10)
                         scale = scale + 1
                     value["scale"] = scale
-                    device.status_range[recomputed_function_code].values = json.dumps(
-                        value
-                    )
+                    status_range.value_descr = status_range.value_descr.updated(value)
                 except Exception:
                     pass
         if recomputed_function_code in device.function:
-            value = json.loads(device.function[recomputed_function_code].values)
+            function = device.function[recomputed_function_code]
+            value = function.value_descr.to_dict()
             if "min" in value and "max" in value and "scale" in value:
                 try:
                     max = int(value["max"])
@@ -149,7 +547,7 @@ class CloudFixes:
                         max = int(max / 10)
                         scale = scale + 1
                     value["scale"] = scale
-                    device.function[recomputed_function_code].values = json.dumps(value)
+                    function.value_descr = function.value_descr.updated(value)
                 except Exception:
                     pass
 
@@ -157,31 +555,35 @@ class CloudFixes:
     def _strip_valuedescr_of_non_label_fields_for_bitmaps(device: XTDevice):
         for _, status in device.status_range.items():
             if status.type == TuyaDPType.BITMAP:
-                values_dict = json.loads(status.values)
+                values_dict = status.value_descr.to_dict()
                 if "label" in values_dict:
                     values_dict = {"label": values_dict["label"]}
                 else:
                     values_dict = {}
-                status.values = json.dumps(values_dict)
+                status.value_descr = status.value_descr.updated(values_dict)
         for _, function in device.function.items():
             if function.type == TuyaDPType.BITMAP:
-                values_dict = json.loads(function.values)
+                values_dict = function.value_descr.to_dict()
                 if "label" in values_dict:
                     values_dict = {"label": values_dict["label"]}
                 else:
                     values_dict = {}
-                function.values = json.dumps(values_dict)
+                function.value_descr = function.value_descr.updated(values_dict)
         for _, ls in device.local_strategy.items():
             if config_item := ls.get("config_item"):
                 ls_type = config_item.get("valueType")
                 if ls_type == TuyaDPType.BITMAP:
-                    if value_descr := config_item.get("valueDesc"):
-                        values_dict = json.loads(value_descr)
+                    if config_item.get("valueDesc"):
+                        values_dict = XTValueDescriptor.get_config_item_descriptor(
+                            config_item
+                        ).to_dict()
                         if "label" in values_dict:
                             values_dict = {"label": values_dict["label"]}
                         else:
                             values_dict = {}
-                        config_item["valueDesc"] = json.dumps(values_dict)
+                        XTValueDescriptor.update_config_item_descriptor(
+                            config_item, values_dict
+                        )
 
     @staticmethod
     def _fix_isolated_status_range_and_function(device: XTDevice):
@@ -235,21 +637,26 @@ class CloudFixes:
                                 )
                                 if ls_value is not None:
                                     sr_value, _ = CloudFixes.get_value_descr_dict(
-                                        device.status_range[status].values
+                                        device.status_range[status].value_descr
                                     )
                                     fix_dict = CloudFixes.compute_aligned_valuedescr(
                                         ls_value, sr_value, {}
                                     )
                                     for fix_code in fix_dict:
                                         ls_value[fix_code] = fix_dict[fix_code]
-                                    config_item["valueDesc"] = json.dumps(ls_value)
+                                    ls_value_descr = XTValueDescriptor.from_dict(
+                                        ls_value
+                                    )
+                                    XTValueDescriptor.set_config_item_descriptor(
+                                        config_item, ls_value_descr
+                                    )
                                     if strat_code in device.status_range:
-                                        device.status_range[strat_code].values = (
-                                            config_item["valueDesc"]
+                                        device.status_range[strat_code].value_descr = (
+                                            ls_value_descr
                                         )
                                     if strat_code in device.function:
-                                        device.function[strat_code].values = (
-                                            config_item["valueDesc"]
+                                        device.function[strat_code].value_descr = (
+                                            ls_value_descr
                                         )
                         status_pop.append(status)
         for status in status_pop:
@@ -283,21 +690,26 @@ class CloudFixes:
                                 )
                                 if ls_value is not None:
                                     fn_value, _ = CloudFixes.get_value_descr_dict(
-                                        device.function[function].values
+                                        device.function[function].value_descr
                                     )
                                     fix_dict = CloudFixes.compute_aligned_valuedescr(
                                         ls_value, fn_value, {}
                                     )
                                     for fix_code in fix_dict:
                                         ls_value[fix_code] = fix_dict[fix_code]
-                                    config_item["valueDesc"] = json.dumps(ls_value)
+                                    ls_value_descr = XTValueDescriptor.from_dict(
+                                        ls_value
+                                    )
+                                    XTValueDescriptor.set_config_item_descriptor(
+                                        config_item, ls_value_descr
+                                    )
                                     if strat_code in device.status_range:
-                                        device.status_range[strat_code].values = (
-                                            config_item["valueDesc"]
+                                        device.status_range[strat_code].value_descr = (
+                                            ls_value_descr
                                         )
                                     if strat_code in device.function:
-                                        device.function[strat_code].values = (
-                                            config_item["valueDesc"]
+                                        device.function[strat_code].value_descr = (
+                                            ls_value_descr
                                         )
                         function_pop.append(function)
         for function in function_pop:
@@ -455,7 +867,7 @@ class CloudFixes:
             config_item = None
             if code in device.status_range:
                 sr_value_dict, sr_value_raw = CloudFixes.get_value_descr_dict(
-                    device.status_range[code].values
+                    device.status_range[code].value_descr
                 )
                 if device.status_range[code].dp_id != 0:
                     dp_id = device.status_range[code].dp_id
@@ -466,7 +878,7 @@ class CloudFixes:
                     correct_value = sr_value_raw
             if code in device.function:
                 fn_value_dict, fn_value_raw = CloudFixes.get_value_descr_dict(
-                    device.function[code].values
+                    device.function[code].value_descr
                 )
                 if device.function[code].dp_id != 0:
                     dp_id = device.function[code].dp_id
@@ -526,15 +938,17 @@ class CloudFixes:
                     config_item["valueDesc"] = correct_value
 
     @staticmethod
-    def get_value_descr_dict(value_str: str) -> tuple[dict[str, Any] | None, str]:
-        try:
-            value_dict: dict = json.loads(value_str)
-            if value_dict.get("ErrorValue1"):
-                return None, value_dict["ErrorValue1"]
-            iter(value_dict)
-            return value_dict, value_str
-        except Exception:
-            return None, value_str
+    def get_value_descr_dict(
+        value_str: str | XTValueDescriptor | None,
+    ) -> tuple[dict[str, Any] | None, str]:
+        if value_str is None:
+            return None, value_str  # type: ignore[return-value]
+        value_descr = XTValueDescriptor.from_any(value_str)
+        if error_value := value_descr.error_value:
+            return None, error_value
+        if not value_descr.is_dict:
+            return None, value_descr.json
+        return value_descr.to_dict(), value_descr.json
 
     @staticmethod
     def get_fixed_value_descr(
@@ -594,16 +1008,18 @@ class CloudFixes:
             config_item = None
             all_uom: list[str] = []
             if code in device.status_range:
-                sr_value = json.loads(device.status_range[code].values)
+                sr_value = device.status_range[code].value_descr.to_dict()
                 dp_id = device.status_range[code].dp_id
             if code in device.function:
-                fn_value = json.loads(device.function[code].values)
+                fn_value = device.function[code].value_descr.to_dict()
                 dp_id = device.function[code].dp_id
             if dp_id is not None:
                 if dp_item := device.local_strategy.get(dp_id):
                     if config_item := dp_item.get("config_item"):
-                        if value_descr := config_item.get("valueDesc"):
-                            ls_value = json.loads(value_descr)
+                        if config_item.get("valueDesc"):
+                            ls_value = XTValueDescriptor.get_config_item_descriptor(
+                                config_item
+                            ).to_dict()
             if sr_value and "unit" in sr_value:
                 sr_uom = sr_value["unit"]
                 if sr_uom in UOM_MAPPING_DICT:
@@ -630,11 +1046,15 @@ class CloudFixes:
                     f"Multiple different uom found for code {code} on device {device.name}: {all_uom}"
                 )
             if sr_value is not None:
-                device.status_range[code].values = json.dumps(sr_value)
+                device.status_range[code].value_descr = device.status_range[
+                    code
+                ].value_descr.updated(sr_value)
             if fn_value is not None:
-                device.function[code].values = json.dumps(fn_value)
+                device.function[code].value_descr = device.function[
+                    code
+                ].value_descr.updated(fn_value)
             if ls_value is not None and config_item is not None:
-                config_item["valueDesc"] = json.dumps(ls_value)
+                XTValueDescriptor.update_config_item_descriptor(config_item, ls_value)
 
     @staticmethod
     def _align_valuedescr(device: XTDevice):
@@ -664,16 +1084,18 @@ class CloudFixes:
             dp_id = None
             config_item = None
             if code in device.status_range:
-                sr_value = json.loads(device.status_range[code].values)
+                sr_value = device.status_range[code].value_descr.to_dict()
                 dp_id = device.status_range[code].dp_id
             if code in device.function:
-                fn_value = json.loads(device.function[code].values)
+                fn_value = device.function[code].value_descr.to_dict()
                 dp_id = device.function[code].dp_id
             if dp_id is not None:
                 if dp_item := device.local_strategy.get(dp_id):
                     if config_item := dp_item.get("config_item"):
-                        if value_descr := config_item.get("valueDesc"):
-                            ls_value = json.loads(value_descr)
+                        if config_item.get("valueDesc"):
+                            ls_value = XTValueDescriptor.get_config_item_descriptor(
+                                config_item
+                            ).to_dict()
             fix_dict = CloudFixes.compute_aligned_valuedescr(
                 ls_value, sr_value, fn_value
             )
@@ -685,11 +1107,15 @@ class CloudFixes:
                 if ls_value is not None:
                     ls_value[fix_code] = fix_dict[fix_code]
             if sr_value:
-                device.status_range[code].values = json.dumps(sr_value)
+                device.status_range[code].value_descr = device.status_range[
+                    code
+                ].value_descr.updated(sr_value)
             if fn_value:
-                device.function[code].values = json.dumps(fn_value)
+                device.function[code].value_descr = device.function[
+                    code
+                ].value_descr.updated(fn_value)
             if ls_value and config_item is not None:
-                config_item["valueDesc"] = json.dumps(ls_value)
+                XTValueDescriptor.update_config_item_descriptor(config_item, ls_value)
 
     @staticmethod
     def compute_aligned_valuedescr(
@@ -797,7 +1223,7 @@ class CloudFixes:
     def _fix_incorrect_percentage_scale(device: XTDevice):
         supported_units: list = ["%"]
         for code in device.status_range:
-            value = json.loads(device.status_range[code].values)
+            value = device.status_range[code].value_descr.to_dict()
             if (
                 "unit" in value
                 and "min" in value
@@ -816,11 +1242,13 @@ class CloudFixes:
                         max = int(max / 10)
                         scale = scale + 1
                     value["scale"] = scale
-                    device.status_range[code].values = json.dumps(value)
+                    device.status_range[code].value_descr = device.status_range[
+                        code
+                    ].value_descr.updated(value)
                 except Exception:
                     continue
         for code in device.function:
-            value = json.loads(device.function[code].values)
+            value = device.function[code].value_descr.to_dict()
             if (
                 "unit" in value
                 and "min" in value
@@ -839,13 +1267,17 @@ class CloudFixes:
                         max = int(max / 10)
                         scale = scale + 1
                     value["scale"] = scale
-                    device.function[code].values = json.dumps(value)
+                    device.function[code].value_descr = device.function[
+                        code
+                    ].value_descr.updated(value)
                 except Exception:
                     continue
         for dpId in device.local_strategy:
             if config_item := device.local_strategy[dpId].get("config_item"):
-                if value_descr := config_item.get("valueDesc"):
-                    value = json.loads(value_descr)
+                if config_item.get("valueDesc"):
+                    value = XTValueDescriptor.get_config_item_descriptor(
+                        config_item
+                    ).to_dict()
                     if (
                         "unit" in value
                         and "min" in value
@@ -864,7 +1296,9 @@ class CloudFixes:
                                 max = int(max / 10)
                                 scale = scale + 1
                             value["scale"] = scale
-                            config_item["valueDesc"] = json.dumps(value)
+                            XTValueDescriptor.update_config_item_descriptor(
+                                config_item, value
+                            )
                         except Exception:
                             continue
 
@@ -952,16 +1386,21 @@ class CloudFixes:
                         continue
                     if config_item.get("valueType", None) != "Enum":
                         continue
-                    valueDesc = config_item.get("valueDesc")
-                    if valueDesc is None:
+                    if config_item.get("valueDesc") is None:
                         continue
-                    value_dict: dict[str, Any] = json.loads(valueDesc)
+                    value_dict: dict[str, Any] = (
+                        XTValueDescriptor.get_config_item_descriptor(
+                            config_item
+                        ).to_dict()
+                    )
                     valueDescr_range: list = value_dict.get("range", [])
                     for range_value in typeSpec.get("range", []):
                         if range_value not in valueDescr_range:
                             valueDescr_range.append(range_value)
                     value_dict["range"] = valueDescr_range
-                    config_item["valueDesc"] = json.dumps(value_dict)
+                    XTValueDescriptor.update_config_item_descriptor(
+                        config_item, value_dict
+                    )
 
     @staticmethod
     def _fix_missing_range_values_using_local_strategy(device: XTDevice):
@@ -975,11 +1414,15 @@ class CloudFixes:
             if config_item := local_strategy.get("config_item", None):
                 if config_item.get("valueType", None) != "Enum":
                     continue
-                if valueDesc := config_item.get("valueDesc", None):
-                    value_dict = json.loads(valueDesc)
-                    if valueDescr_range := value_dict.get("range", []):
+                if config_item.get("valueDesc", None):
+                    value_descr = XTValueDescriptor.get_config_item_descriptor(
+                        config_item
+                    )
+                    if valueDescr_range := value_descr.get("range", []):
                         if status_range := device.status_range.get(status_code, None):
-                            if status_range_values := json.loads(status_range.values):
+                            if (
+                                status_range_values := status_range.value_descr.to_dict()
+                            ):
                                 status_range_range_dict: list = status_range_values.get(
                                     "range", []
                                 )
@@ -990,9 +1433,13 @@ class CloudFixes:
                                     if new_range_value not in new_range_list:
                                         new_range_list.append(new_range_value)
                                 status_range_values["range"] = new_range_list
-                                status_range.values = json.dumps(status_range_values)
+                                status_range.value_descr = (
+                                    status_range.value_descr.updated(
+                                        status_range_values
+                                    )
+                                )
                         if function := device.function.get(status_code, None):
-                            if function_values := json.loads(function.values):
+                            if function_values := function.value_descr.to_dict():
                                 function_range_dict: list = function_values.get(
                                     "range", []
                                 )
@@ -1003,7 +1450,9 @@ class CloudFixes:
                                     if new_range_value not in new_range_list:
                                         new_range_list.append(new_range_value)
                                 function_values["range"] = new_range_list
-                                function.values = json.dumps(function_values)
+                                function.value_descr = function.value_descr.updated(
+                                    function_values
+                                )
 
     @staticmethod
     def _fix_missing_aliases_using_status_format(device: XTDevice):
@@ -1086,3 +1535,223 @@ class CloudFixes:
                         device.local_strategy[dpid]["access_mode"] = DPCODES_OVERRIDES[
                             override
                         ]
+
+
+CloudFixes.PASSES = [
+    XTCloudFixPass(
+        "unify_data_types",
+        CloudFixes._unify_data_types,
+        # Values are only copied between sources whose types disagree
+        _domains(
+            "status",
+            "status_range.keys",
+            "status_range.type",
+            "function.keys",
+            "function.type",
+            "local_strategy.keys",
+            "local_strategy.code",
+            "local_strategy.type",
+        ),
+        _domains(
+            "status_range",
+            "function",
+            "local_strategy.type",
+            "local_strategy.values",
+        ),
+    ),
+    XTCloudFixPass(
+        "unify_added_attributes",
+        CloudFixes._unify_added_attributes,
+        _domains("local_strategy.keys", "local_strategy.code", "local_strategy.attrs"),
+        _domains("local_strategy.code", "local_strategy.attrs"),
+    ),
+    XTCloudFixPass(
+        "map_dpid_to_codes",
+        CloudFixes._map_dpid_to_codes,
+        _domains(
+            "status_range.keys",
+            "status_range.dp_id",
+            "function.keys",
+            "function.dp_id",
+            "local_strategy.keys",
+            "local_strategy.code",
+        ),
+        _domains("status_range.dp_id", "function.dp_id"),
+    ),
+    XTCloudFixPass(
+        "fix_incorrect_valuedescr",
+        CloudFixes._fix_incorrect_valuedescr,
+        _domains(
+            "status_range.keys",
+            "status_range.values",
+            "status_range.dp_id",
+            "function.keys",
+            "function.values",
+            "function.dp_id",
+            "local_strategy.keys",
+            "local_strategy.code",
+            "local_strategy.values",
+        ),
+        _domains("status_range.values", "function.values", "local_strategy.values"),
+    ),
+    XTCloudFixPass(
+        "fix_incorrect_percentage_scale",
+        CloudFixes._fix_incorrect_percentage_scale,
+        _domains(
+            "status_range.keys",
+            "status_range.values",
+            "function.keys",
+            "function.values",
+            "local_strategy.keys",
+            "local_strategy.values",
+        ),
+        _domains("status_range.values", "function.values", "local_strategy.values"),
+    ),
+    XTCloudFixPass(
+        "align_valuedescr",
+        CloudFixes._align_valuedescr,
+        _domains(
+            "status_range.keys",
+            "status_range.values",
+            "status_range.dp_id",
+            "function.keys",
+            "function.values",
+            "function.dp_id",
+            "local_strategy.keys",
+            "local_strategy.code",
+            "local_strategy.values",
+        ),
+        _domains("status_range.values", "function.values", "local_strategy.values"),
+    ),
+    XTCloudFixPass(
+        "fix_missing_local_strategy_enum_mapping_map",
+        CloudFixes._fix_missing_local_strategy_enum_mapping_map,
+        _domains("local_strategy.keys", "local_strategy.enum_map"),
+        _domains("local_strategy.enum_map"),
+    ),
+    XTCloudFixPass(
+        "fix_missing_range_values_using_data_model",
+        CloudFixes._fix_missing_range_values_using_data_model,
+        _domains(
+            "data_model",
+            "local_strategy.keys",
+            "local_strategy.type",
+            "local_strategy.values",
+        ),
+        _domains("local_strategy.values"),
+    ),
+    XTCloudFixPass(
+        "fix_missing_range_values_using_local_strategy",
+        CloudFixes._fix_missing_range_values_using_local_strategy,
+        _domains(
+            "status_range.keys",
+            "status_range.values",
+            "function.keys",
+            "function.values",
+            "local_strategy.keys",
+            "local_strategy.code",
+            "local_strategy.type",
+            "local_strategy.values",
+        ),
+        _domains("status_range.values", "function.values"),
+    ),
+    XTCloudFixPass(
+        "fix_missing_aliases_using_status_format",
+        CloudFixes._fix_missing_aliases_using_status_format,
+        _domains("local_strategy.keys", "local_strategy.code", "local_strategy.format"),
+        _domains("local_strategy.code", "local_strategy.format"),
+    ),
+    XTCloudFixPass(
+        "remove_status_that_are_local_strategy_aliases",
+        CloudFixes._remove_status_that_are_local_strategy_aliases,
+        _domains(
+            "status",
+            "status_range.keys",
+            "function.keys",
+            "local_strategy.keys",
+            "local_strategy.code",
+        ),
+        _domains("status", "status_range.keys", "function.keys"),
+    ),
+    XTCloudFixPass(
+        "fix_unaligned_function_or_status_range",
+        CloudFixes._fix_unaligned_function_or_status_range,
+        _domains(
+            "status_range.keys",
+            "status_range.values",
+            "status_range.dp_id",
+            "function.keys",
+            "function.values",
+            "function.dp_id",
+            "local_strategy.keys",
+            "local_strategy.code",
+            "local_strategy.values",
+        ),
+        _domains(
+            "status_range.keys",
+            "status_range.values",
+            "function.keys",
+            "function.values",
+            "local_strategy.values",
+        ),
+    ),
+    XTCloudFixPass(
+        "strip_valuedescr_of_non_label_fields_for_bitmaps",
+        CloudFixes._strip_valuedescr_of_non_label_fields_for_bitmaps,
+        _domains(
+            "status_range.keys",
+            "status_range.type",
+            "status_range.values",
+            "function.keys",
+            "function.type",
+            "function.values",
+            "local_strategy.keys",
+            "local_strategy.type",
+            "local_strategy.values",
+        ),
+        _domains("status_range.values", "function.values", "local_strategy.values"),
+    ),
+    XTCloudFixPass(
+        "fix_isolated_status_range_and_function",
+        CloudFixes._fix_isolated_status_range_and_function,
+        _domains(
+            "status",
+            "status_range.keys",
+            "status_range.dp_id",
+            "function.keys",
+            "function.dp_id",
+            "local_strategy.keys",
+        ),
+        _domains("status_range.keys", "function.keys"),
+    ),
+    XTCloudFixPass(
+        "align_uom",
+        CloudFixes._align_uom,
+        _domains(
+            "status_range.keys",
+            "status_range.values",
+            "status_range.dp_id",
+            "function.keys",
+            "function.values",
+            "function.dp_id",
+            "local_strategy.keys",
+            "local_strategy.code",
+            "local_strategy.values",
+        ),
+        _domains("status_range.values", "function.values", "local_strategy.values"),
+    ),
+    XTCloudFixPass(
+        "fix_incorrect_access_mode",
+        CloudFixes._fix_incorrect_access_mode,
+        _domains(
+            "status",
+            "status_range.keys",
+            "status_range.dp_id",
+            "function.keys",
+            "function.dp_id",
+            "local_strategy.keys",
+            "local_strategy.access",
+        ),
+        _domains("local_strategy.access"),
+    ),
+]
@@ -0,0 +1,160 @@
+from __future__ import annotations
+import threading
+from dataclasses import dataclass, field
+from typing import Any
+from ...ha_tuya_integration.tuya_integration_imports import (
+    TuyaDPType,
+)
+from .shared_classes import (
+    XTDevice,
+)
+from .command_router import (
+    XTCommandRouter,
+)
+
+
+@dataclass
+class XTPendingCommands:
+    # DPCode => command, in the order the DPCodes were first written
+    commands: dict[str, dict[str, Any]] = field(default_factory=dict)
+    # DPCode => whether the command was sent
+    results: dict[str, bool] = field(default_factory=dict)
+    # The batch of the device sent before this one
+    previous: XTPendingCommands | None = None
+    # Ends the window early
+    flush_now: threading.Event = field(default_factory=threading.Event)
+    flushed: threading.Event = field(default_factory=threading.Event)
+
+
+class XTCommandQueue:
+    """Coalesces the slider-style commands sent to a device.
+
+    Dragging a slider sends a burst of commands, each of them used to go to
+    the cloud. A batch holding an Integer or Json DPCode opens a window: the
+    commands sent to the device meanwhile join it, the last value of a DPCode
+    wins, and everything goes out in one go when the window ends. The other
+    batches (toggles, buttons) are sent right away, closing the open window
+    they join. A DPCode repeated with the same value is coalesced, a Boolean
+    or Enum DPCode repeated with another value sends the window first. The
+    batches of a device are sent one at a time and in order.
+    """
+
+    COALESCED_DPTYPES: set[TuyaDPType] = {TuyaDPType.INTEGER, TuyaDPType.JSON}
+
+    def __init__(self, command_router: XTCommandRouter, window: float) -> None:
+        self.command_router = command_router
+        self.window = window
+        self._lock = threading.Lock()
+        # Device ID => batch whose window is open
+        self._pending: dict[str, XTPendingCommands] = {}
+        # Device ID => last batch not sent yet, the next one waits for it
+        self._last_batches: dict[str, XTPendingCommands] = {}
+        self.queued_commands = 0
+        self.coalesced_commands = 0
+        self.sent_commands = 0
+        self.flushes = 0
+
+    def send_commands(self, device: XTDevice, commands: list[dict[str, Any]]) -> bool:
+        """Blocks until the commands are sent, returns whether the last one was sent."""
+        if not commands:
+            return False
+        hold = self.window > 0 and self._has_coalesced_dptype(device, commands)
+        with self._lock:
+            self.queued_commands += len(commands)
+            pending = self._pending.get(device.id)
+            if pending is not None and not self._can_coalesce(
+                device, pending, commands
+            ):
+                # The commands of the current window go out first, without these
+                del self._pending[device.id]
+                pending.flush_now.set()
+                pending = None
+            is_flusher = pending is None
+            if pending is None:
+                pending = XTPendingCommands(previous=self._last_batches.get(device.id))
+                self._last_batches[device.id] = pending
+                if hold:
+                    self._pending[device.id] = pending
+            elif not hold:
+                # Joins the window and sends it right away
+                del self._pending[device.id]
+                pending.flush_now.set()
+            for command in commands:
+                if command["code"] in pending.commands:
+                    self.coalesced_commands += 1
+                # Replacing keeps the position of the DPCode
+                pending.commands[command["code"]] = command
+        if is_flusher:
+            if hold:
+                pending.flush_now.wait(self.window)
+            self._flush(device, pending)
+        else:
+            pending.flushed.wait()
+        return pending.results.get(commands[-1]["code"], False)
+
+    def _has_coalesced_dptype(
+        self, device: XTDevice, commands: list[dict[str, Any]]
+    ) -> bool:
+        return any(
+            self._get_dptype(device, command["code"])
+            in XTCommandQueue.COALESCED_DPTYPES
+            for command in commands
+        )
+
+    def _can_coalesce(
+        self,
+        device: XTDevice,
+        pending: XTPendingCommands,
+        commands: list[dict[str, Any]],
+    ) -> bool:
+        for command in commands:
+            code = command["code"]
+            if (pending_command := pending.commands.get(code)) is None:
+                continue
+            if pending_command["value"] == command["value"]:
+                continue
+            if self._get_dptype(device, code) not in XTCommandQueue.COALESCED_DPTYPES:
+                return False
+        return True
+
+    @staticmethod
+    def _get_dptype(device: XTDevice, code: str) -> TuyaDPType | None:
+        if function := device.function.get(code):
+            return function.type
+        if status_range := device.status_range.get(code):
+            return status_range.type
+        return None
+
+    def _flush(self, device: XTDevice, pending: XTPendingCommands) -> None:
+        with self._lock:
+            if self._pending.get(device.id) is pending:
+                del self._pending[device.id]
+            # Nothing joins the batch once it left the pending windows
+            commands = list(pending.commands.values())
+        try:
+            if (previous := pending.previous) is not None:
+                previous.flushed.wait()
+                pending.previous = None
+            results = self.command_router.send_commands_and_get_results(
+                device, commands
+            )
+            pending.results = {
+                command["code"]: result for command, result in zip(commands, results)
+            }
+            with self._lock:
+                self.sent_commands += len(commands)
+                self.flushes += 1
+        finally:
+            with self._lock:
+                if self._last_batches.get(device.id) is pending:
+                    del self._last_batches[device.id]
+            pending.flushed.set()
+
+    def get_statistics(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "queued_commands": self.queued_commands,
+                "coalesced_commands": self.coalesced_commands,
+                "sent_commands": self.sent_commands,
+                "flushes": self.flushes,
+            }
@@ -0,0 +1,156 @@
+from __future__ import annotations
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+from .shared_classes import (
+    XTDevice,
+)
+
+if TYPE_CHECKING:
+    from ..multi_manager import (
+        MultiManager,
+    )
+
+
+@dataclass(frozen=True)
+class XTCommandRoute:
+    account_name: str
+    api: str
+    # The code sent: the code of the command or one of its aliases
+    code: str
+
+
+class XTCommandRouter:
+    """Sends the regular commands of a device through the accounts.
+
+    The routes of a command are tried in the same order as they always were:
+    every account with the regular filters, every account with the reversed
+    filters, then the same for each alias of the code. The route that worked
+    for a DPCode of a device is tried first next time. The commands whose
+    first route goes through the same API are sent in a single call, if that
+    call fails they are retried one by one.
+    """
+
+    def __init__(self, multi_manager: MultiManager) -> None:
+        self.multi_manager = multi_manager
+        # (Device ID, DPCode) => route that worked last
+        self._routes: dict[tuple[str, str], XTCommandRoute] = {}
+        self._stats_lock = threading.Lock()
+        self.route_hits = 0
+        self.route_misses = 0
+        self.api_calls = 0
+        self.failed_commands = 0
+
+    def get_routes(
+        self, device: XTDevice, command: dict[str, Any]
+    ) -> list[XTCommandRoute]:
+        code = command.get("code")
+        if code is None:
+            return []
+        routes: list[XTCommandRoute] = []
+        for route_code in [code, *device.get_status_code_aliases(code)]:
+            route_command = {**command, "code": route_code}
+            for reverse_filters in (False, True):
+                for account_name, account in self.multi_manager.accounts.items():
+                    for api in account.get_command_apis(
+                        device.id, route_command, reverse_filters
+                    ):
+                        route = XTCommandRoute(account_name, api, route_code)
+                        if route not in routes:
+                            routes.append(route)
+        with self._stats_lock:
+            known_route = self._routes.get((device.id, code))
+            if known_route in routes:
+                routes.remove(known_route)
+                routes.insert(0, known_route)
+                self.route_hits += 1
+            else:
+                self.route_misses += 1
+        return routes
+
+    def send_commands(self, device: XTDevice, commands: list[dict[str, Any]]) -> bool:
+        """Returns whether the last command was sent, like the commands used to."""
+        if results := self.send_commands_and_get_results(device, commands):
+            return results[-1]
+        return False
+
+    def send_commands_and_get_results(
+        self, device: XTDevice, commands: list[dict[str, Any]]
+    ) -> list[bool]:
+        """Returns whether each of the commands was sent."""
+        remaining_routes = [self.get_routes(device, command) for command in commands]
+        sent = [False] * len(commands)
+        while True:
+            # (Account, API) => indexes of the commands to send through it
+            batches: dict[tuple[str, str], list[int]] = {}
+            for index, routes in enumerate(remaining_routes):
+                if not sent[index] and routes:
+                    batches.setdefault(
+                        (routes[0].account_name, routes[0].api), []
+                    ).append(index)
+            if not batches:
+                break
+            for (account_name, api), indexes in batches.items():
+                batch = [
+                    {**commands[index], "code": remaining_routes[index][0].code}
+                    for index in indexes
+                ]
+                if self._send(device, account_name, api, batch):
+                    sent_indexes = indexes
+                elif len(indexes) > 1:
+                    # One of them may not be accepted by this API
+                    sent_indexes = [
+                        index
+                        for index, command in zip(indexes, batch)
+                        if self._send(device, account_name, api, [command])
+                    ]
+                else:
+                    sent_indexes = []
+                for index in indexes:
+                    route = remaining_routes[index][0]
+                    if index in sent_indexes:
+                        sent[index] = True
+                        self._remember_route(device, commands[index], route)
+                    else:
+                        remaining_routes[index].pop(0)
+                        self._forget_route(device, commands[index], route)
+        with self._stats_lock:
+            self.failed_commands += sent.count(False)
+        return sent
+
+    def _send(
+        self,
+        device: XTDevice,
+        account_name: str,
+        api: str,
+        commands: list[dict[str, Any]],
+    ) -> bool:
+        account = self.multi_manager.accounts.get(account_name)
+        if account is None:
+            return False
+        with self._stats_lock:
+            self.api_calls += 1
+        return account.send_commands_through_api(device.id, commands, api)
+
+    def _remember_route(
+        self, device: XTDevice, command: dict[str, Any], route: XTCommandRoute
+    ) -> None:
+        with self._stats_lock:
+            self._routes[(device.id, command["code"])] = route
+
+    def _forget_route(
+        self, device: XTDevice, command: dict[str, Any], route: XTCommandRoute
+    ) -> None:
+        with self._stats_lock:
+            if self._routes.get((device.id, command["code"])) == route:
+                del self._routes[(device.id, command["code"])]
+
+    def get_statistics(self) -> dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "route_hits": self.route_hits,
+                "route_misses": self.route_misses,
+                "api_calls": self.api_calls,
+                "failed_commands": self.failed_commands,
+                "known_routes": len(self._routes),
+            }
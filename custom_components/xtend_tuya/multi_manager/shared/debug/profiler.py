@@ -5,7 +5,11 @@ try:
 except Exception:
     pass
 import cProfile
+import os
 import re
+import sys
+import threading
+from collections import Counter
 from datetime import datetime
 from typing import Coroutine
 
@@ -45,3 +49,61 @@ async def profile_async_method(coroutine: Coroutine):
     else:
         return await profile_async_method2(coroutine)
     return result
+
+
+class XTSamplingProfiler:
+    """Samples the call stack of a thread at a fixed interval.
+
+    Unlike the deterministic profilers above, the sampled thread does not pay
+    for every call, so it can run during a whole startup. Stacks are counted
+    in the collapsed format flame graph tools read ("outer;inner count").
+    """
+
+    def __init__(
+        self, thread_id: int, interval: float = 0.005, max_depth: int = 64
+    ) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter[str] = Counter()
+        self.sample_count: int = 0
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="xt_sampling_profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack: list[str] = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[";".join(stack)] += 1
+            self.sample_count += 1
+
+    def get_top_stacks(self, count: int) -> list[dict[str, str | int]]:
+        return [
+            {"stack": stack, "samples": samples}
+            for stack, samples in self.stacks.most_common(count)
+        ]
+
+    def dump_collapsed_stacks(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, samples in self.stacks.most_common():
+                file.write(f"{stack} {samples}\n")
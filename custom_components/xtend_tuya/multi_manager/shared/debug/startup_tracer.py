@@ -0,0 +1,134 @@
+from __future__ import annotations
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+from homeassistant.util import dt as dt_util
+from ....const import (
+    LOGGER,
+)
+from .profiler import (
+    XTSamplingProfiler,
+)
+import custom_components.xtend_tuya.multi_manager.multi_manager as mm
+
+# (tracer, span) of the innermost span open in the current task, tasks created
+# while a span is open inherit it as their parent
+_CURRENT_SPAN: ContextVar[tuple[XTStartupTracer, XTStartupSpan] | None] = ContextVar(
+    "xt_startup_span", default=None
+)
+
+
+@dataclass
+class XTStartupSpan:
+    name: str
+    start: float
+    duration: float = 0.0
+    count: int = 0
+    children: dict[str, XTStartupSpan] = field(default_factory=dict)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "start_ms": round(self.start * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+            "count": self.count,
+            "children": [child.as_dict() for child in self.children.values()],
+        }
+
+
+class XTStartupTracer:
+    """Records the nested phases of a config entry startup.
+
+    Spans opened under the same parent with the same name are merged: their
+    duration is summed and counted, so per-device spans stay a single line.
+    The finished timelines are kept in the storage of the config entry.
+    """
+
+    MAX_TIMELINES: int = 5
+    TOP_STACKS: int = 25
+
+    def __init__(self, multi_manager: mm.MultiManager) -> None:
+        self.multi_manager = multi_manager
+        self.root: XTStartupSpan | None = None
+        self.profiler: XTSamplingProfiler | None = None
+        self._start_time: float = 0.0
+        self._started_at: str | None = None
+
+    @property
+    def is_tracing(self) -> bool:
+        return self.root is not None
+
+    def start(self, profile: bool = False) -> None:
+        self._start_time = time.perf_counter()
+        self._started_at = dt_util.utcnow().isoformat()
+        self.root = XTStartupSpan("startup", 0.0)
+        if profile:
+            self.profiler = XTSamplingProfiler(threading.get_ident())
+            self.profiler.start()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        if self.root is None:
+            yield
+            return
+        current = _CURRENT_SPAN.get()
+        if current is not None and current[0] is self:
+            parent = current[1]
+        else:
+            parent = self.root
+        start = time.perf_counter()
+        span = parent.children.get(name)
+        if span is None:
+            span = XTStartupSpan(name, start - self._start_time)
+            parent.children[name] = span
+        token = _CURRENT_SPAN.set((self, span))
+        try:
+            yield
+        finally:
+            _CURRENT_SPAN.reset(token)
+            span.duration += time.perf_counter() - start
+            span.count += 1
+
+    async def async_finish(self) -> dict[str, Any] | None:
+        if self.root is None:
+            return None
+        root = self.root
+        self.root = None
+        root.duration = time.perf_counter() - self._start_time
+        root.count = 1
+        config_entry = self.multi_manager.config_entry
+        timeline: dict[str, Any] = {
+            "entry_id": config_entry.entry_id,
+            "title": config_entry.title,
+            "started_at": self._started_at,
+            "duration_ms": round(root.duration * 1000, 3),
+            "device_count": len(self.multi_manager.device_map),
+            "spans": root.as_dict()["children"],
+        }
+        if self.profiler is not None:
+            profiler = self.profiler
+            self.profiler = None
+            await self.multi_manager.hass.async_add_executor_job(profiler.stop)
+            timeline["profile"] = {
+                "interval_ms": profiler.interval * 1000,
+                "samples": profiler.sample_count,
+                "top_stacks": profiler.get_top_stacks(self.TOP_STACKS),
+            }
+            path = self.multi_manager.hass.config.path(
+                f"xtend_tuya_startup_{config_entry.entry_id}_{int(time.time())}.folded"
+            )
+            try:
+                await self.multi_manager.hass.async_add_executor_job(
+                    profiler.dump_collapsed_stacks, path
+                )
+                timeline["profile"]["collapsed_stacks_file"] = path
+            except OSError as e:
+                LOGGER.warning(f"Could not write the startup profile to {path}: {e}")
+        storage_manager = self.multi_manager.storage_manager
+        storage_manager.add_startup_timeline(timeline, self.MAX_TIMELINES)
+        await storage_manager.save_store_if_dirty()
+        return timeline
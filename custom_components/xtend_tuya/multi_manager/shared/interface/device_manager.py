@@ -11,6 +11,7 @@ from homeassistant.components.camera.webrtc import WebRTCSendMessage
 from ..shared_classes import (
     XTConfigEntry,
     XTDeviceMap,
+    XTDeviceReportItem,
 )
 import custom_components.xtend_tuya.multi_manager.multi_manager as mm
 import custom_components.xtend_tuya.multi_manager.shared.shared_classes as shared
@@ -34,6 +35,17 @@ class XTDeviceManagerAPIInterface(ABC):
     def send_command(self, device_id: str, command: dict[str, Any], reverse_filters: bool = False) -> bool:
         return False
 
+    def get_command_apis(
+        self, device_id: str, command: dict[str, Any], reverse_filters: bool = False
+    ) -> list[str]:
+        """APIs of the account that can send the command, the preferred one first."""
+        return []
+
+    def send_commands_through_api(
+        self, device_id: str, commands: list[dict[str, Any]], api: str
+    ) -> bool:
+        return False
+
     @abstractmethod
     def query_scenes(self) -> list:
         pass
@@ -41,10 +53,17 @@ class XTDeviceManagerAPIInterface(ABC):
     def trigger_scene(self, home_id: str, scene_id: str) -> bool:
         return False
     
-    def get_device_consumption_statistics_by_day(self, device_id: str, start_day: str, end_day: str) -> dict[str, dict[float, float]] | None:
+    async def async_get_device_consumption_history(
+        self,
+        device_id: str,
+        start_day: str,
+        end_day: str,
+        start_day_and_hour: str,
+        end_day_and_hour: str,
+    ) -> dict[str, dict[float, float]] | None:
         return None
-    
-    def get_device_consumption_statistics_by_hour(self, device_id: str, start_day_and_hour: str, end_day_and_hour: str) -> dict[str, dict[float, float]] | None:
+
+    def get_api_statistics(self) -> dict[str, Any] | None:
         return None
 
 
@@ -108,6 +127,11 @@ class XTDeviceManagerIPCameraInterface(ABC):
     ) -> str | None:
         return None
 
+    async def async_get_webrtc_sdp_answer(
+        self, device_id: str, session_id: str, sdp_offer: str, channel: str
+    ) -> str | None:
+        return None
+
     def get_webrtc_ice_servers(
         self, device_id: str, session_id: str | None, format: str, hass: HomeAssistant
     ) -> str | None:
@@ -215,12 +239,15 @@ class XTDeviceManagerMQTTManagementInterface(ABC):
         pass
 
     @abstractmethod
-    def on_message(self, msg: dict):
+    def on_message(self, msg: dict, report: list[XTDeviceReportItem] | None = None):
         pass
 
     def get_mqtt_client(self) -> mqtt.Client | None:
         return None
 
+    def get_mqtt_statistics(self) -> dict[str, Any] | None:
+        return None
+
 
 class XTDeviceManagerLockManagementInterface(ABC):
     def send_lock_unlock_command(self, device: shared.XTDevice, lock: bool, force_unlock_mechanism: XTLockingMechanism = XTLockingMechanism.AUTO) -> bool:
@@ -1,6 +1,7 @@
 from __future__ import annotations
 import json
 import copy
+from dataclasses import dataclass
 from typing import Any
 from ...const import (
     LOGGER,
@@ -9,6 +10,31 @@ from ...const import (
 import custom_components.xtend_tuya.multi_manager.shared.cloud_fix as cf
 import custom_components.xtend_tuya.multi_manager.multi_manager as mm
 import custom_components.xtend_tuya.multi_manager.shared.shared_classes as shared
+from .value_descriptor import (
+    XTValueDescriptor,
+)
+
+# Values that can be shared between the merged structures instead of being copied
+_IMMUTABLE_LEAVES = (str, int, float, bytes, type(None), frozenset, XTValueDescriptor)
+
+
+@dataclass(frozen=True)
+class XTMergeOrigin:
+    """What merge_devices needs to remember of a device before it gets merged."""
+
+    name: str
+    source: str
+    force_compatibility: bool
+    status_codes: tuple[str, ...]
+
+    @staticmethod
+    def from_device(device: shared.XTDevice) -> XTMergeOrigin:
+        return XTMergeOrigin(
+            name=device.name,
+            source=device.source,
+            force_compatibility=device.force_compatibility,
+            status_codes=tuple(device.status),
+        )
 
 
 class XTMergingManager:
@@ -36,14 +62,15 @@ class XTMergingManager:
 
         # if multi_manager:
         #    multi_manager.device_watcher.report_message(device1.id, f"About to merge {device1.source}:{device1}\r\n\r\nand\r\n\r\n{device2.source}:{device2}", device1)
-        higher_bak = copy.deepcopy(higher_priority)
-        lower_bak = copy.deepcopy(lower_priority)
+        higher_origin = XTMergeOrigin.from_device(higher_priority)
+        lower_origin = XTMergeOrigin.from_device(lower_priority)
 
         # Make both devices compliant
         XTMergingManager._fix_incorrect_valuedescr(higher_priority, lower_priority)
         XTMergingManager._fix_incorrect_valuedescr(lower_priority, higher_priority)
-        cf.CloudFixes.apply_fixes(higher_priority, multi_manager)
-        cf.CloudFixes.apply_fixes(lower_priority, multi_manager)
+        # A single pass is enough here, the fixes are run to completion once merged
+        cf.CloudFixes.apply_fixes(higher_priority, multi_manager, max_iterations=1)
+        cf.CloudFixes.apply_fixes(lower_priority, multi_manager, max_iterations=1)
 
         # Now decide between each device which on has "the truth" and set it in both
         XTMergingManager._align_device_properties(
@@ -79,14 +106,14 @@ class XTMergingManager:
             if multi_manager is not None:
                 multi_manager.device_watcher.report_message(
                     device1.id,
-                    f"Messages for merging of {higher_bak.name}({higher_bak.source}) and {lower_bak.name}({lower_bak.source}):",
+                    f"Messages for merging of {higher_origin.name}({higher_origin.source}) and {lower_origin.name}({lower_origin.source}):",
                     XTDeviceWatcherCategory.CLOUD_FIX,
                 )
                 for msg in msg_queue:
                     multi_manager.device_watcher.report_message(device1.id, msg, XTDeviceWatcherCategory.CLOUD_FIX)
             else:
                 LOGGER.warning(
-                    f"Messages for merging of {higher_bak.name}({higher_bak.source}) and {lower_bak.name}({lower_bak.source}):"
+                    f"Messages for merging of {higher_origin.name}({higher_origin.source}) and {lower_origin.name}({lower_origin.source}):"
                 )
                 for msg in msg_queue:
                     LOGGER.warning(msg)
@@ -99,18 +126,17 @@ class XTMergingManager:
         # if multi_manager:
         #    multi_manager.device_watcher.report_message(device1.id, f"Merged into {device1}", device1)
 
-        if lower_bak.force_compatibility:
-            XTMergingManager._enforce_compatibility(higher_priority, lower_bak)
+        if lower_origin.force_compatibility:
+            XTMergingManager._enforce_compatibility(higher_priority, lower_origin)
             higher_priority.force_compatibility = True
-        if higher_bak.force_compatibility:
-            XTMergingManager._enforce_compatibility(lower_priority, higher_bak)
-            lower_bak.force_compatibility = True
+        if higher_origin.force_compatibility:
+            XTMergingManager._enforce_compatibility(lower_priority, higher_origin)
 
     @staticmethod
     def _enforce_compatibility(
-        device: shared.XTDevice, enforcing_reference: shared.XTDevice
+        device: shared.XTDevice, enforcing_reference: XTMergeOrigin
     ):
-        for status in enforcing_reference.status:
+        for status in enforcing_reference.status_codes:
             if status not in device.status:
                 # Find the original status that has been masked as a status_alias and make it the reference
                 for dpId in device.local_strategy:
@@ -194,50 +220,56 @@ class XTMergingManager:
         for code in device1.function:
             if code in device2.function:
                 value1_dict, value1_raw = cf.CloudFixes.get_value_descr_dict(
-                    device1.function[code].values
+                    device1.function[code].value_descr
                 )
                 value2_dict, value2_raw = cf.CloudFixes.get_value_descr_dict(
-                    device2.function[code].values
+                    device2.function[code].value_descr
                 )
             else:
                 continue
             if value1_dict is None or value2_dict is None:
                 if value1_dict is not None:
-                    device2.function[code].values = device1.function[code].values
+                    device2.function[code].value_descr = device1.function[
+                        code
+                    ].value_descr
                 elif value2_dict is not None:
-                    device1.function[code].values = device2.function[code].values
+                    device1.function[code].value_descr = device2.function[
+                        code
+                    ].value_descr
                 else:
                     device1.function[code].values = cf.CloudFixes.get_fixed_value_descr(
                         value1_raw, value2_raw
                     )
-                    device2.function[code].values = device1.function[code].values
+                    device2.function[code].value_descr = device1.function[
+                        code
+                    ].value_descr
 
         for code in device1.status_range:
             if code in device2.status_range:
                 value1_dict, value1_raw = cf.CloudFixes.get_value_descr_dict(
-                    device1.status_range[code].values
+                    device1.status_range[code].value_descr
                 )
                 value2_dict, value2_raw = cf.CloudFixes.get_value_descr_dict(
-                    device2.status_range[code].values
+                    device2.status_range[code].value_descr
                 )
             else:
                 continue
             if value1_dict is None or value2_dict is None:
                 if value1_dict is not None:
-                    device2.status_range[code].values = device1.status_range[
+                    device2.status_range[code].value_descr = device1.status_range[
                         code
-                    ].values
+                    ].value_descr
                 elif value2_dict is not None:
-                    device1.status_range[code].values = device2.status_range[
+                    device1.status_range[code].value_descr = device2.status_range[
                         code
-                    ].values
+                    ].value_descr
                 else:
                     device1.status_range[code].values = (
                         cf.CloudFixes.get_fixed_value_descr(value1_raw, value2_raw)
                     )
-                    device2.status_range[code].values = device1.status_range[
+                    device2.status_range[code].value_descr = device1.status_range[
                         code
-                    ].values
+                    ].value_descr
 
         for dpId in device1.local_strategy:
             value1_dict = None
@@ -276,34 +308,43 @@ class XTMergingManager:
         for code in device1.status_range:
             if (
                 code in device2.status_range
-                and device1.status_range[code].values
-                != device2.status_range[code].values
+                and device1.status_range[code].value_descr
+                != device2.status_range[code].value_descr
             ):
-                value1 = json.loads(device1.status_range[code].values)
-                value2 = json.loads(device2.status_range[code].values)
+                value1 = device1.status_range[code].value_descr.to_dict()
+                value2 = device2.status_range[code].value_descr.to_dict()
                 computed_diff = cf.CloudFixes.compute_aligned_valuedescr(
                     value1, value2, None
                 )
                 for fix_code in computed_diff:
                     value1[fix_code] = computed_diff[fix_code]
                     value2[fix_code] = computed_diff[fix_code]
-                device1.status_range[code].values = json.dumps(value1)
-                device2.status_range[code].values = json.dumps(value2)
+                device1.status_range[code].value_descr = device1.status_range[
+                    code
+                ].value_descr.updated(value1)
+                device2.status_range[code].value_descr = device2.status_range[
+                    code
+                ].value_descr.updated(value2)
         for code in device1.function:
             if (
                 code in device2.function
-                and device1.function[code].values != device2.function[code].values
+                and device1.function[code].value_descr
+                != device2.function[code].value_descr
             ):
-                value1 = json.loads(device1.function[code].values)
-                value2 = json.loads(device2.function[code].values)
+                value1 = device1.function[code].value_descr.to_dict()
+                value2 = device2.function[code].value_descr.to_dict()
                 computed_diff = cf.CloudFixes.compute_aligned_valuedescr(
                     value1, value2, None
                 )
                 for fix_code in computed_diff:
                     value1[fix_code] = computed_diff[fix_code]
                     value2[fix_code] = computed_diff[fix_code]
-                device1.function[code].values = json.dumps(value1)
-                device2.function[code].values = json.dumps(value2)
+                device1.function[code].value_descr = device1.function[
+                    code
+                ].value_descr.updated(value1)
+                device2.function[code].value_descr = device2.function[
+                    code
+                ].value_descr.updated(value2)
         for dp_id in device1.local_strategy:
             if dp_id in device2.local_strategy:
                 config_item1 = device1.local_strategy[dp_id].get("config_item")
@@ -312,16 +353,20 @@ class XTMergingManager:
                     value_descr1 = config_item1.get("valueDesc")
                     value_descr2 = config_item2.get("valueDesc")
                     if value_descr1 is not None and value_descr2 is not None:
-                        value1 = json.loads(value_descr1)
-                        value2 = json.loads(value_descr2)
+                        value1 = XTValueDescriptor.from_json(value_descr1).to_dict()
+                        value2 = XTValueDescriptor.from_json(value_descr2).to_dict()
                         computed_diff = cf.CloudFixes.compute_aligned_valuedescr(
                             value1, value2, None
                         )
                         for fix_code in computed_diff:
                             value1[fix_code] = computed_diff[fix_code]
                             value2[fix_code] = computed_diff[fix_code]
-                        config_item1["valueDesc"] = json.dumps(value1)
-                        config_item2["valueDesc"] = json.dumps(value2)
+                        XTValueDescriptor.update_config_item_descriptor(
+                            config_item1, value1
+                        )
+                        XTValueDescriptor.update_config_item_descriptor(
+                            config_item2, value2
+                        )
 
     @staticmethod
     def _align_api_usage(device1: shared.XTDevice, device2: shared.XTDevice):
@@ -374,14 +419,14 @@ class XTMergingManager:
                 ):
                     case 1:
                         device2.status_range[key].type = device1.status_range[key].type
-                        device2.status_range[key].values = device1.status_range[
+                        device2.status_range[key].value_descr = device1.status_range[
                             key
-                        ].values
+                        ].value_descr
                     case 2:
                         device1.status_range[key].type = device2.status_range[key].type
-                        device1.status_range[key].values = device2.status_range[
+                        device1.status_range[key].value_descr = device2.status_range[
                             key
-                        ].values
+                        ].value_descr
         for key in device1.function:
             if key in device2.function:
                 state_value = device1.status.get(key)
@@ -395,10 +440,14 @@ class XTMergingManager:
                 ):
                     case 1:
                         device2.function[key].type = device1.function[key].type
-                        device2.function[key].values = device1.function[key].values
+                        device2.function[key].value_descr = device1.function[
+                            key
+                        ].value_descr
                     case 2:
                         device1.function[key].type = device2.function[key].type
-                        device1.function[key].values = device2.function[key].values
+                        device1.function[key].value_descr = device2.function[
+                            key
+                        ].value_descr
         for dpId in device1.local_strategy:
             if dpId in device2.local_strategy:
                 state_value = None
@@ -474,8 +523,8 @@ class XTMergingManager:
             left.type = XTMergingManager.smart_merge(
                 left.type, right.type, msg_queue, f"{path}.type"
             )
-            left.values = XTMergingManager.smart_merge(
-                left.values, right.values, msg_queue, f"{path}.values"
+            left.value_descr = XTMergingManager.smart_merge(
+                left.value_descr, right.value_descr, msg_queue, f"{path}.values"
             )
             left.dp_id = XTMergingManager.smart_merge(
                 left.dp_id, right.dp_id, msg_queue, f"{path}.dp_id"
@@ -496,13 +545,29 @@ class XTMergingManager:
             left.name = XTMergingManager.smart_merge(
                 left.name, right.name, msg_queue, f"{path}.name"
             )
-            left.values = XTMergingManager.smart_merge(
-                left.values, right.values, msg_queue, f"{path}.values"
+            left.value_descr = XTMergingManager.smart_merge(
+                left.value_descr, right.value_descr, msg_queue, f"{path}.values"
             )
             left.dp_id = XTMergingManager.smart_merge(
                 left.dp_id, right.dp_id, msg_queue, f"{path}.dp_id"
             )
             return left
+        elif isinstance(left, XTValueDescriptor) and isinstance(
+            right, XTValueDescriptor
+        ):
+            # Descriptors are immutable and shared, only build a new one if they differ
+            if left == right:
+                return left
+            if left.is_json and right.is_json:
+                merged_value = XTMergingManager.smart_merge(
+                    left.parsed, right.parsed, msg_queue, f"{path}.@JS@"
+                )
+                if isinstance(merged_value, dict):
+                    return XTValueDescriptor.from_dict(merged_value)
+                return XTValueDescriptor.from_json(json.dumps(merged_value))
+            return XTValueDescriptor.from_json(
+                XTMergingManager.smart_merge(left.json, right.json, msg_queue, path)
+            )
         elif isinstance(left, dict) and isinstance(right, dict):
             # Merge entries into a fresh detached dict to avoid sharing
             merged = {}
@@ -511,19 +576,21 @@ class XTMergingManager:
                     merged_value = XTMergingManager.smart_merge(
                         left[key], right[key], msg_queue, f"{path}[{key}]"
                     )
-                    merged[key] = copy.deepcopy(merged_value)
+                    if merged_value is left[key] or merged_value is right[key]:
+                        merged_value = XTMergingManager._detach(merged_value)
+                    merged[key] = merged_value
                 else:
-                    merged[key] = copy.deepcopy(left[key])
+                    merged[key] = XTMergingManager._detach(left[key])
             for key in right:
                 if key not in merged:
-                    merged[key] = copy.deepcopy(right[key])
+                    merged[key] = XTMergingManager._detach(right[key])
             return merged
         elif isinstance(left, list) and isinstance(right, list):
             # Merge lists into a new list without creating shared references
-            merged_list = list(left)
+            merged_list = [XTMergingManager._detach(item) for item in left]
             for item in right:
                 if item not in merged_list:
-                    merged_list.append(copy.deepcopy(item))
+                    merged_list.append(XTMergingManager._detach(item))
             return merged_list
         elif isinstance(left, tuple) and isinstance(right, tuple):
             left_list = list(left)
@@ -531,26 +598,23 @@ class XTMergingManager:
             merged_list = XTMergingManager.smart_merge(
                 left_list, right_list, msg_queue, path
             )
-            return tuple(copy.deepcopy(merged_list))
+            return tuple(merged_list)
         elif isinstance(left, set) and isinstance(right, set):
             # Return a new set union (do not return None as set.update does)
-            return copy.deepcopy(left.union(right))
+            return left.union(right)
         elif isinstance(left, str) and isinstance(right, str):
+            if left == right:
+                return left
             # Strings could be strings or represent a json subtree
-            try:
-                left_json = json.loads(left)
-            except Exception:
-                left_json = None
-            try:
-                right_json = json.loads(right)
-            except Exception:
-                right_json = None
+            left_json = XTMergingManager._get_json_subtree(left)
+            right_json = XTMergingManager._get_json_subtree(right)
             if left_json is not None and right_json is not None:
-                return json.dumps(
-                    XTMergingManager.smart_merge(
-                        left_json, right_json, msg_queue, f"{path}.@JS@"
-                    )
+                merged_json = XTMergingManager.smart_merge(
+                    left_json, right_json, msg_queue, f"{path}.@JS@"
                 )
+                if isinstance(merged_json, dict):
+                    return XTValueDescriptor.from_dict(merged_json).json
+                return json.dumps(merged_json)
             elif left_json is not None:
                 return json.dumps(left_json)
             elif right_json is not None:
@@ -571,3 +635,32 @@ class XTMergingManager:
                     f"Merging {type(left)} that are different: |{left}| <=> |{right}|, using left ({path})"
                 )
             return left
+
+    @staticmethod
+    def _detach(value: Any) -> Any:
+        # Copy the mutable structure of a value, its immutable leaves are shared
+        if isinstance(value, _IMMUTABLE_LEAVES):
+            return value
+        value_type = type(value)
+        if value_type is dict:
+            return {key: XTMergingManager._detach(item) for key, item in value.items()}
+        if value_type is list:
+            return [XTMergingManager._detach(item) for item in value]
+        if value_type is tuple:
+            return tuple(XTMergingManager._detach(item) for item in value)
+        if value_type is set:
+            return set(value)
+        if value_type in (shared.XTDeviceStatusRange, shared.XTDeviceFunction):
+            # All their fields are immutable leaves
+            return copy.copy(value)
+        return copy.deepcopy(value)
+
+    @staticmethod
+    def _get_json_subtree(value: str) -> Any:
+        # JSON objects and arrays are value descriptors, reuse their shared parse
+        if value.startswith(("{", "[")):
+            return XTValueDescriptor.from_json(value).parsed
+        try:
+            return json.loads(value)
+        except Exception:
+            return None
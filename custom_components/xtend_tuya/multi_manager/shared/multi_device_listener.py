@@ -1,5 +1,4 @@
 from __future__ import annotations
-from functools import partial
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.dispatcher import dispatcher_send
 from homeassistant.helpers import device_registry as dr
@@ -61,18 +60,7 @@ class MultiDeviceListener:
         """
         if not device.name:
             return
-        device_registry = dr.async_get(self.hass)
-        device_entry = device_registry.async_get_device(
-            identifiers={(DOMAIN_ORIG, device.id), (DOMAIN, device.id)}
-        )
-        if device_entry is not None and device_entry.name != device.name:
-            self.hass.add_job(
-                partial(
-                    device_registry.async_update_device,
-                    device_entry.id,
-                    name=device.name,
-                )
-            )
+        self.multi_manager.registry_sync.sync_device_name(device)
 
     def add_device(self, device: sh.XTDevice):
         self.add_device_by_id(device.id)
@@ -1,7 +1,6 @@
 from __future__ import annotations
-import copy
-from typing import Any
 import custom_components.xtend_tuya.multi_manager.multi_manager as mm
+import custom_components.xtend_tuya.multi_manager.shared.shared_classes as shared
 from ...const import (
     LOGGER,  # noqa: F401
     XTDeviceWatcherCategory,  # noqa: F401
@@ -64,84 +63,79 @@ class MultiSourceHandler:
         self.device_map: dict[str, dict[str, MultiSourceCodeCounter]] = {}
 
     def register_status_list_from_source(
-        self, dev_id: str, source: str, status_in
+        self, dev_id: str, source: str, status_in: list[shared.XTDeviceReportItem]
     ) -> None:
         device = self.multi_manager.device_map.get(dev_id, None)
         if not device:
             return
 
-        virtual_states = (
-            self.multi_manager.virtual_state_handler.get_category_virtual_states(
+        code_virtual_states = (
+            self.multi_manager.virtual_state_handler.get_category_code_virtual_states(
                 device.category
             )
         )
-        if not virtual_states:
+        if not code_virtual_states:
             return
 
         for item in status_in:
-            code, _, _, result_ok = self.multi_manager._read_code_dpid_value_from_state(
-                dev_id, item, False, True
-            )
-            if not result_ok or code is None:
+            if item.code is None:
                 continue
 
-            for virtual_state in virtual_states:
-                if code == virtual_state.key:
-                    self._prepare_structure_for_code(dev_id, code)
-                    self.device_map[dev_id][code].register_source_message(source)
+            for virtual_state in code_virtual_states.get(item.code, ()):
+                self._prepare_structure_for_code(dev_id, item.code)
+                self.device_map[dev_id][item.code].register_source_message(source)
 
     def filter_status_list(
-        self, dev_id: str, original_source: str, status_in: list[dict[str, Any]]
-    ) -> list[dict[str, Any]]:
-        status_list = copy.deepcopy(status_in)
+        self,
+        dev_id: str,
+        original_source: str,
+        status_in: list[shared.XTDeviceReportItem],
+    ) -> list[shared.XTDeviceReportItem]:
         device = self.multi_manager.device_map.get(dev_id, None)
         if not device:
-            return status_list
+            return status_in
 
         # Only filter for devices that have a VirtualState in their status_list
-        virtual_states = (
-            self.multi_manager.virtual_state_handler.get_category_virtual_states(
+        code_virtual_states = (
+            self.multi_manager.virtual_state_handler.get_category_code_virtual_states(
                 device.category
             )
         )
-        if not virtual_states:
-            return status_list
+        if not code_virtual_states:
+            return status_in
 
-        i = 0
+        status_list: list[shared.XTDeviceReportItem] = []
         for item in status_in:
-            code, _, _, result_ok = self.multi_manager._read_code_dpid_value_from_state(
-                dev_id, item, False, True
-            )
-            if not result_ok or code is None:
-                i += 1
+            code = item.code
+            if code is None:
+                status_list.append(item)
                 continue
 
+            item_allowed = True
             update_time_valid: bool | None = None
-            for virtual_state in virtual_states:
-                if code == virtual_state.key:
-                    self._prepare_structure_for_code(dev_id, code)
-                    if (
-                        self._is_allowed_source_for_code(dev_id, code, original_source)
-                        is False
-                    ):
-                        status_list.pop(i)
-                        i -= 1
-                        break
-
-                    # Only check update time if the source is allowed
-                    if update_time_valid is None:
-                        #only check update time once per dpcode, otherwise it would always fail
-                        update_time_valid = self._is_code_update_time_valid(
-                            dev_id,
-                            code,
-                            item.get("t", 0),
-                            original_source,
-                        )
-                    if update_time_valid is False:
-                        status_list.pop(i)
-                        i -= 1
-                        break
-            i += 1
+            for virtual_state in code_virtual_states.get(code, ()):
+                self._prepare_structure_for_code(dev_id, code)
+                if (
+                    self._is_allowed_source_for_code(dev_id, code, original_source)
+                    is False
+                ):
+                    item_allowed = False
+                    break
+
+                # Only check update time if the source is allowed
+                if update_time_valid is None:
+                    #only check update time once per dpcode, otherwise it would always fail
+                    update_time_valid = self._is_code_update_time_valid(
+                        dev_id,
+                        code,
+                        item.t or 0,
+                        original_source,
+                    )
+                if update_time_valid is False:
+                    item_allowed = False
+                    break
+            if item_allowed:
+                status_list.append(item)
 
         return status_list
 
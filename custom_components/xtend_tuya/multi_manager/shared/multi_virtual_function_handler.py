@@ -8,7 +8,9 @@ from ...const import (
     XTMultiManagerProperties,
 )
 import custom_components.xtend_tuya.multi_manager.shared.shared_classes as shared
-import custom_components.xtend_tuya.multi_manager.shared.merging_manager as merging_manager
+from .threading import (
+    XTEventLoopProtector,
+)
 
 import custom_components.xtend_tuya.sensor as sensor
 
@@ -19,6 +21,13 @@ if TYPE_CHECKING:
 class XTVirtualFunctionHandler:
     def __init__(self, multi_manager: mm.MultiManager) -> None:
         self.descriptors_with_virtual_function = {}
+        # Compiled from the registered descriptors, the commands only do lookups
+        self.category_virtual_functions: dict[
+            str, tuple[DescriptionVirtualFunction, ...]
+        ] = {}
+        self.category_code_virtual_function: dict[
+            str, dict[str, DescriptionVirtualFunction]
+        ] = {}
         self.multi_manager = multi_manager
 
     def register_device_descriptors(self, name: str, descriptors):
@@ -47,39 +56,64 @@ class XTVirtualFunctionHandler:
 
         if len(descriptors_with_vf) > 0:
             self.descriptors_with_virtual_function[name] = descriptors_with_vf
+            self._compile_virtual_functions()
 
-    def get_category_virtual_functions(
-        self, category: str
-    ) -> list[DescriptionVirtualFunction]:
-        to_return = []
+    def _compile_virtual_functions(self) -> None:
+        category_virtual_functions: dict[str, list[DescriptionVirtualFunction]] = {}
         for virtual_function in VirtualFunctions:
             if virtual_function.name is None or virtual_function.value is None:
                 continue
             for descriptor in self.descriptors_with_virtual_function.values():
-                if descriptions := descriptor.get(category):
+                for category, descriptions in descriptor.items():
                     for description in descriptions:
                         if (
                             description.virtual_function is not None
                             and description.virtual_function & virtual_function.value
                         ):
-                            # This virtual_state is applied to this key, let's return it
-                            found_virtual_function = DescriptionVirtualFunction(
-                                key=description.key,
-                                virtual_function_name=virtual_function.name,
-                                virtual_function_value=VirtualFunctions(virtual_function.value),
-                                vf_reset_state=(
-                                    description.vf_reset_state
-                                    if description.vf_reset_state is not None
-                                    else []
-                                ),
-                                vf_history_import_dpcodes=(
-                                    description.vf_history_import_dpcodes
-                                    if description.vf_history_import_dpcodes is not None
-                                    else []
-                                ),
+                            # This virtual_function is applied to this key, let's register it
+                            category_virtual_functions.setdefault(category, []).append(
+                                DescriptionVirtualFunction(
+                                    key=description.key,
+                                    virtual_function_name=virtual_function.name,
+                                    virtual_function_value=VirtualFunctions(
+                                        virtual_function.value
+                                    ),
+                                    vf_reset_state=(
+                                        description.vf_reset_state
+                                        if description.vf_reset_state is not None
+                                        else []
+                                    ),
+                                    vf_history_import_dpcodes=(
+                                        description.vf_history_import_dpcodes
+                                        if description.vf_history_import_dpcodes
+                                        is not None
+                                        else []
+                                    ),
+                                )
                             )
-                            to_return.append(found_virtual_function)
-        return to_return
+        self.category_virtual_functions = {}
+        self.category_code_virtual_function = {}
+        for category, virtual_functions in category_virtual_functions.items():
+            self.category_virtual_functions[category] = tuple(virtual_functions)
+            code_virtual_function: dict[str, DescriptionVirtualFunction] = {}
+            for virtual_function in virtual_functions:
+                # A command is handled by the first virtual function of its code
+                code_virtual_function.setdefault(virtual_function.key, virtual_function)
+                for code in virtual_function.vf_reset_state:
+                    code_virtual_function.setdefault(code, virtual_function)
+            self.category_code_virtual_function[category] = code_virtual_function
+
+    def get_category_virtual_functions(
+        self, category: str
+    ) -> tuple[DescriptionVirtualFunction, ...]:
+        return self.category_virtual_functions.get(category, ())
+
+    def get_code_virtual_function(
+        self, category: str, code: str
+    ) -> DescriptionVirtualFunction | None:
+        if code_virtual_function := self.category_code_virtual_function.get(category):
+            return code_virtual_function.get(code)
+        return None
 
     def process_virtual_function(self, device_id: str, commands: list[dict[str, Any]]):
         device: shared.XTDevice | None = self.multi_manager.device_map.get(
@@ -101,38 +135,32 @@ class XTVirtualFunctionHandler:
                     if needs_update:
                         self.multi_manager.multi_device_listener.update_device(device)
                 case VirtualFunctions.FUNCTION_IMPORT_ELECTRICAL_HISTORY:
-                    now = datetime.now()
-                    beginning_of_this_hour = now.replace(minute=0, second=0, microsecond=0)
-                    six_days_ago = now.replace(hour=0) - timedelta(days=6)
-                    seven_days_ago = now.replace(hour=0) - timedelta(days=7)
-                    five_years_and_six_days_ago = six_days_ago.replace(year=six_days_ago.year - 5)
-                    result_days = (
-                        self.multi_manager.get_device_consumption_statistics_by_day(
-                            device_id=device_id,
-                            start_day=five_years_and_six_days_ago.strftime("%Y%m%d"),
-                            end_day=seven_days_ago.strftime("%Y%m%d"),
-                        )
+                    # Many queries, don't hold the caller while they run
+                    XTEventLoopProtector.execute_out_of_event_loop(
+                        self.async_import_electrical_history, device_id
                     )
-                    result_hours = (
-                        self.multi_manager.get_device_consumption_statistics_by_hour(
-                            device_id=device_id,
-                            start_day_and_hour=six_days_ago.strftime("%Y%m%d%H"),
-                            end_day_and_hour=beginning_of_this_hour.strftime("%Y%m%d%H"),
-                        )
-                    )
-                    overall_result = cast(
-                        dict[str, dict[float, float]],
-                        merging_manager.XTMergingManager.smart_merge(
-                            result_days if result_days is not None else {},
-                            result_hours if result_hours is not None else {},
-                        ),
-                    )
-                    all_energy_sensors: dict[str, list[sensor.XTSensorEntity]] = cast(
-                        dict[str, list[sensor.XTSensorEntity]],
-                        self.multi_manager.get_general_property(
-                            XTMultiManagerProperties.ENERGY_SENSOR, {}
-                        ),
-                    )
-                    if device_id in all_energy_sensors:
-                        for energy_sensor in all_energy_sensors[device_id]:
-                            energy_sensor.import_consumption_history(overall_result)
+
+    async def async_import_electrical_history(self, device_id: str) -> None:
+        now = datetime.now()
+        beginning_of_this_hour = now.replace(minute=0, second=0, microsecond=0)
+        six_days_ago = now.replace(hour=0) - timedelta(days=6)
+        seven_days_ago = now.replace(hour=0) - timedelta(days=7)
+        five_years_and_six_days_ago = six_days_ago.replace(year=six_days_ago.year - 5)
+        history = await self.multi_manager.async_get_device_consumption_history(
+            device_id=device_id,
+            start_day=five_years_and_six_days_ago.strftime("%Y%m%d"),
+            end_day=seven_days_ago.strftime("%Y%m%d"),
+            start_day_and_hour=six_days_ago.strftime("%Y%m%d%H"),
+            end_day_and_hour=beginning_of_this_hour.strftime("%Y%m%d%H"),
+        )
+        all_energy_sensors: dict[str, list[sensor.XTSensorEntity]] = cast(
+            dict[str, list[sensor.XTSensorEntity]],
+            self.multi_manager.get_general_property(
+                XTMultiManagerProperties.ENERGY_SENSOR, {}
+            ),
+        )
+        if device_id in all_energy_sensors:
+            for energy_sensor in all_energy_sensors[device_id]:
+                energy_sensor.import_consumption_history(
+                    history if history is not None else {}
+                )
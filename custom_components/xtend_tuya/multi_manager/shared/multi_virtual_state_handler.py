@@ -1,6 +1,6 @@
 from __future__ import annotations
 import copy
-from typing import Any
+import dataclasses
 from ...const import (
     VirtualStates,
     DescriptionVirtualState,
@@ -13,6 +13,13 @@ import custom_components.xtend_tuya.multi_manager.shared.shared_classes as share
 class XTVirtualStateHandler:
     def __init__(self, multi_manager: mm.MultiManager) -> None:
         self.descriptors_with_virtual_state = {}
+        # Compiled from the registered descriptors, the reports only do lookups
+        self.category_virtual_states: dict[str, tuple[DescriptionVirtualState, ...]] = (
+            {}
+        )
+        self.category_code_virtual_states: dict[
+            str, dict[str, tuple[DescriptionVirtualState, ...]]
+        ] = {}
         self.multi_manager = multi_manager
 
     def register_device_descriptors(self, name: str, descriptors):
@@ -40,35 +47,63 @@ class XTVirtualStateHandler:
                 descriptors_with_vs[category] = tuple(description_list_vs)
         if len(descriptors_with_vs) > 0:
             self.descriptors_with_virtual_state[name] = descriptors_with_vs
+            self._compile_virtual_states()
             for device in self.multi_manager.device_map.values():
                 self.apply_init_virtual_states(device)
 
-    def get_category_virtual_states(
-        self, category: str
-    ) -> list[DescriptionVirtualState]:
-        to_return = []
+    def _compile_virtual_states(self) -> None:
+        category_virtual_states: dict[str, list[DescriptionVirtualState]] = {}
         for virtual_state in VirtualStates:
             if virtual_state.name is None or virtual_state.value is None:
                 continue
             for descriptor in self.descriptors_with_virtual_state.values():
-                if descriptions := descriptor.get(category):
+                for category, descriptions in descriptor.items():
                     for description in descriptions:
                         if (
                             description.virtual_state is not None
                             and description.virtual_state & virtual_state.value
                         ):
-                            # This virtual_state is applied to this key, let's return it
-                            vs_copy_to_state = getattr(description, "vs_copy_to_state", [])
-                            vs_copy_delta_to_state = getattr(description, "vs_copy_delta_to_state", [])
-                            found_virtual_state = DescriptionVirtualState(
-                                key=description.key,
-                                virtual_state_name=virtual_state.name,
-                                virtual_state_value=VirtualStates(virtual_state.value),
-                                vs_copy_to_state=vs_copy_to_state,
-                                vs_copy_delta_to_state=vs_copy_delta_to_state,
+                            # This virtual_state is applied to this key, let's register it
+                            vs_copy_to_state = getattr(
+                                description, "vs_copy_to_state", []
+                            )
+                            vs_copy_delta_to_state = getattr(
+                                description, "vs_copy_delta_to_state", []
+                            )
+                            category_virtual_states.setdefault(category, []).append(
+                                DescriptionVirtualState(
+                                    key=description.key,
+                                    virtual_state_name=virtual_state.name,
+                                    virtual_state_value=VirtualStates(
+                                        virtual_state.value
+                                    ),
+                                    vs_copy_to_state=vs_copy_to_state,
+                                    vs_copy_delta_to_state=vs_copy_delta_to_state,
+                                )
                             )
-                            to_return.append(found_virtual_state)
-        return to_return
+        self.category_virtual_states = {}
+        self.category_code_virtual_states = {}
+        for category, virtual_states in category_virtual_states.items():
+            self.category_virtual_states[category] = tuple(virtual_states)
+            code_virtual_states: dict[str, list[DescriptionVirtualState]] = {}
+            for virtual_state in virtual_states:
+                code_virtual_states.setdefault(virtual_state.key, []).append(
+                    virtual_state
+                )
+            self.category_code_virtual_states[category] = {
+                code: tuple(code_list)
+                for code, code_list in code_virtual_states.items()
+            }
+
+    def get_category_virtual_states(
+        self, category: str
+    ) -> tuple[DescriptionVirtualState, ...]:
+        return self.category_virtual_states.get(category, ())
+
+    def get_category_code_virtual_states(
+        self, category: str
+    ) -> dict[str, tuple[DescriptionVirtualState, ...]]:
+        return self.category_code_virtual_states.get(category, {})
 
     def apply_init_virtual_states(self, device: shared.XTDevice):
         # WARNING, this method might be called multiple times for the same device, make sure it doesn't
@@ -270,47 +305,46 @@ class XTVirtualStateHandler:
     def apply_virtual_states_to_status_list(
         self,
         device: shared.XTDevice,
-        status_in: list[dict[str, Any]],
+        status_in: list[shared.XTDeviceReportItem],
         source: str | None = None,
-    ) -> list[dict[str, Any]]:
+    ) -> list[shared.XTDeviceReportItem]:
         if not status_in:
             return status_in
-        status = copy.deepcopy(status_in)
         virtual_states = self.get_category_virtual_states(device.category)
+        if not virtual_states:
+            return status_in
+        status = list(status_in)
         for virtual_state in virtual_states:
             if (
                 virtual_state.virtual_state_value
                 == VirtualStates.STATE_COPY_TO_MULTIPLE_STATE_NAME
             ):
                 for item in status:
-                    code, dpId, new_key_value, result_ok = (
-                        self.multi_manager._read_code_dpid_value_from_state(
-                            device.id, item
-                        )
-                    )
-                    if result_ok and code == virtual_state.key:
+                    if item.is_resolved and item.code == virtual_state.key:
+                        new_key_value = item.value
                         cur_key_value = 0
-                        if code in device.status:
-                            cur_key_value = device.status[code]
+                        if item.code in device.status:
+                            cur_key_value = device.status[item.code]
                         for state_name in virtual_state.vs_copy_to_state:
-                            code, dpId, new_key_value, result_ok = (
+                            code, dpId, _, result_ok = (
                                 self.multi_manager._read_code_dpid_value_from_state(
-                                    device.id,
-                                    {"code": str(state_name), "value": new_key_value},
+                                    device.id, {"code": str(state_name)}
                                 )
                             )
                             if result_ok:
-                                new_status = {
-                                    "code": code,
-                                    "value": copy.copy(new_key_value),
-                                    "dpId": dpId,
-                                }
-                                status.append(new_status)
+                                status.append(
+                                    shared.XTDeviceReportItem(
+                                        code,
+                                        dpId,
+                                        copy.copy(new_key_value),
+                                        None,
+                                        source,
+                                    )
+                                )
                         for state_name in virtual_state.vs_copy_delta_to_state:
-                            code, dpId, new_key_value, result_ok = (
+                            code, dpId, _, result_ok = (
                                 self.multi_manager._read_code_dpid_value_from_state(
-                                    device.id,
-                                    {"code": str(state_name), "value": new_key_value},
+                                    device.id, {"code": str(state_name)}
                                 )
                             )
                             current_value = None
@@ -321,12 +355,15 @@ class XTVirtualStateHandler:
                                 and current_value is not None
                                 and isinstance(new_key_value, (int, float))
                             ):
-                                new_status = {
-                                    "code": code,
-                                    "value": copy.copy(new_key_value - cur_key_value),
-                                    "dpId": dpId,
-                                }
-                                status.append(new_status)
+                                status.append(
+                                    shared.XTDeviceReportItem(
+                                        code,
+                                        dpId,
+                                        new_key_value - cur_key_value,
+                                        None,
+                                        source,
+                                    )
+                                )
 
             if (
                 virtual_state.virtual_state_value
@@ -336,25 +373,17 @@ class XTVirtualStateHandler:
                     continue
                 if device.status[virtual_state.key] is None:
                     device.status[virtual_state.key] = 0
-                if virtual_state.key in device.status:
-                    for item in status:
-                        code, dpId, new_key_value, result_ok = (
-                            self.multi_manager._read_code_dpid_value_from_state(
-                                device.id,
-                                item,
-                                False,
-                                True,
-                            )
+                for i, item in enumerate(status):
+                    if item.code == virtual_state.key:
+                        before_value = item.value
+                        # The items may be shared with other consumers of the report, replace them
+                        status[i] = item = dataclasses.replace(
+                            item, value=item.value + device.status[virtual_state.key]
+                        )
+                        self.multi_manager.device_watcher.report_message(
+                            device.id,
+                            f"[{source}]VS State applying: code: {item.code}, before_update: {before_value}, after_update: {item.value}, status_in: {status_in}",
+                            XTDeviceWatcherCategory.VIRTUAL_STATE,
+                            device,
                         )
-                        if result_ok and code == virtual_state.key:
-                            before_value = item["value"]
-                            item["value"] += device.status[virtual_state.key]
-                            after_value = item["value"]
-                            self.multi_manager.device_watcher.report_message(
-                                device.id,
-                                f"[{source}]VS State applying: code: {code}, before_update: {before_value}, after_update: {after_value}, status_in: {status_in}",
-                                XTDeviceWatcherCategory.VIRTUAL_STATE,
-                                device,
-                            )
-                            continue
         return status
@@ -0,0 +1,224 @@
+from __future__ import annotations
+from collections.abc import Iterable
+from functools import partial
+from typing import Any, Callable
+from homeassistant.const import Platform
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.device_registry import (
+    DeviceEntry,
+    DeviceEntryDisabler,
+)
+from homeassistant.helpers.entity_registry import (
+    RegistryEntryDisabler,
+)
+from homeassistant.helpers.entity_platform import async_get_platforms
+from homeassistant.helpers.entity import EntityDescription
+from ...const import (
+    DOMAIN,
+    DOMAIN_ORIG,
+    FULLY_OVERRIDEN_PLATFORMS,
+)
+import custom_components.xtend_tuya.multi_manager.multi_manager as mm
+import custom_components.xtend_tuya.multi_manager.shared.shared_classes as sc
+import custom_components.xtend_tuya.entity as entity
+
+
+class XTRegistrySync:
+    """Keeps the device registry entries of the Tuya devices indexed by identifier.
+
+    The index is built once during setup and then kept current from the
+    device registry events, so that looking up the registry entry of a device
+    (on every device update for the name sync) is a dict lookup.
+    """
+
+    def __init__(self, hass: HomeAssistant, multi_manager: mm.MultiManager) -> None:
+        self.hass = hass
+        self.multi_manager = multi_manager
+        self.device_entries: dict[tuple[str, str], DeviceEntry] = {}
+        self.index_built: bool = False
+        self._unsubscribe: Callable[[], None] | None = None
+
+    @callback
+    def async_build_index(self) -> None:
+        device_registry = dr.async_get(self.hass)
+        self.device_entries = {}
+        for device_entry in device_registry.devices.values():
+            self._index_device_entry(device_entry)
+        if self._unsubscribe is None:
+            self._unsubscribe = self.hass.bus.async_listen(
+                dr.EVENT_DEVICE_REGISTRY_UPDATED, self._async_on_device_registry_updated
+            )
+        self.index_built = True
+
+    @callback
+    def async_stop(self) -> None:
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+        self.device_entries = {}
+        self.index_built = False
+
+    def _index_device_entry(self, device_entry: DeviceEntry) -> None:
+        for identifier in device_entry.identifiers:
+            if len(identifier) > 1 and identifier[0] in (DOMAIN, DOMAIN_ORIG):
+                self.device_entries.setdefault(identifier, device_entry)
+
+    def _unindex_device_entry(self, hass_device_id: str) -> None:
+        for identifier, device_entry in list(self.device_entries.items()):
+            if device_entry.id == hass_device_id:
+                del self.device_entries[identifier]
+
+    @callback
+    def _async_on_device_registry_updated(
+        self, event: Event[dr.EventDeviceRegistryUpdatedData]
+    ) -> None:
+        hass_device_id = event.data["device_id"]
+        self._unindex_device_entry(hass_device_id)
+        if event.data["action"] == "remove":
+            return
+        if device_entry := dr.async_get(self.hass).async_get(hass_device_id):
+            self._index_device_entry(device_entry)
+
+    def get_device_entry(self, device_id: str) -> DeviceEntry | None:
+        if not self.index_built:
+            return dr.async_get(self.hass).async_get_device(
+                identifiers={(DOMAIN_ORIG, device_id), (DOMAIN, device_id)}
+            )
+        return self.device_entries.get(
+            (DOMAIN_ORIG, device_id)
+        ) or self.device_entries.get((DOMAIN, device_id))
+
+    def sync_device_name(self, device: sc.XTDevice) -> None:
+        device_entry = self.get_device_entry(device.id)
+        if device_entry is not None and device_entry.name != device.name:
+            self.hass.add_job(
+                partial(
+                    dr.async_get(self.hass).async_update_device,
+                    device_entry.id,
+                    name=device.name,
+                )
+            )
+
+    @callback
+    def async_sync_entities(self, devices: Iterable[sc.XTDevice]) -> None:
+        """Disable the Tuya entities we fully override and register the DPCodes the others handle."""
+        entity_registry = er.async_get(self.hass)
+        platform_entities: dict[str, tuple[Platform, Any]] = {}
+        for entity_platform in async_get_platforms(self.hass, DOMAIN_ORIG):
+            platform = Platform(entity_platform.domain)
+            for entity_id, entity_instance in entity_platform.entities.items():
+                platform_entities.setdefault(entity_id, (platform, entity_instance))
+        entities_to_disable: list[str] = []
+        for device in devices:
+            device_entry = self.get_device_entry(device.id)
+            if device_entry is None:
+                continue
+            for entity_registration in er.async_entries_for_device(
+                entity_registry,
+                device_id=device_entry.id,
+                include_disabled_entities=False,
+            ):
+                if entity_registration.entity_id not in platform_entities:
+                    continue
+                platform, entity_instance = platform_entities[
+                    entity_registration.entity_id
+                ]
+                if platform in FULLY_OVERRIDEN_PLATFORMS:
+                    entities_to_disable.append(entity_registration.entity_id)
+                    continue
+                entity_description: EntityDescription | None = getattr(
+                    entity_instance, "entity_description", None
+                )
+                if entity_description is not None:
+                    entity.XTEntity.register_handled_dpcode(
+                        device,
+                        platform,
+                        entity.XTEntity._get_description_dpcode(entity_description),
+                    )
+        for entity_id in entities_to_disable:
+            entity_registry.async_update_entity(
+                entity_id=entity_id,
+                disabled_by=RegistryEntryDisabler.USER,
+            )
+
+    @callback
+    def async_sync_devices(
+        self, config_entry_id: str, devices: Iterable[sc.XTDevice]
+    ) -> None:
+        """Create or update the registry entries of the devices that differ from what we register."""
+        device_registry = dr.async_get(self.hass)
+        devices_to_create: list[tuple[set[tuple[str, str]], sc.XTDevice, str]] = []
+        devices_to_enable: list[str] = []
+        for device in devices:
+            identifiers: set[tuple[str, str]] = set()
+            if (DOMAIN_ORIG, device.id) in self.device_entries:
+                identifiers.add((DOMAIN_ORIG, device.id))
+            for (
+                domain_identifier
+            ) in self.multi_manager.get_domain_identifiers_of_device(device.id):
+                identifiers.add((domain_identifier, device.id))
+            model = f"{device.product_name} (unsupported)"
+            device_entry = self._get_matching_device_entry(identifiers)
+            if device_entry is None or not self._is_device_entry_up_to_date(
+                device_entry, config_entry_id, identifiers, device.name, model
+            ):
+                devices_to_create.append((identifiers, device, model))
+            elif self._is_device_disabled_by_integration(device_entry):
+                devices_to_enable.append(device_entry.id)
+
+        for identifiers, device, model in devices_to_create:
+            device_entry = device_registry.async_get_or_create(
+                config_entry_id=config_entry_id,
+                identifiers=identifiers,
+                manufacturer="Tuya",
+                name=device.name,
+                model=model,
+            )
+            if self._is_device_disabled_by_integration(device_entry):
+                devices_to_enable.append(device_entry.id)
+        for hass_device_id in devices_to_enable:
+            device_registry.async_update_device(hass_device_id, disabled_by=None)
+
+    def _get_matching_device_entry(
+        self, identifiers: set[tuple[str, str]]
+    ) -> DeviceEntry | None:
+        for identifier in identifiers:
+            if device_entry := self.device_entries.get(identifier):
+                return device_entry
+        return None
+
+    def _is_device_entry_up_to_date(
+        self,
+        device_entry: DeviceEntry,
+        config_entry_id: str,
+        identifiers: set[tuple[str, str]],
+        name: str,
+        model: str,
+    ) -> bool:
+        # Mirrors what async_get_or_create would change on an existing entry
+        if (
+            config_entry_id not in device_entry.config_entries
+            or not identifiers <= device_entry.identifiers
+            or device_entry.manufacturer != "Tuya"
+            or device_entry.name != name
+            or device_entry.model != model
+        ):
+            return False
+        primary_entry_id = device_entry.primary_config_entry
+        if primary_entry_id == config_entry_id:
+            return True
+        if primary_entry_id is None:
+            return False
+        primary_entry = self.hass.config_entries.async_get_entry(primary_entry_id)
+        return (
+            primary_entry is not None
+            and primary_entry.domain not in dr.LOW_PRIO_CONFIG_ENTRY_DOMAINS
+        )
+
+    @staticmethod
+    def _is_device_disabled_by_integration(device_entry: DeviceEntry) -> bool:
+        return (
+            device_entry.disabled_by is not None
+            and device_entry.disabled_by != DeviceEntryDisabler.USER
+        )
@@ -23,6 +23,11 @@ from ....util import (
 from homeassistant.const import (
     CONF_DEVICE_ID,
 )
+from homeassistant.core import (
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
 
 CONF_SOURCE = "source"
 CONF_STREAM_TYPE = "stream_type"
@@ -32,6 +37,7 @@ CONF_PAYLOAD = "payload"
 CONF_SESSION_ID = "session_id"
 CONF_FORMAT = "format"
 CONF_CHANNEL = "channel"
+CONF_ENTRY_ID = "entry_id"
 
 SERVICE_GET_CAMERA_STREAM_URL = "get_camera_stream_url"
 SERVICE_GET_CAMERA_STREAM_URL_SCHEMA = vol.Schema(
@@ -80,6 +86,13 @@ SERVICE_WEBRTC_DEBUG_SCHEMA = vol.Schema(
     }
 )
 
+SERVICE_GET_STARTUP_TIMELINES = "get_startup_timelines"
+SERVICE_GET_STARTUP_TIMELINES_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_ENTRY_ID): cv.string,
+    }
+)
+
 
 class ServiceManager:
     def __init__(self, multi_manager: mm.MultiManager) -> None:
@@ -132,6 +145,16 @@ class ServiceManager:
             True,
             False,
         )
+        self._register_service(
+            DOMAIN,
+            SERVICE_GET_STARTUP_TIMELINES,
+            self._handle_get_startup_timelines,
+            SERVICE_GET_STARTUP_TIMELINES_SCHEMA,
+            True,
+            False,
+            False,
+            SupportsResponse.ONLY,
+        )
 
     def _register_service(
         self,
@@ -142,8 +165,11 @@ class ServiceManager:
         requires_auth: bool = True,
         allow_from_api: bool = True,
         use_cache: bool = True,
+        supports_response: SupportsResponse = SupportsResponse.NONE,
     ):
-        self.hass.services.async_register(domain, name, callback, schema=schema)
+        self.hass.services.async_register(
+            domain, name, callback, schema=schema, supports_response=supports_response
+        )
         if allow_from_api:
             self.hass.http.register_view(
                 XTGeneralView(name, callback, requires_auth, use_cache)
@@ -197,6 +223,14 @@ class ServiceManager:
                 except Exception as e:
                     LOGGER.warning(f"API Call failed: {e}")
 
+    async def _handle_get_startup_timelines(self, call: ServiceCall) -> ServiceResponse:
+        entry_id = call.data.get(CONF_ENTRY_ID, None)
+        timelines: list[dict[str, Any]] = []
+        for multi_manager in get_all_multi_managers(self.hass):
+            if entry_id is None or multi_manager.config_entry.entry_id == entry_id:
+                timelines.extend(multi_manager.storage_manager.get_startup_timelines())
+        return {"timelines": timelines}
+
     async def _handle_get_ice_servers(
         self, event: XTEventData
     ) -> web.Response | str | None:
@@ -258,8 +292,7 @@ class ServiceManager:
                     case "application/sdp":
                         if channel is not None:
                             if account := multi_manager.get_account_by_name(source):
-                                sdp_answer = await XTEventLoopProtector.execute_out_of_event_loop_and_return(
-                                    account.get_webrtc_sdp_answer,
+                                sdp_answer = await account.async_get_webrtc_sdp_answer(
                                     device_id,
                                     session_id,
                                     event.payload,
@@ -1,15 +1,15 @@
 from __future__ import annotations
-from typing import NamedTuple, Any, Optional, cast
+from typing import NamedTuple, Any, ClassVar, Optional
 from collections import UserDict
-from dataclasses import dataclass, field, asdict
+from collections.abc import Callable, Mapping
+from dataclasses import InitVar, dataclass, field, fields
+from types import MappingProxyType
 import copy
 import json
+import logging
 from enum import StrEnum
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from tuya_sharing.strategy import (
-    strategy as tuya_sharing_strategy,
-)
 from tuya_sharing import (
     CustomerDevice as TuyaDevice,
 )
@@ -28,6 +28,15 @@ from ...const import (
     XTDeviceWatcherCategory,
     XTDeviceWatcherSpecialDevice,  # noqa: F401
 )
+from .value_descriptor import (
+    XTValueDescriptor,
+)
+from .value_validator import (
+    XTValueValidator,
+)
+from .value_converter import (
+    XTValueConverter,
+)
 
 
 class DeviceWatcher:
@@ -84,6 +93,25 @@ class DeviceWatcher:
                     return True
         return False
 
+    def will_report(
+        self,
+        dev_id: str,
+        category: XTDeviceWatcherCategory,
+        category_parameter: str | None = None,
+        method: str = "warning",
+    ) -> bool:
+        """Whether report_message would log this message, to skip building costly ones."""
+        level = logging.getLevelName(method.upper())
+        if not LOGGER.isEnabledFor(
+            level if isinstance(level, int) else logging.WARNING
+        ):
+            return False
+        return self.is_watched(
+            dev_id,
+            XTDeviceWatcherCategory.get_unique_flags(category),
+            category_parameter,
+        )
+
     def report_message(
         self,
         dev_id: str,
@@ -136,8 +164,35 @@ type XTConfigEntry = ConfigEntry[HomeAssistantXTData]
 class XTDeviceStatusFunctionShared:
     code: str = ""
     type: TuyaDPType | None = None
-    values: str = "{}"
+    # Only a constructor argument, values is backed by the parsed descriptor
+    values: InitVar[str | dict[str, Any] | XTValueDescriptor] = "{}"
     dp_id: int = 0
+    _value_descr: XTValueDescriptor = field(init=False, repr=False)
+
+    def __post_init__(
+        self, values: str | dict[str, Any] | XTValueDescriptor | property
+    ) -> None:
+        if isinstance(values, property):
+            # Not given, the dataclass took the property below as the default
+            values = "{}"
+        self._value_descr = XTValueDescriptor.from_any(values)
+
+    @property
+    def values(self) -> str:
+        # The JSON text is only built on access
+        return self._value_descr.json
+
+    @values.setter
+    def values(self, values: str | dict[str, Any] | XTValueDescriptor) -> None:
+        self._value_descr = XTValueDescriptor.from_any(values)
+
+    @property
+    def value_descr(self) -> XTValueDescriptor:
+        return self._value_descr
+
+    @value_descr.setter
+    def value_descr(self, value_descr: XTValueDescriptor) -> None:
+        self._value_descr = value_descr
 
 
 @dataclass
@@ -148,6 +203,15 @@ class XTDeviceStatusRange(XTDeviceStatusFunctionShared):
     def __repr__(self) -> str:
         return f"StatusRange(code={self.code}, type={self.type}, values={self.values}, dp_id={self.dp_id}), report_type={self.report_type})"
 
+    @property
+    def validator(self) -> XTValueValidator:
+        # Built on first use, rebuilt when the type or the values of the range change
+        validator: XTValueValidator | None = getattr(self, "_validator", None)
+        if validator is None or not validator.matches(self.type, self.value_descr):
+            validator = XTValueValidator.get(self.type, self.value_descr)
+            self._validator = validator
+        return validator
+
     @staticmethod
     def from_compatible_status_range(status_range: Any):
         if hasattr(status_range, "code"):
@@ -214,6 +278,80 @@ class XTDeviceFunction(XTDeviceStatusFunctionShared):
         )
 
 
+@dataclass(slots=True)
+class XTDeviceReportItem:
+    """A status item of a device report, resolved once for the whole report pipeline."""
+
+    code: str | None
+    dp_id: int | None
+    value: Any
+    t: int | None = None
+    source: str | None = None
+
+    @property
+    def is_resolved(self) -> bool:
+        return self.code is not None and self.dp_id is not None
+
+
+@dataclass
+class XTDeviceDPCodeIndex:
+    """Lookup tables between the dpIds, status codes and status code aliases of a local strategy.
+
+    The index is rebuilt when the local strategy it was built from is replaced or
+    gets dpIds added or removed, in place changes of status codes or aliases must
+    call invalidate_all().
+    """
+
+    local_strategy: dict[int, dict[str, Any]]
+    dp_count: int
+    generation: int
+    # Status codes and aliases, the first dpId declaring a code wins
+    code_to_dp_id: dict[str, int] = field(default_factory=dict)
+    dp_id_to_code: dict[int, str] = field(default_factory=dict)
+    # Alias to the status code it stands for, the last dpId declaring an alias wins
+    alias_to_code: dict[str, str] = field(default_factory=dict)
+    code_to_aliases: dict[str, list[str]] = field(default_factory=dict)
+
+    current_generation: ClassVar[int] = 0
+
+    @staticmethod
+    def invalidate_all() -> None:
+        # Devices of the different sources share the same local strategy once merged
+        XTDeviceDPCodeIndex.current_generation += 1
+
+    def is_valid_for(self, local_strategy: dict[int, dict[str, Any]]) -> bool:
+        return (
+            self.generation == XTDeviceDPCodeIndex.current_generation
+            and self.local_strategy is local_strategy
+            and self.dp_count == len(local_strategy)
+        )
+
+    @staticmethod
+    def from_device(device: XTDevice) -> XTDeviceDPCodeIndex:
+        local_strategy = device.local_strategy
+        index = XTDeviceDPCodeIndex(
+            local_strategy=local_strategy,
+            dp_count=len(local_strategy),
+            generation=XTDeviceDPCodeIndex.current_generation,
+        )
+        for dp_id, dp_item in local_strategy.items():
+            if "status_code_alias" not in dp_item:
+                LOGGER.warning(
+                    f"Device {device.name} ({device.id}) has no status_code_alias dict for dpId {dp_id}, please contact the developer about this"
+                )
+            status_code = dp_item.get("status_code")
+            aliases = dp_item.get("status_code_alias") or []
+            if status_code is not None:
+                index.dp_id_to_code[dp_id] = status_code
+                index.code_to_dp_id.setdefault(status_code, dp_id)
+                index.code_to_aliases.setdefault(status_code, []).extend(aliases)
+            for alias in aliases:
+                index.code_to_dp_id.setdefault(alias, dp_id)
+                if status_code:
+                    index.alias_to_code[alias] = status_code
+        return index
+
+
 class XTDevice(TuyaDevice):
     id: str
     name: str
@@ -247,6 +385,20 @@ class XTDevice(TuyaDevice):
     device_preference: dict[str, Any] = {}
     original_device: Any = None
     device_map: XTDeviceMap | None = None
+    cloud_fix_state: Any = None  # Last state reached by CloudFixes for this very object
+    dpcode_index: XTDeviceDPCodeIndex | None = None
+    # (dpcode, dpid) => (objects and values it was built from, information)
+    dpcode_information_cache: (
+        dict[
+            tuple[str, int | None],
+            tuple[tuple[Any, ...], tuple[Any, ...], XTDevice.XTDeviceDPCodeInformation],
+        ]
+        | None
+    ) = None
+    # (dpcode index, status, status size) => codes entities can be discovered for
+    discovery_dpcodes_cache: (
+        tuple[XTDeviceDPCodeIndex, dict[str, Any], int, frozenset[str]] | None
+    ) = None
 
     FIELDS_TO_EXCLUDE_FROM_SYNC: list[str] = [
         "id",
@@ -254,6 +406,10 @@ class XTDevice(TuyaDevice):
         "device_source_priority",
         "original_device",
         "source",
+        "cloud_fix_state",
+        "dpcode_index",
+        "dpcode_information_cache",
+        "discovery_dpcodes_cache",
     ]
 
     class XTDevicePreference(StrEnum):
@@ -268,8 +424,10 @@ class XTDevice(TuyaDevice):
         LOCK_CALL_DOOR_OPEN = "LOCK_CALL_DOOR_OPEN"
         HANDLED_DPCODES = "HANDLED_DPCODES"
 
-    @dataclass
+    @dataclass(frozen=True)
     class XTDeviceDPCodeInformation:
+        """Information about a DPCode, shared between its readers: it must not be modified."""
+
         # From status_range/function
         dpcode: str
         dpid: int | None = None
@@ -289,11 +447,19 @@ class XTDevice(TuyaDevice):
         scale: int | None = None
         step: int | None = None
         unit: str | None = None
-        range: list[str] = field(default_factory=list)
-        label: list[str] = field(default_factory=list)
+        range: tuple[str, ...] = ()
+        label: tuple[str, ...] = ()
         value_convert: str | None = None
-        config_item: dict[str, Any] = field(default_factory=dict)
-        value_descr_dict: dict[str, Any] = field(default_factory=dict)
+        config_item: Mapping[str, Any] = field(
+            default_factory=lambda: MappingProxyType({})
+        )
+        value_descr_dict: Mapping[str, Any] = field(
+            default_factory=lambda: MappingProxyType({})
+        )
+        # Compiled value_convert strategy, see apply_dpcode_strategy
+        converter: Callable[[Any], Any] | None = field(
+            default=None, compare=False, repr=False
+        )
 
     def __init__(self, **kwargs: Any) -> None:
         self.id: str = ""
@@ -359,7 +525,14 @@ class XTDevice(TuyaDevice):
         new = cls.__new__(cls)
         memo[id(self)] = new
         for key, value in self.__dict__.items():
-            if key in ("device_map", "original_device"):
+            if key in (
+                "device_map",
+                "original_device",
+                "cloud_fix_state",
+                "dpcode_index",
+                "dpcode_information_cache",
+                "discovery_dpcodes_cache",
+            ):
                 object.__setattr__(new, key, None)
             else:
                 object.__setattr__(new, key, copy.deepcopy(value, memo))
@@ -381,14 +554,10 @@ class XTDevice(TuyaDevice):
     ) -> Any:
         local_value = value
         if dpcode_information := self.get_dpcode_information(dpcode=dpcode):
-            strategy_name = dpcode_information.value_convert
-            config_item = dpcode_information.config_item
-            dp_item = (dpcode, value)
+            if (converter := dpcode_information.converter) is None:
+                return local_value
             try:
-                _, new_value = tuya_sharing_strategy.convert(
-                    strategy_name, dp_item, config_item
-                )
-                local_value = new_value
+                local_value = converter(value)
             except Exception as e:
                 if (
                     multi_manager is not None
@@ -451,20 +620,38 @@ class XTDevice(TuyaDevice):
     def set_preference(self, pref_id: str, pref_val: Any):
         self.device_preference[pref_id] = pref_val
 
+    def get_dpcode_index(self) -> XTDeviceDPCodeIndex:
+        dpcode_index = self.dpcode_index
+        if dpcode_index is None or not dpcode_index.is_valid_for(self.local_strategy):
+            dpcode_index = XTDeviceDPCodeIndex.from_device(self)
+            self.dpcode_index = dpcode_index
+        return dpcode_index
+
+    def get_discovery_dpcodes(self) -> frozenset[str]:
+        # A description can only be supported for a reported code or an alias
+        dpcode_index = self.get_dpcode_index()
+        cache = self.discovery_dpcodes_cache
+        if (
+            cache is not None
+            and cache[0] is dpcode_index
+            and cache[1] is self.status
+            and cache[2] == len(self.status)
+        ):
+            return cache[3]
+        dpcodes = frozenset(self.status).union(dpcode_index.alias_to_code)
+        self.discovery_dpcodes_cache = (
+            dpcode_index,
+            self.status,
+            len(self.status),
+            dpcodes,
+        )
+        return dpcodes
+
     def get_all_status_code_aliases(self) -> dict[str, str]:
-        return_list: dict[str, str] = {}
-        for local_strategy in self.local_strategy.values():
-            if status_code := local_strategy.get("status_code", None):
-                for alias in local_strategy.get("status_code_alias", {}):
-                    return_list[alias] = status_code
-        return return_list
+        return dict(self.get_dpcode_index().alias_to_code)
 
     def get_status_code_aliases(self, status_code: str) -> list[str]:
-        alias_list: list[str] = []
-        for local_strategy in self.local_strategy.values():
-            if local_strategy.get("status_code", None) == status_code:
-                alias_list.extend(local_strategy.get("status_code_alias", []))
-        return alias_list
+        return list(self.get_dpcode_index().code_to_aliases.get(status_code, []))
 
     def replace_status_code_with_another(
         self,
@@ -508,6 +695,7 @@ class XTDevice(TuyaDevice):
                             )
                             break
                         config_item["statusFormat"] = json.dumps(status_formats_dict)
+                XTDeviceDPCodeIndex.invalidate_all()
                 break
 
     def get_dpcode_information(
@@ -519,71 +707,133 @@ class XTDevice(TuyaDevice):
             dpcode = self.local_strategy[dpid].get("status_code")
         if dpcode is None:
             return None
-        dp_info: XTDevice.XTDeviceDPCodeInformation = (
-            XTDevice.XTDeviceDPCodeInformation(
-                dpcode=dpcode,
-                dpid=dpid,
-                human_name=entity.XTEntity.get_human_name(technical_name=dpcode),
-            )
+
+        function = self.function.get(dpcode)
+        status_range = self.status_range.get(dpcode)
+        resolved_dpid = dpid
+        if function is not None and function.dp_id is not None and function.dp_id != 0:
+            resolved_dpid = function.dp_id
+        elif (
+            resolved_dpid is None
+            and status_range is not None
+            and status_range.dp_id is not None
+            and status_range.dp_id != 0
+        ):
+            resolved_dpid = status_range.dp_id
+        local_strategy = (
+            self.local_strategy.get(resolved_dpid)
+            if resolved_dpid is not None
+            else None
         )
-        if function := self.function.get(dpcode):
-            if function.dp_id is not None and function.dp_id != 0:
-                dp_info.dpid = function.dp_id
-            dp_info.dptype = function.type
-            dp_info.in_function = True
-        if status_range := self.status_range.get(dpcode):
-            if (
-                dp_info.dpid is None
-                and status_range.dp_id is not None
-                and status_range.dp_id != 0
+        config_item = local_strategy.get("config_item") if local_strategy else None
+
+        # The information is rebuilt when anything it is built from changes
+        sources = (function, status_range, local_strategy, config_item)
+        values = (
+            resolved_dpid,
+            function.type if function is not None else None,
+            status_range.type if status_range is not None else None,
+            local_strategy.get("access_mode") if local_strategy else None,
+            local_strategy.get("value_convert") if local_strategy else None,
+            config_item.get("valueType") if config_item else None,
+            config_item.get("valueDesc") if config_item else None,
+            config_item.get("statusFormat") if config_item else None,
+            # The enum mappings are edited in place (e.g. by the cloud fixes)
+            XTDevice._get_enum_mapping_fingerprint(config_item),
+        )
+        cache = self.dpcode_information_cache
+        if cache is None:
+            cache = {}
+            self.dpcode_information_cache = cache
+        cache_key = (dpcode, dpid)
+        if cached := cache.get(cache_key):
+            cached_sources, cached_values, dp_info = cached
+            if cached_values == values and all(
+                source is cached_source
+                for source, cached_source in zip(sources, cached_sources)
             ):
-                dp_info.dpid = status_range.dp_id
-            if dp_info.dptype is None:
-                dp_info.dptype = status_range.type
-            dp_info.in_status_range = True
-
-        if dp_info.dpid is not None:
-            if local_strategy := self.local_strategy.get(dp_info.dpid):
-                dp_info.in_local_strategy = True
-                dp_info.value_convert = local_strategy.get("value_convert")
-                if access_mode := local_strategy.get("access_mode"):
-                    dp_info.access_mode = access_mode
-                    match access_mode:
-                        case XTEntityAccessMode.READ_ONLY:
-                            dp_info.read_only = True
-                            dp_info.write_only = False
-                            dp_info.read_write = False
-                        case XTEntityAccessMode.READ_WRITE:
-                            dp_info.read_only = False
-                            dp_info.write_only = False
-                            dp_info.read_write = True
-                        case XTEntityAccessMode.WRITE_ONLY:
-                            dp_info.read_only = False
-                            dp_info.write_only = True
-                            dp_info.read_write = False
-                if config_item := local_strategy.get("config_item"):
-                    dp_info.config_item = config_item
-                    if dp_info.dptype is None:
-                        if ls_dptype := config_item.get("valueType"):
-                            dp_info.dptype = TuyaDPType.try_parse(ls_dptype)
-                    if ls_value_descr := config_item.get("valueDesc"):
-                        try:
-                            value_descr_dict = cast(
-                                dict[str, Any], json.loads(ls_value_descr)
-                            )
-                            dp_info.unit = value_descr_dict.get("unit")
-                            dp_info.min = value_descr_dict.get("min")
-                            dp_info.max = value_descr_dict.get("max")
-                            dp_info.scale = value_descr_dict.get("scale")
-                            dp_info.step = value_descr_dict.get("step")
-                            dp_info.range = value_descr_dict.get("range", [])
-                            dp_info.label = value_descr_dict.get("label", [])
-                            dp_info.value_descr_dict = value_descr_dict
-                        except Exception:
-                            pass
-
-        # Break the memory links to avoid changes from outside
-        return copy.deepcopy(dp_info)
+                return dp_info
+
+        dp_info = self._build_dpcode_information(
+            dpcode, resolved_dpid, function, status_range, local_strategy
+        )
+        cache[cache_key] = (sources, values, dp_info)
+        return dp_info
+
+    @staticmethod
+    def _get_enum_mapping_fingerprint(
+        config_item: dict[str, Any] | None,
+    ) -> tuple[tuple[Any, Any], ...] | None:
+        # The mapped values the enum converter is compiled from, copied out of the mapping
+        if not config_item or not (
+            enum_mapping_map := config_item.get("enumMappingMap")
+        ):
+            return None
+        return tuple(
+            (key, mapping.get("value") if isinstance(mapping, dict) else mapping)
+            for key, mapping in enum_mapping_map.items()
+        )
+
+    def _build_dpcode_information(
+        self,
+        dpcode: str,
+        dpid: int | None,
+        function: XTDeviceFunction | None,
+        status_range: XTDeviceStatusRange | None,
+        local_strategy: dict[str, Any] | None,
+    ) -> XTDevice.XTDeviceDPCodeInformation:
+        dp_info: dict[str, Any] = {
+            "dpcode": dpcode,
+            "dpid": dpid,
+            "human_name": entity.XTEntity.get_human_name(technical_name=dpcode),
+        }
+        dptype: TuyaDPType | None = None
+        if function:
+            dptype = function.type
+            dp_info["in_function"] = True
+        if status_range:
+            if dptype is None:
+                dptype = status_range.type
+            dp_info["in_status_range"] = True
+
+        if local_strategy:
+            dp_info["in_local_strategy"] = True
+            dp_info["value_convert"] = local_strategy.get("value_convert")
+            if access_mode := local_strategy.get("access_mode"):
+                dp_info["access_mode"] = access_mode
+                match access_mode:
+                    case XTEntityAccessMode.READ_ONLY:
+                        dp_info["read_only"] = True
+                    case XTEntityAccessMode.READ_WRITE:
+                        dp_info["read_write"] = True
+                    case XTEntityAccessMode.WRITE_ONLY:
+                        dp_info["write_only"] = True
+            if config_item := local_strategy.get("config_item"):
+                dp_info["config_item"] = MappingProxyType(config_item)
+                if dptype is None:
+                    if ls_dptype := config_item.get("valueType"):
+                        dptype = TuyaDPType.try_parse(ls_dptype)
+                if config_item.get("valueDesc"):
+                    ls_value_descr = XTValueDescriptor.get_config_item_descriptor(
+                        config_item
+                    )
+                    if ls_value_descr.is_dict:
+                        dp_info["unit"] = ls_value_descr.get("unit")
+                        dp_info["min"] = ls_value_descr.get("min")
+                        dp_info["max"] = ls_value_descr.get("max")
+                        dp_info["scale"] = ls_value_descr.get("scale")
+                        dp_info["step"] = ls_value_descr.get("step")
+                        dp_info["range"] = tuple(ls_value_descr.get("range") or ())
+                        dp_info["label"] = tuple(ls_value_descr.get("label") or ())
+                        # The descriptor is an immutable mapping
+                        dp_info["value_descr_dict"] = ls_value_descr
+        dp_info["dptype"] = dptype
+        dp_info["converter"] = XTValueConverter.compile(
+            dp_info.get("value_convert"),
+            dpcode,
+            dp_info.get("config_item") or MappingProxyType({}),
+        )
+        return XTDevice.XTDeviceDPCodeInformation(**dp_info)
 
     def set_dpcode_information(
         self, new_dpcode_info: XTDevice.XTDeviceDPCodeInformation
@@ -594,12 +844,13 @@ class XTDevice(TuyaDevice):
         )
         if cur_dpcode_info is None:
             return False
-        new_dpcode_info_dict = asdict(new_dpcode_info)
-        cur_dpcode_info_dict = asdict(cur_dpcode_info)
         changed_fields: list[str] = []
         processed_fields: list[str] = []
-        for key in new_dpcode_info_dict:
-            if cur_dpcode_info_dict[key] != new_dpcode_info_dict[key]:
+        for dp_info_field in fields(new_dpcode_info):
+            key = dp_info_field.name
+            if not dp_info_field.compare:
+                continue
+            if getattr(cur_dpcode_info, key) != getattr(new_dpcode_info, key):
                 changed_fields.append(key)
         # LOGGER.warning(f"set_dpcode_information: {changed_fields=}")
         if "dpcode" in changed_fields or "dpid" in changed_fields:
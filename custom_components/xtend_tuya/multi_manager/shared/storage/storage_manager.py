@@ -1,6 +1,7 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING, Any
 import json
+import time
 from dataclasses import dataclass, field
 from homeassistant.helpers.storage import Store
 from ....const import (
@@ -18,11 +19,47 @@ if TYPE_CHECKING:
     )
 
 
+@dataclass
+class XTProductSchema:
+    model_hash: str
+    data_model: dict[str, Any] = field(default_factory=dict)
+    known_dp_ids: list[int] = field(default_factory=list)
+    fetched_at: float = 0
+
+    # Built from data_model on first use, never persisted
+    local_strategy: dict[int, dict[str, Any]] | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "model_hash": self.model_hash,
+            "data_model": self.data_model,
+            "known_dp_ids": self.known_dp_ids,
+            "fetched_at": self.fetched_at,
+        }
+
+    @staticmethod
+    def from_dict(raw_dict: dict[str, Any]) -> XTProductSchema | None:
+        model_hash = raw_dict.get("model_hash")
+        data_model = raw_dict.get("data_model")
+        if not isinstance(model_hash, str) or not isinstance(data_model, dict):
+            return None
+        return XTProductSchema(
+            model_hash=model_hash,
+            data_model=data_model,
+            known_dp_ids=[int(dp_id) for dp_id in raw_dict.get("known_dp_ids", [])],
+            fetched_at=float(raw_dict.get("fetched_at", 0)),
+        )
+
+    def is_expired(self, max_age: float) -> bool:
+        return time.time() - self.fetched_at > max_age
+
+
 @dataclass
 class XTStorageStructure:
     type DeviceId = str
     type DPCode = str
     type PropertyName = str
+    type ProductId = str
 
     device_configurable_properties: dict[
         XTStorageStructure.DeviceId,
@@ -31,12 +68,23 @@ class XTStorageStructure:
             dict[XTStorageStructure.PropertyName, XTAcceptableStoragePropertyValue],
         ],
     ] = field(default_factory=dict)
+    product_schemas: dict[XTStorageStructure.ProductId, XTProductSchema] = field(
+        default_factory=dict
+    )
+    startup_timelines: list[dict[str, Any]] = field(default_factory=list)
 
     def as_dict(self) -> dict[str, Any]:
         return_dict: dict[str, Any] = {}
         return_dict["device_configurable_properties"] = json.dumps(
             self.device_configurable_properties
         )
+        return_dict["product_schemas"] = json.dumps(
+            {
+                product_id: product_schema.as_dict()
+                for product_id, product_schema in self.product_schemas.items()
+            }
+        )
+        return_dict["startup_timelines"] = json.dumps(self.startup_timelines)
         return return_dict
 
     @staticmethod
@@ -50,6 +98,13 @@ class XTStorageStructure:
             new_dict["device_configurable_properties"] = json.loads(
                 device_configurable_properties
             )
+        if (product_schemas := raw_dict.get("product_schemas")) is not None:
+            new_dict["product_schemas"] = {}
+            for product_id, raw_schema in json.loads(product_schemas).items():
+                if product_schema := XTProductSchema.from_dict(raw_schema):
+                    new_dict["product_schemas"][product_id] = product_schema
+        if (startup_timelines := raw_dict.get("startup_timelines")) is not None:
+            new_dict["startup_timelines"] = json.loads(startup_timelines)
         return XTStorageStructure(**new_dict)
 
 
@@ -63,8 +118,19 @@ class XTStorageManager:
         self._store = Store(
             hass=hass, version=1, key=f"xtend_tuya_{config_entry.entry_id}"
         )
+        # The device snapshot is large, it has its own store so that it is not
+        # rewritten along with every settings change
+        self._device_snapshot_store = Store(
+            hass=hass, version=1, key=f"xtend_tuya_{config_entry.entry_id}_devices"
+        )
+        self._consumption_history_store = Store(
+            hass=hass,
+            version=1,
+            key=f"xtend_tuya_{config_entry.entry_id}_consumption_history",
+        )
         self._store_data: XTStorageStructure = XTStorageStructure()
         self._multi_manager: MultiManager = multi_manager
+        self._dirty: bool = False
 
     def get_device_configurable_property(
         self,
@@ -98,6 +164,61 @@ class XTStorageManager:
             prop_name
         ] = prop_value
 
+    def get_product_schema(
+        self, product_id: XTStorageStructure.ProductId
+    ) -> XTProductSchema | None:
+        return self._store_data.product_schemas.get(product_id)
+
+    def set_product_schema(
+        self,
+        product_id: XTStorageStructure.ProductId,
+        product_schema: XTProductSchema,
+    ):
+        # Called from executor threads while the device caches are refreshed,
+        # the store is written once the refresh is over (see save_store_if_dirty)
+        self._store_data.product_schemas[product_id] = product_schema
+        self._dirty = True
+
+    def get_startup_timelines(self) -> list[dict[str, Any]]:
+        return list(self._store_data.startup_timelines)
+
+    def add_startup_timeline(self, timeline: dict[str, Any], max_timelines: int):
+        self._store_data.startup_timelines = [
+            *self._store_data.startup_timelines,
+            timeline,
+        ][-max_timelines:]
+        self._dirty = True
+
+    async def load_device_snapshot(self) -> dict[str, Any] | None:
+        try:
+            return await self._device_snapshot_store.async_load()
+        except Exception as e:
+            LOGGER.exception(e)
+            return None
+
+    async def save_device_snapshot(self, snapshot: dict[str, Any]) -> bool:
+        try:
+            await self._device_snapshot_store.async_save(snapshot)
+        except Exception as e:
+            LOGGER.exception(e)
+            return False
+        return True
+
+    async def load_consumption_history(self) -> dict[str, Any] | None:
+        try:
+            return await self._consumption_history_store.async_load()
+        except Exception as e:
+            LOGGER.exception(e)
+            return None
+
+    async def save_consumption_history(self, history: dict[str, Any]) -> bool:
+        try:
+            await self._consumption_history_store.async_save(history)
+        except Exception as e:
+            LOGGER.exception(e)
+            return False
+        return True
+
     async def load_store(self) -> bool:
         try:
             stored_data = await self._store.async_load()
@@ -110,8 +231,14 @@ class XTStorageManager:
 
     async def save_store(self) -> bool:
         try:
+            self._dirty = False
             await self._store.async_save(self._store_data.as_dict())
         except Exception as e:
             LOGGER.exception(e)
             return False
         return True
+
+    async def save_store_if_dirty(self) -> bool:
+        if self._dirty is False:
+            return True
+        return await self.save_store()
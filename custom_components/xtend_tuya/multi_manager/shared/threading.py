@@ -3,6 +3,7 @@ import threading
 import inspect
 import asyncio
 from functools import partial
+from collections.abc import Awaitable, Callable, Iterable
 from typing import Any
 from homeassistant.core import (
     HomeAssistant,
@@ -35,6 +36,89 @@ class XTConcurrencyManager:
             i = i + 1
 
 
+class XTAsyncWorkQueue:
+    """Runs a coroutine for each item with a bounded number of workers.
+
+    Unlike XTConcurrencyManager, which waits for a whole batch before starting
+    the next one, a worker picks the next item as soon as it is done. The item
+    starts can also be rate limited (items per second). A failing item is
+    logged and does not stop the others.
+    """
+
+    PROGRESS_LOG_INTERVAL: float = 10.0
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        rate_limit: float | None = None,
+        progress_callback: Callable[[int, int], None] | None = None,
+    ) -> None:
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.rate_limit = rate_limit
+        self.progress_callback = progress_callback
+        self.done: int = 0
+        self.failed: int = 0
+        self.total: int = 0
+        self._next_start: float = 0.0
+        self._last_progress_log: float = 0.0
+
+    async def run(
+        self, items: Iterable[Any], worker: Callable[[Any], Awaitable[Any]]
+    ) -> list[Any]:
+        items = list(items)
+        loop = asyncio.get_running_loop()
+        results: list[Any] = [None] * len(items)
+        self.total = len(items)
+        self.done = 0
+        self.failed = 0
+        self._next_start = self._last_progress_log = loop.time()
+        pending = iter(enumerate(items))
+
+        async def consume() -> None:
+            # All the workers share the same iterator
+            for index, item in pending:
+                await self._wait_for_rate_limit(loop)
+                try:
+                    results[index] = await worker(item)
+                except Exception as e:
+                    self.failed += 1
+                    # Items may be whole devices, only their ID is logged
+                    item_id = getattr(item, "id", item)
+                    LOGGER.warning(f"{self.name}: {item_id} failed: {e}")
+                    LOGGER.debug(f"{self.name}: {item_id} traceback", exc_info=True)
+                self.done += 1
+                self._report_progress(loop)
+
+        await asyncio.gather(
+            *(consume() for _ in range(min(self.max_concurrency, self.total)))
+        )
+        return results
+
+    async def _wait_for_rate_limit(self, loop: asyncio.AbstractEventLoop) -> None:
+        if not self.rate_limit:
+            return
+        now = loop.time()
+        start = max(now, self._next_start)
+        self._next_start = start + 1 / self.rate_limit
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def _report_progress(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self.progress_callback is not None:
+            self.progress_callback(self.done, self.total)
+        now = loop.time()
+        if (
+            self.done == self.total
+            or now - self._last_progress_log >= self.PROGRESS_LOG_INTERVAL
+        ):
+            self._last_progress_log = now
+            LOGGER.debug(
+                f"{self.name}: {self.done}/{self.total} done ({self.failed} failed)"
+            )
+
+
 class XTEventLoopProtector:
     hass: HomeAssistant | None = None
 
@@ -0,0 +1,85 @@
+from __future__ import annotations
+import json
+from collections.abc import Callable, Mapping
+from typing import Any
+from tuya_sharing.strategy import (
+    strategy as tuya_sharing_strategy,
+)
+
+_NO_MAPPING = object()
+
+
+class XTValueConverter:
+    """Compiles the tuya_sharing value conversion strategy of a DPCode into a callable.
+
+    The "default" and "enum" strategies parse their configuration on every
+    conversion, their compiled form parses it once and closes over the result.
+    Other strategies, and configurations these two would reject, go through
+    tuya_sharing so that they behave (and fail) exactly as before.
+    A converter takes the reported value and returns the converted one.
+    """
+
+    @staticmethod
+    def compile(
+        strategy_name: str | None, dpcode: str, config_item: Mapping[str, Any]
+    ) -> Callable[[Any], Any]:
+        def generic_converter(value: Any) -> Any:
+            _, new_value = tuya_sharing_strategy.convert(
+                strategy_name, (dpcode, value), config_item
+            )
+            return new_value
+
+        if strategy_name not in ("default", "enum"):
+            return generic_converter
+        try:
+            # Both strategies only use statusFormat for the returned key
+            json.loads(config_item["statusFormat"]).popitem()
+            if strategy_name == "enum":
+                enum_mappings: dict[str, Any] = {
+                    key: mapping["value"]
+                    for key, mapping in config_item["enumMappingMap"].items()
+                    if "value" in mapping
+                }
+        except Exception:
+            return generic_converter
+        try:
+            default_value = XTValueConverter.get_default_value(config_item)
+        except Exception:
+            # The failure is raised, and reported, on each conversion needing it
+            default_converter = generic_converter
+        else:
+
+            def default_converter(value: Any) -> Any:
+                return default_value
+
+        if strategy_name == "default":
+
+            def converter(value: Any) -> Any:
+                if value is not None and value != "":
+                    return value
+                return default_converter(value)
+
+        else:
+
+            def converter(value: Any) -> Any:
+                key_raw = str(value)
+                status_value = enum_mappings.get(key_raw, _NO_MAPPING)
+                if status_value is _NO_MAPPING:
+                    status_value = enum_mappings.get(key_raw.lower())
+                if status_value is None:
+                    return default_converter(value)
+                return status_value
+
+        return converter
+
+    @staticmethod
+    def get_default_value(config_item: Mapping[str, Any]) -> Any:
+        # Same as tuya_sharing's default strategy
+        value_type = config_item["valueType"].capitalize()
+        if value_type == "Boolean":
+            return False
+        elif value_type == "Integer":
+            return json.loads(config_item["valueDesc"]).get("min")
+        elif value_type == "Enum":
+            return json.loads(config_item["valueDesc"]).get("range")[0]
+        return ""
@@ -0,0 +1,207 @@
+from __future__ import annotations
+import json
+from collections import OrderedDict
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+_UNPARSED = object()
+_INVALID = object()
+
+
+class XTValueDescriptor(Mapping[str, Any]):
+    """Parsed, immutable form of a status_range/function "values" or a local strategy "valueDesc".
+
+    Instances are interned by their JSON text so that every holder of the same
+    descriptor shares a single parse, and the JSON text of a descriptor built
+    from a dict is only produced when a consumer asks for it.
+    The shared parse must not be mutated: parsed and to_dict() return private
+    copies, the values read through the Mapping interface must be left as is.
+    """
+
+    __slots__ = ("_raw", "_parsed", "_canonical")
+
+    MAX_INTERNED: int = 20000
+    # JSON text => descriptor, the least recently used ones are evicted first
+    _interned: OrderedDict[str, XTValueDescriptor] = OrderedDict()
+
+    def __init__(self, raw: str | None, parsed: Any = _UNPARSED) -> None:
+        self._raw = raw
+        self._parsed = parsed
+        self._canonical: str | None = None
+
+    @staticmethod
+    def from_json(raw: str | None) -> XTValueDescriptor:
+        if raw is None:
+            raw = "{}"
+        interned = XTValueDescriptor._interned
+        descriptor = interned.get(raw)
+        if descriptor is not None:
+            try:
+                interned.move_to_end(raw)
+            except KeyError:
+                # Evicted by another thread meanwhile
+                pass
+            return descriptor
+        descriptor = XTValueDescriptor(raw)
+        XTValueDescriptor._intern(raw, descriptor)
+        return descriptor
+
+    @staticmethod
+    def from_dict(value: dict[str, Any]) -> XTValueDescriptor:
+        # The descriptor takes ownership of value, callers must not mutate it afterwards
+        return XTValueDescriptor(None, value)
+
+    @staticmethod
+    def from_any(value: Any) -> XTValueDescriptor:
+        if isinstance(value, XTValueDescriptor):
+            return value
+        if isinstance(value, dict):
+            return XTValueDescriptor.from_dict(value)
+        if value is None or isinstance(value, str):
+            return XTValueDescriptor.from_json(value)
+        return XTValueDescriptor.from_json(str(value))
+
+    @staticmethod
+    def get_config_item_descriptor(config_item: dict[str, Any]) -> XTValueDescriptor:
+        return XTValueDescriptor.from_json(config_item.get("valueDesc"))
+
+    @staticmethod
+    def set_config_item_descriptor(
+        config_item: dict[str, Any], descriptor: XTValueDescriptor
+    ) -> None:
+        # The local strategy is handed to tuya_sharing and serialized as is, keep a plain string in it
+        config_item["valueDesc"] = descriptor.json
+
+    @staticmethod
+    def update_config_item_descriptor(
+        config_item: dict[str, Any], value: dict[str, Any]
+    ) -> None:
+        if "valueDesc" in config_item:
+            current = XTValueDescriptor.get_config_item_descriptor(config_item)
+            if current._decoded() == value:
+                return
+        config_item["valueDesc"] = XTValueDescriptor.from_dict(value).json
+
+    @staticmethod
+    def clear_interned() -> None:
+        XTValueDescriptor._interned = OrderedDict()
+
+    @staticmethod
+    def _intern(raw: str, descriptor: XTValueDescriptor) -> None:
+        interned = XTValueDescriptor._interned
+        interned[raw] = descriptor
+        while len(interned) > XTValueDescriptor.MAX_INTERNED:
+            try:
+                interned.popitem(last=False)
+            except KeyError:
+                break
+
+    @property
+    def json(self) -> str:
+        if self._raw is None:
+            raw = json.dumps(self._parsed)
+            self._raw = raw
+            if raw not in XTValueDescriptor._interned:
+                XTValueDescriptor._intern(raw, self)
+        return self._raw
+
+    @property
+    def parsed(self) -> Any:
+        """A private copy of the decoded JSON value, or None if the JSON text is invalid."""
+        return _copy_json_value(self._decoded())
+
+    def _decoded(self) -> Any:
+        # The shared parse, never hand it out
+        if self._parsed is _UNPARSED:
+            try:
+                self._parsed = json.loads(self._raw)  # type: ignore[arg-type]
+            except Exception:
+                self._parsed = _INVALID
+        if self._parsed is _INVALID:
+            return None
+        return self._parsed
+
+    @property
+    def is_json(self) -> bool:
+        return self._decoded() is not None
+
+    @property
+    def is_dict(self) -> bool:
+        return isinstance(self._decoded(), dict)
+
+    @property
+    def _canonical_json(self) -> str:
+        # Same text for equal descriptors whatever their key order or spacing
+        if self._canonical is None:
+            if (decoded := self._decoded()) is None:
+                self._canonical = self.json
+            else:
+                self._canonical = json.dumps(
+                    decoded, sort_keys=True, separators=(",", ":")
+                )
+        return self._canonical
+
+    @property
+    def error_value(self) -> str | None:
+        """The raw value stored by CloudFixes when the cloud returned an invalid descriptor."""
+        if isinstance(decoded := self._decoded(), dict) and (
+            error_value := decoded.get("ErrorValue1")
+        ):
+            return error_value
+        return None
+
+    def updated(self, value: dict[str, Any]) -> XTValueDescriptor:
+        """Descriptor holding value, self is returned when nothing changed."""
+        if self._decoded() == value:
+            return self
+        return XTValueDescriptor.from_dict(value)
+
+    def to_dict(self) -> dict[str, Any]:
+        if not isinstance(decoded := self._decoded(), dict):
+            return {}
+        return _copy_json_value(decoded)
+
+    def _as_dict(self) -> dict[str, Any]:
+        decoded = self._decoded()
+        if isinstance(decoded, dict):
+            return decoded
+        return {}
+
+    def __getitem__(self, key: str) -> Any:
+        return self._as_dict()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._as_dict())
+
+    def __len__(self) -> int:
+        return len(self._as_dict())
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if isinstance(other, XTValueDescriptor):
+            if self._raw is not None and self._raw == other._raw:
+                return True
+            return self._canonical_json == other._canonical_json
+        return super().__eq__(other)
+
+    def __hash__(self) -> int:
+        return hash(self._canonical_json)
+
+    def __copy__(self) -> XTValueDescriptor:
+        return self
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> XTValueDescriptor:
+        return self
+
+    def __repr__(self) -> str:
+        return self.json
+
+
+def _copy_json_value(value: Any) -> Any:
+    # Much cheaper than copy.deepcopy as a JSON value can only hold dicts, lists and scalars
+    if isinstance(value, dict):
+        return {key: _copy_json_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_json_value(item) for item in value]
+    return value
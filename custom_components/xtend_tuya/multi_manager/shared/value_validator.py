@@ -0,0 +1,148 @@
+from __future__ import annotations
+import threading
+from typing import Any
+from ...ha_tuya_integration.tuya_integration_imports import (
+    TuyaDPType,
+)
+from ...const import (
+    LOGGER,
+)
+from .value_descriptor import (
+    XTValueDescriptor,
+)
+
+
+class XTValueValidator:
+    """Checks a reported value against its status range, built once per range.
+
+    Enum values are looked up in a frozenset, Integer values are compared to
+    the bounds of the range and Bitmap values to the mask of its labels. Only
+    the invalid Enum values are dropped (as they always were), the cloud
+    ranges of the other types are too often wrong to drop the device state.
+    """
+
+    __slots__ = (
+        "dptype",
+        "descriptor",
+        "allowed_values",
+        "minimum",
+        "maximum",
+        "bitmap_mask",
+        "drop_invalid",
+    )
+
+    MAX_CACHED: int = 20000
+    # (DPType, descriptor) => validator, most status ranges share them
+    _cache: dict[tuple[TuyaDPType | None, XTValueDescriptor], XTValueValidator] = {}
+
+    def __init__(
+        self, dptype: TuyaDPType | None, descriptor: XTValueDescriptor
+    ) -> None:
+        self.dptype = dptype
+        self.descriptor = descriptor
+        self.allowed_values: frozenset[Any] | None = None
+        self.minimum: float | None = None
+        self.maximum: float | None = None
+        self.bitmap_mask: int | None = None
+        self.drop_invalid: bool = False
+        match dptype:
+            case TuyaDPType.ENUM:
+                if descriptor.is_dict:
+                    self.allowed_values = frozenset(
+                        value
+                        for value in descriptor.get("range", [])
+                        if isinstance(value, (str, int, float, bool))
+                    )
+                    self.drop_invalid = True
+                else:
+                    LOGGER.warning(
+                        f"Failed to parse status_range values of an Enum: {descriptor}"
+                    )
+            case TuyaDPType.INTEGER:
+                self.minimum = XTValueValidator._get_number(descriptor, "min")
+                self.maximum = XTValueValidator._get_number(descriptor, "max")
+            case TuyaDPType.BITMAP:
+                if isinstance(labels := descriptor.get("label"), list):
+                    self.bitmap_mask = (1 << len(labels)) - 1
+
+    @staticmethod
+    def get(
+        dptype: TuyaDPType | None, descriptor: XTValueDescriptor
+    ) -> XTValueValidator:
+        key = (dptype, descriptor)
+        if (validator := XTValueValidator._cache.get(key)) is not None:
+            return validator
+        if len(XTValueValidator._cache) >= XTValueValidator.MAX_CACHED:
+            XTValueValidator._cache = {}
+        validator = XTValueValidator(dptype, descriptor)
+        XTValueValidator._cache[key] = validator
+        return validator
+
+    @staticmethod
+    def _get_number(descriptor: XTValueDescriptor, key: str) -> float | None:
+        value = descriptor.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+        return None
+
+    def matches(self, dptype: TuyaDPType | None, descriptor: XTValueDescriptor) -> bool:
+        return self.dptype == dptype and self.descriptor is descriptor
+
+    def is_valid(self, value: Any) -> bool:
+        if self.allowed_values is not None:
+            try:
+                return value in self.allowed_values
+            except TypeError:
+                # Unhashable, cannot be one of the values of the range
+                return False
+        if self.minimum is not None or self.maximum is not None:
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                return False
+            if self.minimum is not None and value < self.minimum:
+                return False
+            if self.maximum is not None and value > self.maximum:
+                return False
+            return True
+        if self.bitmap_mask is not None:
+            if not isinstance(value, int) or isinstance(value, bool):
+                return False
+            return value & ~self.bitmap_mask == 0
+        return True
+
+    def __copy__(self) -> XTValueValidator:
+        return self
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> XTValueValidator:
+        return self
+
+
+class XTRejectedValues:
+    """Counts the reported values that do not match their status range, per device and DPCode."""
+
+    DROPPED: str = "dropped"
+    OUT_OF_RANGE: str = "out_of_range"
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # Device ID => DROPPED / OUT_OF_RANGE => DPCode => count
+        self._counts: dict[str, dict[str, dict[str, int]]] = {}
+
+    def record(self, device_id: str, code: str, dropped: bool) -> None:
+        kind = XTRejectedValues.DROPPED if dropped else XTRejectedValues.OUT_OF_RANGE
+        with self._lock:
+            codes = self._counts.setdefault(device_id, {}).setdefault(kind, {})
+            codes[code] = codes.get(code, 0) + 1
+
+    def get_device_statistics(self, device_id: str) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {
+                kind: dict(codes)
+                for kind, codes in self._counts.get(device_id, {}).items()
+            }
+
+    def get_statistics(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {
+                device_id: {kind: sum(codes.values()) for kind, codes in kinds.items()}
+                for device_id, kinds in self._counts.items()
+            }
@@ -0,0 +1,362 @@
+from __future__ import annotations
+import dataclasses
+import hashlib
+import json
+import threading
+import time
+from typing import Any
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from ...const import (
+    LOGGER,
+    XT_WARM_START_COMMAND_TIMEOUT,
+)
+from ...ha_tuya_integration.tuya_integration_imports import (
+    TuyaDPType,
+)
+from .shared_classes import (
+    XTConfigEntry,
+    XTDevice,
+    XTDeviceFunction,
+    XTDeviceMap,
+    XTDeviceStatusRange,
+    XTTrackedDictionnary,
+)
+from .threading import (
+    XTEventLoopProtector,
+)
+import custom_components.xtend_tuya.multi_manager.multi_manager as mm
+
+
+class XTWarmStart:
+    """Brings the entities up from a snapshot of the merged device map.
+
+    The snapshot holds the final merged devices (after merging, cloud fixes,
+    virtual states and entity setup) with their last status. On the next
+    setup the devices are restored from it instead of being fetched from the
+    cloud, then the cloud is queried in the background: the fresh state is
+    adopted by the restored devices and only the status that changed is
+    pushed to the entities. If the devices or their DPs changed in the
+    meantime, the entry is reloaded once from the cloud. The accounts only
+    know the devices once they are refreshed, the commands sent before are
+    held until then.
+    """
+
+    SNAPSHOT_VERSION: int = 2
+    COMMAND_TIMEOUT: float = XT_WARM_START_COMMAND_TIMEOUT
+
+    # Never persisted: secrets, live links and caches
+    EXCLUDED_FIELDS: tuple[str, ...] = (
+        "local_key",
+        "device_preference",
+        "device_map",
+        "original_device",
+        "cloud_fix_state",
+        "dpcode_index",
+        "dpcode_information_cache",
+        "discovery_dpcodes_cache",
+        "status",
+        "function",
+        "status_range",
+        "local_strategy",
+    )
+
+    # Entries to set up from the cloud on their next setup (survives reloads)
+    cold_start_entry_ids: set[str] = set()
+
+    def __init__(self, hass: HomeAssistant, multi_manager: mm.MultiManager) -> None:
+        self.hass = hass
+        self.multi_manager = multi_manager
+        self.is_warm_start: bool = False
+        # Device ID => signature of the device as built from the cloud, before
+        # the entities completed it
+        self.cloud_signatures: dict[str, str] = {}
+        # Set once the accounts know the devices (right away on a cold start)
+        self.devices_ready = threading.Event()
+        self.devices_ready.set()
+        self.devices_refreshed: bool = True
+
+    @staticmethod
+    def serialize_device(device: XTDevice) -> dict[str, Any]:
+        return {
+            "fields": {
+                key: value
+                for key, value in vars(device).items()
+                if key not in XTWarmStart.EXCLUDED_FIELDS
+                and isinstance(value, (str, int, float, bool, list, dict, type(None)))
+            },
+            "function": {
+                code: XTWarmStart._serialize_dpcode(function)
+                for code, function in device.function.items()
+            },
+            "status_range": {
+                code: XTWarmStart._serialize_dpcode(status_range)
+                for code, status_range in device.status_range.items()
+            },
+            "local_strategy": {
+                str(dp_id): strategy
+                for dp_id, strategy in device.local_strategy.items()
+            },
+            "status": dict(device.status),
+        }
+
+    @staticmethod
+    def _serialize_dpcode(
+        dpcode: XTDeviceFunction | XTDeviceStatusRange,
+    ) -> dict[str, Any]:
+        raw_dpcode = dataclasses.asdict(dpcode)
+        # values is a constructor argument backed by the parsed descriptor
+        del raw_dpcode["_value_descr"]
+        raw_dpcode["values"] = dpcode.values
+        return raw_dpcode
+
+    @staticmethod
+    def restore_device(raw_device: dict[str, Any]) -> XTDevice:
+        device = XTDevice(**raw_device["fields"])
+        device.function = {
+            code: XTDeviceFunction(
+                **{
+                    **function,
+                    "type": TuyaDPType.try_parse(function.get("type")),
+                }
+            )
+            for code, function in raw_device["function"].items()
+        }
+        device.status_range = {
+            code: XTDeviceStatusRange(
+                **{
+                    **status_range,
+                    "type": TuyaDPType.try_parse(status_range.get("type")),
+                }
+            )
+            for code, status_range in raw_device["status_range"].items()
+        }
+        device.local_strategy = {
+            int(dp_id): strategy
+            for dp_id, strategy in raw_device["local_strategy"].items()
+        }
+        device.status = raw_device["status"]
+        device.force_compatibility = True
+        return device
+
+    @staticmethod
+    def get_cloud_signature(device: XTDevice) -> str:
+        # Only what decides which entities are created: the DPs, their codes
+        # and types. The rest of the definition is adopted in place.
+        structure = {
+            "category": device.category,
+            "function": {
+                code: str(function.type) for code, function in device.function.items()
+            },
+            "status_range": {
+                code: str(status_range.type)
+                for code, status_range in device.status_range.items()
+            },
+            "local_strategy": {
+                str(dp_id): [
+                    strategy.get("status_code"),
+                    sorted(strategy.get("status_code_alias") or []),
+                ]
+                for dp_id, strategy in device.local_strategy.items()
+            },
+            "status": sorted(device.status),
+        }
+        return hashlib.sha256(
+            json.dumps(structure, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def update_cloud_signatures(self) -> None:
+        self.cloud_signatures = {
+            device_id: self.get_cloud_signature(device)
+            for device_id, device in self.multi_manager.device_map.items()
+        }
+
+    def build_snapshot(self) -> dict[str, Any]:
+        devices: dict[str, Any] = {}
+        for device_id, device in self.multi_manager.device_map.items():
+            devices[device_id] = self.serialize_device(device)
+            devices[device_id]["cloud_signature"] = self.cloud_signatures.get(device_id)
+        return {
+            "version": self.SNAPSHOT_VERSION,
+            "saved_at": time.time(),
+            "devices": devices,
+        }
+
+    async def async_restore(self) -> bool:
+        entry_id = self.multi_manager.config_entry.entry_id
+        if entry_id in XTWarmStart.cold_start_entry_ids:
+            XTWarmStart.cold_start_entry_ids.discard(entry_id)
+            return False
+        snapshot = await self.multi_manager.storage_manager.load_device_snapshot()
+        if (
+            snapshot is None
+            or snapshot.get("version") != self.SNAPSHOT_VERSION
+            or not snapshot.get("devices")
+        ):
+            return False
+        try:
+            devices = {
+                device_id: self.restore_device(raw_device)
+                for device_id, raw_device in snapshot["devices"].items()
+            }
+        except Exception as e:
+            LOGGER.warning(f"Could not restore the device snapshot, ignoring it: {e}")
+            return False
+        self.cloud_signatures = {
+            device_id: raw_device["cloud_signature"]
+            for device_id, raw_device in snapshot["devices"].items()
+            if raw_device.get("cloud_signature")
+        }
+        self.multi_manager.master_device_map = XTDeviceMap(devices)
+        self.is_warm_start = True
+        self.devices_refreshed = False
+        self.devices_ready.clear()
+        return True
+
+    async def async_save(self) -> bool:
+        if not self.multi_manager.device_map:
+            return False
+        return await self.multi_manager.storage_manager.save_device_snapshot(
+            self.build_snapshot()
+        )
+
+    @callback
+    def async_setup(self, config_entry: XTConfigEntry) -> None:
+        # Config entries are not unloaded when HA stops, save the last status
+        config_entry.async_on_unload(
+            self.hass.bus.async_listen(EVENT_HOMEASSISTANT_STOP, self._async_on_stop)
+        )
+        if self.is_warm_start:
+            config_entry.async_create_background_task(
+                self.hass,
+                self.async_reconcile(),
+                f"xtend_tuya reconcile {config_entry.entry_id}",
+            )
+
+    async def _async_on_stop(self, event: Event) -> None:
+        await self.async_save()
+
+    def wait_for_devices(self) -> None:
+        """Holds a command until the restored devices are refreshed from the cloud."""
+        if not self.devices_ready.is_set():
+            if (
+                self.hass is not None
+                and self.hass.loop_thread_id == threading.get_ident()
+            ):
+                # Waiting here would block the refresh
+                raise HomeAssistantError(
+                    f"The devices of {self.multi_manager.config_entry.title} are still being refreshed from the cloud"
+                )
+            self.devices_ready.wait(self.COMMAND_TIMEOUT)
+        if not self.devices_refreshed:
+            raise HomeAssistantError(
+                f"The devices of {self.multi_manager.config_entry.title} could not be refreshed from the cloud yet"
+            )
+
+    def release_commands(self, devices_refreshed: bool) -> None:
+        self.devices_refreshed = devices_refreshed
+        self.devices_ready.set()
+
+    async def async_reconcile(self) -> None:
+        try:
+            await self._async_reconcile()
+        finally:
+            # Never leave the commands waiting, they fail if the refresh failed
+            if not self.devices_ready.is_set():
+                self.release_commands(False)
+
+    async def _async_reconcile(self) -> None:
+        multi_manager = self.multi_manager
+        warm_device_map = multi_manager.master_device_map
+        try:
+            await multi_manager.update_account_device_caches()
+            # From here on there is no await until the restored devices took
+            # the place of the fresh ones in the device maps
+            multi_manager.master_device_map = XTDeviceMap({})
+            multi_manager.build_master_device_map()
+        except Exception as e:
+            LOGGER.warning(
+                f"Could not refresh the devices from the cloud, reloading: {e}"
+            )
+            multi_manager.master_device_map = warm_device_map
+            self.release_commands(False)
+            self.async_schedule_cold_reload()
+            return
+        fresh_device_map = multi_manager.master_device_map
+        cloud_signatures: dict[str, str] = {}
+        needs_reload = set(fresh_device_map) != set(warm_device_map)
+        updates: list[tuple[XTDevice, list[str] | None]] = []
+        for device_id, fresh_device in list(fresh_device_map.items()):
+            multi_manager.virtual_state_handler.apply_init_virtual_states(fresh_device)
+            cloud_signatures[device_id] = self.get_cloud_signature(fresh_device)
+            if cloud_signatures[device_id] != self.cloud_signatures.get(device_id):
+                needs_reload = True
+            if warm_device := warm_device_map.get(device_id):
+                if update := self.adopt_device(warm_device, fresh_device):
+                    updates.append(update)
+        self.cloud_signatures = cloud_signatures
+        # The accounts know the devices, the held commands can go out
+        self.release_commands(True)
+
+        await self.hass.async_add_executor_job(self._push_updates, updates)
+        await XTEventLoopProtector.execute_out_of_event_loop_and_return(
+            multi_manager.refresh_mq
+        )
+        if needs_reload:
+            LOGGER.info(
+                f"The devices of {multi_manager.config_entry.title} changed since the last snapshot, reloading"
+            )
+            self.async_schedule_cold_reload()
+            return
+        await self.async_save()
+
+    def adopt_device(
+        self, warm_device: XTDevice, fresh_device: XTDevice
+    ) -> tuple[XTDevice, list[str] | None] | None:
+        """Give the fresh state to the restored device the entities hold.
+
+        The containers of the fresh device are kept, they can be shared with
+        the account devices. The fresh definition wins, the restored device
+        only completes it with the entries the entities added (missing from
+        the cloud). Returns the device update to push, if any.
+        """
+        previous_status = dict(warm_device.status)
+        previous_fields = (warm_device.name, warm_device.online)
+        for code, function in warm_device.function.items():
+            fresh_device.function.setdefault(code, function)
+        for code, status_range in warm_device.status_range.items():
+            fresh_device.status_range.setdefault(code, status_range)
+        for dp_id, strategy in warm_device.local_strategy.items():
+            fresh_device.local_strategy.setdefault(dp_id, strategy)
+        for code, value in warm_device.status.items():
+            fresh_device.status.setdefault(code, value)
+        fresh_device.device_preference.update(warm_device.device_preference)
+        for key, value in vars(fresh_device).items():
+            object.__setattr__(warm_device, key, value)
+        if isinstance(warm_device.status, XTTrackedDictionnary):
+            warm_device.status.device = warm_device
+        self.multi_manager.replace_device_in_device_maps(fresh_device, warm_device)
+
+        updated_status = [
+            code
+            for code, value in warm_device.status.items()
+            if code not in previous_status or previous_status[code] != value
+        ]
+        if (warm_device.name, warm_device.online) != previous_fields:
+            return warm_device, None
+        if updated_status:
+            return warm_device, updated_status
+        return None
+
+    def _push_updates(self, updates: list[tuple[XTDevice, list[str] | None]]) -> None:
+        for device, updated_status in updates:
+            self.multi_manager.multi_device_listener.update_device(
+                device, updated_status
+            )
+
+    @callback
+    def async_schedule_cold_reload(self) -> None:
+        entry_id = self.multi_manager.config_entry.entry_id
+        XTWarmStart.cold_start_entry_ids.add(entry_id)
+        self.hass.config_entries.async_schedule_reload(entry_id)
@@ -25,6 +25,10 @@ from homeassistant.components.recorder.db_schema import (
     Statistics,
     StatisticsShortTerm,
 )
+from homeassistant.components.recorder.statistics import (
+    StatisticsRow,
+    get_last_statistics,
+)
 from homeassistant.const import (
     UnitOfEnergy,
     UnitOfTime,
@@ -62,10 +66,12 @@ from .const import (
     LOGGER,
     XTMultiManagerProperties,
     XTDeviceWatcherCategory,
+    XT_CONSUMPTION_STATISTICS_IMPORT_BATCH_SIZE,
 )
 from .entity import (
     XTEntity,
     XTEntityDescriptorManager,
+    XTEntityDiscovery,
 )
 from .ha_tuya_integration.tuya_integration_imports import (
     TuyaSensorEntity,
@@ -2168,95 +2174,70 @@ async def async_setup_entry(
     @callback
     def async_discover_device(device_map, restrict_dpcode: str | None = None) -> None:
         """Discover and add a discovered Tuya sensor."""
-        if hass_data.manager is None:
+        if (device_manager := hass_data.manager) is None:
             return
-        entities: list[XTSensorEntity] = []
-        device_ids = [*device_map]
-        for device_id in device_ids:
-            if device := hass_data.manager.device_map.get(device_id):
-                if category_descriptions := XTEntityDescriptorManager.get_category_descriptors(
-                    supported_descriptors, device.category
-                ):
-                    externally_managed_dpcodes = (
-                        XTEntityDescriptorManager.get_category_keys(
-                            externally_managed_descriptors.get(device.category)
-                        )
+
+        def discover_entities(device: XTDevice) -> list[XTSensorEntity]:
+            entities: list[XTSensorEntity] = []
+            if category_descriptions := XTEntityDescriptorManager.get_category_descriptors(
+                supported_descriptors, device.category
+            ):
+                externally_managed_dpcodes = (
+                    XTEntityDescriptorManager.get_category_keys(
+                        externally_managed_descriptors.get(device.category)
                     )
-                    if restrict_dpcode is not None:
-                        category_descriptions = cast(
-                            tuple[XTSensorEntityDescription, ...],
-                            restrict_descriptor_category(
-                                category_descriptions, [restrict_dpcode]
-                            ),
-                        )
-                    # for description in category_descriptions:
-                    #     dpcode = description.dpcode or description.key
-                    #     if (
-                    #         hasattr(description, "virtual_state")
-                    #         and description.virtual_state
-                    #         and description.virtual_state & VirtualStates.STATE_SUMMED_IN_REPORTING_PAYLOAD
-                    #         and (dpcode) in device.status_range
-                    #     ):
-                    #         device.status_range[dpcode].report_type = "sum"
-                    entities.extend(
-                        XTSensorEntity.get_entity_instance(
-                            description,
-                            device,
-                            hass_data.manager,
-                            definition,
-                            supported_descriptors,
-                        )
-                        for description in category_descriptions
-                        if (
-                            XTEntity.supports_description(
-                                device,
-                                this_platform,
-                                description,
-                                True,
-                                externally_managed_dpcodes,
-                                COMPOUND_KEY,
-                                hass_data.manager,
-                            )
-                            and (
-                                definition := xt_get_default_definition(
-                                    device,
-                                    description=description,
-                                    device_manager=hass_data.manager,
-                                )
-                            )
-                        )
+                )
+                if restrict_dpcode is not None:
+                    category_descriptions = cast(
+                        tuple[XTSensorEntityDescription, ...],
+                        restrict_descriptor_category(
+                            category_descriptions, [restrict_dpcode]
+                        ),
                     )
-                    entities.extend(
-                        XTSensorEntity.get_entity_instance(
-                            description,
+                # for description in category_descriptions:
+                #     dpcode = description.dpcode or description.key
+                #     if (
+                #         hasattr(description, "virtual_state")
+                #         and description.virtual_state
+                #         and description.virtual_state & VirtualStates.STATE_SUMMED_IN_REPORTING_PAYLOAD
+                #         and (dpcode) in device.status_range
+                #     ):
+                #         device.status_range[dpcode].report_type = "sum"
+                entities.extend(
+                    XTSensorEntity.get_entity_instance(
+                        description,
+                        device,
+                        device_manager,
+                        definition,
+                        supported_descriptors,
+                    )
+                    for description in XTEntityDiscovery.get_supported_descriptions(
+                        device,
+                        this_platform,
+                        category_descriptions,
+                        externally_managed_dpcodes,
+                        COMPOUND_KEY,
+                        device_manager,
+                    )
+                    if (
+                        definition := xt_get_default_definition(
                             device,
-                            hass_data.manager,
-                            definition,
-                            supported_descriptors,
-                        )
-                        for description in category_descriptions
-                        if (
-                            XTEntity.supports_description(
-                                device,
-                                this_platform,
-                                description,
-                                False,
-                                externally_managed_dpcodes,
-                                COMPOUND_KEY,
-                                hass_data.manager,
-                            )
-                            and (
-                                definition := xt_get_default_definition(
-                                    device,
-                                    description=description,
-                                    device_manager=hass_data.manager,
-                                )
-                            )
+                            description=description,
+                            device_manager=device_manager,
                         )
                     )
-        async_add_entities(entities)
+                )
+            return entities
+
+        XTEntityDiscovery.add_entities(
+            device_manager,
+            this_platform,
+            device_map,
+            discover_entities,
+            async_add_entities,
+        )
         if restrict_dpcode is None:
-            hass_data.manager.add_post_setup_callback(
+            device_manager.add_post_setup_callback(
                 XTMultiManagerPostSetupCallbackPriority.PRIORITY_LAST,
                 async_add_generic_entities,
                 device_map,
@@ -2419,16 +2400,19 @@ class XTSensorEntity(XTEntity, TuyaSensorEntity, RestoreSensor):  # type: ignore
                 self._get_description_dpcode(self.entity_description)
                 in all_dependant_dpcodes
             ):
-                consumption_data = self._get_consumption_stat_data(history[dpcode])
-                if consumption_data is not None:
-                    XTEventLoopProtector.execute_out_of_event_loop(
-                        self._import_consumption_history, consumption_data
-                    )
-                    break
+                XTEventLoopProtector.execute_out_of_event_loop(
+                    self._import_consumption_history_incrementally,
+                    history[dpcode],
+                )
+                break
 
     def _get_consumption_stat_data(
-        self, history: dict[float, float]
+        self,
+        history: dict[float, float],
+        initial_sum: float = 0.0,
+        last_timestamp: datetime | None = None,
     ) -> XTSensorEntity.XTSensorConsumptionData | None:
+        """Statistic rows of the history, summed on top of initial_sum."""
         metadata = StatisticMetaData(
             has_mean=False,
             mean_type=StatisticMeanType.NONE,
@@ -2440,8 +2424,7 @@ class XTSensorEntity(XTEntity, TuyaSensorEntity, RestoreSensor):  # type: ignore
             unit_of_measurement=self.unit_of_measurement,
         )
         long_term_stats: list[StatisticData] = []
-        sum: float = 0.0
-        last_timestamp: datetime | None = None
+        sum: float = initial_sum
         start_of_this_hour = datetime.now(tz=UTC).replace(
             minute=0, second=0, microsecond=0
         )
@@ -2514,6 +2497,52 @@ class XTSensorEntity(XTEntity, TuyaSensorEntity, RestoreSensor):  # type: ignore
                 )
         return dpcodes
 
+    async def _import_consumption_history_incrementally(
+        self,
+        history: dict[float, float],
+    ) -> None:
+        last_rows = await self._get_last_statistics(2)
+        if (
+            len(last_rows) < 2
+            or last_rows[0]["start"] not in history
+            or last_rows[1].get("sum") is None
+        ):
+            # Nothing imported yet or not from the same buckets, start over
+            full_history = self._get_consumption_stat_data(history)
+            if full_history is not None:
+                await self._import_consumption_history(full_history)
+            return None
+
+        # The last row is imported again, its bucket may have changed since
+        last_row, previous_row = last_rows
+        history_slice = {
+            timestamp: value
+            for timestamp, value in history.items()
+            if timestamp >= last_row["start"]
+        }
+        consumption_data = self._get_consumption_stat_data(
+            history_slice,
+            initial_sum=cast(float, previous_row["sum"]),
+            last_timestamp=datetime.fromtimestamp(previous_row["start"], tz=UTC),
+        )
+        if consumption_data is None:
+            # No new bucket
+            return None
+        self.set_sensor_value(consumption_data.current_value)
+        await self._import_consumption_history_to_recorder(consumption_data)
+
+    async def _get_last_statistics(self, number_of_stats: int) -> list[StatisticsRow]:
+        """Last long term statistic rows of the entity, the most recent first."""
+        last_statistics = await get_recorder_instance(self.hass).async_add_executor_job(
+            get_last_statistics,
+            self.hass,
+            number_of_stats,
+            self.entity_id,
+            False,
+            {"state", "sum"},
+        )
+        return last_statistics.get(self.entity_id, [])
+
     async def _import_consumption_history(
         self, history: XTSensorEntity.XTSensorConsumptionData
     ) -> None:
@@ -2543,9 +2572,19 @@ class XTSensorEntity(XTEntity, TuyaSensorEntity, RestoreSensor):  # type: ignore
     ) -> None:
         """Import consumption history to recorder."""
         recorder = get_recorder_instance(self.hass)
-        recorder.async_import_statistics(
-            metadata=history.metadata, stats=history.long_term_stats, table=Statistics
-        )
+        # Up to five years of rows, hand them over in batches so that the
+        # recorder queue stays short
+        for index in range(
+            0, len(history.long_term_stats), XT_CONSUMPTION_STATISTICS_IMPORT_BATCH_SIZE
+        ):
+            recorder.async_import_statistics(
+                metadata=history.metadata,
+                stats=history.long_term_stats[
+                    index : index + XT_CONSUMPTION_STATISTICS_IMPORT_BATCH_SIZE
+                ],
+                table=Statistics,
+            )
+            await recorder.async_block_till_done()
         recorder.async_import_statistics(
             metadata=history.metadata,
             stats=history.short_term_stats,
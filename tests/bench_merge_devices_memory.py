@@ -0,0 +1,200 @@
+"""Memory benchmark of XTMergingManager.merge_devices on synthetic devices.
+
+Every device is reported by three sources (tuya_sharing, tuya_iot and the
+tuya_iot open API device) and merged the way MultiManager and the tuya_iot
+manager do during setup. Reports as JSON the peak RSS growth during the merge
+and, from traced Python allocations, the memory the merge retains and the
+transient peak of each merge_devices call (allocated then released before it
+returns).
+
+Offline, standalone: run with an env that has homeassistant installed:
+  python tests/bench_merge_devices_memory.py --devices 500 --dps 30
+
+Run it on two trees (e.g. a git worktree of the previous commit) to compare
+before/after. Peak RSS is a process high-water mark, so each measurement runs
+in its own subprocess.
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from custom_components.xtend_tuya.const import (
+        MESSAGE_SOURCE_TUYA_IOT,
+        XTDeviceSourcePriority,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.merging_manager import (
+        XTMergingManager,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.shared_classes import (
+        XTDevice,
+    )
+    from bench_mm_update_device_cache import (
+        SyntheticProduct,
+        make_iot_device,
+        make_sharing_device,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+
+def make_devices(args) -> list[list[XTDevice]]:
+    rng = random.Random(args.seed)
+    products = [
+        SyntheticProduct(i, args.dps, args.alias_density, rng)
+        for i in range(max(1, args.products))
+    ]
+    devices = []
+    for i in range(args.devices):
+        device_id = f"bf{i:020x}"
+        product = products[i % len(products)]
+        sharing_device = XTDevice.from_compatible_device(
+            make_sharing_device(device_id, product),
+            device_source_priority=XTDeviceSourcePriority.TUYA_SHARED,
+        )
+        iot_device = make_iot_device(device_id, product)
+        iot_device.device_source_priority = XTDeviceSourcePriority.TUYA_IOT
+        open_api_device = make_iot_device(device_id, product)
+        open_api_device.source = f"{MESSAGE_SOURCE_TUYA_IOT} open API"
+        open_api_device.device_source_priority = XTDeviceSourcePriority.TUYA_IOT
+        devices.append([sharing_device, iot_device, open_api_device])
+    return devices
+
+
+def merge_all(devices: list[list[XTDevice]], merge=XTMergingManager.merge_devices):
+    for sources in devices:
+        # Same order as MultiManager._merge_devices_from_multiple_sources
+        to_be_merged: list[XTDevice] = []
+        for current_device in sources:
+            for prev_device in to_be_merged:
+                merge(prev_device, current_device)
+            to_be_merged.append(current_device)
+
+
+def traced_merge(transient_peaks: list[int]):
+    def merge(device1: XTDevice, device2: XTDevice) -> None:
+        tracemalloc.reset_peak()
+        XTMergingManager.merge_devices(device1, device2)
+        current, peak = tracemalloc.get_traced_memory()
+        # Memory allocated during this merge and released before it returned
+        transient_peaks.append(peak - current)
+
+    return merge
+
+
+def max_rss_bytes() -> int:
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def measure(args) -> dict:
+    devices = make_devices(args)
+    gc.collect()
+    result: dict = {}
+    if args.trace:
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        transient_peaks: list[int] = []
+        merge_all(devices, traced_merge(transient_peaks))
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["traced_retained_bytes"] = current - before
+        result["merge_transient_peak_bytes"] = {
+            "max": max(transient_peaks),
+            "total": sum(transient_peaks),
+        }
+    else:
+        rss_before = max_rss_bytes()
+        start = time.perf_counter()
+        merge_all(devices)
+        result["wall_s"] = round(time.perf_counter() - start, 6)
+        result["rss_before_bytes"] = rss_before
+        result["rss_peak_growth_bytes"] = max_rss_bytes() - rss_before
+    return result
+
+
+def run_child(args, trace: bool) -> dict:
+    command = [
+        sys.executable,
+        os.path.abspath(__file__),
+        "--child",
+        f"--devices={args.devices}",
+        f"--dps={args.dps}",
+        f"--products={args.products}",
+        f"--alias-density={args.alias_density}",
+        f"--seed={args.seed}",
+    ]
+    if trace:
+        command.append("--trace")
+    output = subprocess.run(command, check=True, capture_output=True, text=True)
+    return json.loads(output.stdout.splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=500)
+    parser.add_argument("--dps", type=int, default=20, help="DPs per device")
+    parser.add_argument("--products", type=int, default=20, help="distinct products")
+    parser.add_argument(
+        "--alias-density",
+        type=float,
+        default=0.1,
+        help="share of DPs reported under an alias code by tuya_sharing",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--no-alloc", action="store_true", help="skip the tracemalloc run"
+    )
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--trace", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    if args.child:
+        print(json.dumps(measure(args)))
+        return
+
+    runs = [run_child(args, False) for _ in range(args.repeat)]
+    best = min(runs, key=lambda run: run["rss_peak_growth_bytes"])
+    result = {
+        "benchmark": "merge_devices_memory",
+        "python": platform.python_version(),
+        "parameters": {
+            "devices": args.devices,
+            "sources": 3,
+            "dps": args.dps,
+            "products": args.products,
+            "alias_density": args.alias_density,
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "rss_before_bytes": best["rss_before_bytes"],
+        "rss_peak_growth_bytes": best["rss_peak_growth_bytes"],
+        "wall_s": min(run["wall_s"] for run in runs),
+        "allocations": None if args.no_alloc else run_child(args, True),
+    }
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,456 @@
+"""Benchmark of MultiManager.mm_update_device_cache on synthetic accounts.
+
+Builds a tuya_sharing and a tuya_iot account whose APIs are replaced by
+generators of synthetic devices, runs the full device cache pipeline (merge,
+cloud fixes, post init fixes, strategies, multi map alignment) and reports
+wall time, allocations and a per-stage breakdown as JSON.
+
+Offline, standalone: run with an env that has homeassistant installed:
+  python tests/bench_mm_update_device_cache.py --devices 500 --dps 30
+  python tests/bench_mm_update_device_cache.py --output bench_output.txt
+
+Stage times are exclusive (time spent in nested stages is attributed to the
+innermost one), "unattributed" is the rest of the pipeline.
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from homeassistant.core import HomeAssistant
+    from tuya_sharing import CustomerDevice
+    from custom_components.xtend_tuya.const import (
+        MESSAGE_SOURCE_TUYA_IOT,
+        MESSAGE_SOURCE_TUYA_SHARING,
+        XTDeviceSourcePriority,
+    )
+    from custom_components.xtend_tuya.multi_manager.multi_manager import (
+        MultiManager,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.cloud_fix import (
+        CloudFixes,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.interface.device_manager import (
+        XTDeviceManagerInterface,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.merging_manager import (
+        XTMergingManager,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.shared_classes import (
+        XTDevice,
+        XTDeviceFunction,
+        XTDeviceMap,
+        XTDeviceStatusRange,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+DP_KINDS = ("Boolean", "Integer", "Enum", "Bitmap", "String", "Json")
+UNITS = ("%", "℃", "°C", "W", "kWh", "s", "")
+
+
+class SyntheticProduct:
+    """The thing model shared by every device of a product."""
+
+    def __init__(self, index: int, dp_count: int, alias_density: float, rng):
+        self.product_id = f"pid{index:06d}"
+        self.category = rng.choice(("kg", "cz", "dj", "wsdcg", "qn", "ms", "sp"))
+        self.dps: list[dict] = []
+        for dp_id in range(1, dp_count + 1):
+            kind = DP_KINDS[rng.randrange(len(DP_KINDS))]
+            code = f"{kind.lower()}_{index}_{dp_id}"
+            if kind == "Integer":
+                maximum = rng.choice((100, 255, 1000, 10000))
+                value_descr = {
+                    "unit": rng.choice(UNITS),
+                    "min": 0,
+                    "max": maximum,
+                    "scale": rng.choice((0, 1, 2)),
+                    "step": 1,
+                }
+                value = rng.randrange(maximum)
+            elif kind == "Enum":
+                value_descr = {"range": [f"mode{i}" for i in range(rng.randint(2, 6))]}
+                value = value_descr["range"][0]
+            elif kind == "Bitmap":
+                value_descr = {"label": ["fault_a", "fault_b"], "maxlen": 2}
+                value = 0
+            elif kind == "String":
+                value_descr = {"maxlen": 255}
+                value = ""
+            elif kind == "Json":
+                value_descr = {}
+                value = "{}"
+            else:
+                value_descr = {}
+                value = False
+            self.dps.append(
+                {
+                    "dp_id": dp_id,
+                    "code": code,
+                    "alias": f"{code}_alias" if rng.random() < alias_density else None,
+                    "kind": kind,
+                    "value_descr": value_descr,
+                    "value": value,
+                    "access_mode": rng.choice(("rw", "ro", "wr")),
+                }
+            )
+
+
+class SyntheticAccount(XTDeviceManagerInterface):
+    """Account whose cloud calls are replaced by the synthetic generators."""
+
+    def __init__(self, source: str, priority: XTDeviceSourcePriority, devices) -> None:
+        self.source = source
+        self.priority = priority
+        self._devices = devices
+        self.device_map: XTDeviceMap = XTDeviceMap({}, priority)
+
+    def get_type_name(self) -> str:
+        return self.source
+
+    def is_type_initialized(self) -> bool:
+        return True
+
+    async def setup_from_entry(self, hass, config_entry, multi_manager) -> None:
+        return None
+
+    async def update_device_cache(self):
+        for device in self._devices:
+            self.device_map[device.id] = device
+
+    def get_available_device_maps(self) -> list[XTDeviceMap]:
+        return [self.device_map]
+
+    def convert_to_xt_device(self, device, device_source_priority=None) -> XTDevice:
+        if isinstance(device, XTDevice):
+            device.device_source_priority = device_source_priority
+            return device
+        return XTDevice.from_compatible_device(
+            device, device_source_priority=device_source_priority
+        )
+
+    def get_domain_identifiers_of_device(self, device_id: str) -> list:
+        return []
+
+    def get_device_registry_identifiers(self) -> list:
+        return []
+
+    def on_message(self, msg: dict):
+        return None
+
+    def query_scenes(self) -> list:
+        return []
+
+    def get_device_stream_allocate(self, device_id: str, stream_type) -> str | None:
+        return None
+
+
+def make_sharing_device(device_id: str, product: SyntheticProduct) -> CustomerDevice:
+    # Shaped like XTSharingDeviceRepository output
+    status: dict = {}
+    status_range: dict = {}
+    function: dict = {}
+    local_strategy: dict = {}
+    for dp in product.dps:
+        code = dp["alias"] or dp["code"]
+        values = json.dumps(dp["value_descr"])
+        status[code] = dp["value"]
+        status_range[code] = XTDeviceStatusRange(
+            code=code, type=dp["kind"], values=values
+        )
+        if dp["access_mode"] != "ro":
+            function[code] = XTDeviceFunction(code=code, type=dp["kind"], values=values)
+        local_strategy[dp["dp_id"]] = {
+            "value_convert": "default",
+            "status_code": dp["code"],
+            "config_item": {
+                "statusFormat": json.dumps({code: "$"}),
+                "valueDesc": values,
+                "valueType": dp["kind"],
+                "enumMappingMap": {},
+                "pid": product.product_id,
+            },
+            "status_code_alias": [],
+        }
+    return CustomerDevice(
+        id=device_id,
+        name=f"Device {device_id}",
+        local_key="",
+        category=product.category,
+        product_id=product.product_id,
+        product_name=f"Product {product.product_id}",
+        sub=False,
+        uuid=device_id,
+        asset_id="",
+        online=True,
+        icon="",
+        ip="",
+        time_zone="+00:00",
+        active_time=0,
+        create_time=0,
+        update_time=0,
+        set_up=False,
+        support_local=True,
+        status=status,
+        status_range=status_range,
+        function=function,
+        local_strategy=local_strategy,
+    )
+
+
+def make_iot_device(device_id: str, product: SyntheticProduct) -> XTDevice:
+    # Shaped like XTIOTDeviceManager.get_open_api_device output
+    device = XTDevice(
+        id=device_id,
+        name=f"Device {device_id}",
+        category=product.category,
+        product_id=product.product_id,
+        product_name=f"Product {product.product_id}",
+        online=True,
+    )
+    device.source = MESSAGE_SOURCE_TUYA_IOT
+    for dp in product.dps:
+        code = dp["code"]
+        values = json.dumps(dp["value_descr"])
+        device.status[code] = dp["value"]
+        device.local_strategy[dp["dp_id"]] = {
+            "value_convert": "default",
+            "status_code": code,
+            "config_item": {
+                "statusFormat": json.dumps({code: "$"}),
+                "valueDesc": values,
+                "valueType": dp["kind"],
+                "pid": product.product_id,
+            },
+            "property_update": True,
+            "use_open_api": True,
+            "access_mode": dp["access_mode"],
+            "status_code_alias": [],
+        }
+        device.status_range[code] = XTDeviceStatusRange(
+            code=code, type=dp["kind"], values=values, dp_id=dp["dp_id"]
+        )
+        if dp["access_mode"] != "ro":
+            device.function[code] = XTDeviceFunction(
+                code=code, type=dp["kind"], values=values, dp_id=dp["dp_id"]
+            )
+    return device
+
+
+def make_accounts(args) -> list[SyntheticAccount]:
+    rng = random.Random(args.seed)
+    products = [
+        SyntheticProduct(i, args.dps, args.alias_density, rng)
+        for i in range(max(1, args.products))
+    ]
+    sharing_devices = []
+    iot_devices = []
+    for i in range(args.devices):
+        device_id = f"bf{i:020x}"
+        product = products[i % len(products)]
+        sharing_devices.append(make_sharing_device(device_id, product))
+        if rng.random() < args.overlap:
+            iot_devices.append(make_iot_device(device_id, product))
+    return [
+        SyntheticAccount(
+            MESSAGE_SOURCE_TUYA_SHARING,
+            XTDeviceSourcePriority.TUYA_SHARED,
+            sharing_devices,
+        ),
+        SyntheticAccount(
+            MESSAGE_SOURCE_TUYA_IOT, XTDeviceSourcePriority.TUYA_IOT, iot_devices
+        ),
+    ]
+
+
+class StageTimer:
+    """Exclusive time per instrumented callable."""
+
+    def __init__(self) -> None:
+        self.stages: dict[str, dict] = {}
+        self._stack: list[list] = []
+
+    def wrap(self, name: str, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            frame = [name, time.perf_counter(), 0.0]
+            self._stack.append(frame)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._stack.pop()
+                elapsed = time.perf_counter() - frame[1]
+                stage = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0})
+                stage["calls"] += 1
+                stage["seconds"] += elapsed - frame[2]
+                if self._stack:
+                    self._stack[-1][2] += elapsed
+
+        return wrapper
+
+
+STAGES = (
+    (MultiManager, "update_master_device_map", False),
+    (MultiManager, "_merge_devices_from_multiple_sources", False),
+    (XTMergingManager, "merge_devices", True),
+    (CloudFixes, "apply_fixes", True),
+    (CloudFixes, "apply_post_init_fixes", True),
+    (MultiManager, "_add_dpcodes_supported_by_all_devices", False),
+    (XTDevice, "apply_dpcode_strategy", False),
+    (MultiManager, "_enable_multi_map_device_alignment", False),
+    (MultiManager, "_process_pending_messages", False),
+)
+
+
+def instrument(timer: StageTimer):
+    originals = []
+    for owner, name, is_static in STAGES:
+        func = owner.__dict__[name]
+        originals.append((owner, name, func))
+        inner = func.__func__ if is_static else func
+        wrapped = timer.wrap(f"{owner.__name__}.{name}", inner)
+        setattr(owner, name, staticmethod(wrapped) if is_static else wrapped)
+    return originals
+
+
+def restore(originals) -> None:
+    for owner, name, func in originals:
+        setattr(owner, name, func)
+
+
+async def run_once(hass, args, trace_allocations: bool) -> dict:
+    accounts = make_accounts(args)
+    config_entry = SimpleNamespace(entry_id="benchmark", data={}, options={})
+    multi_manager = MultiManager(hass, config_entry)  # type: ignore[arg-type]
+    for account in accounts:
+        multi_manager.register_account(account)
+
+    timer = StageTimer()
+    originals = instrument(timer)
+    try:
+        if trace_allocations:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        await multi_manager.mm_update_device_cache()
+        wall = time.perf_counter() - start
+        result: dict = {"wall_s": wall}
+        if trace_allocations:
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            result["allocations"] = {
+                "retained_bytes": current - before,
+                "peak_bytes": peak - before,
+                "retained_blocks": sum(
+                    stat.count for stat in snapshot.statistics("filename")
+                ),
+            }
+    finally:
+        restore(originals)
+    attributed = sum(stage["seconds"] for stage in timer.stages.values())
+    result["stages"] = {
+        name: {"calls": stage["calls"], "seconds": round(stage["seconds"], 6)}
+        for name, stage in sorted(
+            timer.stages.items(), key=lambda item: -item[1]["seconds"]
+        )
+    }
+    result["stages"]["unattributed"] = {
+        "calls": 1,
+        "seconds": round(max(result["wall_s"] - attributed, 0.0), 6),
+    }
+    result["merged_devices"] = len(multi_manager.device_map)
+    XTDeviceMap.clear_master_device_map()
+    return result
+
+
+async def run(args) -> dict:
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        runs = []
+        for _ in range(args.warmup):
+            await run_once(hass, args, False)
+        for _ in range(args.repeat):
+            runs.append(await run_once(hass, args, False))
+        allocations = None
+        if not args.no_alloc:
+            allocations = (await run_once(hass, args, True))["allocations"]
+    walls = [run["wall_s"] for run in runs]
+    best = min(runs, key=lambda run: run["wall_s"])
+    return {
+        "benchmark": "mm_update_device_cache",
+        "python": platform.python_version(),
+        "parameters": {
+            "devices": args.devices,
+            "dps": args.dps,
+            "products": args.products,
+            "alias_density": args.alias_density,
+            "overlap": args.overlap,
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "merged_devices": best["merged_devices"],
+        "wall_s": {
+            "min": round(min(walls), 6),
+            "median": round(statistics.median(walls), 6),
+            "max": round(max(walls), 6),
+        },
+        "stages": best["stages"],
+        "allocations": allocations,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=200)
+    parser.add_argument("--dps", type=int, default=20, help="DPs per device")
+    parser.add_argument("--products", type=int, default=20, help="distinct products")
+    parser.add_argument(
+        "--alias-density",
+        type=float,
+        default=0.1,
+        help="share of DPs reported under an alias code by tuya_sharing",
+    )
+    parser.add_argument(
+        "--overlap",
+        type=float,
+        default=1.0,
+        help="share of devices also present in the tuya_iot account",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument(
+        "--no-alloc", action="store_true", help="skip the tracemalloc run"
+    )
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    result = asyncio.run(run(args))
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
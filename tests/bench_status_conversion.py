@@ -0,0 +1,156 @@
+"""Microbenchmark of the conversion of device report status lists.
+
+Builds a single synthetic device with many DPs through the full device cache
+pipeline, then times MultiManager.resolve_device_report and
+StatusHelper.is_status_in_status_list on status lists that only carry codes
+(the dpId has to be resolved from the code, possibly an alias) and on lists
+that only carry dpIds. Reports the time per status item as JSON.
+
+Offline, standalone: run with an env that has homeassistant installed:
+  python tests/bench_status_conversion.py --dps 100
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from homeassistant.core import HomeAssistant
+    from custom_components.xtend_tuya.const import MESSAGE_SOURCE_TUYA_SHARING
+    from custom_components.xtend_tuya.multi_manager.shared.debug.status_helper import (
+        StatusHelper,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.shared_classes import (
+        XTDeviceMap,
+    )
+    from bench_mm_update_device_cache import MultiManager, make_accounts
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+
+def time_per_item(function, items_per_call: int, min_seconds: float) -> float:
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        function()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / (calls * items_per_call)
+
+
+async def run(args) -> dict:
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        accounts = make_accounts(
+            SimpleNamespace(
+                devices=1,
+                dps=args.dps,
+                products=1,
+                alias_density=args.alias_density,
+                overlap=1.0,
+                seed=args.seed,
+            )
+        )
+        config_entry = SimpleNamespace(entry_id="benchmark", data={}, options={})
+        multi_manager = MultiManager(hass, config_entry)  # type: ignore[arg-type]
+        for account in accounts:
+            multi_manager.register_account(account)
+        await multi_manager.mm_update_device_cache()
+        device = next(iter(multi_manager.device_map.values()))
+
+        rng = random.Random(args.seed)
+        aliases = device.get_all_status_code_aliases()
+        # Reported codes are what the sharing MQ sends: the alias when there is one
+        reported_codes = []
+        for dp_item in device.local_strategy.values():
+            code = dp_item["status_code"]
+            code_aliases = device.get_status_code_aliases(code)
+            reported_codes.append(code_aliases[0] if code_aliases else code)
+        rng.shuffle(reported_codes)
+        now_ms = int(time.time() * 1000)
+        by_code = [{"code": code, "value": 1, "t": now_ms} for code in reported_codes]
+        by_dp_id = [
+            {"dpId": dp_id, "value": 1, "t": now_ms} for dp_id in device.local_strategy
+        ]
+        status_helper = StatusHelper(multi_manager)
+        last_code = device.local_strategy[max(device.local_strategy)]["status_code"]
+
+        def convert(status_list):
+            return lambda: multi_manager.resolve_device_report(
+                device.id, status_list, MESSAGE_SOURCE_TUYA_SHARING
+            )
+
+        results = {
+            "convert_by_code_us": time_per_item(
+                convert(by_code), len(by_code), args.min_seconds
+            ),
+            "convert_by_code_single_item_us": time_per_item(
+                convert(by_code[-1:]), 1, args.min_seconds
+            ),
+            "convert_by_dp_id_us": time_per_item(
+                convert(by_dp_id), len(by_dp_id), args.min_seconds
+            ),
+            "status_helper_us": time_per_item(
+                lambda: status_helper.is_status_in_status_list(
+                    device.id, last_code, by_code
+                ),
+                len(by_code),
+                args.min_seconds,
+            ),
+        }
+        XTDeviceMap.clear_master_device_map()
+    return {
+        "benchmark": "status_conversion",
+        "python": platform.python_version(),
+        "parameters": {
+            "dps": args.dps,
+            "alias_density": args.alias_density,
+            "aliases": len(aliases),
+            "seed": args.seed,
+        },
+        "per_item": {name: round(value * 1e6, 3) for name, value in results.items()},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dps", type=int, default=100)
+    parser.add_argument(
+        "--alias-density",
+        type=float,
+        default=0.3,
+        help="share of DPs reported under an alias code by tuya_sharing",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=1.0,
+        help="minimum time spent on each measurement",
+    )
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    result = asyncio.run(run(args))
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
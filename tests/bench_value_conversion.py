@@ -0,0 +1,169 @@
+"""Microbenchmark of the value_convert strategies applied to reported DPs.
+
+Builds a power meter and a thermostat with typical DPs (integer readings,
+an enum mode, a switch) and measures how many values per second
+XTDevice.apply_dpcode_strategy converts, how many the compiled converters
+convert on their own and how many tuya_sharing's strategy registry converts
+with the configuration parsed on every call. Reports conversions per second as JSON.
+
+Offline, standalone: run with an env that has homeassistant installed:
+  python tests/bench_value_conversion.py
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from tuya_sharing.strategy import strategy as tuya_sharing_strategy
+    from custom_components.xtend_tuya.multi_manager.shared.shared_classes import (
+        XTDevice,
+        XTDeviceStatusRange,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+# code: (dp_id, strategy, valueType, valueDesc, enumMappingMap, sample values)
+POWER_METER = {
+    "cur_power": (19, "default", "Integer", {"min": 0, "max": 50000}, None, (0, 1234)),
+    "cur_voltage": (20, "default", "Integer", {"min": 0, "max": 5000}, None, (2301,)),
+    "cur_current": (18, "default", "Integer", {"min": 0, "max": 30000}, None, (512,)),
+    "add_ele": (17, "default", "Integer", {"min": 0, "max": 500000}, None, (42, "")),
+    "switch_1": (1, "default", "Boolean", {}, None, (True, False)),
+}
+THERMOSTAT = {
+    "temp_current": (3, "default", "Integer", {"min": -200, "max": 1000}, None, (215,)),
+    "temp_set": (2, "default", "Integer", {"min": 50, "max": 350}, None, (210, None)),
+    "mode": (
+        4,
+        "enum",
+        "Enum",
+        {"range": ["auto", "manual", "eco"]},
+        {
+            "0": {"value": "auto"},
+            "1": {"value": "manual"},
+            "Eco": {"value": "eco"},
+        },
+        ("0", "1", "eco"),
+    ),
+    "switch": (1, "default", "Boolean", {}, None, (True,)),
+}
+
+
+def make_device(device_id: str, dps: dict) -> XTDevice:
+    device = XTDevice()
+    device.id = device_id
+    for code, (dp_id, strategy, value_type, value_desc, mappings, _) in dps.items():
+        device.status_range[code] = XTDeviceStatusRange(
+            code=code, type=value_type, values=json.dumps(value_desc), dp_id=dp_id
+        )
+        config_item = {
+            "statusFormat": json.dumps({code: "$"}),
+            "valueType": value_type,
+            "valueDesc": json.dumps(value_desc),
+        }
+        if mappings is not None:
+            config_item["enumMappingMap"] = mappings
+        device.local_strategy[dp_id] = {
+            "status_code": code,
+            "value_convert": strategy,
+            "config_item": config_item,
+        }
+    return device
+
+
+def conversions_per_second(function, conversions_per_call: int, min_seconds: float):
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        function()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return calls * conversions_per_call / elapsed
+
+
+def run(args) -> dict:
+    rng = random.Random(args.seed)
+    results = {}
+    for name, dps in (("power_meter", POWER_METER), ("thermostat", THERMOSTAT)):
+        device = make_device(f"bf{name:0>20}", dps)
+        reports = [
+            (code, rng.choice(dps[code][5]))
+            for code in rng.choices(list(dps), k=args.reports)
+        ]
+
+        def apply_dpcode_strategy():
+            for code, value in reports:
+                device.apply_dpcode_strategy(code, value)
+
+        converters = {
+            code: device.get_dpcode_information(dpcode=code).converter  # type: ignore[union-attr]
+            for code in dps
+        }
+
+        def compiled():
+            for code, value in reports:
+                converters[code](value)
+
+        def registry():
+            for code, value in reports:
+                dp_info = device.local_strategy[dps[code][0]]
+                tuya_sharing_strategy.convert(
+                    dp_info["value_convert"], (code, value), dp_info["config_item"]
+                )
+
+        results[name] = {
+            "apply_dpcode_strategy": conversions_per_second(
+                apply_dpcode_strategy, len(reports), args.min_seconds
+            ),
+            "compiled_converter": conversions_per_second(
+                compiled, len(reports), args.min_seconds
+            ),
+            "tuya_sharing_registry": conversions_per_second(
+                registry, len(reports), args.min_seconds
+            ),
+        }
+    return {
+        "benchmark": "value_conversion",
+        "python": platform.python_version(),
+        "parameters": {"reports": args.reports, "seed": args.seed},
+        "conversions_per_second": {
+            name: {kind: round(value) for kind, value in result.items()}
+            for name, result in results.items()
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reports", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=1.0,
+        help="minimum time spent on each measurement",
+    )
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    result = run(args)
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""CloudFixes must run its passes to a fixpoint and skip the passes whose inputs did not change.
+
+Standalone: run with an env that has homeassistant installed:
+  python tests/test_cloud_fix_engine.py
+"""
+
+import copy
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from custom_components.xtend_tuya.multi_manager.shared.shared_classes import (
+        XTDevice,
+        XTDeviceFunction,
+        XTDeviceStatusRange,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.cloud_fix import (
+        CloudFixes,
+        XTCloudFixStatistics,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+
+def make_device():
+    d = XTDevice()
+    d.id = "bf0123456789abcdef0123"
+    d.name = "Thermostat"
+    # temp_alias is reported under an alias of temp_current, which only shows up in statusFormat
+    d.status = {"temp_alias": 215, "mode": "eco", "fault": 0}
+    d.status_range = {
+        "temp_alias": XTDeviceStatusRange(
+            code="temp_alias",
+            type="Integer",
+            values='{"unit": "℃", "min": 0, "max": 500, "scale": 1, "step": 1}',
+        ),
+        "mode": XTDeviceStatusRange(
+            code="mode", type="Enum", values='{"range": ["eco", "comfort"]}'
+        ),
+        "fault": XTDeviceStatusRange(
+            code="fault", type="Bitmap", values='{"label": ["e1"], "maxlen": 1}'
+        ),
+    }
+    d.function = {
+        "mode": XTDeviceFunction(
+            code="mode", type="Enum", values='{"range": ["eco", "comfort", "away"]}'
+        ),
+    }
+    d.local_strategy = {
+        1: {
+            "status_code": "temp_current",
+            "config_item": {
+                "valueType": "Integer",
+                "valueDesc": '{"unit": "°C", "min": 0, "max": 500, "scale": 1, "step": 1}',
+                "statusFormat": '{"temp_current": "$", "temp_alias": "$"}',
+            },
+        },
+        2: {
+            "status_code": "mode",
+            "config_item": {
+                "valueType": "Enum",
+                "valueDesc": '{"range": ["eco", "comfort", "boost"]}',
+            },
+        },
+        3: {
+            "status_code": "fault",
+            "config_item": {
+                "valueType": "Bitmap",
+                "valueDesc": '{"label": ["e1"], "maxlen": 1}',
+            },
+        },
+    }
+    return d
+
+
+def state_of(device):
+    return copy.deepcopy(
+        (
+            device.status,
+            {
+                code: (str(sr.type), sr.values, sr.dp_id)
+                for code, sr in device.status_range.items()
+            },
+            {
+                code: (str(fn.type), fn.values, fn.dp_id)
+                for code, fn in device.function.items()
+            },
+            device.local_strategy,
+        )
+    )
+
+
+def runs():
+    return {
+        name: stats["runs"]
+        for name, stats in statistics.get_statistics()["passes"].items()
+    }
+
+
+# 1. A single call reaches a fixpoint: running every pass once more changes nothing.
+statistics = XTCloudFixStatistics()
+device = make_device()
+CloudFixes.apply_fixes(device, statistics=statistics)
+assert "temp_current" in device.status and "temp_alias" not in device.status
+fixed = state_of(device)
+for fix_pass in CloudFixes.PASSES:
+    fix_pass.fix(device)
+assert state_of(device) == fixed
+report = statistics.get_statistics()
+assert report["engine"]["calls"] == 1
+assert report["engine"]["not_converged"] == 0
+assert (
+    report["passes"]["remove_status_that_are_local_strategy_aliases"]["codes_touched"]
+    > 0
+)
+
+# 2. Nothing changed since the last call: no pass runs.
+device = make_device()
+CloudFixes.apply_fixes(device, statistics=statistics)
+before = runs()
+CloudFixes.apply_fixes(device, statistics=statistics)
+assert runs() == before
+
+# 3. Only the passes reading what changed run again.
+device.status_range["mode"].values = '{"range": ["eco", "comfort", "night"]}'
+before = runs()
+CloudFixes.apply_fixes(device, statistics=statistics)
+after = runs()
+assert after["align_valuedescr"] > before["align_valuedescr"]
+assert after["fix_incorrect_access_mode"] == before["fix_incorrect_access_mode"]
+assert after["fix_missing_aliases_using_status_format"] == (
+    before["fix_missing_aliases_using_status_format"]
+)
+
+# 4. A call limited to one iteration leaves the remaining work to the next call.
+limited = make_device()
+CloudFixes.apply_fixes(limited, max_iterations=1)
+assert limited.cloud_fix_state.pending_passes
+CloudFixes.apply_fixes(limited)
+assert not limited.cloud_fix_state.pending_passes
+assert state_of(limited) == fixed
+
+# 5. Copies start from scratch instead of sharing the tracking state.
+assert copy.deepcopy(limited).cloud_fix_state is None
+
+# 6. Each statistics object only counts its own calls, concurrent calls are all
+# counted.
+other = XTCloudFixStatistics()
+threads = [
+    threading.Thread(
+        target=CloudFixes.apply_fixes,
+        args=(make_device(),),
+        kwargs={"statistics": other},
+    )
+    for _ in range(8)
+]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+calls = statistics.get_statistics()["engine"]["calls"]
+assert other.get_statistics()["engine"]["calls"] == 8
+assert other.get_statistics()["passes"]["align_valuedescr"]["runs"] >= 8
+CloudFixes.apply_fixes(make_device())
+assert statistics.get_statistics()["engine"]["calls"] == calls
+other.reset()
+assert other.get_statistics()["engine"]["calls"] == 0
+assert statistics.get_statistics()["engine"]["calls"] == calls
+
+print("OK")
@@ -0,0 +1,170 @@
+"""Bursts of slider commands to a device must be coalesced into a single flush, the last value winning.
+
+Standalone: run with an env that has homeassistant installed:
+  python tests/test_command_queue.py
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from custom_components.xtend_tuya.multi_manager.shared.command_queue import (
+        XTCommandQueue,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.shared_classes import (
+        XTDevice,
+        XTDeviceFunction,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+
+class FakeRouter:
+    def __init__(self, rejected_codes=()):
+        self.rejected_codes = set(rejected_codes)
+        self.flushes = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def send_commands_and_get_results(self, device, commands):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.02)
+        with self.lock:
+            self.in_flight -= 1
+            self.flushes.append(
+                [(command["code"], command["value"]) for command in commands]
+            )
+        return [command["code"] not in self.rejected_codes for command in commands]
+
+
+def make_device(device_id="bf1"):
+    device = XTDevice()
+    device.id = device_id
+    device.function = {
+        "bright_value": XTDeviceFunction(code="bright_value", type="Integer"),
+        "colour_data": XTDeviceFunction(code="colour_data", type="Json"),
+        "button": XTDeviceFunction(code="button", type="Boolean"),
+        "switch_led": XTDeviceFunction(code="switch_led", type="Boolean"),
+    }
+    return device
+
+
+def send_concurrently(queue, calls):
+    results = [None] * len(calls)
+
+    def send(index, device, commands):
+        results[index] = queue.send_commands(device, commands)
+
+    threads = []
+    for index, (device, commands) in enumerate(calls):
+        threads.append(threading.Thread(target=send, args=(index, device, commands)))
+        threads[-1].start()
+        time.sleep(0.005)
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def command(code, value):
+    return {"code": code, "value": value}
+
+
+device = make_device()
+
+# 1. A slider burst is one flush with the last value, merged with the other
+# DPCodes written meanwhile, in the order they were first written.
+router = FakeRouter()
+queue = XTCommandQueue(router, window=0.1)  # type: ignore[arg-type]
+results = send_concurrently(
+    queue,
+    [(device, [command("bright_value", value)]) for value in (10, 20, 30)]
+    + [
+        (device, [command("colour_data", "{}")]),
+        (device, [command("bright_value", 40)]),
+    ],
+)
+assert results == [True] * 5
+assert router.flushes == [[("bright_value", 40), ("colour_data", "{}")]]
+assert queue.get_statistics() == {
+    "queued_commands": 5,
+    "coalesced_commands": 3,
+    "sent_commands": 2,
+    "flushes": 1,
+}
+
+# 2. Turning a light on while dragging its brightness resends the same switch
+# value with each brightness: still one flush.
+router = FakeRouter()
+queue = XTCommandQueue(router, window=0.1)  # type: ignore[arg-type]
+send_concurrently(
+    queue,
+    [
+        (device, [command("switch_led", True), command("bright_value", value)])
+        for value in (10, 20, 30, 40)
+    ],
+)
+assert router.flushes == [[("switch_led", True), ("bright_value", 40)]]
+assert queue.get_statistics()["coalesced_commands"] == 6
+
+# 2b. Toggles and buttons are sent right away, closing the window they join.
+# A toggle written again with another value sends the window first, the
+# flushes of a device go out one at a time and in order.
+router = FakeRouter()
+queue = XTCommandQueue(router, window=0.1)  # type: ignore[arg-type]
+start = time.perf_counter()
+assert queue.send_commands(device, [command("button", True)])
+assert time.perf_counter() - start < 0.1
+send_concurrently(
+    queue,
+    [
+        (device, [command("switch_led", True), command("bright_value", 10)]),
+        (device, [command("switch_led", False)]),
+        (device, [command("bright_value", 20)]),
+        (device, [command("button", True)]),
+    ],
+)
+assert router.flushes == [
+    [("button", True)],
+    [("switch_led", True), ("bright_value", 10)],
+    [("switch_led", False)],
+    [("bright_value", 20), ("button", True)],
+]
+assert router.max_in_flight == 1
+
+# 3. The devices have their own windows, each caller gets the result of its
+# last command.
+router = FakeRouter(rejected_codes={"colour_data"})
+queue = XTCommandQueue(router, window=0.1)  # type: ignore[arg-type]
+other_device = make_device("bf2")
+results = send_concurrently(
+    queue,
+    [
+        (device, [command("bright_value", 10)]),
+        (other_device, [command("bright_value", 10)]),
+        (device, [command("bright_value", 20), command("colour_data", "{}")]),
+    ],
+)
+assert results == [True, True, False]
+assert sorted(router.flushes) == [
+    [("bright_value", 10)],
+    [("bright_value", 20), ("colour_data", "{}")],
+]
+
+# 4. Without a window the commands are sent right away.
+router = FakeRouter()
+queue = XTCommandQueue(router, window=0)  # type: ignore[arg-type]
+start = time.perf_counter()
+assert queue.send_commands(device, [command("bright_value", 10)]) is True
+assert time.perf_counter() - start < 0.1
+assert queue.send_commands(device, []) is False
+assert router.flushes == [[("bright_value", 10)]]
+
+print("OK")
@@ -0,0 +1,120 @@
+"""The regular commands of a device must be sent in batches through the route that worked last.
+
+Standalone: run with an env that has homeassistant installed:
+  python tests/test_command_router.py
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from custom_components.xtend_tuya.multi_manager.shared.command_router import (
+        XTCommandRoute,
+        XTCommandRouter,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.shared_classes import (
+        XTDevice,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+
+class FakeAccount:
+    def __init__(self, apis, reversed_apis=(), accepted_codes=None):
+        self.apis = list(apis)
+        self.reversed_apis = list(reversed_apis)
+        # None: every code is accepted
+        self.accepted_codes = accepted_codes
+        self.calls = []
+
+    def get_command_apis(self, device_id, command, reverse_filters=False):
+        return self.reversed_apis if reverse_filters else self.apis
+
+    def send_commands_through_api(self, device_id, commands, api):
+        self.calls.append((api, [command["code"] for command in commands]))
+        return self.accepted_codes is None or all(
+            command["code"] in self.accepted_codes for command in commands
+        )
+
+
+def make_device():
+    device = XTDevice()
+    device.id = "bf1"
+    device.local_strategy = {
+        1: {"status_code": "switch", "status_code_alias": [], "config_item": {}},
+        2: {
+            "status_code": "bright_value",
+            "status_code_alias": ["bright_value_v2"],
+            "config_item": {},
+        },
+    }
+    return device
+
+
+def make_router(**accounts):
+    return XTCommandRouter(SimpleNamespace(accounts=accounts))  # type: ignore[arg-type]
+
+
+COMMANDS = [{"code": "switch", "value": True}, {"code": "bright_value", "value": 10}]
+
+# 1. The commands that share their first route are sent in a single call.
+iot = FakeAccount(["open_api_regular", "property_update"])
+sharing = FakeAccount(["sharing"])
+router = make_router(iot=iot, sharing=sharing)
+assert router.send_commands(make_device(), COMMANDS) is True
+assert iot.calls == [("open_api_regular", ["switch", "bright_value"])]
+assert sharing.calls == []
+
+# 2. A rejected batch is retried one by one, the rejected command moves on to
+# the next route; the route that worked is tried first next time.
+iot = FakeAccount(["open_api_regular", "property_update"])
+sharing = FakeAccount(["sharing"], accepted_codes={"switch"})
+router = make_router(sharing=sharing, iot=iot)
+assert router.send_commands(make_device(), COMMANDS) is True
+assert sharing.calls == [
+    ("sharing", ["switch", "bright_value"]),
+    ("sharing", ["switch"]),
+    ("sharing", ["bright_value"]),
+]
+assert iot.calls == [("open_api_regular", ["bright_value"])]
+assert router.get_routes(make_device(), COMMANDS[1])[0] == XTCommandRoute(
+    "iot", "open_api_regular", "bright_value"
+)
+sharing.calls.clear()
+iot.calls.clear()
+assert router.send_commands(make_device(), COMMANDS) is True
+assert sharing.calls == [("sharing", ["switch"])]
+assert iot.calls == [("open_api_regular", ["bright_value"])]
+
+# 3. The reversed filters are tried before the aliases, then the aliases.
+iot = FakeAccount(["open_api_regular"], ["property_update"], {"bright_value_v2"})
+router = make_router(iot=iot)
+assert router.send_commands(make_device(), [COMMANDS[1]]) is True
+assert iot.calls == [
+    ("open_api_regular", ["bright_value"]),
+    ("property_update", ["bright_value"]),
+    ("open_api_regular", ["bright_value_v2"]),
+]
+
+# 4. The result is the one of the last command, like it always was.
+iot = FakeAccount(["open_api_regular"], accepted_codes={"bright_value"})
+router = make_router(iot=iot)
+assert router.send_commands(make_device(), COMMANDS) is True
+assert router.send_commands(make_device(), COMMANDS[::-1]) is False
+assert router.send_commands(make_device(), []) is False
+assert router.send_commands(make_device(), [{"value": 1}]) is False
+
+# 5. The statistics count the hits, misses, calls and failures.
+assert router.get_statistics() == {
+    "route_hits": 1,
+    "route_misses": 3,
+    "api_calls": 6,
+    "failed_commands": 3,
+    "known_routes": 1,
+}
+
+print("OK")
@@ -0,0 +1,186 @@
+"""The consumption history must be fetched concurrently and re-imports must only query the missing tail.
+
+Standalone: run with an env that has homeassistant installed:
+  python tests/test_consumption_history.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from collections import Counter
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from homeassistant.core import HomeAssistant
+    from custom_components.xtend_tuya.multi_manager.managers.tuya_iot.xt_tuya_iot_statistics import (
+        XTIOTStatisticsFetcher,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.shared_classes import (
+        XTDevice,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.storage.storage_manager import (
+        XTStorageManager,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+
+def bucket_range(start, end, fmt, step):
+    current = datetime.strptime(start, fmt)
+    while current <= datetime.strptime(end, fmt):
+        yield current.strftime(fmt)
+        current += step
+
+
+class FakeAPI:
+    def __init__(self):
+        self.queries = []
+        self.calls = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.failing_hour_range = None
+        self.latency = 0.001
+
+    async def async_get(self, path, params=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.latency)
+        self.in_flight -= 1
+        self.calls[path.rsplit("/", 1)[-1]] += 1
+        if path.endswith("/all-statistic-type"):
+            return {
+                "success": True,
+                "result": [{"code": "add_ele", "stat_type": "sum"}],
+            }
+        if path.endswith("/days"):
+            self.queries.append(("days", params["start_day"], params["end_day"]))
+            days = bucket_range(
+                params["start_day"], params["end_day"], "%Y%m%d", timedelta(days=1)
+            )
+            # Nothing consumed before the device was installed
+            return {
+                "success": True,
+                "result": {
+                    "days": {
+                        day: "0.00" if day < "20240105" else "1.00" for day in days
+                    }
+                },
+            }
+        self.queries.append(("hours", params["start_hour"], params["end_hour"]))
+        if (params["start_hour"], params["end_hour"]) == self.failing_hour_range:
+            return {"success": False, "msg": "timeout"}
+        hours = bucket_range(
+            params["start_hour"], params["end_hour"], "%Y%m%d%H", timedelta(hours=1)
+        )
+        return {
+            "success": True,
+            "result": {
+                "hours": {hour: "0.00" if hour[8:] < "02" else "0.25" for hour in hours}
+            },
+        }
+
+
+def make_device(device_id):
+    device = XTDevice()
+    device.id = device_id
+    device.product_id = "pid"
+    return device
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        config_entry = SimpleNamespace(entry_id="entry")
+        multi_manager = SimpleNamespace()
+        multi_manager.storage_manager = XTStorageManager(
+            hass, config_entry, multi_manager  # type: ignore[arg-type]
+        )
+        api = FakeAPI()
+        device_manager = SimpleNamespace(api=api, multi_manager=multi_manager)
+        fetcher = XTIOTStatisticsFetcher(device_manager)  # type: ignore[arg-type]
+
+        # 1. Hour ranges are split by calendar day.
+        assert XTIOTStatisticsFetcher.split_hour_range_by_day(
+            "2024011005", "2024011203"
+        ) == [
+            ("2024011005", "2024011023"),
+            ("2024011100", "2024011123"),
+            ("2024011200", "2024011203"),
+        ]
+        assert (
+            XTIOTStatisticsFetcher.split_hour_range_by_day("2024011005", "2024011005")
+            == []
+        )
+
+        # 2. The first import fetches everything, concurrently, leading empty
+        # buckets are stripped (per day for the hours).
+        api.latency = 0.25
+        window = ("20240101", "20240110", "2024011100", "2024011303")
+        history = await fetcher.async_get_consumption_history(
+            make_device("bf1"), *window
+        )
+        assert api.calls == {"all-statistic-type": 1, "days": 1, "hours": 3}
+        assert api.max_in_flight > 1
+        api.latency = 0.001
+        days = history["add_ele"]
+        first_bucket = datetime.strptime("2024010512", "%Y%m%d%H").timestamp()
+        assert next(iter(days)) == first_bucket
+        assert list(days) == sorted(days)
+        assert len(days) == 6 + 2 * 22 + 2
+        assert sum(days.values()) == 6 * 1.0 + (2 * 22 + 2) * 0.25
+
+        # 3. A re-import only queries from the last bucket fetched and gives the
+        # same history, the statistic types are cached per product.
+        api.calls.clear()
+        api.queries.clear()
+        window = ("20240101", "20240111", "2024011200", "2024011305")
+        history = await fetcher.async_get_consumption_history(
+            make_device("bf1"), *window
+        )
+        assert sorted(api.queries) == [
+            ("days", "20240110", "20240111"),
+            ("hours", "2024011303", "2024011305"),
+        ]
+        assert "all-statistic-type" not in api.calls
+        assert len(history["add_ele"]) == 7 + 22 + 4
+
+        # 4. A failed range is queried again on the next import.
+        await hass.async_block_till_done()
+        api.queries.clear()
+        api.failing_hour_range = ("2024011305", "2024011323")
+        await fetcher.async_get_consumption_history(
+            make_device("bf1"), "20240101", "20240111", "2024011200", "2024011402"
+        )
+        api.failing_hour_range = None
+        api.queries.clear()
+        await fetcher.async_get_consumption_history(
+            make_device("bf1"), "20240101", "20240111", "2024011200", "2024011402"
+        )
+        assert sorted(api.queries) == [
+            ("days", "20240111", "20240111"),
+            ("hours", "2024011305", "2024011323"),
+            ("hours", "2024011400", "2024011402"),
+        ]
+
+        # 5. The buckets survive a restart, older buckets are pruned.
+        await hass.async_block_till_done()
+        api.queries.clear()
+        fetcher = XTIOTStatisticsFetcher(device_manager)  # type: ignore[arg-type]
+        history = await fetcher.async_get_consumption_history(
+            make_device("bf1"), "20240103", "20240111", "2024011300", "2024011402"
+        )
+        assert api.queries == [("days", "20240111", "20240111")]
+        stored = fetcher._history["bf1"]["add_ele"]  # type: ignore[index]
+        assert min(stored["days"]) == "20240103"
+        assert min(stored["hours"]) == "2024011300"
+
+        await hass.async_stop(force=True)
+
+
+asyncio.run(main())
+print("OK")
@@ -0,0 +1,113 @@
+"""Re-importing the consumption history must only append to the statistics already imported.
+
+Standalone: run with an env that has homeassistant installed:
+  python tests/test_consumption_import.py
+"""
+
+import asyncio
+import os
+import sys
+from datetime import UTC, datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from custom_components.xtend_tuya.sensor import (
+        XTSensorEntity,
+        XTSensorEntityDescription,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+
+START = datetime(2024, 1, 1, tzinfo=UTC).timestamp()
+# Three days of hourly buckets, the sum resets every day
+HISTORY = {START + 3600 * hour: 0.5 for hour in range(72)}
+
+
+def make_entity(last_rows):
+    entity = XTSensorEntity.__new__(XTSensorEntity)
+    entity.entity_description = XTSensorEntityDescription(
+        key="add_ele", reset_daily=True
+    )
+    entity.entity_id = "sensor.plug_energy"
+    entity._attr_native_unit_of_measurement = "kWh"
+    entity._currently_importing_statistics = False
+    entity.calls = []
+
+    async def get_last_statistics(number_of_stats):
+        return last_rows[:number_of_stats]
+
+    async def import_full(history):
+        entity.calls.append(("full", history))
+
+    async def import_to_recorder(history):
+        assert not entity._currently_importing_statistics
+        entity.calls.append(("recorder", history))
+
+    entity._get_last_statistics = get_last_statistics
+    entity._import_consumption_history = import_full
+    entity._import_consumption_history_to_recorder = import_to_recorder
+    entity.set_sensor_value = lambda value: entity.calls.append(("value", value))
+    return entity
+
+
+def as_row(statistic):
+    return {
+        "start": statistic["start"].timestamp(),
+        "state": statistic["state"],
+        "sum": statistic["sum"],
+    }
+
+
+full = make_entity([])._get_consumption_stat_data(HISTORY)
+assert full is not None
+rows = full.long_term_stats
+
+# 1. A slice summed on top of the row before it gives the same rows as the
+# full history, across a daily reset.
+slice_start = rows[30]["start"].timestamp()
+partial = make_entity([])._get_consumption_stat_data(
+    {
+        timestamp: value
+        for timestamp, value in HISTORY.items()
+        if timestamp >= slice_start
+    },
+    initial_sum=rows[29]["sum"],
+    last_timestamp=rows[29]["start"],
+)
+assert partial is not None
+assert partial.long_term_stats == rows[30:]
+assert partial.short_term_stats == full.short_term_stats
+assert partial.current_value == full.current_value
+
+# 2. With statistics already imported, only the rows from the last one on are
+# imported again, the entity stays available.
+entity = make_entity([as_row(rows[60]), as_row(rows[59])])
+asyncio.run(entity._import_consumption_history_incrementally(HISTORY))
+assert [call[0] for call in entity.calls] == ["value", "recorder"]
+assert entity.calls[0][1] == full.current_value
+assert entity.calls[1][1].long_term_stats == rows[60:]
+
+# 3. Nothing imported yet, or rows that are not from these buckets: full import.
+for last_rows in (
+    [],
+    [as_row(rows[60])],
+    [{"start": 1.0, "sum": 1.0}, as_row(rows[59])],
+):
+    entity = make_entity(last_rows)
+    asyncio.run(entity._import_consumption_history_incrementally(HISTORY))
+    assert entity.calls == [("full", full)]
+
+# 3b. Not enough buckets for a full import: nothing is imported.
+entity = make_entity([])
+asyncio.run(entity._import_consumption_history_incrementally({START: 0.5}))
+assert entity.calls == []
+
+# 4. Nothing new since the last import: nothing is imported.
+entity = make_entity([as_row(full.short_term_stats[0]), as_row(rows[-1])])
+asyncio.run(entity._import_consumption_history_incrementally(HISTORY))
+assert entity.calls == []
+
+print("OK")
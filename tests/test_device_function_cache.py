@@ -0,0 +1,248 @@
+"""The IoT device function cache must be refreshed through a bounded work queue, one model per product.
+
+Standalone: run with an env that has homeassistant installed:
+  python tests/test_device_function_cache.py
+"""
+
+import asyncio
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from homeassistant.core import HomeAssistant
+    from custom_components.xtend_tuya.multi_manager.multi_manager import (
+        MultiManager,
+    )
+    from custom_components.xtend_tuya.multi_manager.managers.tuya_iot.xt_tuya_iot_manager import (
+        XTIOTDeviceManager,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.shared_classes import (
+        XTDevice,
+        XTDeviceMap,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.threading import (
+        XTAsyncWorkQueue,
+    )
+    from custom_components.xtend_tuya.const import LOGGER
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+
+async def test_work_queue():
+    # 1. Bounded concurrency, results in order, progress reported for every item.
+    in_flight = 0
+    max_in_flight = 0
+    progress = []
+
+    async def worker(item):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.001 * (item % 3))
+        in_flight -= 1
+        return item * 2
+
+    work_queue = XTAsyncWorkQueue(
+        "test", 4, progress_callback=lambda done, total: progress.append(done)
+    )
+    assert await work_queue.run(range(20), worker) == [i * 2 for i in range(20)]
+    assert max_in_flight == 4
+    assert progress == list(range(1, 21))
+
+    # 2. A slow item does not hold the others back like a batch would.
+    async def sleep(duration):
+        await asyncio.sleep(duration)
+
+    start = time.perf_counter()
+    await XTAsyncWorkQueue("test", 2).run([0.3] + [0.03] * 10, sleep)
+    assert time.perf_counter() - start < 0.4
+
+    # 3. Item starts are spaced by the rate limit.
+    starts = []
+
+    async def record_start(item):
+        starts.append(time.perf_counter())
+
+    await XTAsyncWorkQueue("test", 5, rate_limit=50).run(range(5), record_start)
+    assert starts[-1] - starts[0] >= 0.07
+
+    # 4. A failing item is counted and does not stop the others.
+    async def fail_on_two(item):
+        if item == 2:
+            raise ValueError(item)
+        return item
+
+    work_queue = XTAsyncWorkQueue("test", 2)
+    assert await work_queue.run(range(4), fail_on_two) == [0, 1, None, 3]
+    assert (work_queue.done, work_queue.failed) == (4, 1)
+    assert await work_queue.run([], fail_on_two) == []
+
+    # 4b. A failing device is logged by its ID, not by its whole content.
+    class RecordingHandler(logging.Handler):
+        def __init__(self):
+            super().__init__(logging.DEBUG)
+            self.records = []
+
+        def emit(self, record):
+            self.records.append(record)
+
+    async def fail(device):
+        raise ValueError("unreachable")
+
+    failing_device = XTDevice()
+    failing_device.id = "bf_failing"
+    failing_device.status = {f"code_{index}": index for index in range(100)}
+    handler = RecordingHandler()
+    LOGGER.addHandler(handler)
+    previous_level = LOGGER.level
+    LOGGER.setLevel(logging.DEBUG)
+    try:
+        await XTAsyncWorkQueue("test", 1).run([failing_device], fail)
+    finally:
+        LOGGER.removeHandler(handler)
+        LOGGER.setLevel(previous_level)
+    warnings = [
+        record.getMessage()
+        for record in handler.records
+        if record.levelno == logging.WARNING
+    ]
+    assert warnings == ["test: bf_failing failed: unreachable"]
+    assert all(
+        record.levelno < logging.WARNING or record.exc_info is None
+        for record in handler.records
+    )
+    assert any(record.exc_info for record in handler.records)
+
+
+class FakeAPI:
+    def __init__(self):
+        self.calls = Counter()
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def respond(self, path):
+        device_id = re.search(r"/(?:devices|thing)/([^/]+)", path).group(1)
+        with self.lock:
+            self.calls[path.rsplit("/", 1)[-1]] += 1
+        if path.endswith("/model"):
+            return {"success": True, "result": {"model": '{"services": []}'}}
+        if path.endswith("/specifications"):
+            return {
+                "success": True,
+                "result": {
+                    "functions": [
+                        {"code": "switch", "type": "Boolean", "values": "{}"}
+                    ],
+                    "status": [
+                        {
+                            "code": f"power_{device_id}",
+                            "type": "Integer",
+                            "values": "{}",
+                        }
+                    ],
+                },
+            }
+        return {
+            "success": True,
+            "result": {
+                "properties": [
+                    {"code": "switch", "dp_id": 1, "type": "bool", "value": True},
+                    {
+                        "code": f"power_{device_id}",
+                        "dp_id": 2,
+                        "type": "value",
+                        "value": 0,
+                    },
+                ]
+            },
+        }
+
+    def get(self, path, params=None):
+        return self.respond(path)
+
+    async def async_get(self, path, params=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        return self.respond(path)
+
+
+def make_manager(multi_manager, api, device_count):
+    manager = XTIOTDeviceManager.__new__(XTIOTDeviceManager)
+    manager.multi_manager = multi_manager
+    manager.api = api
+    manager.mq = SimpleNamespace(remove_message_listener=lambda listener: None)
+    manager.device_manage = SimpleNamespace(
+        get_device_specification=lambda device_id: api.get(
+            f"/v1.0/devices/{device_id}/specifications"
+        ),
+        async_get_device_specification=lambda device_id: api.async_get(
+            f"/v1.0/devices/{device_id}/specifications"
+        ),
+    )
+    manager._product_schema_locks = {}
+    manager._async_product_schema_locks = {}
+    devices = {}
+    for index in range(device_count):
+        device = XTDevice()
+        device.id = f"bf{index:04d}"
+        device.product_id = f"pid{index % 3}"
+        device.category = "cz"
+        devices[device.id] = device
+    manager.device_map = XTDeviceMap(devices)
+    return manager
+
+
+def summary(manager):
+    return {
+        device.id: (sorted(device.status_range), device.status)
+        for device in manager.device_map.values()
+    }
+
+
+async def test_device_function_cache():
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        config_entry = SimpleNamespace(entry_id="test", data={}, options={})
+        multi_manager = MultiManager(hass, config_entry)  # type: ignore[arg-type]
+
+        # 5. Every device gets its specification and properties, the model is
+        # fetched once per product and the refresh is bounded.
+        api = FakeAPI()
+        manager = make_manager(multi_manager, api, 30)
+        await manager.async_update_device_function_cache()
+        assert api.calls == {"specifications": 30, "properties": 30, "model": 3}
+        assert 1 < api.max_in_flight <= 2 * 10
+        assert summary(manager)["bf0007"] == (
+            ["power_bf0007", "switch"],
+            {"switch": True, "power_bf0007": 0},
+        )
+
+        # 6. Only the requested devices are refreshed, the models are cached.
+        api.calls.clear()
+        await manager.async_update_device_function_cache(["bf0001", "bf0002"])
+        assert api.calls == {"specifications": 2, "properties": 2}
+
+        # 7. The blocking path builds the same devices.
+        blocking_manager = make_manager(multi_manager, FakeAPI(), 30)
+        blocking_manager.update_device_function_cache()
+        assert summary(blocking_manager) == summary(manager)
+
+        await hass.async_stop(force=True)
+
+
+asyncio.run(test_work_queue())
+asyncio.run(test_device_function_cache())
+print("OK")
@@ -0,0 +1,200 @@
+"""Device reports must be resolved once and go through the report pipeline without copies.
+
+Standalone: run with an env that has homeassistant installed:
+  python tests/test_device_report.py
+"""
+
+import asyncio
+import copy
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from homeassistant.core import HomeAssistant
+    from custom_components.xtend_tuya.const import (
+        MESSAGE_SOURCE_TUYA_IOT,
+        MESSAGE_SOURCE_TUYA_SHARING,
+        VirtualStates,
+    )
+    from custom_components.xtend_tuya.multi_manager.multi_manager import (
+        MultiManager,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.shared_classes import (
+        XTDevice,
+        XTDeviceReportItem,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+
+def make_device():
+    d = XTDevice()
+    d.id = "bf0123456789abcdef0123"
+    d.name = "Plug"
+    d.category = "cz"
+    d.status = {"add_ele": 5, "cur_power": 0, "cur_power_copy": 0}
+    d.local_strategy = {
+        1: {"status_code": "switch_1", "status_code_alias": ["switch"]},
+        17: {"status_code": "add_ele", "status_code_alias": []},
+        19: {"status_code": "cur_power", "status_code_alias": []},
+        20: {"status_code": "cur_power_copy", "status_code_alias": []},
+    }
+    return d
+
+
+class Account:
+    def __init__(self, multi_manager, source):
+        self.multi_manager = multi_manager
+        self.source = source
+        self.reports = []
+        self.nested_message = None
+
+    def on_message(self, msg, report=None):
+        if (nested_message := self.nested_message) is not None:
+            # Another report dispatched while this one is handled
+            self.nested_message = None
+            self.multi_manager.on_message(nested_message, self.source)
+        if report is None:
+            data = msg["data"]
+            report = self.multi_manager.resolve_device_report(
+                data["devId"], data["status"], self.source
+            )
+        self.reports.append(report)
+
+
+async def make_multi_manager():
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        config_entry = SimpleNamespace(entry_id="test", data={}, options={})
+        return MultiManager(hass, config_entry)  # type: ignore[arg-type]
+
+
+multi_manager = asyncio.run(make_multi_manager())
+device = make_device()
+multi_manager.master_device_map[device.id] = device
+multi_manager.is_ready_for_messages = True
+
+# 1. Items are resolved to their main code and dpId, the status list is left untouched.
+status = [
+    {"code": "switch", "value": True, "t": 1700000000123},
+    {"dpId": 19, "value": 120, "t": 1700000000456},
+    {"code": "unknown", "value": 1},
+    {"code": "no_value"},
+]
+original = copy.deepcopy(status)
+report = multi_manager.resolve_device_report(
+    device.id, status, MESSAGE_SOURCE_TUYA_SHARING
+)
+assert status == original
+assert report == [
+    XTDeviceReportItem("switch_1", 1, True, 1700000000, MESSAGE_SOURCE_TUYA_SHARING),
+    XTDeviceReportItem("cur_power", 19, 120, 1700000000, MESSAGE_SOURCE_TUYA_SHARING),
+    XTDeviceReportItem("unknown", None, 1, None, MESSAGE_SOURCE_TUYA_SHARING),
+]
+assert [item.is_resolved for item in report] == [True, True, False]
+iot_report = multi_manager.resolve_device_report(
+    device.id, status[:1], MESSAGE_SOURCE_TUYA_IOT
+)
+assert iot_report[0].t == 1700000000123
+
+# 2. The account receiving the message gets the report resolved by on_message.
+account = Account(multi_manager, MESSAGE_SOURCE_TUYA_SHARING)
+multi_manager.accounts[MESSAGE_SOURCE_TUYA_SHARING] = account  # type: ignore[assignment]
+msg = {"protocol": 4, "data": {"devId": device.id, "status": status}}
+with mock.patch.object(
+    MultiManager,
+    "_read_code_dpid_value_from_state",
+    autospec=True,
+    side_effect=MultiManager._read_code_dpid_value_from_state,
+) as resolve:
+    multi_manager.on_message(msg, MESSAGE_SOURCE_TUYA_SHARING)
+assert resolve.call_count == len(status)
+assert account.reports == [report]
+
+# 2b. A report dispatched while another one is handled gets its own items.
+account.reports.clear()
+account.nested_message = {
+    "protocol": 4,
+    "data": {"devId": device.id, "status": [{"dpId": 17, "value": 7}]},
+}
+multi_manager.on_message(msg, MESSAGE_SOURCE_TUYA_SHARING)
+assert [[item.code for item in items] for items in account.reports] == [
+    ["add_ele"],
+    ["switch_1", "cur_power", "unknown"],
+]
+
+# 3. Reports of a deduplicated code are only kept from the most talkative source
+# and when they are newer than the last one kept.
+multi_manager.virtual_state_handler.register_device_descriptors(
+    "test",
+    {
+        "cz": (
+            SimpleNamespace(
+                key="add_ele",
+                virtual_state=VirtualStates.STATE_SUMMED_IN_REPORTING_PAYLOAD
+                | VirtualStates.STATE_DEDUPLICATE_IN_REPORTING,
+            ),
+            SimpleNamespace(
+                key="cur_power",
+                virtual_state=VirtualStates.STATE_COPY_TO_MULTIPLE_STATE_NAME,
+                vs_copy_to_state=["cur_power_copy"],
+            ),
+        )
+    },
+)
+source_handler = multi_manager.multi_source_handler
+
+
+def add_ele_report(source, t):
+    return [
+        XTDeviceReportItem("add_ele", 17, 3, t, source),
+        XTDeviceReportItem("switch_1", 1, True, t, source),
+    ]
+
+
+for _ in range(2):
+    source_handler.register_status_list_from_source(
+        device.id,
+        MESSAGE_SOURCE_TUYA_SHARING,
+        add_ele_report(MESSAGE_SOURCE_TUYA_SHARING, 10),
+    )
+kept = source_handler.filter_status_list(
+    device.id,
+    MESSAGE_SOURCE_TUYA_SHARING,
+    add_ele_report(MESSAGE_SOURCE_TUYA_SHARING, 10),
+)
+assert [item.code for item in kept] == ["add_ele", "switch_1"]
+kept = source_handler.filter_status_list(
+    device.id, MESSAGE_SOURCE_TUYA_IOT, add_ele_report(MESSAGE_SOURCE_TUYA_IOT, 11)
+)
+assert [item.code for item in kept] == ["switch_1"]
+kept = source_handler.filter_status_list(
+    device.id,
+    MESSAGE_SOURCE_TUYA_SHARING,
+    add_ele_report(MESSAGE_SOURCE_TUYA_SHARING, 10),
+)
+assert [item.code for item in kept] == ["switch_1"]
+
+# 4. Virtual states are applied to new items, the items of the report are not modified.
+report = [
+    XTDeviceReportItem("add_ele", 17, 3, 12, MESSAGE_SOURCE_TUYA_SHARING),
+    XTDeviceReportItem("cur_power", 19, 120, 12, MESSAGE_SOURCE_TUYA_SHARING),
+]
+original = copy.deepcopy(report)
+applied = multi_manager.virtual_state_handler.apply_virtual_states_to_status_list(
+    device, report, MESSAGE_SOURCE_TUYA_SHARING
+)
+assert report == original
+assert [(item.code, item.dp_id, item.value) for item in applied] == [
+    ("add_ele", 17, 8),
+    ("cur_power", 19, 120),
+    ("cur_power_copy", 20, 120),
+]
+
+print("OK")
@@ -0,0 +1,106 @@
+"""The dpId/code/alias index of a device must match its local strategy, even after changes.
+
+Standalone: run with an env that has homeassistant installed:
+  python tests/test_dpcode_index.py
+"""
+
+import copy
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from custom_components.xtend_tuya.multi_manager.shared.shared_classes import (
+        XTDevice,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.cloud_fix import (
+        CloudFixes,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+
+def make_device():
+    d = XTDevice()
+    d.id = "bf0123456789abcdef0123"
+    d.name = "Thermostat"
+    d.status = {"temp_alias": 215}
+    d.local_strategy = {
+        1: {
+            "status_code": "temp_current",
+            "status_code_alias": ["temp_alias"],
+            "config_item": {"statusFormat": '{"temp_current": "$"}'},
+        },
+        2: {"status_code": "mode", "status_code_alias": []},
+        # Declares a code already owned by dpId 1, the first dpId must win
+        3: {"status_code": "temp_alias", "status_code_alias": ["mode"]},
+    }
+    return d
+
+
+def scan_dp_id(device, code):
+    # Reference: the linear scan the index replaces
+    for dp_id, dp_item in device.local_strategy.items():
+        if dp_item["status_code"] == code or code in dp_item["status_code_alias"]:
+            return dp_id
+    return None
+
+
+def check(device):
+    index = device.get_dpcode_index()
+    codes = {"unknown"}
+    for dp_item in device.local_strategy.values():
+        codes.add(dp_item["status_code"])
+        codes.update(dp_item["status_code_alias"])
+    for code in codes:
+        assert index.code_to_dp_id.get(code) == scan_dp_id(device, code), code
+    for dp_id, dp_item in device.local_strategy.items():
+        assert index.dp_id_to_code[dp_id] == dp_item["status_code"]
+
+
+# 1. The index matches the linear scan and is reused while nothing changes.
+device = make_device()
+check(device)
+assert device.get_all_status_code_aliases() == {
+    "temp_alias": "temp_current",
+    "mode": "temp_alias",
+}
+assert device.get_status_code_aliases("temp_current") == ["temp_alias"]
+index = device.get_dpcode_index()
+assert device.get_dpcode_index() is index
+
+# 2. Renaming a status code updates the index.
+device.replace_status_code_with_another("mode", "work_mode")
+assert device.get_dpcode_index() is not index
+assert device.get_dpcode_index().code_to_dp_id["mode"] == 2
+assert device.get_dpcode_index().dp_id_to_code[2] == "work_mode"
+check(device)
+
+# 3. Adding a dpId or replacing the local strategy updates the index.
+device.local_strategy[4] = {"status_code": "countdown", "status_code_alias": []}
+assert device.get_dpcode_index().code_to_dp_id["countdown"] == 4
+device.local_strategy = {5: {"status_code": "switch", "status_code_alias": []}}
+assert device.get_dpcode_index().code_to_dp_id == {"switch": 5}
+
+# 4. Devices sharing a local strategy see the changes made through the other one.
+first = make_device()
+second = make_device()
+second.local_strategy = first.local_strategy
+second.get_dpcode_index()
+first.replace_status_code_with_another("temp_current", "temp_indoor")
+assert second.get_dpcode_index().dp_id_to_code[1] == "temp_indoor"
+
+# 5. Aliases added by the cloud fixes are indexed.
+device = make_device()
+device.local_strategy[2]["config_item"] = {"statusFormat": '{"work_mode": "$"}'}
+assert "work_mode" not in device.get_dpcode_index().code_to_dp_id
+CloudFixes.apply_fixes(device)
+assert device.get_dpcode_index().code_to_dp_id["work_mode"] == 2
+check(device)
+
+# 6. Copies do not carry the index of the original.
+assert copy.deepcopy(device).dpcode_index is None
+
+print("OK")
@@ -0,0 +1,119 @@
+"""DPCode information must be shared while its sources are unchanged and rebuilt when they change.
+
+Standalone: run with an env that has homeassistant installed:
+  python tests/test_dpcode_information.py
+"""
+
+import copy
+import dataclasses
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from custom_components.xtend_tuya.const import XTEntityAccessMode
+    from custom_components.xtend_tuya.ha_tuya_integration.tuya_integration_imports import (
+        TuyaDPType,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.shared_classes import (
+        XTDevice,
+        XTDeviceStatusRange,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+VALUE_DESCR = '{"unit": "W", "min": 0, "max": 50000, "scale": 1, "step": 1}'
+
+
+def make_device():
+    d = XTDevice()
+    d.id = "bf0123456789abcdef0123"
+    d.name = "Plug"
+    d.status = {"cur_power": 120}
+    d.status_range = {
+        "cur_power": XTDeviceStatusRange(
+            code="cur_power", type="Integer", values=VALUE_DESCR, dp_id=19
+        ),
+    }
+    d.local_strategy = {
+        19: {
+            "status_code": "cur_power",
+            "status_code_alias": [],
+            "value_convert": "default",
+            "access_mode": XTEntityAccessMode.READ_ONLY,
+            "config_item": {
+                "statusFormat": '{"cur_power":"$"}',
+                "valueType": "Integer",
+                "valueDesc": VALUE_DESCR,
+            },
+        },
+    }
+    return d
+
+
+# 1. The information is complete, immutable and shared while nothing changes.
+device = make_device()
+info = device.get_dpcode_information(dpcode="cur_power")
+assert info is not None
+assert (info.dpid, info.dptype, info.unit, info.max, info.scale) == (
+    19,
+    TuyaDPType.INTEGER,
+    "W",
+    50000,
+    1,
+)
+assert info.read_only and info.in_status_range and info.in_local_strategy
+assert info.human_name == "Cur power"
+assert device.get_dpcode_information(dpcode="cur_power") is info
+assert device.get_dpcode_information(dpid=19) == info
+try:
+    info.dptype = TuyaDPType.STRING  # type: ignore[misc]
+except dataclasses.FrozenInstanceError:
+    pass
+else:
+    raise AssertionError("information is mutable")
+try:
+    info.config_item["valueType"] = "String"  # type: ignore[index]
+except TypeError:
+    pass
+else:
+    raise AssertionError("config item is mutable")
+
+# 2. In place changes of the status range or local strategy rebuild it.
+device.status_range["cur_power"].type = TuyaDPType.STRING
+assert device.get_dpcode_information(dpcode="cur_power").dptype == TuyaDPType.STRING
+device.local_strategy[19]["access_mode"] = XTEntityAccessMode.READ_WRITE
+assert device.get_dpcode_information(dpcode="cur_power").read_write
+device.local_strategy[19]["config_item"]["valueDesc"] = VALUE_DESCR.replace(
+    '"W"', '"kW"'
+)
+assert device.get_dpcode_information(dpcode="cur_power").unit == "kW"
+device.local_strategy = {}
+assert not device.get_dpcode_information(dpcode="cur_power").in_local_strategy
+
+# 2b. An enum mapping value edited in place rebuilds the enum converter.
+device = make_device()
+config_item = device.local_strategy[19]["config_item"]
+config_item["statusFormat"] = '{"mode":"$"}'
+config_item["enumMappingMap"] = {"0": {"value": "eco"}, "1": {"value": "comfort"}}
+device.local_strategy[19]["value_convert"] = "enum"
+assert device.get_dpcode_information(dpcode="cur_power").converter("1") == "comfort"
+config_item["enumMappingMap"]["1"]["value"] = "boost"
+assert device.get_dpcode_information(dpcode="cur_power").converter("1") == "boost"
+config_item["enumMappingMap"] = {"1": {"value": "away"}}
+assert device.get_dpcode_information(dpcode="cur_power").converter("1") == "away"
+
+# 3. Changes are applied through set_dpcode_information on a modified copy.
+device = make_device()
+info = device.get_dpcode_information(dpcode="cur_power")
+assert device.set_dpcode_information(dataclasses.replace(info, dptype=TuyaDPType.JSON))
+assert device.status_range["cur_power"].type == TuyaDPType.JSON
+assert device.local_strategy[19]["config_item"]["valueType"] == TuyaDPType.JSON
+assert device.get_dpcode_information(dpcode="cur_power").dptype == TuyaDPType.JSON
+
+# 4. Copies do not carry the cache of the original.
+assert copy.deepcopy(device).dpcode_information_cache is None
+
+print("OK")
@@ -0,0 +1,110 @@
+"""Entity discovery must pick the descriptions of the two-pass scan and add the entities in chunks.
+
+Standalone: run with an env that has homeassistant installed:
+  python tests/test_entity_discovery.py
+"""
+
+import os
+import random
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from homeassistant.const import Platform
+    from homeassistant.helpers.entity import EntityDescription
+    from custom_components.xtend_tuya.multi_manager.shared.shared_classes import (
+        XTDevice,
+    )
+    from custom_components.xtend_tuya.entity import (
+        XTEntity,
+        XTEntityDiscovery,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.debug.startup_tracer import (
+        XTStartupTracer,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+CODES = [f"code_{index}" for index in range(12)]
+
+
+def make_device(rng, index):
+    device = XTDevice()
+    device.id = f"bf{index:020d}"
+    device.status = {code: 0 for code in rng.sample(CODES, rng.randint(0, 6))}
+    device.local_strategy = {
+        dp_id: {
+            "status_code": code,
+            "status_code_alias": rng.sample(CODES, rng.randint(0, 2)),
+        }
+        for dp_id, code in enumerate(rng.sample(CODES, rng.randint(0, 5)), start=1)
+    }
+    return device
+
+
+def make_descriptions(rng):
+    return [
+        EntityDescription(key=rng.choice(CODES + ["unknown"]))
+        for _ in range(rng.randint(0, 10))
+    ]
+
+
+def reference_scan(device, platform, descriptions):
+    # Reference: the two passes each platform ran over all its descriptions
+    return [
+        description
+        for first_pass in (True, False)
+        for description in descriptions
+        if XTEntity.supports_description(device, platform, description, first_pass)
+    ]
+
+
+def handled_dpcodes(device):
+    return device.get_preference(XTDevice.XTDevicePreference.HANDLED_DPCODES, {})
+
+
+# 1. The same descriptions are supported and the same DPCodes are registered.
+rng = random.Random(1)
+for index in range(500):
+    seed = rng.random()
+    descriptions = make_descriptions(random.Random(seed))
+    reference_device = make_device(random.Random(seed), index)
+    device = make_device(random.Random(seed), index)
+    for platform in (Platform.SENSOR, Platform.SWITCH, Platform.SENSOR):
+        expected = reference_scan(reference_device, platform, descriptions)
+        actual = list(
+            XTEntityDiscovery.get_supported_descriptions(device, platform, descriptions)
+        )
+        assert actual == expected, (index, platform)
+        assert handled_dpcodes(device) == handled_dpcodes(reference_device)
+
+# 2. The candidate DPCodes follow the reported status.
+device = make_device(random.Random(2), 0)
+device.local_strategy = {1: {"status_code": "code_1", "status_code_alias": ["alias"]}}
+device.status = {"code_1": 0}
+assert device.get_discovery_dpcodes() == {"code_1", "alias"}
+assert "code_2" not in device.get_discovery_dpcodes()
+device.status["code_2"] = 0
+assert "code_2" in device.get_discovery_dpcodes()
+
+# 3. Entities are added as each chunk of devices is discovered, unknown devices skipped.
+devices = {f"device_{index}": f"entity_{index}" for index in range(45)}
+calls = []
+XTEntityDiscovery.add_entities(
+    SimpleNamespace(  # type: ignore[arg-type]
+        device_map=devices, startup_tracer=XTStartupTracer(None)  # type: ignore[arg-type]
+    ),
+    Platform.SENSOR,
+    [*devices, "unknown"],
+    lambda device: [device] * 2,  # type: ignore[arg-type, return-value]
+    lambda entities: calls.append(list(entities)),  # type: ignore[arg-type]
+)
+assert [len(call) for call in calls] == [40, 40, 10]
+assert [entity for call in calls for entity in call] == [
+    f"entity_{index}" for index in range(45) for _ in range(2)
+]
+
+print("OK")
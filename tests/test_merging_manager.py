@@ -0,0 +1,93 @@
+"""merge_devices must not copy whole devices and must only share immutable values.
+
+Standalone: run with an env that has homeassistant installed:
+  python tests/test_merging_manager.py
+"""
+
+import os
+import sys
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from custom_components.xtend_tuya.multi_manager.shared.shared_classes import (
+        XTDevice,
+        XTDeviceFunction,
+        XTDeviceStatusRange,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.merging_manager import (
+        XTMergingManager,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+VALUE_DESCR = '{"unit": "%", "min": 0, "max": 1000, "scale": 1, "step": 1}'
+
+
+def make_device(source, extra_code=None, extra_dp_id=3):
+    d = XTDevice()
+    d.id = "bf0123456789abcdef0123"
+    d.name = "Dimmer"
+    d.source = source
+    d.status = {"bright_value": 10}
+    d.status_range = {
+        "bright_value": XTDeviceStatusRange(
+            code="bright_value", type="Integer", values=VALUE_DESCR, dp_id=2
+        ),
+    }
+    d.function = {
+        "bright_value": XTDeviceFunction(
+            code="bright_value", type="Integer", values=VALUE_DESCR, dp_id=2
+        ),
+    }
+    d.local_strategy = {
+        2: {
+            "status_code": "bright_value",
+            "config_item": {"valueType": "Integer", "valueDesc": VALUE_DESCR},
+        },
+    }
+    if extra_code is not None:
+        d.status[extra_code] = "low"
+        d.status_range[extra_code] = XTDeviceStatusRange(
+            code=extra_code,
+            type="Enum",
+            values='{"range": ["low", "high"]}',
+            dp_id=extra_dp_id,
+        )
+        d.local_strategy[extra_dp_id] = {
+            "status_code": extra_code,
+            "config_item": {
+                "valueType": "Enum",
+                "valueDesc": '{"range": ["low", "high"]}',
+            },
+        }
+    return d
+
+
+# 1. Merging does not deep copy the devices anymore.
+first = make_device("sharing")
+second = make_device("iot", extra_code="mode")
+with mock.patch.object(
+    XTDevice, "__deepcopy__", side_effect=AssertionError("device deep copied")
+):
+    XTMergingManager.merge_devices(first, second)
+assert first.status_range is second.status_range
+assert set(first.status_range) == {"bright_value", "mode"}
+assert first.local_strategy[3]["status_code"] == "mode"
+
+# 2. The merged structure does not share mutable objects with the sources.
+third = make_device("open_api", extra_code="eco", extra_dp_id=4)
+third_status_range = third.status_range
+third_config_item = third.local_strategy[4]["config_item"]
+XTMergingManager.merge_devices(first, third)
+assert first.status_range["eco"] is not third_status_range["eco"]
+assert first.local_strategy[4]["config_item"] is not third_config_item
+first.status_range["eco"].code = "renamed"
+assert third_status_range["eco"].code == "eco"
+
+# 3. Immutable leaves are shared instead of being copied.
+assert first.status_range["eco"].value_descr is third_status_range["eco"].value_descr
+
+print("OK")
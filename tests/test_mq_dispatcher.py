@@ -0,0 +1,102 @@
+"""MQTT messages must be decoded and dispatched off the paho thread, in order per device.
+
+Standalone: run with an env that has homeassistant installed:
+  python tests/test_mq_dispatcher.py
+"""
+
+import base64
+import json
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from Crypto.Cipher import AES
+    from custom_components.xtend_tuya.lib.tuya_iot.openmq import (
+        TuyaMQDispatcher,
+        TuyaOpenMQ,
+    )
+    from custom_components.xtend_tuya.lib.tuya_iot.tuya_enums import AuthType
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+# 1. TuyaOpenMQ hands the payload over and the listeners run on the decode worker.
+password = "0123456789abcdefghijklmnopqrstuv"
+data = {"devId": "bf01", "status": [{"code": "switch_1", "value": True}]}
+plaintext = json.dumps(data).encode("utf8")
+padding = 16 - len(plaintext) % 16
+cipher = AES.new(password[8:24].encode("utf8"), AES.MODE_ECB)
+encrypted = cipher.encrypt(plaintext + bytes([padding]) * padding)
+payload = json.dumps(
+    {"protocol": 4, "t": 1, "data": base64.b64encode(encrypted).decode()}
+).encode("utf8")
+
+mq = TuyaOpenMQ(SimpleNamespace(auth_type=AuthType.SMART_HOME))  # type: ignore[arg-type]
+received = []
+mq.add_message_listener(
+    lambda msg: received.append((msg, threading.current_thread().name))
+)
+mq.dispatcher.start()
+user_data = {"mqConfig": SimpleNamespace(password=password)}
+mq._on_message(None, user_data, SimpleNamespace(payload=payload))  # type: ignore[arg-type]
+mq._on_message(None, user_data, SimpleNamespace(payload=b"not json"))  # type: ignore[arg-type]
+wait_for(lambda: mq.dispatcher.get_statistics()["decode_time"]["count"] == 2)
+assert received == [({"protocol": 4, "t": 1, "data": data}, "IOT MQTT decode")]
+statistics = mq.dispatcher.get_statistics()
+assert statistics["received"] == 2 and statistics["decode_failures"] == 1
+assert statistics["dispatch_time"]["count"] == 1
+mq.dispatcher.stop()
+
+# 2. When the workers fall behind, messages are dropped instead of blocking the caller.
+release = threading.Event()
+dispatcher = TuyaMQDispatcher(
+    "TEST", lambda payload, _: json.loads(payload), lambda _: release.wait(), 2
+)
+dispatcher.start()
+accepted = [dispatcher.submit(b'{"data": {}}', None) for _ in range(10)]
+assert not all(accepted)
+statistics = dispatcher.get_statistics()
+assert statistics["dropped"] == accepted.count(False)
+assert statistics["max_queue_depth"] == 2
+release.set()
+dispatcher.stop()
+
+# 3. With several lanes, each device keeps the order of its messages.
+dispatched: dict[str, list[int]] = {}
+lock = threading.Lock()
+
+
+def record(msg):
+    time.sleep(0.0005 if msg["data"]["devId"] == "slow" else 0)
+    with lock:
+        dispatched.setdefault(msg["data"]["devId"], []).append(msg["data"]["seq"])
+
+
+dispatcher = TuyaMQDispatcher(
+    "TEST", lambda payload, _: json.loads(payload), record, 1000, lanes=3
+)
+dispatcher.start()
+device_ids = ["slow", "bf01", "bf02", "bf03", "bf04"]
+for seq in range(400):
+    dev_id = device_ids[seq % len(device_ids)]
+    msg = {"data": {"devId": dev_id, "seq": seq}}
+    assert dispatcher.submit(json.dumps(msg).encode(), None)
+wait_for(lambda: sum(len(seqs) for seqs in dispatched.values()) == 400)
+for seqs in dispatched.values():
+    assert seqs == sorted(seqs)
+dispatcher.stop()
+
+print("OK")
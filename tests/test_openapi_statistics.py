@@ -0,0 +1,111 @@
+"""TuyaOpenAPI must only serialise its debug traces when they are emitted and record endpoint statistics.
+
+Standalone: run with an env that has homeassistant installed:
+  python tests/test_openapi_statistics.py
+"""
+
+import json
+import logging
+import os
+import sys
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from custom_components.xtend_tuya.const import LOGGER
+    from custom_components.xtend_tuya.lib.tuya_iot import openapi
+    from custom_components.xtend_tuya.lib.tuya_iot.openapi import (
+        TuyaOpenAPI,
+        TuyaTokenInfo,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+
+class Response:
+    def __init__(self, payload: dict | None):
+        self.payload = payload
+        self.content = b"x" * 10 if payload is None else json.dumps(payload).encode()
+
+    def json(self):
+        if self.payload is None:
+            raise ValueError("not json")
+        return self.payload
+
+
+class Session:
+    def __init__(self):
+        self.responses: list[Response] = []
+
+    def request(self, method, url, params=None, json=None, headers=None):
+        return self.responses.pop(0)
+
+
+api = TuyaOpenAPI("https://openapi.tuyaeu.com", "access_id", "secret", TuyaTokenInfo())
+api.token_info = TuyaTokenInfo(
+    {
+        "success": True,
+        "t": int(time.time() * 1000),
+        "result": {"access_token": "token", "expire": 7200},
+    }
+)
+session = Session()
+api.session = session  # type: ignore[assignment]
+
+# 1. Without debug logging, requests and responses are not serialised.
+LOGGER.setLevel(logging.INFO)
+session.responses.append(Response({"success": True, "result": {"id": 1}}))
+with mock.patch.object(openapi.json, "dumps", wraps=json.dumps) as dumps:
+    assert api.get("/v1.0/devices/bf0123456789abcdef0123") == {
+        "success": True,
+        "result": {"id": 1},
+    }
+    # The signature serialises the body, only once and without indentation
+    assert all("indent" not in call.kwargs for call in dumps.call_args_list)
+    LOGGER.setLevel(logging.DEBUG)
+    session.responses.append(Response({"success": True, "result": {"id": 1}}))
+    api.get("/v1.0/devices/bf0123456789abcdef0123")
+    assert any("indent" in call.kwargs for call in dumps.call_args_list)
+LOGGER.setLevel(logging.NOTSET)
+
+# 2. Statistics are grouped by endpoint, ids being replaced.
+for index in range(20):
+    session.responses.append(
+        Response(
+            {"success": True, "result": {}}
+            if index % 4
+            else {"success": False, "code": 1106, "msg": "permission deny"}
+        )
+    )
+    api.post(f"/v1.0/devices/bf{index:020d}/commands", {"commands": []})
+session.responses.append(Response(None))
+try:
+    api.get("/v1.0/users/ay1622424524456Qzgh/devices")
+except Exception:
+    pass
+else:
+    raise AssertionError("invalid json accepted")
+statistics = api.get_statistics()
+assert set(statistics) == {
+    "GET /v1.0/devices/{id}",
+    "POST /v1.0/devices/{id}/commands",
+    "GET /v1.0/users/{id}/devices",
+}
+commands = statistics["POST /v1.0/devices/{id}/commands"]
+assert commands["count"] == 20
+assert commands["error_codes"] == {"1106": 5}
+assert commands["response_bytes"] > 0
+assert 0 <= commands["p50_ms"] <= commands["p95_ms"]
+assert statistics["GET /v1.0/users/{id}/devices"]["error_codes"] == {"invalid_json": 1}
+
+# 3. Percentiles use the nearest rank of the recent latencies.
+endpoint_statistics = openapi.TuyaOpenAPIEndpointStatistics()
+for latency in range(1, 101):
+    endpoint_statistics.add(latency / 1000, 0, None)
+assert endpoint_statistics.as_dict()["p50_ms"] == 50
+assert endpoint_statistics.as_dict()["p95_ms"] == 95
+
+print("OK")
@@ -0,0 +1,183 @@
+"""The registry sync must leave the device registry as the per-device setup loop did, writing only what differs.
+
+Standalone: run with an env that has homeassistant installed:
+  python tests/test_registry_sync.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from homeassistant.config_entries import ConfigEntries, ConfigEntry
+    from homeassistant.core import HomeAssistant
+    from homeassistant.helpers import device_registry as dr, entity_registry as er
+    from homeassistant.helpers.device_registry import DeviceEntryDisabler
+    from custom_components.xtend_tuya.const import DOMAIN, DOMAIN_ORIG
+    from custom_components.xtend_tuya.multi_manager.shared.registry_sync import (
+        XTRegistrySync,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+XT_ENTRY_ID = "xt_entry"
+TUYA_ENTRY_ID = "tuya_entry"
+
+
+def make_config_entry(domain: str, entry_id: str) -> ConfigEntry:
+    return ConfigEntry(
+        domain=domain,
+        entry_id=entry_id,
+        title=domain,
+        data={},
+        options={},
+        source="user",
+        version=1,
+        minor_version=1,
+        unique_id=None,
+        discovery_keys={},  # type: ignore[arg-type]
+        subentries_data=None,
+    )
+
+
+def make_devices():
+    return [
+        SimpleNamespace(id=f"bf{index:020d}", name=f"Device {index}", product_name="P")
+        for index in range(8)
+    ]
+
+
+async def make_hass(config_dir: str) -> HomeAssistant:
+    hass = HomeAssistant(config_dir)
+    hass.config_entries = ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    await dr.async_load(hass)
+    await er.async_load(hass)
+    for domain, entry_id in ((DOMAIN, XT_ENTRY_ID), (DOMAIN_ORIG, TUYA_ENTRY_ID)):
+        entry = make_config_entry(domain, entry_id)
+        hass.config_entries._entries[entry.entry_id] = entry
+    device_registry = dr.async_get(hass)
+    devices = make_devices()
+    # 0: up to date, 1: renamed in Tuya, 2: disabled by the integration,
+    # 3: only known to the Tuya integration, 4: disabled by the user, 5-7: new
+    for index, device in enumerate(devices[:5]):
+        in_tuya = index == 3
+        device_entry = device_registry.async_get_or_create(
+            config_entry_id=TUYA_ENTRY_ID if in_tuya else XT_ENTRY_ID,
+            identifiers={(DOMAIN_ORIG if in_tuya else DOMAIN, device.id)},
+            manufacturer="Tuya",
+            name="Old name" if index == 1 else device.name,
+            model=f"{device.product_name} (unsupported)",
+        )
+        if index in (2, 4):
+            device_registry.async_update_device(
+                device_entry.id,
+                disabled_by=(
+                    DeviceEntryDisabler.INTEGRATION
+                    if index == 2
+                    else DeviceEntryDisabler.USER
+                ),
+            )
+    return hass
+
+
+def reference_sync(hass: HomeAssistant, devices) -> None:
+    # Reference: the per-device loop async_setup_entry ran before the sync stage
+    device_registry = dr.async_get(hass)
+    for device in devices:
+        identifiers = {(DOMAIN, device.id)}
+        if device_registry.async_get_device({(DOMAIN_ORIG, device.id)}) is not None:
+            identifiers.add((DOMAIN_ORIG, device.id))
+        device_entry = device_registry.async_get_or_create(
+            config_entry_id=XT_ENTRY_ID,
+            identifiers=identifiers,
+            manufacturer="Tuya",
+            name=device.name,
+            model=f"{device.product_name} (unsupported)",
+        )
+        if (
+            device_entry.disabled_by is not None
+            and device_entry.disabled_by != DeviceEntryDisabler.USER
+        ):
+            device_registry.async_update_device(device_entry.id, disabled_by=None)
+
+
+def snapshot(hass: HomeAssistant):
+    return sorted(
+        (
+            sorted(entry.identifiers),
+            sorted(entry.config_entries),
+            entry.primary_config_entry,
+            entry.manufacturer,
+            entry.name,
+            entry.model,
+            entry.disabled_by,
+        )
+        for entry in dr.async_get(hass).devices.values()
+    )
+
+
+def count_updates(hass: HomeAssistant) -> list:
+    updates = []
+    hass.bus.async_listen(dr.EVENT_DEVICE_REGISTRY_UPDATED, updates.append)
+    return updates
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as reference_dir:
+        with tempfile.TemporaryDirectory() as config_dir:
+            reference_hass = await make_hass(reference_dir)
+            hass = await make_hass(config_dir)
+            devices = make_devices()
+            multi_manager = SimpleNamespace(
+                get_domain_identifiers_of_device=lambda device_id: [DOMAIN]
+            )
+            registry_sync = XTRegistrySync(hass, multi_manager)  # type: ignore[arg-type]
+
+            # 1. The registry ends up as with the per-device loop.
+            reference_sync(reference_hass, devices)
+            registry_sync.async_build_index()
+            updates = count_updates(hass)
+            registry_sync.async_sync_devices(XT_ENTRY_ID, devices)
+            await hass.async_block_till_done()
+            assert snapshot(hass) == snapshot(reference_hass)
+
+            # 2. Only the devices that differ are written, and nothing once in sync.
+            written = {update.data["device_id"] for update in updates}
+            unchanged = registry_sync.get_device_entry(devices[0].id)
+            assert unchanged is not None and unchanged.id not in written
+            assert len(written) == 6, len(written)
+            updates.clear()
+            registry_sync.async_sync_devices(XT_ENTRY_ID, devices)
+            await hass.async_block_till_done()
+            assert updates == []
+
+            # 3. The index follows the registry and the name sync only writes changes.
+            devices[0].name = "Renamed"
+            registry_sync.sync_device_name(devices[0])
+            # add_job schedules the update thread-safely, let the loop pick it up
+            await asyncio.sleep(0)
+            await hass.async_block_till_done()
+            device_entry = registry_sync.get_device_entry(devices[0].id)
+            assert device_entry is not None and device_entry.name == "Renamed"
+            updates.clear()
+            registry_sync.sync_device_name(devices[0])
+            await asyncio.sleep(0)
+            await hass.async_block_till_done()
+            assert updates == []
+            dr.async_get(hass).async_remove_device(device_entry.id)
+            await hass.async_block_till_done()
+            assert registry_sync.get_device_entry(devices[0].id) is None
+
+            registry_sync.async_stop()
+            await hass.async_stop(force=True)
+            await reference_hass.async_stop(force=True)
+
+
+asyncio.run(main())
+print("OK")
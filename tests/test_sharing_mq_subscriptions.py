@@ -0,0 +1,132 @@
+"""The sharing MQ must subscribe in batched SUBSCRIBE packets and only (un)subscribe the device delta.
+
+Standalone: run with an env that has homeassistant installed:
+  python tests/test_sharing_mq_subscriptions.py
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from custom_components.xtend_tuya.const import (
+        XT_SHARING_MQTT_SUBSCRIBE_BATCH_SIZE,
+    )
+    from custom_components.xtend_tuya.multi_manager.managers.tuya_sharing.xt_tuya_sharing_mq import (
+        XTSharingMQ,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+
+class FakeClient:
+    def __init__(self):
+        self.subscribes = []
+        self.unsubscribes = []
+        self.next_mid = 0
+
+    def subscribe(self, topic, qos=0):
+        self.next_mid += 1
+        self.subscribes.append((self.next_mid, topic))
+        return 0, self.next_mid
+
+    def unsubscribe(self, topics):
+        self.unsubscribes.append(topics)
+        return 0, None
+
+
+def make_devices(start, end):
+    return [SimpleNamespace(id=f"bf{index:04d}") for index in range(start, end)]
+
+
+def acknowledge(mq, client, rejected=()):
+    for mid, topics in client.subscribes:
+        if isinstance(topics, list):
+            mq._on_subscribe(
+                client,
+                None,
+                mid,
+                [0x80 if topic in rejected else 0 for topic, _ in topics],
+            )
+    client.subscribes.clear()
+
+
+reports = []
+manager = SimpleNamespace(
+    multi_manager=SimpleNamespace(
+        device_watcher=SimpleNamespace(
+            report_message=lambda *args, **kwargs: reports.append(args)
+        )
+    )
+)
+mq = XTSharingMQ(None, ["home1"], make_devices(0, 100), manager)  # type: ignore[arg-type]
+mq.mq_config = SimpleNamespace(
+    owner_topic="smart/mb/in/{ownerId}", dev_topic="smart/device/in/{devId}"
+)
+client = FakeClient()
+mq.client = client  # type: ignore[assignment]
+
+# 1. On connection the 200 device topics go out in batched SUBSCRIBE packets.
+mq._on_connect(client, None, {}, 0)  # type: ignore[arg-type]
+assert client.subscribes[0][1] == "smart/mb/in/home1"
+device_packets = [topics for _, topics in client.subscribes[1:]]
+assert len(device_packets) == 200 // XT_SHARING_MQTT_SUBSCRIBE_BATCH_SIZE
+assert all(
+    len(topics) <= XT_SHARING_MQTT_SUBSCRIBE_BATCH_SIZE for topics in device_packets
+)
+assert {topic for topics in device_packets for topic, _ in topics} == {
+    topic for device in mq.device for topic in mq.get_device_topics(device.id)
+}
+assert mq.get_statistics()["pending_topics"] == 200
+
+# 2. The acknowledged topics are tracked, a refused topic is reported.
+refused_topic = mq.get_device_topics("bf0042")[0]
+acknowledge(mq, client, rejected={refused_topic})
+statistics = mq.get_statistics()
+assert (statistics["subscribed_topics"], statistics["pending_topics"]) == (199, 0)
+assert statistics["rejected_topics"] == 1
+assert refused_topic in str(reports[-1])
+
+# 3. Only the delta is (un)subscribed when the devices change, the refused
+# topic is tried again.
+mq.update_devices(make_devices(2, 103))
+assert client.unsubscribes == [
+    mq.get_device_topics("bf0000") + mq.get_device_topics("bf0001")
+]
+assert len(client.subscribes) == 1
+assert sorted(topic for topic, _ in client.subscribes[0][1]) == sorted(
+    [refused_topic]
+    + mq.get_device_topics("bf0100")
+    + mq.get_device_topics("bf0101")
+    + mq.get_device_topics("bf0102")
+)
+acknowledge(mq, client)
+assert mq.get_statistics()["subscribed_topics"] == 202
+
+# 4. Nothing changed: nothing is sent.
+client.unsubscribes.clear()
+mq.update_devices(make_devices(2, 103))
+assert (client.subscribes, client.unsubscribes) == ([], [])
+
+# 5. A single device added and removed.
+mq.subscribe_device("bf0200", SimpleNamespace(id="bf0200"))
+mq.subscribe_device("bf0200", SimpleNamespace(id="bf0200"))
+assert len(client.subscribes) == 1
+assert sum(device.id == "bf0200" for device in mq.device) == 1
+acknowledge(mq, client)
+mq.un_subscribe_device("bf0200", False)
+assert client.unsubscribes == [mq.get_device_topics("bf0200")]
+assert all(device.id != "bf0200" for device in mq.device)
+assert mq.get_statistics()["subscribed_topics"] == 202
+
+# 6. A new connection starts over with every device.
+new_client = FakeClient()
+mq.client = new_client  # type: ignore[assignment]
+mq._on_connect(new_client, None, {}, 0)  # type: ignore[arg-type]
+assert sum(len(topics) for _, topics in new_client.subscribes[1:]) == 202
+assert mq.get_statistics()["subscribed_topics"] == 0
+
+print("OK")
@@ -0,0 +1,129 @@
+"""The startup tracer must nest and merge spans, across tasks, and keep the last timelines.
+
+Standalone: run with an env that has homeassistant installed:
+  python tests/test_startup_tracer.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from homeassistant.core import HomeAssistant
+    from custom_components.xtend_tuya.multi_manager.shared.debug.profiler import (
+        XTSamplingProfiler,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.debug.startup_tracer import (
+        XTStartupTracer,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.storage.storage_manager import (
+        XTStorageManager,
+        XTStorageStructure,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+
+def find_span(spans, *path):
+    for span in spans:
+        if span["name"] == path[0]:
+            return span if len(path) == 1 else find_span(span["children"], *path[1:])
+    raise AssertionError(path)
+
+
+def busy_wait_for_profiler(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        config_entry = SimpleNamespace(entry_id="entry", title="Tuya")
+        multi_manager = SimpleNamespace(
+            hass=hass, config_entry=config_entry, device_map={"bf1": None}
+        )
+        multi_manager.storage_manager = XTStorageManager(
+            hass, config_entry, multi_manager  # type: ignore[arg-type]
+        )
+        tracer = XTStartupTracer(multi_manager)  # type: ignore[arg-type]
+
+        # 1. Spans are no-ops until the tracer is started.
+        with tracer.span("ignored"):
+            pass
+        assert await tracer.async_finish() is None
+
+        # 2. Spans nest, repeated spans are merged and counted, tasks inherit their parent.
+        async def update_account(name: str) -> None:
+            with tracer.span(f"update_device_cache:{name}"):
+                await asyncio.sleep(0)
+                for _ in range(3):
+                    with tracer.span("device"):
+                        pass
+
+        tracer.start()
+        with tracer.span("setup"):
+            await asyncio.gather(update_account("a"), update_account("b"))
+        # Executor threads do not inherit the span, they are recorded at the top
+        thread = threading.Thread(target=lambda: tracer.span("thread").__enter__())
+        thread.start()
+        thread.join()
+        timeline = await tracer.async_finish()
+        assert timeline is not None and not tracer.is_tracing
+        assert timeline["device_count"] == 1
+        assert [span["name"] for span in timeline["spans"]] == ["setup", "thread"]
+        for name in ("a", "b"):
+            account = find_span(
+                timeline["spans"], "setup", f"update_device_cache:{name}"
+            )
+            device = find_span(account["children"], "device")
+            assert account["count"] == 1 and device["count"] == 3
+            assert device["start_ms"] >= account["start_ms"]
+        assert "profile" not in timeline
+
+        # 3. The profiler samples the traced thread and dumps the collapsed stacks.
+        tracer.start(profile=True)
+        with tracer.span("busy"):
+            busy_wait_for_profiler(0.2)
+        timeline = await tracer.async_finish()
+        assert timeline is not None
+        profile = timeline["profile"]
+        assert profile["samples"] > 0
+        assert "busy_wait_for_profiler" in profile["top_stacks"][0]["stack"]
+        with open(profile["collapsed_stacks_file"], encoding="utf-8") as file:
+            assert "busy_wait_for_profiler" in file.read()
+
+        # 4. Only the last timelines are kept and they survive a store round trip.
+        for _ in range(XTStartupTracer.MAX_TIMELINES + 2):
+            tracer.start()
+            await tracer.async_finish()
+        storage_manager = multi_manager.storage_manager
+        timelines = storage_manager.get_startup_timelines()
+        assert len(timelines) == XTStartupTracer.MAX_TIMELINES
+        stored = XTStorageStructure.from_dict(storage_manager._store_data.as_dict())
+        assert stored.startup_timelines == timelines
+        reloaded = XTStorageManager(
+            hass, config_entry, multi_manager  # type: ignore[arg-type]
+        )
+        assert await reloaded.load_store()
+        assert reloaded.get_startup_timelines() == timelines
+
+        await hass.async_stop(force=True)
+
+
+# 5. The sampling profiler can be stopped before it took any sample.
+profiler = XTSamplingProfiler(threading.get_ident(), interval=10)
+profiler.start()
+profiler.stop()
+assert profiler.sample_count == 0 and profiler.get_top_stacks(5) == []
+
+asyncio.run(main())
+print("OK")
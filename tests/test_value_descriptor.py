@@ -0,0 +1,145 @@
+"""Value descriptors must be parsed once, shared, and only serialized on demand.
+
+Standalone: run with an env that has homeassistant installed:
+  python tests/test_value_descriptor.py
+"""
+
+import copy
+import json
+import os
+import sys
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from custom_components.xtend_tuya.multi_manager.shared.shared_classes import (
+        XTDevice,
+        XTDeviceFunction,
+        XTDeviceStatusRange,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.cloud_fix import (
+        CloudFixes,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.value_descriptor import (
+        XTValueDescriptor,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+import custom_components.xtend_tuya.multi_manager.shared.value_descriptor as vd
+
+VALUE_DESCR = '{"unit": "%", "min": 0, "max": 1000, "scale": 1, "step": 1}'
+ENUM_DESCR = '{"range": ["low", "high"]}'
+
+
+def make_device(i):
+    d = XTDevice()
+    d.id = f"bf{i:020x}"
+    d.name = f"Dimmer {i}"
+    d.status = {"bright_value": 10, "mode": "low"}
+    d.status_range = {
+        "bright_value": XTDeviceStatusRange(
+            code="bright_value", type="Integer", values=VALUE_DESCR, dp_id=2
+        ),
+        "mode": XTDeviceStatusRange(
+            code="mode", type="Enum", values=ENUM_DESCR, dp_id=3
+        ),
+    }
+    d.function = {
+        "bright_value": XTDeviceFunction(
+            code="bright_value", type="Integer", values=VALUE_DESCR, dp_id=2
+        ),
+    }
+    d.local_strategy = {
+        2: {
+            "status_code": "bright_value",
+            "config_item": {"valueType": "Integer", "valueDesc": VALUE_DESCR},
+        },
+        3: {
+            "status_code": "mode",
+            "config_item": {"valueType": "Enum", "valueDesc": ENUM_DESCR},
+        },
+    }
+    return d
+
+
+# 1. Same JSON text, same descriptor, parsed once.
+XTValueDescriptor.clear_interned()
+a = XTValueDescriptor.from_json(VALUE_DESCR)
+assert XTValueDescriptor.from_json(VALUE_DESCR) is a
+assert a["max"] == 1000 and a.is_dict and a.error_value is None
+assert copy.deepcopy(a) is a
+
+# 2. to_dict() hands out a private copy, the shared parse is left untouched.
+mutable = a.to_dict()
+mutable["max"] = 5
+assert a["max"] == 1000
+
+# 3. Descriptors built from dicts only serialize when the JSON text is read.
+status_range = XTDeviceStatusRange(code="x", values=VALUE_DESCR)
+with mock.patch.object(vd.json, "dumps", wraps=json.dumps) as dumps:
+    status_range.value_descr = status_range.value_descr.updated({"min": 1})
+    assert dumps.call_count == 0
+    assert json.loads(status_range.values) == {"min": 1}
+    assert dumps.call_count == 1
+
+# 4. Invalid descriptors are reported the way CloudFixes expects.
+assert CloudFixes.get_value_descr_dict("not json") == (None, "not json")
+assert CloudFixes.get_value_descr_dict('{"ErrorValue1": "bad"}') == (None, "bad")
+
+# 5. Running the cloud fixes on many identical devices parses each distinct descriptor once.
+XTValueDescriptor.clear_interned()
+devices = [make_device(i) for i in range(50)]
+with mock.patch.object(vd.json, "loads", wraps=json.loads) as loads:
+    for device in devices:
+        CloudFixes.apply_fixes(device)
+        CloudFixes.apply_fixes(device)
+    parsed_texts = [call.args[0] for call in loads.call_args_list]
+assert len(parsed_texts) == len(set(parsed_texts)), parsed_texts
+assert devices[0].status_range["bright_value"].value_descr is (
+    devices[49].status_range["bright_value"].value_descr
+)
+assert (
+    json.loads(devices[0].local_strategy[2]["config_item"]["valueDesc"])["max"] == 1000
+)
+
+# 6. Equal descriptors hash the same whatever their key order or spacing.
+XTValueDescriptor.clear_interned()
+compact = XTValueDescriptor.from_json('{"min":0,"max":10}')
+spaced = XTValueDescriptor.from_json('{"max": 10, "min": 0}')
+from_dict = XTValueDescriptor.from_dict({"max": 10, "min": 0})
+assert compact == spaced == from_dict
+assert len({compact, spaced, from_dict}) == 1
+assert XTValueDescriptor.from_json("not json") != XTValueDescriptor.from_json("{}")
+
+# 7. parsed is a private copy, the shared parse is left untouched.
+shared_range = XTValueDescriptor.from_json(ENUM_DESCR)
+shared_range.parsed["range"].append("boost")
+assert shared_range["range"] == ["low", "high"]
+
+# 8. The least recently used descriptors are evicted first.
+XTValueDescriptor.clear_interned()
+with mock.patch.object(XTValueDescriptor, "MAX_INTERNED", 2):
+    first = XTValueDescriptor.from_json('{"a": 1}')
+    second = XTValueDescriptor.from_json('{"b": 1}')
+    assert XTValueDescriptor.from_json('{"a": 1}') is first
+    XTValueDescriptor.from_json('{"c": 1}')
+    assert XTValueDescriptor.from_json('{"a": 1}') is first
+    assert XTValueDescriptor.from_json('{"b": 1}') is not second
+XTValueDescriptor.clear_interned()
+
+# 9. values is a constructor argument, positional or not, with a default, and
+# compared through the descriptor.
+assert XTDeviceStatusRange(code="mode").values == "{}"
+positional = XTDeviceStatusRange("mode", None, ENUM_DESCR, 3)
+assert (positional.values, positional.dp_id) == (ENUM_DESCR, 3)
+assert positional == XTDeviceStatusRange(
+    code="mode", values={"range": ["low", "high"]}, dp_id=3
+)
+assert positional != XTDeviceStatusRange(code="mode", values="{}", dp_id=3)
+positional.values = {"range": ["low"]}
+assert positional.value_descr["range"] == ["low"]
+
+print("OK")
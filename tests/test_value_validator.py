@@ -0,0 +1,138 @@
+"""Reported values must be checked against validators built once per status range.
+
+Standalone: run with an env that has homeassistant installed:
+  python tests/test_value_validator.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from homeassistant.core import HomeAssistant
+    from custom_components.xtend_tuya.multi_manager.multi_manager import (
+        MultiManager,
+    )
+    from custom_components.xtend_tuya.multi_manager.managers.tuya_iot.xt_tuya_iot_manager import (
+        XTIOTDeviceManager,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.shared_classes import (
+        XTDevice,
+        XTDeviceMap,
+        XTDeviceStatusRange,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.value_validator import (
+        XTValueValidator,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+
+def make_device():
+    device = XTDevice()
+    device.id = "bf1"
+    device.name = "Heater"
+    device.category = "qn"
+    device.status = {"mode": "eco", "temp_set": 20, "fault": 0, "switch": False}
+    device.local_strategy = {
+        1: {"status_code": "switch", "status_code_alias": [], "config_item": {}},
+        2: {"status_code": "mode", "status_code_alias": [], "config_item": {}},
+        3: {"status_code": "temp_set", "status_code_alias": [], "config_item": {}},
+        4: {"status_code": "fault", "status_code_alias": [], "config_item": {}},
+    }
+    device.status_range = {
+        "switch": XTDeviceStatusRange(code="switch", type="Boolean", values="{}"),
+        "mode": XTDeviceStatusRange(
+            code="mode", type="Enum", values='{"range": ["eco", "comfort"]}'
+        ),
+        "temp_set": XTDeviceStatusRange(
+            code="temp_set", type="Integer", values='{"min": 5, "max": 35}'
+        ),
+        "fault": XTDeviceStatusRange(
+            code="fault", type="Bitmap", values='{"label": ["e1", "e2", "e3"]}'
+        ),
+    }
+    return device
+
+
+device = make_device()
+
+# 1. Enum values are looked up in the range, numbers checked against the
+# bounds, bitmaps against the mask of their labels.
+mode = device.status_range["mode"].validator
+assert mode.allowed_values == frozenset({"eco", "comfort"})
+assert mode.is_valid("comfort") and not mode.is_valid("boost")
+assert not mode.is_valid(["eco"]) and not mode.is_valid(None)
+temp_set = device.status_range["temp_set"].validator
+assert temp_set.is_valid(5) and temp_set.is_valid(35) and temp_set.is_valid(20.5)
+assert not temp_set.is_valid(36) and not temp_set.is_valid("20")
+assert not temp_set.is_valid(True)
+fault = device.status_range["fault"].validator
+assert fault.is_valid(0) and fault.is_valid(0b101) and not fault.is_valid(0b1000)
+assert device.status_range["switch"].validator.is_valid("anything")
+# Only the invalid Enum values are dropped
+assert [mode.drop_invalid, temp_set.drop_invalid, fault.drop_invalid] == [
+    True,
+    False,
+    False,
+]
+
+# 2. The validators are built once, shared by the ranges with the same values
+# and rebuilt when the range is fixed.
+assert device.status_range["mode"].validator is mode
+assert make_device().status_range["mode"].validator is mode
+device.status_range["mode"].values = '{"range": ["eco", "comfort", "boost"]}'
+assert device.status_range["mode"].validator.is_valid("boost")
+device.status_range["mode"].values = '{"range": ["eco", "comfort"]}'
+assert device.status_range["mode"].validator is mode
+device.status_range["mode"].type = "String"
+assert device.status_range["mode"].validator.is_valid("boost")
+device.status_range["mode"].type = "Enum"
+assert XTValueValidator.get("Enum", device.status_range["mode"].value_descr) is mode
+
+
+async def make_multi_manager():
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        config_entry = SimpleNamespace(entry_id="test", data={}, options={})
+        return MultiManager(hass, config_entry)  # type: ignore[arg-type]
+
+
+multi_manager = asyncio.run(make_multi_manager())
+device = make_device()
+multi_manager.master_device_map[device.id] = device
+manager = XTIOTDeviceManager.__new__(XTIOTDeviceManager)
+manager.multi_manager = multi_manager
+manager.device_map = XTDeviceMap({device.id: device})
+manager.device_listeners = set()
+manager.mq = SimpleNamespace(remove_message_listener=lambda listener: None)
+
+# 3. The IoT report path drops the invalid Enum values, keeps the other
+# values outside of their range and counts both per device.
+manager._on_device_report(
+    device.id,
+    [
+        {"code": "mode", "value": "boost"},
+        {"code": "temp_set", "value": 99},
+        {"code": "fault", "value": 0b1000},
+        {"code": "switch", "value": True},
+    ],
+)
+assert device.status == {"mode": "eco", "temp_set": 99, "fault": 8, "switch": True}
+manager._on_device_report(device.id, [{"code": "mode", "value": "comfort"}])
+assert device.status["mode"] == "comfort"
+assert multi_manager.rejected_values.get_device_statistics(device.id) == {
+    "dropped": {"mode": 1},
+    "out_of_range": {"temp_set": 1, "fault": 1},
+}
+assert multi_manager.rejected_values.get_statistics() == {
+    device.id: {"dropped": 1, "out_of_range": 2}
+}
+assert multi_manager.rejected_values.get_device_statistics("unknown") == {}
+
+print("OK")
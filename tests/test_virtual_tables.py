@@ -0,0 +1,122 @@
+"""The compiled virtual state/function tables must match a scan of the registered descriptors.
+
+Standalone: run with an env that has homeassistant installed:
+  python tests/test_virtual_tables.py
+"""
+
+import os
+import random
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from custom_components.xtend_tuya.const import VirtualFunctions, VirtualStates
+    from custom_components.xtend_tuya.multi_manager.shared.multi_virtual_function_handler import (
+        XTVirtualFunctionHandler,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.multi_virtual_state_handler import (
+        XTVirtualStateHandler,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+CATEGORIES = ["cz", "dlq", "kg", "wk"]
+CODES = ["add_ele", "cur_power", "switch_1", "reset_add_ele", "temp_current"]
+
+
+def random_flags(rng, flags):
+    value = 0
+    for flag in flags:
+        if rng.random() < 0.3:
+            value |= flag.value
+    return value or None
+
+
+def make_descriptors(rng):
+    descriptors = {}
+    for category in CATEGORIES:
+        descriptions = []
+        for code in rng.sample(CODES, rng.randint(1, len(CODES))):
+            descriptions.append(
+                SimpleNamespace(
+                    key=code,
+                    virtual_state=random_flags(rng, VirtualStates),
+                    vs_copy_to_state=[code + "_copy"],
+                    vs_copy_delta_to_state=[],
+                    virtual_function=random_flags(rng, VirtualFunctions),
+                    vf_reset_state=rng.sample(CODES, rng.randint(0, 2)),
+                    vf_history_import_dpcodes=None,
+                )
+            )
+        descriptors[category] = tuple(descriptions)
+    return descriptors
+
+
+def scan_virtual_states(all_descriptors, category):
+    # Reference: the scan done on every report before the tables
+    found = []
+    for virtual_state in VirtualStates:
+        for descriptors in all_descriptors:
+            for description in descriptors.get(category, ()):
+                if description.virtual_state and (
+                    description.virtual_state & virtual_state.value
+                ):
+                    found.append((description.key, virtual_state.name))
+    return found
+
+
+def scan_virtual_function(all_descriptors, category, code):
+    # Reference: the scan done on every command before the tables
+    for virtual_function in VirtualFunctions:
+        for descriptors in all_descriptors:
+            for description in descriptors.get(category, ()):
+                if (
+                    description.virtual_function
+                    and description.virtual_function & virtual_function.value
+                    and (code == description.key or code in description.vf_reset_state)
+                ):
+                    return (description.key, virtual_function.name)
+    return None
+
+
+rng = random.Random(1)
+for _ in range(50):
+    multi_manager = SimpleNamespace(device_map={})
+    state_handler = XTVirtualStateHandler(multi_manager)  # type: ignore[arg-type]
+    function_handler = XTVirtualFunctionHandler(multi_manager)  # type: ignore[arg-type]
+    all_descriptors = [make_descriptors(rng) for _ in range(3)]
+    for index, descriptors in enumerate(all_descriptors):
+        state_handler.register_device_descriptors(f"platform_{index}", descriptors)
+        function_handler.register_device_descriptors(f"platform_{index}", descriptors)
+
+    for category in CATEGORIES + ["unknown"]:
+        expected = scan_virtual_states(all_descriptors, category)
+        virtual_states = state_handler.get_category_virtual_states(category)
+        assert [
+            (virtual_state.key, virtual_state.virtual_state_name)
+            for virtual_state in virtual_states
+        ] == expected
+        code_virtual_states = state_handler.get_category_code_virtual_states(category)
+        for code in CODES:
+            assert [
+                virtual_state.virtual_state_name
+                for virtual_state in code_virtual_states.get(code, ())
+            ] == [name for key, name in expected if key == code]
+            virtual_function = function_handler.get_code_virtual_function(
+                category, code
+            )
+            assert (
+                None
+                if virtual_function is None
+                else (virtual_function.key, virtual_function.virtual_function_name)
+            ) == scan_virtual_function(all_descriptors, category, code)
+
+    # The tables are only rebuilt when descriptors are registered
+    assert state_handler.get_category_virtual_states("cz") is (
+        state_handler.get_category_virtual_states("cz")
+    )
+
+print("OK")
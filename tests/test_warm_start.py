@@ -0,0 +1,239 @@
+"""The device snapshot must restore the merged devices and the reconciliation must only push what changed.
+
+Standalone: run with an env that has homeassistant installed:
+  python tests/test_warm_start.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from homeassistant.core import HomeAssistant
+    from homeassistant.exceptions import HomeAssistantError
+    from custom_components.xtend_tuya.ha_tuya_integration.tuya_integration_imports import (
+        TuyaDPType,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.shared_classes import (
+        XTDevice,
+        XTDeviceFunction,
+        XTDeviceMap,
+        XTDeviceStatusRange,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.storage.storage_manager import (
+        XTStorageManager,
+    )
+    from custom_components.xtend_tuya.multi_manager.shared.warm_start import (
+        XTWarmStart,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+
+def make_device(device_id="bf1", switch=True):
+    device = XTDevice()
+    device.id = device_id
+    device.name = "Plug"
+    device.local_key = "secret"
+    device.category = "cz"
+    device.product_id = "pid"
+    device.online = True
+    device.data_model = {"services": []}
+    device.function = {
+        "switch": XTDeviceFunction(
+            code="switch", type=TuyaDPType.BOOLEAN, values="{}", dp_id=1
+        )
+    }
+    device.status_range = {
+        "cur_power": XTDeviceStatusRange(
+            code="cur_power",
+            type=TuyaDPType.INTEGER,
+            values='{"min": 0, "max": 50000, "scale": 1, "step": 1}',
+            dp_id=19,
+            report_type="sum",
+        )
+    }
+    device.local_strategy = {
+        1: {"status_code": "switch", "config_item": {"valueType": "Boolean"}},
+        19: {"status_code": "cur_power", "value_convert": "default"},
+    }
+    device.status = {"switch": switch, "cur_power": 12.5}
+    return device
+
+
+# 1. A device survives a JSON round trip of the snapshot, secrets are not stored.
+device = make_device()
+raw_device = json.loads(json.dumps(XTWarmStart.serialize_device(device)))
+assert "local_key" not in raw_device["fields"]
+restored = XTWarmStart.restore_device(raw_device)
+assert (restored.id, restored.name, restored.category) == ("bf1", "Plug", "cz")
+assert restored.data_model == device.data_model
+assert restored.function == device.function
+assert restored.status_range == device.status_range
+assert restored.status_range["cur_power"].type is TuyaDPType.INTEGER
+assert restored.local_strategy == device.local_strategy
+assert restored.status == device.status
+assert restored.force_compatibility is True
+
+# 2. The cloud signature only changes with the DPs the entities are created
+# from, not with the status values or the DP definitions.
+signature = XTWarmStart.get_cloud_signature(device)
+assert XTWarmStart.get_cloud_signature(restored) == signature
+assert XTWarmStart.get_cloud_signature(make_device(switch=False)) == signature
+changed = make_device()
+changed.status_range["cur_power"].values = '{"min": 0, "max": 100}'
+changed.local_strategy[19]["value_convert"] = "enum"
+assert XTWarmStart.get_cloud_signature(changed) == signature
+changed = make_device()
+changed.status["countdown"] = 0
+assert XTWarmStart.get_cloud_signature(changed) != signature
+changed = make_device()
+changed.status_range["cur_power"].type = TuyaDPType.ENUM
+assert XTWarmStart.get_cloud_signature(changed) != signature
+changed = make_device()
+changed.local_strategy[19]["status_code"] = "cur_current"
+assert XTWarmStart.get_cloud_signature(changed) != signature
+
+# 3. The restored device adopts the fresh state, keeps what the entities added
+# and takes the place of the fresh device in the device maps.
+warm_device = XTWarmStart.restore_device(raw_device)
+warm_device.status["entity_code"] = "kept"
+warm_device.function["entity_code"] = XTDeviceFunction(code="entity_code")
+warm_device.set_preference(XTDevice.XTDevicePreference.HANDLED_DPCODES, {"x": 1})
+fresh_device = make_device(switch=False)
+fresh_device.status_range["cur_power"].values = '{"min": 0, "max": 100}'
+fresh_status_range = fresh_device.status_range["cur_power"]
+fresh_status = fresh_device.status
+account_device_map = XTDeviceMap({"bf1": fresh_device})
+master_device_map = XTDeviceMap({"bf1": fresh_device})
+
+
+def replace_device_in_device_maps(device, new_device):
+    for device_map in (master_device_map, account_device_map):
+        if device_map.get(device.id) is device:
+            device_map[device.id] = new_device
+
+
+warm_start = XTWarmStart(
+    None,  # type: ignore[arg-type]
+    SimpleNamespace(  # type: ignore[arg-type]
+        replace_device_in_device_maps=replace_device_in_device_maps
+    ),
+)
+update = warm_start.adopt_device(warm_device, fresh_device)
+assert update == (warm_device, ["switch"])
+assert master_device_map["bf1"] is warm_device
+assert account_device_map["bf1"] is warm_device
+assert warm_device.status is fresh_status
+assert warm_device.status["switch"] is False
+assert warm_device.status["entity_code"] == "kept"
+# The fresh definition wins over the snapshot, what the entities added is kept
+assert warm_device.status_range["cur_power"] is fresh_status_range
+assert "entity_code" in warm_device.function and "switch" in warm_device.function
+assert warm_device.get_preference(XTDevice.XTDevicePreference.HANDLED_DPCODES) == {
+    "x": 1
+}
+assert warm_device.local_key == "secret"
+# Nothing changed: nothing to push, a rename or going offline: a full update
+assert warm_start.adopt_device(warm_device, make_device(switch=False)) is None
+offline_device = make_device(switch=False)
+offline_device.online = False
+assert warm_start.adopt_device(warm_device, offline_device) == (warm_device, None)
+
+
+# 4. The commands sent while the restored devices are refreshed are held until
+# the refresh ends, they fail if it failed or took too long.
+warm_start = XTWarmStart(
+    None,  # type: ignore[arg-type]
+    SimpleNamespace(config_entry=SimpleNamespace(title="Tuya")),  # type: ignore[arg-type]
+)
+warm_start.wait_for_devices()
+outcomes = []
+
+
+def send_command(warm_start):
+    try:
+        warm_start.wait_for_devices()
+    except HomeAssistantError:
+        outcomes.append("failed")
+    else:
+        outcomes.append("sent")
+
+
+def hold_command(warm_start):
+    # As async_restore does
+    warm_start.devices_refreshed = False
+    warm_start.devices_ready.clear()
+    thread = threading.Thread(target=send_command, args=(warm_start,))
+    thread.start()
+    time.sleep(0.05)
+    assert thread.is_alive()
+    return thread
+
+
+thread = hold_command(warm_start)
+assert outcomes == []
+warm_start.release_commands(True)
+thread.join(1)
+thread = hold_command(warm_start)
+warm_start.release_commands(False)
+thread.join(1)
+warm_start.devices_ready.clear()
+warm_start.COMMAND_TIMEOUT = 0.05
+send_command(warm_start)
+assert outcomes == ["sent", "failed", "failed"]
+
+
+# 5. The snapshot is kept in its own store, a cold start marker skips it once.
+async def main():
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        config_entry = SimpleNamespace(entry_id="entry", title="Tuya")
+        multi_manager = SimpleNamespace(
+            config_entry=config_entry,
+            master_device_map=XTDeviceMap({"bf1": make_device()}),
+        )
+        multi_manager.device_map = multi_manager.master_device_map
+        multi_manager.storage_manager = XTStorageManager(
+            hass, config_entry, multi_manager  # type: ignore[arg-type]
+        )
+        warm_start = XTWarmStart(hass, multi_manager)  # type: ignore[arg-type]
+        warm_start.update_cloud_signatures()
+        assert await warm_start.async_save()
+        # Written atomically by HA, wait for it like the shutdown does
+        await hass.async_block_till_done()
+
+        multi_manager.master_device_map = XTDeviceMap({})
+        warm_start = XTWarmStart(hass, multi_manager)  # type: ignore[arg-type]
+        XTWarmStart.cold_start_entry_ids.add("entry")
+        assert not await warm_start.async_restore()
+        assert "entry" not in XTWarmStart.cold_start_entry_ids
+        assert await warm_start.async_restore() and warm_start.is_warm_start
+        restored = multi_manager.master_device_map["bf1"]
+        assert restored.device_map is multi_manager.master_device_map
+        assert restored.status == make_device().status
+        assert warm_start.cloud_signatures == {
+            "bf1": XTWarmStart.get_cloud_signature(make_device())
+        }
+
+        # A snapshot from another version is ignored
+        await multi_manager.storage_manager.save_device_snapshot(
+            {"version": XTWarmStart.SNAPSHOT_VERSION + 1, "devices": {}}
+        )
+        assert not await XTWarmStart(
+            hass, multi_manager  # type: ignore[arg-type]
+        ).async_restore()
+
+        await hass.async_stop(force=True)
+
+
+asyncio.run(main())
+print("OK")
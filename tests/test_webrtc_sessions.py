@@ -0,0 +1,149 @@
+"""The SDP answer must be returned as soon as its last candidate arrives, expired sessions dropped from a heap.
+
+Standalone: run with an env that has homeassistant installed:
+  python tests/test_webrtc_sessions.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    # Loads the IPC manager before the WebRTC manager which it imports
+    import custom_components.xtend_tuya.multi_manager.managers.tuya_iot.xt_tuya_iot_manager  # noqa: F401
+    from custom_components.xtend_tuya.multi_manager.managers.tuya_iot.ipc.webrtc.xt_tuya_iot_webrtc_manager import (
+        XTIOTWebRTCManager,
+        XTIOTWebRTCSessionStore,
+    )
+except ImportError as exc:
+    print(f"SKIP: needs an env with homeassistant installed ({exc})")
+    sys.exit(0)
+
+ENDLINE = "\r\n"
+OFFER = "v=0" + ENDLINE + "a=candidate:1 1 udp 1 10.0.0.2 5000 typ host" + ENDLINE
+
+
+class FakeIPCManager:
+    """Answers each offer from another thread, like the IPC MQTT listener."""
+
+    def __init__(self, answer_delay, send_last_candidate=True):
+        self.answer_delay = answer_delay
+        self.send_last_candidate = send_last_candidate
+        self.published = []
+        self.webrtc_manager = None
+        self.mq = SimpleNamespace(
+            mq_config=SimpleNamespace(
+                sink_topic={"ipc": "av/moto/moto_id/u/{device_id}"}
+            )
+        )
+
+    def get_from(self):
+        return "user1"
+
+    def publish_to_ipc_mqtt(self, topic, payload):
+        message = json.loads(payload)
+        self.published.append((topic, message["data"]["header"]["type"]))
+        if message["data"]["header"]["type"] == "offer":
+            session_id = message["data"]["header"]["sessionid"]
+            threading.Thread(target=self.answer, args=(session_id,)).start()
+
+    def answer(self, session_id):
+        time.sleep(self.answer_delay)
+        self.webrtc_manager.set_sdp_answer(session_id, {"sdp": "v=0" + ENDLINE})
+        self.webrtc_manager.add_sdp_answer_candidate(
+            session_id,
+            {"candidate": "a=candidate:2 1 udp 1 10.0.0.3 6000 typ host" + ENDLINE},
+        )
+        if self.send_last_candidate:
+            self.webrtc_manager.add_sdp_answer_candidate(session_id, {"candidate": ""})
+
+
+def make_manager(answer_delay=0.05, send_last_candidate=True):
+    ipc_manager = FakeIPCManager(answer_delay, send_last_candidate)
+    manager = XTIOTWebRTCManager(ipc_manager)  # type: ignore[arg-type]
+    ipc_manager.webrtc_manager = manager
+    return manager, ipc_manager
+
+
+def configure(manager, session_id):
+    manager.set_config(session_id, {"auth": "token", "moto_id": "moto1", "skill": ""})
+
+
+EXPECTED_ANSWER = (
+    "v=0"
+    + ENDLINE
+    + "a=candidate:2 1 udp 1 10.0.0.3 6000 typ host"
+    + ENDLINE
+    + "a=end-of-candidates"
+    + ENDLINE
+)
+
+# 1. The sessions expire through the heap, a session created again under the
+# same ID is not dropped by the stale heap entry.
+store = XTIOTWebRTCSessionStore()
+old_session = store.get_or_create("s1")
+store.get_or_create("s2")
+old_session.valid_until = datetime.now() - timedelta(seconds=1)
+store._expiry_heap[0] = (old_session.valid_until, "s1")
+assert store.get("s1") is None and store.get("s2") is not None
+new_session = store.get_or_create("s1")
+assert new_session is not old_session and len(store) == 2
+assert store.get_or_create("s1") is new_session
+
+# 2. The answer is returned as soon as the last candidate arrives, the end of
+# the offer candidates is sent after it.
+manager, ipc_manager = make_manager()
+configure(manager, "session1")
+start = time.perf_counter()
+answer = manager.get_sdp_answer("bf1", "session1", OFFER, "high")
+assert time.perf_counter() - start < 1
+assert answer == EXPECTED_ANSWER
+assert ipc_manager.published == [
+    ("av/moto/moto1/u/bf1", "offer"),
+    ("av/moto/moto1/u/bf1", "candidate"),
+    ("av/moto/moto1/u/bf1", "candidate"),
+]
+assert manager.get_webrtc_session("session1").final_answer == answer
+
+
+# 3. The event loop variant waits on the session too.
+async def get_answer_async(manager, session_id, wait_for_answers=5):
+    return await manager.async_get_sdp_answer(
+        "bf1", session_id, OFFER, "high", wait_for_answers
+    )
+
+
+manager, ipc_manager = make_manager()
+configure(manager, "session2")
+start = time.perf_counter()
+assert asyncio.run(get_answer_async(manager, "session2")) == EXPECTED_ANSWER
+assert time.perf_counter() - start < 1
+assert len(ipc_manager.published) == 3
+
+# 4. Without the last candidate, both variants give up after the wait with
+# what they received.
+manager, ipc_manager = make_manager(send_last_candidate=False)
+configure(manager, "session3")
+start = time.perf_counter()
+assert manager.get_sdp_answer("bf1", "session3", OFFER, "high", 0.3) == EXPECTED_ANSWER
+assert 0.3 <= time.perf_counter() - start < 1
+configure(manager, "session4")
+start = time.perf_counter()
+assert asyncio.run(get_answer_async(manager, "session4", 0.3)) == EXPECTED_ANSWER
+assert 0.3 <= time.perf_counter() - start < 1
+assert manager.get_webrtc_session("session4")._async_waiters == []
+
+# 5. No configuration: nothing is sent.
+manager, ipc_manager = make_manager()
+manager._get_config_from_cloud = lambda device_id, session_id: None
+assert manager.get_sdp_answer("bf1", "session5", OFFER, "high") is None
+assert ipc_manager.published == []
+
+print("OK")